@@ -0,0 +1,230 @@
+# appdataflowai/actualizacion_masiva.py
+"""
+Actualización masiva desde Excel / CSV por id_registro (vistas *BulkUpdateExcelView).
+
+Antes cada fila hacía un `filter(id_registro=...).first()` y un serializer.save()
+(dos o tres consultas por fila). Aquí, por cada trozo del archivo
+(lectura_archivos.leer_por_trozos):
+
+- las instancias se traen en una consulta con `in_bulk` sobre la clave, dentro
+  del alcance de la vista (empresa / producto);
+- las celdas se convierten por columna según el campo del modelo
+  (importacion.coercionar_dataframe) y se comparan con la instancia: sólo las
+  filas con diferencias se escriben, con `bulk_update` agrupando por el conjunto
+  de campos que cambió;
+- celda vacía = no tocar el campo (como el `row.dropna()` + partial=True de antes).
+
+La respuesta informa {"updated", "unchanged", "missing"} y, si hubo filas
+inválidas (que no se escriben), "errores" con 'Fila N: ...'.
+"""
+from collections import defaultdict
+from decimal import Decimal, InvalidOperation
+
+import pandas as pd
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db import models, transaction
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from .importacion import coercionar_dataframe
+from .lectura_archivos import leer_por_trozos
+from .versiones_dataset import marcar_objetos_modificados
+
+ACTUALIZACION_BATCH_SIZE = getattr(settings, 'IMPORTACION_BATCH_SIZE', 1000)
+ACTUALIZACION_MAX_ERRORES = 50
+
+
+def campos_actualizables(modelo, columnas, clave, excluir=()):
+    """{encabezado del archivo: field} de las columnas que corresponden a campos editables."""
+    campos = {}
+    for field in modelo._meta.concrete_fields:
+        if field.primary_key or not field.editable or field.name in (clave, *excluir):
+            continue
+        # las FK se aceptan por nombre ('canal') o por columna ('canal_id')
+        for encabezado in (field.name, field.attname):
+            if encabezado in columnas:
+                campos[encabezado] = field
+                break
+    return campos
+
+
+def _normalizar(field, valor):
+    """Valor del archivo como lo guarda el modelo, para compararlo con la instancia."""
+    valor = field.to_python(valor)
+    if valor is None:
+        return None
+    if isinstance(field, models.DecimalField):
+        try:
+            return valor.quantize(Decimal(1).scaleb(-field.decimal_places))
+        except InvalidOperation:
+            raise ValidationError(f'{valor} excede {field.max_digits} dígitos')
+    if isinstance(field, models.DateTimeField) and settings.USE_TZ and timezone.is_naive(valor):
+        return timezone.make_aware(valor)
+    return valor
+
+
+def _fk_inexistentes(field, serie):
+    """Máscara de filas cuya FK no existe en la tabla referenciada (una consulta por columna)."""
+    ids = pd.to_numeric(serie, errors='coerce')
+    valores = ids.dropna().astype('int64').unique().tolist()
+    existentes = set(
+        field.related_model._base_manager.filter(pk__in=valores).values_list('pk', flat=True)
+    ) if valores else set()
+    return ids.notna() & ~ids.isin(existentes)
+
+
+def actualizar_por_clave(modelo, trozos, clave='id_registro', filtro=None, excluir=(),
+                         preparar=None, ajustar=None, batch_size=ACTUALIZACION_BATCH_SIZE):
+    """
+    Aplica los DataFrames de `trozos` sobre las filas existentes de `modelo`
+    (filtradas por `filtro`). `preparar(df)` puede agregar columnas derivadas
+    antes de convertir; `ajustar(instancia, valores)` recibe los valores no
+    vacíos de la fila ya normalizados, puede modificarlos y retorna un mensaje
+    de error para descartar la fila. Retorna (updated, unchanged, missing, errores).
+    """
+    qs = modelo.objects.filter(**(filtro or {}))
+    actualizadas = sin_cambios = faltantes = 0
+    errores = []
+
+    def error(idx, mensaje):
+        if len(errores) < ACTUALIZACION_MAX_ERRORES:
+            errores.append(f'Fila {idx + 2}: {mensaje}')
+
+    for df in trozos:
+        if preparar:
+            df = preparar(df)
+        campos = campos_actualizables(modelo, df.columns, clave, excluir)
+        datos = df[list(campos)].rename(columns={col: field.name for col, field in campos.items()})
+        fields = {field.name: field for field in campos.values()}
+
+        ids = pd.to_numeric(df[clave], errors='coerce')
+        sin_id = ids.isna() | (ids % 1 != 0)
+        for idx in df.index[sin_id.to_numpy()]:
+            error(idx, f'{clave} invalido')
+
+        # una consulta por trozo: {id: instancia}
+        instancias = qs.in_bulk(ids[~sin_id].astype('int64').unique().tolist(), field_name=clave)
+
+        convertido, errores_fila = coercionar_dataframe(
+            datos, modelo, [nombre for nombre, field in fields.items() if not field.is_relation]
+        )
+        for nombre, field in fields.items():
+            if field.is_relation:
+                convertido[nombre] = datos[nombre].astype(object).where(datos[nombre].notna(), None)
+                for idx in df.index[_fk_inexistentes(field, datos[nombre]).to_numpy()]:
+                    errores_fila.setdefault(idx, f'{nombre}: no existe {datos.at[idx, nombre]!r}')
+
+        por_campos = defaultdict(dict)
+        for idx, id_registro, fila in zip(df.index, ids, convertido.to_dict('records')):
+            if sin_id.at[idx]:
+                continue
+            instancia = instancias.get(int(id_registro))
+            if instancia is None:
+                faltantes += 1
+                continue
+            if idx in errores_fila:
+                error(idx, errores_fila[idx])
+                continue
+
+            try:
+                valores = {
+                    nombre: _normalizar(fields[nombre], valor)
+                    for nombre, valor in fila.items() if pd.notna(valor)
+                }
+            except ValidationError as e:
+                error(idx, '; '.join(e.messages))
+                continue
+            mensaje = ajustar(instancia, valores) if ajustar else None
+            if mensaje:
+                error(idx, mensaje)
+                continue
+
+            cambios = {
+                nombre: valor for nombre, valor in valores.items()
+                if valor != getattr(instancia, fields[nombre].attname if nombre in fields else nombre)
+            }
+            if not cambios:
+                sin_cambios += 1
+                continue
+            try:
+                for nombre, valor in cambios.items():
+                    field = modelo._meta.get_field(nombre)
+                    if not field.is_relation:
+                        # choices / max_length / validators, como el serializer de antes
+                        field.validate(valor, instancia)
+                        field.run_validators(valor)
+            except ValidationError as e:
+                error(idx, f'{nombre}: {"; ".join(e.messages)}')
+                continue
+
+            for nombre, valor in cambios.items():
+                setattr(instancia, modelo._meta.get_field(nombre).attname, valor)
+            # la misma instancia puede venir en varias filas: queda el último valor
+            por_campos[frozenset(cambios)][instancia.pk] = instancia
+
+        objs = {}
+        for nombres, grupo in por_campos.items():
+            modelo.objects.bulk_update(
+                list(grupo.values()),
+                [modelo._meta.get_field(nombre).attname for nombre in sorted(nombres)],
+                batch_size=batch_size,
+            )
+            objs.update(grupo)
+        actualizadas += len(objs)
+        if objs:
+            marcar_objetos_modificados(modelo, objs.values())
+
+    return actualizadas, sin_cambios, faltantes, errores
+
+
+class ActualizacionMasivaView(APIView):
+    """
+    POST multipart con `file` (columna `clave` + columnas a cambiar). Responde
+    200 {"updated", "unchanged", "missing", "errores"?}.
+    """
+    modelo = None
+    clave = 'id_registro'
+    # alcance: sólo se actualizan filas que cumplen este filtro
+    filtro = {}
+    # campos que el archivo no puede cambiar (la empresa / producto del alcance)
+    excluir = ('id_empresa', 'id_producto')
+    error_sin_clave = None
+
+    def preparar(self, df):
+        return df
+
+    def ajustar(self, instancia, valores):
+        return None
+
+    @transaction.atomic
+    def post(self, request):
+        file = request.FILES.get('file')
+        if not file:
+            return Response({'error': 'No se envio ningun archivo'}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            trozos = leer_por_trozos(file)
+            primero = next(trozos, None)
+        except Exception as e:
+            return Response({'error': f'Archivo invalido: {str(e)}'}, status=status.HTTP_400_BAD_REQUEST)
+
+        if primero is None or self.clave not in primero.columns:
+            return Response(
+                self.error_sin_clave or {'error': 'Falta columna obligatoria', 'faltantes': [self.clave]},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        def todos():
+            yield primero
+            yield from trozos
+
+        updated, unchanged, missing, errores = actualizar_por_clave(
+            self.modelo, todos(), clave=self.clave, filtro=self.filtro, excluir=self.excluir,
+            preparar=self.preparar, ajustar=self.ajustar,
+        )
+        data = {'updated': updated, 'unchanged': unchanged, 'missing': missing}
+        if errores:
+            data['errores'] = errores
+        return Response(data, status=status.HTTP_200_OK)
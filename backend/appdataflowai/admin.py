@@ -10,8 +10,24 @@ from .models import (
     TipoPlan,
     DetalleProductoVendido, 
     Pagos,
-    DashboardVentas
+    DashboardVentas,
+    TrabajoImportacion,
+    TrabajoExportacion,
+    CargaArchivo,
+    HistorialImportacion,
 )
+from .versiones_dataset import borrar_y_marcar
+
+
+class DatasetAdmin(admin.ModelAdmin):
+    """Admin de un dataset versionado: los borrados también suben su versión (versiones_dataset.py)."""
+
+    def delete_model(self, request, obj):
+        borrar_y_marcar(obj)
+
+    def delete_queryset(self, request, queryset):
+        borrar_y_marcar(queryset)
+
 
 @admin.register(Categoria)
 class CategoriaAdmin(admin.ModelAdmin):
@@ -232,7 +248,7 @@ class DashboardVentasColtradeAdmin(admin.ModelAdmin):
     list_filter = ('fecha_entrega',)
 
 @admin.register(DashboardVentasDataflow)
-class DashboardVentasDataflowAdmin(admin.ModelAdmin):
+class DashboardVentasDataflowAdmin(DatasetAdmin):
     list_display = ('id_registro', 'punto_venta', 'dinero_entregado', 'cantidad_entregada', 'fecha_entrega')
     search_fields = ('punto_venta',)
     list_filter = ('fecha_entrega', 'punto_venta')  # ✅ Filtro por punto de venta
@@ -245,7 +261,7 @@ class DashboardVentasDataflowAdmin(admin.ModelAdmin):
 from django.contrib import admin
 
 @admin.register(DashboardVentas)
-class DashboardVentasAdmin(admin.ModelAdmin):
+class DashboardVentasAdmin(DatasetAdmin):
     list_display = (
         'id_registro', 'id_empresa', 'id_producto',
         'punto_venta', 'canal', 'ciudad', 'region',
@@ -308,7 +324,7 @@ from django.contrib import admin
 from .models import DashboardFinanzas
 
 @admin.register(DashboardFinanzas)
-class DashboardFinanzasAdmin(admin.ModelAdmin):
+class DashboardFinanzasAdmin(DatasetAdmin):
     list_display = (
         'id_registro', 'id_empresa', 'id_producto',
         'fecha_registro', 'mes', 'anio',
@@ -385,7 +401,7 @@ from django.contrib import admin
 from .models import DashboardCompras
 
 @admin.register(DashboardCompras)
-class DashboardComprasAdmin(admin.ModelAdmin):
+class DashboardComprasAdmin(DatasetAdmin):
     list_display = (
         'id_registro', 'id_empresa', 'id_producto',
         'fecha_compra', 'mes', 'anio',
@@ -433,7 +449,7 @@ from .models import DashboardSales
 
 
 @admin.register(DashboardSales)
-class DashboardSalesAdmin(admin.ModelAdmin):
+class DashboardSalesAdmin(DatasetAdmin):
     list_display = (
         'id_registro', 'id_empresa', 'id_producto',
         'point_of_sale', 'channel', 'city', 'region',
@@ -505,7 +521,7 @@ from django.contrib import admin
 from .models import DashboardSalesreview
 
 @admin.register(DashboardSalesreview)
-class DashboardSalesreviewAdmin(admin.ModelAdmin):
+class DashboardSalesreviewAdmin(DatasetAdmin):
     list_display = (
         'id_registro', 
         'id_empresa', 
@@ -616,7 +632,7 @@ class RegistrosSesionAdmin(admin.ModelAdmin):
     ordering = ('-fecha_inicio_sesion',)
 
     # Opcional: solo lectura para los campos autocompletados
-    readonly_fields = ('nombre_empresa', 'nombres', 'fecha_inicio_sesion')
+    readonly_fields = ('nombre_empresa', 'nombres', 'fecha_inicio_sesion', 'codigo_registro')
 
     # Opcional: si quieres agrupar los campos en secciones en el formulario admin
     fieldsets = (
@@ -627,7 +643,7 @@ class RegistrosSesionAdmin(admin.ModelAdmin):
             'fields': ('id_usuario', 'nombres')
         }),
         ('Registro de Sesión', {
-            'fields': ('fecha_inicio_sesion',)
+            'fields': ('fecha_inicio_sesion', 'codigo_registro')
         }),
     )
 
@@ -637,7 +653,7 @@ from django.contrib import admin
 from .models import DashboardSalesCorporativo
 
 @admin.register(DashboardSalesCorporativo)
-class DashboardSalesCorporativoAdmin(admin.ModelAdmin):
+class DashboardSalesCorporativoAdmin(DatasetAdmin):
     list_display = (
         'id_registro',
         'orden_compra',
@@ -675,7 +691,7 @@ from django.contrib import admin
 from .models import DashboardSalesCorporativoMetas
 
 @admin.register(DashboardSalesCorporativoMetas)
-class DashboardSalesCorporativoMetasAdmin(admin.ModelAdmin):
+class DashboardSalesCorporativoMetasAdmin(DatasetAdmin):
     list_display = (
         'id_registro',
         'ano',
@@ -750,7 +766,7 @@ from django.contrib import admin
 from .models import DashboardChurnRate
 
 @admin.register(DashboardChurnRate)
-class DashboardChurnRateAdmin(admin.ModelAdmin):
+class DashboardChurnRateAdmin(DatasetAdmin):
     list_display = (
         'id_registro',
         'id_empresa',
@@ -1109,7 +1125,7 @@ from .models import (
 # TIENDAS
 # =========================
 @admin.register(DashDfTiendas)
-class DashDfTiendasAdmin(admin.ModelAdmin):
+class DashDfTiendasAdmin(DatasetAdmin):
     list_display = (
         'id_tienda',
         'nombre_tienda',
@@ -1141,7 +1157,7 @@ class DashDfTiendasAdmin(admin.ModelAdmin):
 # PRODUCTOS
 # =========================
 @admin.register(DashDfProductos)
-class DashDfProductosAdmin(admin.ModelAdmin):
+class DashDfProductosAdmin(DatasetAdmin):
     list_display = (
         'id_producto',
         'nombre_producto',
@@ -1172,7 +1188,7 @@ class DashDfProductosAdmin(admin.ModelAdmin):
 # VENTAS
 # =========================
 @admin.register(DashDfVentas)
-class DashDfVentasAdmin(admin.ModelAdmin):
+class DashDfVentasAdmin(DatasetAdmin):
     list_display = (
         'id_registro',
         'id_tienda',
@@ -1203,7 +1219,7 @@ class DashDfVentasAdmin(admin.ModelAdmin):
 # METAS
 # =========================
 @admin.register(DashDfMetas)
-class DashDfMetasAdmin(admin.ModelAdmin):
+class DashDfMetasAdmin(DatasetAdmin):
     list_display = (
         'id_registro',
         'id_tienda',
@@ -1234,7 +1250,7 @@ class DashDfMetasAdmin(admin.ModelAdmin):
 # INVENTARIOS
 # =========================
 @admin.register(DashDfInventarios)
-class DashDfInventariosAdmin(admin.ModelAdmin):
+class DashDfInventariosAdmin(DatasetAdmin):
     list_display = (
         'id_registro',
         'id_tienda',
@@ -1300,7 +1316,7 @@ class UsuariosBrokersAdmin(admin.ModelAdmin):
 
 # ---------- LeadsBrokers ----------
 @admin.register(LeadsBrokers)
-class LeadsBrokersAdmin(admin.ModelAdmin):
+class LeadsBrokersAdmin(DatasetAdmin):
     list_display = (
         'id_lead',
         'nombre_lead',
@@ -1481,7 +1497,7 @@ from .models import (
 
 
 @admin.register(ProductosBelkin)
-class ProductosBelkinAdmin(admin.ModelAdmin):
+class ProductosBelkinAdmin(DatasetAdmin):
     list_display = (
         'id_registro',
         'id_empresa',
@@ -1510,7 +1526,7 @@ class ProductosBelkinAdmin(admin.ModelAdmin):
     ordering = ('marca', 'nombre_producto')
 
 @admin.register(PdvBelkin)
-class PdvBelkinAdmin(admin.ModelAdmin):
+class PdvBelkinAdmin(DatasetAdmin):
     list_display = (
         'id_registro',
         'id_empresa',
@@ -1535,7 +1551,7 @@ class PdvBelkinAdmin(admin.ModelAdmin):
 
 
 @admin.register(VentasBelkin)
-class VentasBelkinAdmin(admin.ModelAdmin):
+class VentasBelkinAdmin(DatasetAdmin):
     list_display = (
         'id_registro',
         'fecha_venta',
@@ -1573,7 +1589,7 @@ class VentasBelkinAdmin(admin.ModelAdmin):
 
 
 @admin.register(InventariosBelkin)
-class InventariosBelkinAdmin(admin.ModelAdmin):
+class InventariosBelkinAdmin(DatasetAdmin):
     list_display = (
         'id_registro',
         'fecha_inventario',
@@ -1625,7 +1641,7 @@ from .models import (
 )
 
 @admin.register(ProductosBluetti)
-class ProductosBluettiAdmin(admin.ModelAdmin):
+class ProductosBluettiAdmin(DatasetAdmin):
 
     list_display = (
         'id_registro',
@@ -1653,7 +1669,7 @@ class ProductosBluettiAdmin(admin.ModelAdmin):
     ordering = ('marca', 'nombre_producto')
 
 @admin.register(CanalesBluetti)
-class CanalesBluettiAdmin(admin.ModelAdmin):
+class CanalesBluettiAdmin(DatasetAdmin):
 
     list_display = (
         'id_registro',
@@ -1677,7 +1693,7 @@ class CanalesBluettiAdmin(admin.ModelAdmin):
 
 
 @admin.register(CuentasClientesBluetti)
-class CuentasClientesBluettiAdmin(admin.ModelAdmin):
+class CuentasClientesBluettiAdmin(DatasetAdmin):
 
     list_display = (
         'id_registro',
@@ -1711,7 +1727,7 @@ class CuentasClientesBluettiAdmin(admin.ModelAdmin):
     )
 
 @admin.register(VentasBluetti)
-class VentasBluettiAdmin(admin.ModelAdmin):
+class VentasBluettiAdmin(DatasetAdmin):
 
     list_display = (
         'id_registro',
@@ -1755,7 +1771,7 @@ class VentasBluettiAdmin(admin.ModelAdmin):
 
 
 @admin.register(InventariosBluetti)
-class InventariosBluettiAdmin(admin.ModelAdmin):
+class InventariosBluettiAdmin(DatasetAdmin):
 
     list_display = (
         'id_registro',
@@ -1797,7 +1813,7 @@ class InventariosBluettiAdmin(admin.ModelAdmin):
 
 
 @admin.register(VentasSelloutBluetti)
-class VentasSelloutBluettiAdmin(admin.ModelAdmin):
+class VentasSelloutBluettiAdmin(DatasetAdmin):
 
     list_display = (
         'id_registro',
@@ -1839,7 +1855,7 @@ class VentasSelloutBluettiAdmin(admin.ModelAdmin):
 
 
 @admin.register(InventariosSelloutBluetti)
-class InventariosSelloutBluettiAdmin(admin.ModelAdmin):
+class InventariosSelloutBluettiAdmin(DatasetAdmin):
 
     list_display = (
         'id_registro',
@@ -1879,7 +1895,7 @@ class InventariosSelloutBluettiAdmin(admin.ModelAdmin):
 
 
 @admin.register(MetasComercialesBluetti)
-class MetasComercialesBluettiAdmin(admin.ModelAdmin):
+class MetasComercialesBluettiAdmin(DatasetAdmin):
 
     list_display = (
         'id_registro',
@@ -1927,7 +1943,7 @@ from .models import (
 
 
 @admin.register(conetcom_clientes)
-class ConetcomClientesAdmin(admin.ModelAdmin):
+class ConetcomClientesAdmin(DatasetAdmin):
     list_display = (
         'id_cliente',
         'id_empresa',
@@ -1955,7 +1971,7 @@ class ConetcomClientesAdmin(admin.ModelAdmin):
 
 
 @admin.register(conetcom_planes)
-class ConetcomPlanesAdmin(admin.ModelAdmin):
+class ConetcomPlanesAdmin(DatasetAdmin):
     list_display = (
         'id_plan',
         'nombre_plan',
@@ -1972,7 +1988,7 @@ class ConetcomPlanesAdmin(admin.ModelAdmin):
 
 
 @admin.register(conetcom_facturacion)
-class ConetcomFacturacionAdmin(admin.ModelAdmin):
+class ConetcomFacturacionAdmin(DatasetAdmin):
     list_display = (
         'id_factura',
         'id_cliente',
@@ -1991,7 +2007,7 @@ class ConetcomFacturacionAdmin(admin.ModelAdmin):
 
 
 @admin.register(conetcom_pagos)
-class ConetcomPagosAdmin(admin.ModelAdmin):
+class ConetcomPagosAdmin(DatasetAdmin):
     list_display = (
         'id_pago',
         'id_cliente',
@@ -2010,7 +2026,7 @@ class ConetcomPagosAdmin(admin.ModelAdmin):
 
 
 @admin.register(conetcom_tickets_soporte)
-class ConetcomTicketsSoporteAdmin(admin.ModelAdmin):
+class ConetcomTicketsSoporteAdmin(DatasetAdmin):
     list_display = (
         'id_ticket',
         'id_cliente',
@@ -2029,7 +2045,7 @@ class ConetcomTicketsSoporteAdmin(admin.ModelAdmin):
 
 
 @admin.register(conetcom_trafico_consumo)
-class ConetcomTraficoConsumoAdmin(admin.ModelAdmin):
+class ConetcomTraficoConsumoAdmin(DatasetAdmin):
     list_display = (
         'id_registro',
         'id_cliente',
@@ -2048,7 +2064,7 @@ class ConetcomTraficoConsumoAdmin(admin.ModelAdmin):
 
 
 @admin.register(conetcom_campanas)
-class ConetcomCampanasAdmin(admin.ModelAdmin):
+class ConetcomCampanasAdmin(DatasetAdmin):
     list_display = (
         'id_campana',
         'nombre_campana',
@@ -2066,7 +2082,7 @@ class ConetcomCampanasAdmin(admin.ModelAdmin):
 
 
 @admin.register(conetcom_interacciones_campanas)
-class ConetcomInteraccionesCampanasAdmin(admin.ModelAdmin):
+class ConetcomInteraccionesCampanasAdmin(DatasetAdmin):
     list_display = (
         'id_interaccion',
         'id_campana',
@@ -2104,7 +2120,7 @@ from .models import ServiciosLoopTotek
 
 
 @admin.register(ServiciosLoopTotek)
-class ServiciosLoopTotekAdmin(admin.ModelAdmin):
+class ServiciosLoopTotekAdmin(DatasetAdmin):
     list_display = (
         "id_registro",
         "fecha_servicio",
@@ -2130,3 +2146,32 @@ class ServiciosLoopTotekAdmin(admin.ModelAdmin):
         "descripcion_servicio",
     )
     ordering = ("-fecha_servicio",)
+
+
+@admin.register(TrabajoImportacion)
+class TrabajoImportacionAdmin(admin.ModelAdmin):
+    list_display = ('id_trabajo', 'tipo', 'estado', 'id_empresa', 'filas_procesadas', 'fecha_creacion', 'fecha_fin')
+    list_filter = ('estado', 'tipo')
+    search_fields = ('codigo', 'nombre_archivo')
+    exclude = ('contenido',)
+
+
+@admin.register(TrabajoExportacion)
+class TrabajoExportacionAdmin(admin.ModelAdmin):
+    list_display = ('id_trabajo', 'tipo', 'formato', 'estado', 'id_empresa', 'filas', 'tamano_bytes', 'fecha_creacion', 'fecha_fin')
+    list_filter = ('estado', 'formato')
+    search_fields = ('codigo', 'clave', 'nombre_archivo')
+
+
+@admin.register(CargaArchivo)
+class CargaArchivoAdmin(admin.ModelAdmin):
+    list_display = ('id_carga', 'nombre_archivo', 'estado', 'id_empresa', 'tamano_total', 'fecha_creacion')
+    list_filter = ('estado',)
+    search_fields = ('codigo', 'nombre_archivo')
+
+
+@admin.register(HistorialImportacion)
+class HistorialImportacionAdmin(admin.ModelAdmin):
+    list_display = ('id_historial', 'tipo', 'nombre_archivo', 'id_empresa', 'codigo_http', 'fecha')
+    list_filter = ('tipo',)
+    search_fields = ('huella', 'nombre_archivo')
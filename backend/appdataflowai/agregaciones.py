@@ -0,0 +1,279 @@
+# appdataflowai/agregaciones.py
+"""
+Agregaciones server-side para los dashboards de ventas.
+
+En lugar de mandar todas las filas al navegador para que sume por mes / marca /
+tienda, el endpoint `agregaciones/<dataset>/` arma un GROUP BY en SQL:
+
+    GET /agregaciones/ventas/?bucket=month&group_by=marca,canal
+        &medidas=sum:dinero_vendido,count&start=2025-01-01&end=2025-06-30
+
+- bucket: day | week | month (opcional, agrupa la columna de fecha con Trunc*)
+- group_by: dimensiones lógicas separadas por coma (marca, sku, punto_venta, canal, ...)
+  que cada dataset traduce a su columna real (p. ej. marca -> brand en DashboardSales).
+- medidas: `sum:campo`, `avg:campo`, `count` o `count:campo`. Si no se envía
+  se usa la suma de las medidas por defecto del dataset.
+- start / end (o fecha_from / fecha_to): mismos filtros de fecha que los listados.
+
+Respuesta:
+    {"dataset": "...", "bucket": "month", "group_by": [...], "medidas": [...],
+     "rows": [{"periodo": "2025-01-01", "marca": "X", "sum_dinero_vendido": 123.4, ...}]}
+"""
+from dataclasses import dataclass, field
+from decimal import Decimal
+
+from django.db.models import Avg, Count, Sum
+from django.db.models.functions import TruncDay, TruncMonth, TruncWeek
+from django.utils.dateparse import parse_date
+from rest_framework.exceptions import ValidationError
+
+from .models import (
+    DashboardSales,
+    DashboardVentas,
+    DashboardVentasDataflow,
+    DashDfVentas,
+    VentasBelkin,
+    VentasBluetti,
+)
+
+BUCKETS = {
+    'day': TruncDay,
+    'week': TruncWeek,
+    'month': TruncMonth,
+}
+
+FUNCIONES = {
+    'sum': Sum,
+    'avg': Avg,
+    'count': Count,
+}
+
+# tope de filas devueltas; un GROUP BY razonable de dashboard son cientos
+MAX_FILAS_AGREGACION = 5000
+
+
+@dataclass(frozen=True)
+class DatasetAgregable:
+    model: type
+    campo_fecha: str
+    dimensiones: dict
+    medidas: tuple
+    medidas_defecto: tuple
+    # None -> la empresa sale del token; int -> empresa fija (dashboards Belkin/Bluetti)
+    empresa_fija: int = None
+    productos: tuple = field(default=())
+
+    @property
+    def filtra_empresa(self):
+        return any(f.name == 'id_empresa' for f in self.model._meta.get_fields())
+
+
+DATASETS = {
+    'ventas': DatasetAgregable(
+        model=DashboardVentas,
+        campo_fecha='fecha_venta',
+        dimensiones={
+            'marca': 'marca',
+            'sku': 'sku',
+            'punto_venta': 'punto_venta',
+            'canal': 'canal',
+            'categoria': 'categoria',
+            'ciudad': 'ciudad',
+            'region': 'region',
+        },
+        medidas=(
+            'cantidad_vendida', 'dinero_vendido', 'ticket_promedio', 'descuento_total',
+            'numero_transacciones', 'devoluciones', 'dinero_devoluciones',
+            'utilidad_bruta', 'unidades_promocionadas',
+        ),
+        medidas_defecto=('cantidad_vendida', 'dinero_vendido'),
+    ),
+    # DashboardVentasDataflow no tiene columna id_empresa: es el tablero propio de Dataflow
+    'ventas-dataflow': DatasetAgregable(
+        model=DashboardVentasDataflow,
+        campo_fecha='fecha_entrega',
+        dimensiones={
+            'punto_venta': 'punto_venta',
+        },
+        medidas=('dinero_entregado', 'cantidad_entregada'),
+        medidas_defecto=('dinero_entregado', 'cantidad_entregada'),
+    ),
+    'sales': DatasetAgregable(
+        model=DashboardSales,
+        campo_fecha='sale_date',
+        dimensiones={
+            'marca': 'brand',
+            'sku': 'sku',
+            'punto_venta': 'point_of_sale',
+            'canal': 'channel',
+            'categoria': 'category',
+            'ciudad': 'city',
+            'region': 'region',
+        },
+        medidas=(
+            'quantity_sold', 'sales_amount', 'average_ticket', 'total_discount',
+            'number_transactions', 'returns', 'return_amount', 'gross_profit', 'promoted_units',
+        ),
+        medidas_defecto=('quantity_sold', 'sales_amount'),
+    ),
+    'ventas-bluetti': DatasetAgregable(
+        model=VentasBluetti,
+        campo_fecha='fecha_venta',
+        dimensiones={
+            'sku': 'sku',
+            'canal': 'canal__nombre_canal',
+            'producto': 'producto',
+            'tipo_venta': 'tipo_venta',
+        },
+        medidas=('cantidad', 'precio_unitario', 'total_venta', 'costo_unitario', 'costo_total'),
+        medidas_defecto=('cantidad', 'total_venta'),
+        empresa_fija=1,
+        productos=(23,),
+    ),
+    'ventas-belkin': DatasetAgregable(
+        model=VentasBelkin,
+        campo_fecha='fecha_venta',
+        dimensiones={
+            'marca': 'marca',
+            'punto_venta': 'punto_venta',
+            'canal': 'canal_cliente',
+            'categoria': 'categoria',
+            'producto': 'producto',
+        },
+        medidas=('cantidad', 'precio_unitario_venta', 'total_ventas'),
+        medidas_defecto=('cantidad', 'total_ventas'),
+        empresa_fija=1,
+        productos=(22, 23),
+    ),
+    'dashdf-ventas': DatasetAgregable(
+        model=DashDfVentas,
+        campo_fecha='fecha_venta',
+        dimensiones={
+            'marca': 'id_producto__marca',
+            'producto': 'id_producto__nombre_producto',
+            'categoria': 'id_producto__categoria',
+            'punto_venta': 'id_tienda__nombre_tienda',
+            'canal': 'id_tienda__canal',
+            'ciudad': 'id_tienda__ciudad',
+        },
+        medidas=('cantidad_vendida', 'dinero_vendido'),
+        medidas_defecto=('cantidad_vendida', 'dinero_vendido'),
+    ),
+}
+
+
+def _lista_param(params, nombre):
+    valores = []
+    for raw in params.getlist(nombre):
+        valores.extend(v.strip() for v in raw.split(',') if v.strip())
+    return valores
+
+
+def _parse_fecha(params, *nombres):
+    for nombre in nombres:
+        valor = params.get(nombre)
+        if not valor:
+            continue
+        fecha = parse_date(valor)
+        if fecha is None:
+            raise ValidationError({nombre: 'Formato de fecha inválido (YYYY-MM-DD)'})
+        return fecha
+    return None
+
+
+def _parse_medidas(dataset, params):
+    specs = _lista_param(params, 'medidas')
+    if not specs:
+        specs = [f'sum:{m}' for m in dataset.medidas_defecto]
+
+    medidas = []
+    for spec in specs:
+        funcion, _, campo = spec.partition(':')
+        funcion = funcion.lower()
+        if funcion not in FUNCIONES:
+            raise ValidationError({'medidas': f"Función '{funcion}' no soportada (sum, avg, count)"})
+        if funcion == 'count' and not campo:
+            medidas.append(('count', 'count', None))
+            continue
+        if campo not in dataset.medidas:
+            raise ValidationError({'medidas': f"Campo '{campo}' no agregable en este dataset"})
+        medidas.append((f'{funcion}_{campo}', funcion, campo))
+    return medidas
+
+
+def _a_json(valor):
+    if isinstance(valor, Decimal):
+        return float(valor)
+    if hasattr(valor, 'date') and callable(valor.date):
+        # TruncDay/Week/Month sobre DateField devuelve date; sobre DateTimeField datetime
+        return valor.date().isoformat()
+    if hasattr(valor, 'isoformat'):
+        return valor.isoformat()
+    return valor
+
+
+def agregar_dataset(dataset, params, empresa_id=None):
+    """
+    Ejecuta la agregación sobre `dataset` (DatasetAgregable) con los query params
+    del request. `empresa_id` es la empresa del token (ignorada si el dataset
+    tiene empresa fija). Lanza ValidationError ante parámetros inválidos.
+    """
+    bucket = (params.get('bucket') or '').lower() or None
+    if bucket and bucket not in BUCKETS:
+        raise ValidationError({'bucket': 'Valores permitidos: day, week, month'})
+
+    dimensiones = _lista_param(params, 'group_by')
+    invalidas = [d for d in dimensiones if d not in dataset.dimensiones]
+    if invalidas:
+        raise ValidationError({'group_by': f"Dimensiones no soportadas: {', '.join(invalidas)}"})
+    dimensiones = list(dict.fromkeys(dimensiones))
+
+    medidas = _parse_medidas(dataset, params)
+
+    qs = dataset.model.objects.all()
+    if dataset.empresa_fija is not None:
+        qs = qs.filter(id_empresa_id=dataset.empresa_fija)
+        if dataset.productos:
+            qs = qs.filter(id_producto_id__in=dataset.productos)
+    elif dataset.filtra_empresa:
+        qs = qs.filter(id_empresa_id=empresa_id)
+
+    start = _parse_fecha(params, 'start', 'fecha_from')
+    end = _parse_fecha(params, 'end', 'fecha_to')
+    if start:
+        qs = qs.filter(**{f'{dataset.campo_fecha}__gte': start})
+    if end:
+        qs = qs.filter(**{f'{dataset.campo_fecha}__lte': end})
+
+    columnas = []
+    if bucket:
+        qs = qs.annotate(periodo=BUCKETS[bucket](dataset.campo_fecha))
+        columnas.append('periodo')
+    # values() con las columnas reales; el alias lógico se pone al serializar
+    # (usar values(marca=F('brand')) choca con campos que ya se llaman así)
+    nombres = {'periodo': 'periodo'}
+    for dim in dimensiones:
+        columnas.append(dataset.dimensiones[dim])
+        nombres[dataset.dimensiones[dim]] = dim
+
+    anotaciones = {
+        alias: FUNCIONES[funcion](campo or 'pk')
+        for alias, funcion, campo in medidas
+    }
+
+    if columnas:
+        qs = qs.values(*columnas).annotate(**anotaciones).order_by(*columnas)
+        filas = list(qs[:MAX_FILAS_AGREGACION + 1])
+    else:
+        filas = [qs.aggregate(**anotaciones)]
+
+    truncado = len(filas) > MAX_FILAS_AGREGACION
+    filas = filas[:MAX_FILAS_AGREGACION]
+
+    return {
+        'bucket': bucket,
+        'group_by': dimensiones,
+        'medidas': [alias for alias, _, _ in medidas],
+        'rows': [{nombres.get(k, k): _a_json(v) for k, v in fila.items()} for fila in filas],
+        'truncado': truncado,
+    }
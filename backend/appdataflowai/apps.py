@@ -4,3 +4,15 @@ from django.apps import AppConfig
 class AppdataflowaiConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'appdataflowai'
+
+    def ready(self):
+        # versión por (empresa, dataset) para ETag / 304 (ver versiones_dataset.py).
+        # Sólo post_save y sólo en los datasets versionados: los borrados marcan con
+        # borrar_y_marcar para no perder el fast delete de Django.
+        from django.db.models.signals import post_save
+
+        from . import checks  # noqa: F401  (registra el aviso de cache LocMem)
+        from .versiones_dataset import dataset_guardado, modelos_versionados
+
+        for model in modelos_versionados():
+            post_save.connect(dataset_guardado, sender=model, dispatch_uid=f'ds_ver_save_{model._meta.label_lower}')
@@ -1,57 +1,495 @@
 # appdataflowai/authentication.py
+import copy
+import hashlib
+import logging
+import threading
+import time
+from collections import OrderedDict
+from datetime import timedelta
+
 import jwt
 from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+from django.utils.functional import SimpleLazyObject
+from rest_framework import status
 from rest_framework.authentication import BaseAuthentication, get_authorization_header
 from rest_framework.exceptions import AuthenticationFailed
+from rest_framework.response import Response
 
-from .models import Usuario
+from .models import Usuario, UsuariosBrokers
 
-class JWTAuthentication(BaseAuthentication):
+logger = logging.getLogger(__name__)
+
+
+# ---------------------------
+# Cache en proceso de tokens verificados
+# ---------------------------
+# Cada worker guarda (hash del token -> payload + Usuario ya resuelto) durante un TTL corto
+# que nunca supera el `exp` del token. Así un dashboard que hace polling no paga
+# un SELECT a Usuario en cada petición.
+JWT_AUTH_CACHE_MAX_ENTRIES = getattr(settings, 'JWT_AUTH_CACHE_MAX_ENTRIES', 2048)
+JWT_AUTH_CACHE_TTL_SECONDS = getattr(settings, 'JWT_AUTH_CACHE_TTL_SECONDS', 60)
+# cada cuántas búsquedas se registran hits / misses en el log del worker (0 = nunca)
+JWT_AUTH_CACHE_LOG_EVERY = getattr(settings, 'JWT_AUTH_CACHE_LOG_EVERY', 10000)
+
+
+class _TokenUserCache:
     """
-    Decodifica Bearer JWT y devuelve (user, token) donde user es instancia de Usuario.
-    Si no hay Authorization header, devuelve None para que DRF pruebe otras autenticaciones.
+    LRU acotado y thread-safe: clave = sha256(token), valor = (expira_en, payload, usuario).
     """
-    def authenticate(self, request):
-        auth = get_authorization_header(request).split()
-        if not auth or auth[0].lower() != b'bearer':
-            return None
 
+    def __init__(self, max_entries, ttl_seconds, log_every=0):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.log_every = log_every
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key_for(token):
+        return hashlib.sha256(token.encode('utf-8')).hexdigest()
+
+    def get(self, key):
         try:
-            token = auth[1].decode('utf-8')
+            return self._get(key)
+        finally:
+            if self.log_every > 0 and (self.hits + self.misses) % self.log_every == 0:
+                logger.info("Cache de tokens JWT: %s", self.stats())
+
+    def _get(self, key):
+        now = time.time()
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            expira_en, payload, usuario = entry
+            if expira_en <= now:
+                del self._data[key]
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+        # copia profunda (usuario + empresa/rol/estado ya cargados): las vistas pueden
+        # mutar el objeto sin ensuciar la cache
+        return payload, copy.deepcopy(usuario)
+
+    def set(self, key, payload, usuario, token_exp=None):
+        if self.max_entries <= 0 or self.ttl_seconds <= 0:
+            return
+        expira_en = time.time() + self.ttl_seconds
+        if token_exp:
+            try:
+                expira_en = min(expira_en, float(token_exp))
+            except (TypeError, ValueError):
+                pass
+        with self._lock:
+            self._data[key] = (expira_en, dict(payload), copy.deepcopy(usuario))
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def invalidate(self, id_usuario=None, id_empresa=None):
+        """Elimina las entradas del usuario y/o de todos los usuarios de la empresa."""
+        removed = 0
+        with self._lock:
+            for key in list(self._data.keys()):
+                usuario = self._data[key][2]
+                if id_usuario is not None and usuario.id_usuario == id_usuario:
+                    del self._data[key]
+                    removed += 1
+                elif id_empresa is not None and usuario.id_empresa_id == id_empresa:
+                    del self._data[key]
+                    removed += 1
+        return removed
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_ratio': round(self.hits / total, 4) if total else 0.0,
+                'entries': len(self._data),
+                'max_entries': self.max_entries,
+                'ttl_seconds': self.ttl_seconds,
+            }
+
+
+token_user_cache = _TokenUserCache(JWT_AUTH_CACHE_MAX_ENTRIES, JWT_AUTH_CACHE_TTL_SECONDS, JWT_AUTH_CACHE_LOG_EVERY)
+
+
+def invalidar_cache_usuario(id_usuario):
+    """Llamar cuando cambie estado, rol o empresa de un usuario."""
+    return token_user_cache.invalidate(id_usuario=id_usuario)
+
+
+def invalidar_cache_empresa(id_empresa):
+    """Llamar cuando cambien los datos de una empresa (afecta a todos sus usuarios)."""
+    return token_user_cache.invalidate(id_empresa=id_empresa)
+
+
+# ---------------------------
+# Versión de token por usuario (revocación)
+# ---------------------------
+# Los access tokens llevan `tv`, la versión guardada en usuarios.version_token:
+# al subirla, todos los access tokens emitidos antes dejan de valer. La BD es la
+# fuente (sobrevive reinicios y es la misma para todos los procesos); la cache de
+# Django sólo evita leerla en cada request, por TOKEN_VERSION_CACHE_SECONDS.
+# Con varios procesos CACHES debe apuntar a un backend compartido (ver checks.py):
+# si no, otro proceso puede aceptar un token revocado hasta que venza su entrada.
+TOKEN_VERSION_CACHE_PREFIX = 'jwt_tv'
+TOKEN_VERSION_CACHE_SECONDS = getattr(settings, 'TOKEN_VERSION_CACHE_SECONDS', 300)
+ACCESS_TOKEN_HORAS = 2
+
+
+def _token_version_key(id_usuario):
+    return f"{TOKEN_VERSION_CACHE_PREFIX}:{id_usuario}"
+
+
+def version_token_usuario(id_usuario):
+    """Versión vigente de los tokens del usuario, o None si el usuario no existe."""
+    key = _token_version_key(id_usuario)
+    version = cache.get(key)
+    if version is None:
+        version = Usuario.objects.filter(pk=id_usuario).values_list('version_token', flat=True).first()
+        if version is not None:
+            cache.set(key, version, timeout=TOKEN_VERSION_CACHE_SECONDS)
+    return version
+
+
+def revocar_tokens_usuario(id_usuario):
+    """
+    Invalida todos los access tokens vigentes del usuario (desactivación, cambio
+    de rol, borrado). El refresh token sigue sirviendo si el usuario está activo
+    y emite un access token con los claims actualizados.
+    """
+    key = _token_version_key(id_usuario)
+    Usuario.objects.filter(pk=id_usuario).update(version_token=F('version_token') + 1)
+    version = Usuario.objects.filter(pk=id_usuario).values_list('version_token', flat=True).first()
+    if version is None:
+        cache.delete(key)
+    else:
+        cache.set(key, version, timeout=TOKEN_VERSION_CACHE_SECONDS)
+    # un request que leyó la versión anterior antes del commit no debe dejarla en cache
+    transaction.on_commit(lambda: cache.delete(key))
+    invalidar_cache_usuario(id_usuario)
+    return version
+
+
+def construir_payload_acceso(usuario, now=None):
+    """Payload del access token: identidad + claims de empresa/rol/estado + versión."""
+    now = now or timezone.now()
+    exp = now + timedelta(hours=ACCESS_TOKEN_HORAS)
+    return {
+        'id_usuario': usuario.id_usuario,
+        'correo': usuario.correo,
+        'id_empresa': usuario.id_empresa_id,
+        'id_permiso_acceso': usuario.id_permiso_acceso_id,
+        'id_estado': usuario.id_estado_id,
+        'tv': version_token_usuario(usuario.id_usuario),
+        'type': 'access',
+        'exp': int(exp.timestamp()),
+        'iat': int(now.timestamp()),
+    }
+
+
+# ---------------------------
+# Identidad resuelta una sola vez por petición
+# ---------------------------
+# Todas las vistas (DRF o no) leen de aquí: como máximo un jwt.decode y una
+# consulta a Usuario por request. Con los claims de empresa/rol/estado en el
+# token, las lecturas filtradas por empresa no necesitan consultar Usuario.
+IDENTIDAD_ATTR = '_dataflow_identidad'
+
+# unión de los select_related que usaban los distintos helpers de views.py
+USUARIO_SELECT_RELATED = (
+    'id_empresa__id_categoria',
+    'id_empresa__id_plan',
+    'id_empresa__id_estado',
+    'id_permiso_acceso',
+    'id_estado',
+    'id_area',
+)
+
+CLAIMS_IDENTIDAD = ('id_usuario', 'id_empresa', 'id_permiso_acceso', 'id_estado')
+
+
+class Identidad:
+    """
+    Resultado de autenticar una petición: token crudo, payload decodificado y
+    usuario (con empresa, rol y estado ya cargados). Si el token trae los claims
+    de tenant, el Usuario sólo se consulta cuando una vista lo pide. Los brokers
+    se cargan bajo demanda y quedan memorizados para el resto de la petición.
+    """
+
+    def __init__(self, token, payload, usuario=None, cache_key=None):
+        self.token = token
+        self.payload = payload
+        self._usuario = usuario
+        self._cache_key = cache_key
+        self._brokers = None
+
+    @property
+    def tiene_claims(self):
+        return all(self.payload.get(c) is not None for c in CLAIMS_IDENTIDAD)
+
+    @property
+    def usuario(self):
+        if self._usuario is None:
+            usuario = _cargar_usuario(self.payload)
+            if self._cache_key:
+                token_user_cache.set(self._cache_key, self.payload, usuario, token_exp=self.payload.get('exp'))
+            # compatibilidad mínima: setear is_authenticated (DRF y librerías pueden esperarlo)
+            setattr(usuario, 'is_authenticated', True)
+            self._usuario = usuario
+        return self._usuario
+
+    def _claim(self, nombre, atributo):
+        valor = self.payload.get(nombre)
+        if valor is not None and self._usuario is None:
+            return int(valor)
+        return getattr(self.usuario, atributo)
+
+    @property
+    def id_usuario(self):
+        return self._claim('id_usuario', 'id_usuario')
+
+    @property
+    def id_empresa(self):
+        return self._claim('id_empresa', 'id_empresa_id')
+
+    @property
+    def id_permiso_acceso(self):
+        return self._claim('id_permiso_acceso', 'id_permiso_acceso_id')
+
+    @property
+    def id_estado(self):
+        return self._claim('id_estado', 'id_estado_id')
+
+    @property
+    def empresa(self):
+        return self.usuario.id_empresa
+
+    @property
+    def brokers(self):
+        if self._brokers is None:
+            brokers = list(UsuariosBrokers.objects.filter(id_usuario_id=self.id_usuario).order_by('id_broker'))
+            if self._usuario is not None:
+                for broker in brokers:
+                    # el usuario ya está cargado: evita un query por broker al serializar
+                    broker.id_usuario = self._usuario
+            self._brokers = brokers
+        return self._brokers
+
+    @property
+    def broker_ids(self):
+        return [b.id_broker for b in self.brokers]
+
+    @property
+    def broker(self):
+        brokers = self.brokers
+        return brokers[0] if brokers else None
+
+
+class UsuarioToken(SimpleLazyObject):
+    """
+    request.user perezoso: id_usuario / id_empresa_id / id_permiso_acceso_id /
+    id_estado_id salen de los claims del token; cualquier otro atributo carga el
+    Usuario completo (una sola consulta, compartida con la Identidad).
+    """
+    is_authenticated = True
+    is_anonymous = False
+
+    def __init__(self, identidad):
+        super().__init__(lambda: identidad.usuario)
+        self.__dict__['_identidad'] = identidad
+
+    def __bool__(self):
+        return True
+
+    @property
+    def id_usuario(self):
+        return self.__dict__['_identidad'].id_usuario
+
+    @property
+    def pk(self):
+        return self.__dict__['_identidad'].id_usuario
+
+    @property
+    def id_empresa_id(self):
+        return self.__dict__['_identidad'].id_empresa
+
+    @property
+    def id_permiso_acceso_id(self):
+        return self.__dict__['_identidad'].id_permiso_acceso
+
+    @property
+    def id_estado_id(self):
+        return self.__dict__['_identidad'].id_estado
+
+
+# códigos de los AuthenticationFailed de resolver_identidad (ver codigo_error)
+SIN_TOKEN = 'sin_token'
+TOKEN_EXPIRADO = 'token_expirado'
+TOKEN_INVALIDO = 'token_invalido'
+TOKEN_REVOCADO = 'token_revocado'
+USUARIO_NO_ENCONTRADO = 'usuario_no_encontrado'
+CLAIMS_INCOMPLETOS = 'claims_incompletos'
+
+
+def codigo_error(exc):
+    """Código del AuthenticationFailed (SIN_TOKEN, TOKEN_EXPIRADO, ...)."""
+    return exc.get_codes()
+
+
+def respuesta_error_token(exc, mensajes=None, estados=None):
+    """
+    Response para un AuthenticationFailed de resolver_identidad. `mensajes` y
+    `estados` ({código: valor}) permiten a cada vista conservar su texto y su
+    status; por defecto se devuelve el mensaje original con 401.
+    """
+    codigo = codigo_error(exc)
+    mensaje = (mensajes or {}).get(codigo, str(exc.detail))
+    estado = (estados or {}).get(codigo, status.HTTP_401_UNAUTHORIZED)
+    return Response({'error': mensaje}, status=estado)
+
+
+def id_usuario_o_error(request):
+    """(id_usuario, None) si el token es válido; (None, Response 401) si no."""
+    try:
+        return resolver_identidad(request).id_usuario, None
+    except AuthenticationFailed as e:
+        return None, respuesta_error_token(e, {
+            SIN_TOKEN: 'Token no enviado',
+            CLAIMS_INCOMPLETOS: 'Token inválido (sin id_usuario)',
+        })
+
+
+def _django_request(request):
+    # rest_framework.request.Request envuelve al HttpRequest en `_request`
+    return getattr(request, '_request', request)
+
+
+def extraer_token(request):
+    """
+    Devuelve el token del header Authorization ('Bearer <t>' o '<t>' a secas,
+    como aceptaban los helpers antiguos) o '' si no viene.
+    """
+    auth = _django_request(request).META.get('HTTP_AUTHORIZATION', '')
+    if not auth:
+        return ''
+    parts = auth.split()
+    if not parts:
+        return ''
+    if parts[0].lower() == 'bearer':
+        return parts[1] if len(parts) > 1 else ''
+    return parts[-1]
+
+
+def _cargar_usuario(payload):
+    user_ident = payload.get('user_id') or payload.get('id_usuario') or payload.get('sub')
+    email = payload.get('email') or payload.get('correo')
+    qs = Usuario.objects.select_related(*USUARIO_SELECT_RELATED)
+
+    if user_ident:
+        try:
+            user_ident_int = int(user_ident)
         except Exception:
-            raise AuthenticationFailed('Formato de token inválido')
+            user_ident_int = user_ident
+        try:
+            return qs.get(id_usuario=user_ident_int)
+        except Usuario.DoesNotExist:
+            raise AuthenticationFailed('Usuario no encontrado', code=USUARIO_NO_ENCONTRADO)
+    elif email:
+        try:
+            return qs.get(correo=email)
+        except Usuario.DoesNotExist:
+            raise AuthenticationFailed('Usuario no encontrado', code=USUARIO_NO_ENCONTRADO)
+    raise AuthenticationFailed('Claims del token incompletos', code=CLAIMS_INCOMPLETOS)
 
+
+def _verificar_version(payload):
+    # tokens sin `tv` (emitidos antes de los claims) expiran solos en <= 2h
+    if payload.get('tv') is None or payload.get('id_usuario') is None:
+        return
+    # usuario inexistente = versión desconocida: se rechaza
+    if int(payload['tv']) != version_token_usuario(payload['id_usuario']):
+        raise AuthenticationFailed('Token revocado', code=TOKEN_REVOCADO)
+
+
+def resolver_identidad(request, token=None):
+    """
+    Devuelve la Identidad de la petición, resolviéndola si todavía no existe.
+    Lanza AuthenticationFailed ('No se proporcionó token', 'Token expirado',
+    'Token inválido', 'Token revocado', 'Usuario no encontrado', ...) si algo falla;
+    el motivo está en `codigo_error(e)`, no hace falta comparar el texto.
+    """
+    django_request = _django_request(request)
+    identidad = getattr(django_request, IDENTIDAD_ATTR, None)
+    if identidad is not None:
+        return identidad
+
+    if token is None:
+        token = extraer_token(request)
+    if not token:
+        raise AuthenticationFailed('No se proporcionó token', code=SIN_TOKEN)
+
+    # token ya verificado en este worker: ni decode ni query
+    cache_key = token_user_cache.key_for(token)
+    cached = token_user_cache.get(cache_key)
+    if cached is not None:
+        payload, usuario = cached
+        setattr(usuario, 'is_authenticated', True)
+        _verificar_version(payload)
+        identidad = Identidad(token, payload, usuario=usuario, cache_key=cache_key)
+    else:
         try:
             payload = jwt.decode(token, settings.SECRET_KEY, algorithms=['HS256'])
         except jwt.ExpiredSignatureError:
-            raise AuthenticationFailed('Token expirado')
+            raise AuthenticationFailed('Token expirado', code=TOKEN_EXPIRADO)
         except jwt.InvalidTokenError:
-            raise AuthenticationFailed('Token inválido')
+            raise AuthenticationFailed('Token inválido', code=TOKEN_INVALIDO)
+        _verificar_version(payload)
+        identidad = Identidad(token, payload, cache_key=cache_key)
+        if not identidad.tiene_claims:
+            # token antiguo: sin claims de tenant hay que cargar el usuario ya
+            identidad.usuario
 
-        # buscar claim con id de usuario o email
-        user_ident = payload.get('user_id') or payload.get('id_usuario') or payload.get('sub')
-        email = payload.get('email') or payload.get('correo')
+    setattr(django_request, IDENTIDAD_ATTR, identidad)
+    return identidad
 
-        if user_ident:
-            try:
-                user_ident_int = int(user_ident)
-            except Exception:
-                user_ident_int = user_ident
-            try:
-                usuario = Usuario.objects.select_related('id_empresa', 'id_permiso_acceso', 'id_estado').get(id_usuario=user_ident_int)
-            except Usuario.DoesNotExist:
-                raise AuthenticationFailed('Usuario no encontrado')
-        elif email:
-            try:
-                usuario = Usuario.objects.select_related('id_empresa', 'id_permiso_acceso', 'id_estado').get(correo=email)
-            except Usuario.DoesNotExist:
-                raise AuthenticationFailed('Usuario no encontrado')
-        else:
-            raise AuthenticationFailed('Claims del token incompletos')
 
-        # compatibilidad mínima: setear is_authenticated (DRF y librerías pueden esperarlo)
-        setattr(usuario, 'is_authenticated', True)
-        return (usuario, token)
+class JWTAuthentication(BaseAuthentication):
+    """
+    Decodifica Bearer JWT y devuelve (user, token) donde user es instancia de Usuario
+    (o un UsuarioToken perezoso si el token trae los claims de empresa/rol/estado).
+    Si no hay Authorization header, devuelve None para que DRF pruebe otras autenticaciones.
+    La Identidad resuelta queda en el request para que las vistas no vuelvan a decodificar.
+    """
+    def authenticate(self, request):
+        auth = get_authorization_header(request).split()
+        if not auth or auth[0].lower() != b'bearer':
+            return None
+
+        try:
+            token = auth[1].decode('utf-8')
+        except Exception:
+            raise AuthenticationFailed('Formato de token inválido', code=TOKEN_INVALIDO)
+
+        identidad = resolver_identidad(request, token=token)
+        if identidad._usuario is None:
+            return (UsuarioToken(identidad), identidad.token)
+        return (identidad.usuario, identidad.token)
 
     def authenticate_header(self, request):
         return 'Bearer'
@@ -0,0 +1,141 @@
+# appdataflowai/cache_backends.py
+"""
+Backend de cache en proceso con presupuesto de memoria en bytes y expulsión LRU.
+
+LocMemCache de Django sólo limita por número de entradas (MAX_ENTRIES) y expulsa
+por tercios; para cachear cuerpos de respuesta de tamaño muy variable necesitamos
+un tope en bytes. Se configura como cualquier backend de CACHES:
+
+    'respuestas': {
+        'BACKEND': 'appdataflowai.cache_backends.LRUBytesCache',
+        'LOCATION': 'dataflow-respuestas',
+        'TIMEOUT': 300,
+        'OPTIONS': {'MAX_BYTES': 64 * 1024 * 1024},
+    }
+
+En producción el alias puede apuntar a Redis/Memcached (con su propia política
+de memoria, p. ej. maxmemory-policy allkeys-lru) sin tocar el código.
+"""
+import pickle
+import threading
+import time
+from collections import OrderedDict
+
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+
+# un store por LOCATION, compartido entre instancias del mismo proceso (como LocMemCache)
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+class _Store:
+
+    def __init__(self):
+        self.datos = OrderedDict()  # clave -> (expira_en, bytes)
+        self.total_bytes = 0
+        self.lock = threading.Lock()
+        self.expulsiones = 0
+
+
+class LRUBytesCache(BaseCache):
+    pickle_protocol = pickle.HIGHEST_PROTOCOL
+
+    def __init__(self, name, params):
+        super().__init__(params)
+        options = params.get('OPTIONS', {})
+        self.max_bytes = int(options.get('MAX_BYTES', 64 * 1024 * 1024))
+        # una entrada no puede ocupar más que esta fracción del presupuesto
+        self.max_entry_bytes = int(options.get('MAX_ENTRY_BYTES', self.max_bytes // 4))
+        with _stores_lock:
+            self._store = _stores.setdefault(name, _Store())
+
+    # --- internos (llamar con el lock tomado) ---
+
+    def _eliminar(self, key):
+        item = self._store.datos.pop(key, None)
+        if item is not None:
+            self._store.total_bytes -= len(item[1])
+
+    def _vigente(self, key):
+        item = self._store.datos.get(key)
+        if item is None:
+            return None
+        expira_en, _ = item
+        if expira_en is not None and expira_en <= time.time():
+            self._eliminar(key)
+            return None
+        return item
+
+    def _guardar(self, key, value, timeout):
+        raw = pickle.dumps(value, self.pickle_protocol)
+        if len(raw) > self.max_entry_bytes:
+            # demasiado grande para cachear sin vaciar medio cache
+            self._eliminar(key)
+            return False
+        self._eliminar(key)
+        self._store.datos[key] = (self.get_backend_timeout(timeout), raw)
+        self._store.total_bytes += len(raw)
+        while self._store.total_bytes > self.max_bytes and self._store.datos:
+            _, (_, viejo) = self._store.datos.popitem(last=False)
+            self._store.total_bytes -= len(viejo)
+            self._store.expulsiones += 1
+        return True
+
+    # --- API de BaseCache ---
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        with self._store.lock:
+            if self._vigente(key) is not None:
+                return False
+            return self._guardar(key, value, timeout)
+
+    def get(self, key, default=None, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        with self._store.lock:
+            item = self._vigente(key)
+            if item is None:
+                return default
+            self._store.datos.move_to_end(key)
+            raw = item[1]
+        return pickle.loads(raw)
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        with self._store.lock:
+            self._guardar(key, value, timeout)
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        with self._store.lock:
+            item = self._vigente(key)
+            if item is None:
+                return False
+            self._store.datos[key] = (self.get_backend_timeout(timeout), item[1])
+            return True
+
+    def delete(self, key, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        with self._store.lock:
+            existia = key in self._store.datos
+            self._eliminar(key)
+            return existia
+
+    def has_key(self, key, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        with self._store.lock:
+            return self._vigente(key) is not None
+
+    def clear(self):
+        with self._store.lock:
+            self._store.datos.clear()
+            self._store.total_bytes = 0
+
+    def stats(self):
+        with self._store.lock:
+            return {
+                'entradas': len(self._store.datos),
+                'bytes': self._store.total_bytes,
+                'max_bytes': self.max_bytes,
+                'expulsiones': self._store.expulsiones,
+            }
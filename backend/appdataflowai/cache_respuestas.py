@@ -0,0 +1,91 @@
+# appdataflowai/cache_respuestas.py
+"""
+Cache de cuerpos de respuesta de los GET pesados de dashboards.
+
+La clave es (empresa, ruta completa con query params, media type negociado,
+versiones de los datasets de versiones_dataset.py); cualquier escritura sube la
+versión, así que no hay invalidación explícita: las entradas viejas dejan de
+pedirse y las expulsa el LRU o el TIMEOUT.
+
+El backend es el alias RESPONSE_CACHE_ALIAS de CACHES ('respuestas'): en
+desarrollo appdataflowai.cache_backends.LRUBytesCache (presupuesto en bytes),
+en producción un store compartido (Redis / Memcached).
+Un hit devuelve los bytes ya renderizados: ni consulta ni serializer de DRF.
+"""
+import hashlib
+import logging
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import InvalidCacheBackendError, caches
+from django.http import HttpResponse
+from rest_framework import status
+from rest_framework.response import Response
+
+from .versiones_dataset import empresa_del_token, versiones_datasets
+
+logger = logging.getLogger(__name__)
+
+RESPONSE_CACHE_ALIAS = getattr(settings, 'RESPONSE_CACHE_ALIAS', 'respuestas')
+RESPONSE_CACHE_TIMEOUT = getattr(settings, 'RESPONSE_CACHE_TIMEOUT', 300)
+RESPONSE_CACHE_PREFIX = 'resp'
+
+
+def _backend():
+    try:
+        return caches[RESPONSE_CACHE_ALIAS]
+    except InvalidCacheBackendError:
+        return None
+
+
+def clave_respuesta(request, empresa_id, models):
+    versiones = versiones_datasets(empresa_id, models)
+    base = '|'.join([
+        str(empresa_id),
+        ','.join(f'{m._meta.label_lower}={v}' for m, v in zip(models, versiones)),
+        request.get_full_path(),
+        getattr(request, 'accepted_media_type', '') or '',
+    ])
+    return f"{RESPONSE_CACHE_PREFIX}:{hashlib.sha1(base.encode('utf-8')).hexdigest()}"
+
+
+def cache_respuesta(*models, empresa=empresa_del_token):
+    """
+    Decorador para el `get` (o `list`) de una vista. Mismo contrato que
+    versiones_dataset.etag_dataset: `empresa` es callable(request) o id fijo.
+    Sólo se cachean respuestas 200.
+    """
+    def decorador(metodo):
+        @wraps(metodo)
+        def envoltura(self, request, *args, **kwargs):
+            backend = _backend()
+            empresa_id = empresa(request) if callable(empresa) else empresa
+            if backend is None or (empresa_id is None and callable(empresa)):
+                return metodo(self, request, *args, **kwargs)
+
+            clave = clave_respuesta(request, empresa_id, models)
+            try:
+                guardado = backend.get(clave)
+            except Exception:
+                logger.exception("Error leyendo cache de respuestas")
+                guardado = None
+            if guardado is not None:
+                cuerpo, content_type = guardado
+                return HttpResponse(cuerpo, content_type=content_type, status=status.HTTP_200_OK)
+
+            respuesta = metodo(self, request, *args, **kwargs)
+            if not isinstance(respuesta, Response) or respuesta.status_code != status.HTTP_200_OK:
+                return respuesta
+
+            # renderizar aquí (lo mismo que haría finalize_response) para guardar los bytes
+            respuesta.accepted_renderer = request.accepted_renderer
+            respuesta.accepted_media_type = request.accepted_media_type
+            respuesta.renderer_context = self.get_renderer_context()
+            respuesta.render()
+            try:
+                backend.set(clave, (respuesta.content, respuesta['Content-Type']), RESPONSE_CACHE_TIMEOUT)
+            except Exception:
+                logger.exception("Error guardando en cache de respuestas")
+            return respuesta
+        return envoltura
+    return decorador
@@ -0,0 +1,304 @@
+# appdataflowai/carga_masiva.py
+"""
+Carga masiva de filas con COPY FROM STDIN en PostgreSQL.
+
+Para tablas de hechos grandes (VentasBluetti, VentasSelloutBluetti,
+InventariosBluetti, VentasBelkin, InventariosBelkin, conetcom_trafico_consumo)
+`bulk_create` gasta la mayor parte del tiempo armando instancias y SQL. Aquí
+las filas se normalizan en una sola pasada (generador, sin instancias), se
+copian como CSV a una tabla temporal y se pasan a la tabla destino con un
+INSERT ... SELECT (o ON CONFLICT ... DO UPDATE si hay clave de conflicto),
+todo dentro de la transacción de la vista:
+
+    carga = CargaMasiva(VentasBluetti, CAMPOS)
+    carga.copiar(carga.normalizar(fila) for fila in filas_validas())
+    if errores:
+        return Response(...)            # la tabla temporal se descarta en el commit
+    creados, actualizados = carga.insertar(empresa_id=...)
+
+Fuera de PostgreSQL (SQLite en desarrollo) o con CARGA_COPY_HABILITADA=False
+se usa bulk_create por lotes con el mismo resultado.
+"""
+import datetime as dt
+import itertools
+import uuid
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db import DEFAULT_DB_ALIAS, connections, models
+from django.db.transaction import TransactionManagementError
+
+from .versiones_dataset import marcar_dataset_modificado
+
+CARGA_COPY_HABILITADA = getattr(settings, 'CARGA_COPY_HABILITADA', True)
+CARGA_BATCH_SIZE = getattr(settings, 'IMPORTACION_BATCH_SIZE', 1000)
+# bytes de CSV por trozo entregado al COPY
+CARGA_COPY_BUFFER_BYTES = 256 * 1024
+
+
+def _es_nulo(valor):
+    if valor is None:
+        return True
+    try:
+        # NaN / NaT de pandas: distintos de sí mismos
+        return bool(valor != valor)
+    except TypeError:
+        # pd.NA
+        return True
+
+
+def _celda_csv(valor):
+    """Todo lo no nulo va entre comillas: así '' no se confunde con NULL en COPY ... CSV."""
+    if valor is None:
+        return ''
+    if isinstance(valor, dt.timedelta):
+        valor = f'{valor.total_seconds()} seconds'
+    return '"' + str(valor).replace('"', '""') + '"'
+
+
+class _LectorCSV:
+    """Objeto tipo archivo sobre un iterable de líneas, para cursor.copy_expert()."""
+
+    def __init__(self, lineas):
+        self._lineas = iter(lineas)
+        self._pendiente = ''
+
+    def read(self, size=-1):
+        partes = [self._pendiente]
+        tamano = len(self._pendiente)
+        for linea in self._lineas:
+            partes.append(linea)
+            tamano += len(linea)
+            if 0 < size <= tamano:
+                break
+        texto = ''.join(partes)
+        if size > 0:
+            texto, self._pendiente = texto[:size], texto[size:]
+        else:
+            self._pendiente = ''
+        return texto
+
+
+class CargaMasiva:
+    """
+    Carga en `modelo`. `campos` son attnames ('canal_id', 'id_empresa_id'...);
+    por defecto todos los campos concretos salvo el AutoField. Con `conflicto`
+    (campo único) las filas que ya existen se actualizan; si el archivo repite
+    una clave gana la última fila.
+    """
+
+    def __init__(self, modelo, campos=None, conflicto=None, using=DEFAULT_DB_ALIAS):
+        self.modelo = modelo
+        if campos is None:
+            campos = [
+                f.attname for f in modelo._meta.concrete_fields
+                if not isinstance(f, models.AutoField)
+            ]
+        self.campos = list(campos)
+        self.conflicto = conflicto
+        self.using = using
+        self.connection = connections[using]
+        self.usa_copy = CARGA_COPY_HABILITADA and self.connection.vendor == 'postgresql'
+        self._fields = [modelo._meta.get_field(campo) for campo in self.campos]
+        self._staging = None
+        self._filas = []
+        self.copiadas = 0
+
+    # -------------------------
+    # Normalización
+    # -------------------------
+
+    def normalizar(self, valores):
+        """
+        dict campo -> valor crudo (celda de pandas) a tupla de valores Python en el
+        orden de `campos`; los campos ausentes toman su default del modelo, como
+        en bulk_create. Lanza ValidationError con el nombre del campo inválido.
+        """
+        fila = []
+        for campo, field in zip(self.campos, self._fields):
+            if campo not in valores and field.has_default():
+                valor = field.get_default()
+            else:
+                valor = valores.get(campo)
+            if _es_nulo(valor):
+                valor = None
+            else:
+                try:
+                    valor = field.to_python(valor)
+                except ValidationError as e:
+                    raise ValidationError(f'{campo}: {"; ".join(e.messages)}')
+            if valor is None and not field.null:
+                raise ValidationError(f'{campo}: es obligatorio')
+            fila.append(valor)
+        return tuple(fila)
+
+    def filas_de_columnas(self, columnas, mascara=None):
+        """
+        Tuplas para copiar() a partir de columnas ya convertidas en bloque:
+        Series de pandas alineadas o escalares fijos para todas las filas.
+        `mascara` elige las filas; los campos ausentes toman su default.
+        """
+        listas = []
+        hay_series = False
+        for campo, field in zip(self.campos, self._fields):
+            if campo in columnas:
+                valor = columnas[campo]
+            else:
+                valor = field.get_default() if field.has_default() else None
+            if not hasattr(valor, 'tolist'):
+                listas.append(itertools.repeat(valor))
+                continue
+            hay_series = True
+            if mascara is not None:
+                valor = valor[mascara]
+            # float de pandas (NaN en la columna) a int para columnas enteras
+            entero = isinstance(getattr(field, 'target_field', field), models.IntegerField)
+            listas.append([
+                None if _es_nulo(v) else (int(v) if entero and isinstance(v, float) else v)
+                for v in valor.tolist()
+            ])
+        if not hay_series:
+            return iter(())
+        return zip(*listas)
+
+    # -------------------------
+    # Carga
+    # -------------------------
+
+    def copiar(self, filas):
+        """Carga `filas` (tuplas de normalizar()) a la tabla temporal, o las guarda para bulk_create."""
+        if not self.usa_copy:
+            for fila in filas:
+                self._filas.append(fila)
+                self.copiadas += 1
+            return self.copiadas
+
+        if not self.connection.in_atomic_block:
+            raise TransactionManagementError('CargaMasiva con COPY requiere transaction.atomic()')
+
+        qn = self.connection.ops.quote_name
+        columnas = ', '.join(qn(f.column) for f in self._fields)
+        if self._staging is None:
+            self._staging = f'carga_{uuid.uuid4().hex[:12]}'
+            with self.connection.cursor() as cursor:
+                cursor.execute(
+                    f'CREATE TEMP TABLE {qn(self._staging)} ON COMMIT DROP AS '
+                    f'SELECT {columnas} FROM {qn(self.modelo._meta.db_table)} WITH NO DATA'
+                )
+                # orden del archivo, para quedarse con la última fila de cada clave
+                cursor.execute(f'ALTER TABLE {qn(self._staging)} ADD COLUMN _fila bigserial')
+
+        sql = f'COPY {qn(self._staging)} ({columnas}) FROM STDIN WITH (FORMAT csv)'
+        with self.connection.cursor() as cursor:
+            crudo = cursor.cursor
+            if hasattr(crudo, 'copy_expert'):
+                # psycopg2
+                crudo.copy_expert(sql, _LectorCSV(self._lineas(filas)), size=CARGA_COPY_BUFFER_BYTES)
+            else:
+                # psycopg 3
+                with crudo.copy(sql) as copy:
+                    for trozo in self._trozos(self._lineas(filas)):
+                        copy.write(trozo)
+        return self.copiadas
+
+    def _lineas(self, filas):
+        prep = [
+            (lambda v, f=field: f.get_db_prep_save(v, self.connection))
+            for field in self._fields
+        ]
+        for fila in filas:
+            self.copiadas += 1
+            yield ','.join(
+                _celda_csv(None if valor is None else p(valor))
+                for p, valor in zip(prep, fila)
+            ) + '\n'
+
+    @staticmethod
+    def _trozos(lineas):
+        buffer = []
+        tamano = 0
+        for linea in lineas:
+            buffer.append(linea)
+            tamano += len(linea)
+            if tamano >= CARGA_COPY_BUFFER_BYTES:
+                yield ''.join(buffer)
+                buffer = []
+                tamano = 0
+        if buffer:
+            yield ''.join(buffer)
+
+    def insertar(self, empresa_id=None):
+        """Pasa las filas copiadas a la tabla destino. Retorna (insertadas, actualizadas)."""
+        if self.usa_copy:
+            insertadas, actualizadas = self._insertar_select()
+        else:
+            insertadas, actualizadas = self._insertar_bulk()
+        if insertadas or actualizadas:
+            marcar_dataset_modificado(self.modelo, empresa_id, using=self.using)
+        return insertadas, actualizadas
+
+    def _insertar_select(self):
+        if self._staging is None:
+            return 0, 0
+        qn = self.connection.ops.quote_name
+        tabla = qn(self.modelo._meta.db_table)
+        staging = qn(self._staging)
+        columnas = [qn(f.column) for f in self._fields]
+        lista = ', '.join(columnas)
+
+        with self.connection.cursor() as cursor:
+            if not self.conflicto:
+                cursor.execute(f'INSERT INTO {tabla} ({lista}) SELECT {lista} FROM {staging}')
+                return cursor.rowcount, 0
+
+            clave = qn(self.modelo._meta.get_field(self.conflicto).column)
+            actualizar = ', '.join(f'{c} = EXCLUDED.{c}' for c in columnas if c != clave)
+            accion = f'DO UPDATE SET {actualizar}' if actualizar else 'DO NOTHING'
+            # xmax = 0 sólo en filas recién insertadas
+            cursor.execute(
+                f'WITH r AS ('
+                f' INSERT INTO {tabla} ({lista})'
+                f' SELECT DISTINCT ON ({clave}) {lista} FROM {staging} ORDER BY {clave}, _fila DESC'
+                f' ON CONFLICT ({clave}) {accion}'
+                f' RETURNING (xmax = 0) AS insertada'
+                f') SELECT count(*) FILTER (WHERE insertada), count(*) FILTER (WHERE NOT insertada) FROM r'
+            )
+            insertadas, actualizadas = cursor.fetchone()
+            return insertadas, actualizadas
+
+    def _insertar_bulk(self):
+        if not self._filas:
+            return 0, 0
+        manager = self.modelo._base_manager.using(self.using)
+
+        if not self.conflicto:
+            objs = [self.modelo(**dict(zip(self.campos, fila))) for fila in self._filas]
+            manager.bulk_create(objs, batch_size=CARGA_BATCH_SIZE)
+            self._filas = []
+            return len(objs), 0
+
+        # la última fila de cada clave gana, como en el camino COPY
+        posicion = self.campos.index(self.conflicto)
+        por_clave = {fila[posicion]: fila for fila in self._filas}
+        claves = list(por_clave)
+        existentes = set()
+        for i in range(0, len(claves), CARGA_BATCH_SIZE):
+            existentes.update(
+                manager.filter(**{f'{self.conflicto}__in': claves[i:i + CARGA_BATCH_SIZE]})
+                .values_list(self.conflicto, flat=True)
+            )
+        objs = [self.modelo(**dict(zip(self.campos, fila))) for fila in por_clave.values()]
+        actualizar = [
+            campo for campo, field in zip(self.campos, self._fields)
+            if campo != self.conflicto and not field.primary_key
+        ]
+        manager.bulk_create(
+            objs,
+            batch_size=CARGA_BATCH_SIZE,
+            update_conflicts=bool(actualizar),
+            ignore_conflicts=not actualizar,
+            unique_fields=[self.conflicto] if actualizar else None,
+            update_fields=actualizar or None,
+        )
+        self._filas = []
+        return len(claves) - len(existentes), len(existentes)
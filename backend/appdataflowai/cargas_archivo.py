@@ -0,0 +1,234 @@
+# appdataflowai/cargas_archivo.py
+"""
+Subida por partes (reanudable) de archivos grandes de importación.
+
+Los CSV / Excel de sell-out anuales (80-200 MB) no caben en un multipart normal
+ni conviene tenerlos en memoria. El cliente los sube en partes de tamaño fijo:
+
+    POST   importaciones/cargas/                        {nombre_archivo, tamano_total, tamano_parte?, sha256?}
+    PUT    importaciones/cargas/<codigo>/partes/<n>/    cuerpo binario de la parte n (desde 0)
+    GET    importaciones/cargas/<codigo>/               partes recibidas / faltantes (para reanudar)
+    POST   importaciones/cargas/<codigo>/completar/     verifica tamaño y sha256
+
+Cada parte se escribe directo en su posición del archivo en disco (CARGAS_DIR),
+leyendo el cuerpo del request por bloques; una parte cortada no queda marcada y
+basta con reenviarla. Completada la carga, cualquier vista de importación acepta
+`id_carga` en lugar del archivo: el trabajo guarda la ruta y el worker lee del
+disco (ver ImportacionEnSegundoPlanMixin).
+
+Las cargas con más de CARGA_EXPIRACION_HORAS se borran con
+`python manage.py limpiar_cargas`, salvo las que un trabajo de importación
+pendiente o en proceso todavía va a leer.
+"""
+import hashlib
+import os
+import tempfile
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files import File
+from django.db import transaction
+from django.utils import timezone
+
+from .models import CargaArchivo, TrabajoImportacion
+
+CARGAS_DIR = getattr(settings, 'CARGAS_DIR', os.path.join(tempfile.gettempdir(), 'dataflowai_cargas'))
+CARGA_MAX_BYTES = getattr(settings, 'CARGA_MAX_BYTES', 1024 * 1024 * 1024)
+CARGA_TAMANO_PARTE = getattr(settings, 'CARGA_TAMANO_PARTE', 8 * 1024 * 1024)
+CARGA_TAMANO_PARTE_MIN = 256 * 1024
+CARGA_TAMANO_PARTE_MAX = 64 * 1024 * 1024
+CARGA_EXPIRACION_HORAS = getattr(settings, 'CARGA_EXPIRACION_HORAS', 24)
+# bytes leídos por vuelta al copiar del request al disco / al calcular el hash
+CARGA_BLOQUE_BYTES = 1024 * 1024
+
+
+class ErrorCarga(Exception):
+    """Error de la subida por partes; `status` es el código HTTP a responder."""
+
+    def __init__(self, mensaje, status=400):
+        super().__init__(mensaje)
+        self.status = status
+
+
+class ArchivoCarga(File):
+    """El archivo ensamblado de una carga, abierto desde el disco (no tiene el límite de un multipart)."""
+
+    def __init__(self, ruta, nombre, sha256=None):
+        super().__init__(open(ruta, 'rb'), name=nombre)
+        self.ruta = ruta
+        # ya calculado al completar la carga: la deduplicación no vuelve a leer el archivo
+        self.sha256 = sha256
+
+
+def ruta_carga(carga):
+    return os.path.join(CARGAS_DIR, f'{carga.codigo}.carga')
+
+
+def serializar_carga(carga):
+    recibidas = set(carga.partes_recibidas)
+    return {
+        'id_carga': str(carga.codigo),
+        'nombre_archivo': carga.nombre_archivo,
+        'estado': carga.estado,
+        'tamano_total': carga.tamano_total,
+        'tamano_parte': carga.tamano_parte,
+        'total_partes': carga.total_partes,
+        'partes_recibidas': sorted(recibidas),
+        'partes_faltantes': [n for n in range(carga.total_partes) if n not in recibidas],
+        'sha256': carga.sha256 if carga.estado == CargaArchivo.ESTADO_COMPLETA else None,
+    }
+
+
+# -------------------------
+# Protocolo
+# -------------------------
+
+def iniciar_carga(usuario, nombre_archivo, tamano_total, tamano_parte=None, sha256=None):
+    nombre_archivo = os.path.basename(str(nombre_archivo or '').strip())
+    if not nombre_archivo:
+        raise ErrorCarga('nombre_archivo es obligatorio')
+    try:
+        tamano_total = int(tamano_total)
+        tamano_parte = int(tamano_parte or CARGA_TAMANO_PARTE)
+    except (TypeError, ValueError):
+        raise ErrorCarga('tamano_total y tamano_parte deben ser enteros')
+    if tamano_total <= 0:
+        raise ErrorCarga('tamano_total debe ser mayor que 0')
+    if tamano_total > CARGA_MAX_BYTES:
+        raise ErrorCarga(f'Archivo >{CARGA_MAX_BYTES // (1024 * 1024)}MB', status=413)
+    if not CARGA_TAMANO_PARTE_MIN <= tamano_parte <= CARGA_TAMANO_PARTE_MAX:
+        raise ErrorCarga(
+            f'tamano_parte debe estar entre {CARGA_TAMANO_PARTE_MIN} y {CARGA_TAMANO_PARTE_MAX} bytes'
+        )
+
+    carga = CargaArchivo.objects.create(
+        id_empresa_id=getattr(usuario, 'id_empresa_id', None),
+        id_usuario_id=getattr(usuario, 'id_usuario', None),
+        nombre_archivo=nombre_archivo,
+        tamano_total=tamano_total,
+        tamano_parte=tamano_parte,
+        sha256=(sha256 or '').strip().lower() or None,
+    )
+    os.makedirs(CARGAS_DIR, exist_ok=True)
+    # archivo disperso del tamaño final: cada parte se escribe en su posición
+    with open(ruta_carga(carga), 'wb') as destino:
+        destino.truncate(tamano_total)
+    return carga
+
+
+def obtener_carga(codigo, usuario):
+    """La carga `codigo` del usuario (o de su empresa). ErrorCarga 404 si no existe."""
+    carga = CargaArchivo.objects.filter(codigo=codigo).first()
+    if carga is None:
+        raise ErrorCarga('Carga no encontrada', status=404)
+    empresa = getattr(usuario, 'id_empresa_id', None)
+    if carga.id_empresa_id and carga.id_empresa_id != empresa:
+        raise ErrorCarga('Carga no encontrada', status=404)
+    return carga
+
+
+def recibir_parte(carga, numero, stream, longitud=None):
+    """
+    Copia la parte `numero` desde `stream` (el cuerpo del request) a su
+    posición en el archivo, por bloques. Reenviar una parte la sobrescribe.
+    """
+    if carga.estado != CargaArchivo.ESTADO_RECIBIENDO:
+        raise ErrorCarga('La carga ya fue completada', status=409)
+    if not 0 <= numero < carga.total_partes:
+        raise ErrorCarga(f'Parte fuera de rango (0..{carga.total_partes - 1})')
+
+    inicio = numero * carga.tamano_parte
+    esperados = min(carga.tamano_parte, carga.tamano_total - inicio)
+    if longitud is not None and longitud != esperados:
+        raise ErrorCarga(f'La parte {numero} debe tener {esperados} bytes (recibidos {longitud})')
+
+    escritos = 0
+    with open(ruta_carga(carga), 'r+b') as destino:
+        destino.seek(inicio)
+        while escritos < esperados:
+            bloque = stream.read(min(CARGA_BLOQUE_BYTES, esperados - escritos))
+            if not bloque:
+                break
+            destino.write(bloque)
+            escritos += len(bloque)
+    if escritos != esperados:
+        # conexión cortada: la parte queda sin marcar y se reenvía
+        raise ErrorCarga(f'La parte {numero} llegó incompleta ({escritos} de {esperados} bytes)')
+
+    with transaction.atomic():
+        # varias partes pueden llegar en paralelo: bloquear la fila al marcarla
+        carga = CargaArchivo.objects.select_for_update().get(pk=carga.pk)
+        if numero not in carga.partes_recibidas:
+            carga.partes_recibidas = sorted([*carga.partes_recibidas, numero])
+        carga.fecha_actualizacion = timezone.now()
+        carga.save(update_fields=['partes_recibidas', 'fecha_actualizacion'])
+    return carga
+
+
+def completar_carga(carga):
+    """Verifica que estén todas las partes y el sha256; deja la carga lista para importar."""
+    if carga.estado == CargaArchivo.ESTADO_COMPLETA:
+        return carga
+    faltantes = serializar_carga(carga)['partes_faltantes']
+    if faltantes:
+        raise ErrorCarga(f'Faltan partes: {faltantes[:20]}', status=409)
+    ruta = ruta_carga(carga)
+    if os.path.getsize(ruta) != carga.tamano_total:
+        raise ErrorCarga('El tamaño del archivo no coincide con tamano_total', status=409)
+
+    sha256 = hashlib.sha256()
+    with open(ruta, 'rb') as origen:
+        for bloque in iter(lambda: origen.read(CARGA_BLOQUE_BYTES), b''):
+            sha256.update(bloque)
+    calculado = sha256.hexdigest()
+    if carga.sha256 and carga.sha256 != calculado:
+        raise ErrorCarga('sha256 no coincide: reenviar las partes', status=409)
+
+    carga.sha256 = calculado
+    carga.estado = CargaArchivo.ESTADO_COMPLETA
+    carga.fecha_actualizacion = timezone.now()
+    carga.save(update_fields=['sha256', 'estado', 'fecha_actualizacion'])
+    return carga
+
+
+def abrir_carga(codigo, usuario):
+    """ArchivoCarga de una carga completada, para pasarla a una vista de importación."""
+    carga = obtener_carga(codigo, usuario)
+    if carga.estado != CargaArchivo.ESTADO_COMPLETA:
+        raise ErrorCarga('La carga no está completa', status=409)
+    ruta = ruta_carga(carga)
+    if not os.path.exists(ruta):
+        raise ErrorCarga('El archivo de la carga ya no está disponible', status=410)
+    return ArchivoCarga(ruta, carga.nombre_archivo, sha256=carga.sha256)
+
+
+def carga_en_uso(carga):
+    """True si un trabajo de importación pendiente o en proceso lee el archivo de la carga."""
+    return TrabajoImportacion.objects.filter(
+        ruta_archivo=ruta_carga(carga),
+        estado__in=(TrabajoImportacion.ESTADO_PENDIENTE, TrabajoImportacion.ESTADO_PROCESANDO),
+    ).exists()
+
+
+def eliminar_carga(carga):
+    if carga_en_uso(carga):
+        raise ErrorCarga('La carga está siendo importada; borrarla cuando termine el trabajo', status=409)
+    try:
+        os.remove(ruta_carga(carga))
+    except FileNotFoundError:
+        pass
+    carga.delete()
+
+
+def limpiar_cargas_vencidas(horas=CARGA_EXPIRACION_HORAS):
+    """Borra cargas (y sus archivos) sin actividad en `horas`. Devuelve cuántas borró."""
+    limite = timezone.now() - timedelta(hours=horas)
+    borradas = 0
+    for carga in CargaArchivo.objects.filter(fecha_actualizacion__lt=limite).iterator():
+        try:
+            eliminar_carga(carga)
+        except ErrorCarga:
+            # la lee un trabajo en cola: se borra en una pasada posterior
+            continue
+        borradas += 1
+    return borradas
@@ -0,0 +1,23 @@
+# appdataflowai/checks.py
+from django.core.checks import Tags, Warning, register
+
+from .versiones_dataset import cache_es_local
+
+
+@register(Tags.caches)
+def cache_default_compartido(app_configs, **kwargs):
+    """
+    Las versiones de dataset, la versión de token y los trabajos procesar_* se
+    comunican por el cache `default`: con LocMem cada worker de gunicorn
+    (WEB_CONCURRENCY o -w N) tendría los suyos. Es un aviso y no un error para
+    no bloquear migrate ni el resto de comandos.
+    """
+    if not cache_es_local():
+        return []
+    return [Warning(
+        "El cache default es LocMem: con varios workers las versiones de dataset (ETag / 304) "
+        "y la revocación de tokens no se comparten entre procesos.",
+        hint="Usar DatabaseCache (el default, tabla creada por la migración 0079), Redis o Memcached "
+             "en CACHE_BACKEND.",
+        id='appdataflowai.W001',
+    )]
@@ -0,0 +1,395 @@
+# appdataflowai/esquemas_importacion.py
+"""
+Motor de importación declarativo para los importadores masivos.
+
+Cada modelo destino declara un EsquemaImportacion: columnas del archivo, tipo,
+obligatoriedad, FKs a resolver contra la BD y clave de upsert. El motor hace el
+resto igual para todos:
+
+- conversión por columna (pd.to_numeric / pd.to_datetime ...), sin iterrows();
+- FKs resueltas con un merge contra las claves existentes (una consulta por FK);
+- errores 'Fila N: ...' con el primer fallo de cada fila, en el orden declarado;
+- escritura con CargaMasiva (COPY / INSERT ... ON CONFLICT, o bulk_create por lotes);
+- el archivo se lee y valida por trozos de IMPORTACION_CHUNK_FILAS filas
+  (lectura_archivos.leer_por_trozos: openpyxl read_only / read_csv chunksize);
+- modo simulación (dry_run: valida sin escribir) y métricas de tiempos;
+- con clave de upsert, las filas idénticas a la última importación no se
+  reescriben (huella por fila, ver historial_importaciones.py).
+
+Las vistas heredan ImportacionEsquemaView y sólo declaran `esquema` (y, si
+hace falta, `valores_fijos`, p. ej. la empresa del usuario).
+"""
+import itertools
+import time
+from dataclasses import dataclass, field
+
+import pandas as pd
+from django.conf import settings
+from django.db import transaction
+from rest_framework import status
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from .carga_masiva import CargaMasiva
+from .historial_importaciones import claves_sin_cambios, guardar_huellas
+from .importacion import columna_fecha, columna_numero, columna_texto, errores_por_fila
+from .lectura_archivos import leer_por_trozos
+from .trabajos_importacion import ImportacionEnSegundoPlanMixin, reporte_progreso
+
+IMPORTACION_CHUNK_FILAS = getattr(settings, 'IMPORTACION_CHUNK_FILAS', 50_000)
+IMPORTACION_MAX_ERRORES = 50
+
+TIPOS = ('texto', 'entero', 'decimal', 'fecha', 'fecha_hora', 'booleano', 'duracion')
+
+_VERDADEROS = {'1', 'true', 't', 'yes', 'y', 'si', 'sí'}
+_FALSOS = {'0', 'false', 'f', 'no', 'n'}
+
+
+class ErrorImportacion(Exception):
+    """Error que aborta la importación completa (responde 400 con el mensaje)."""
+
+
+@dataclass(frozen=True)
+class Referencia:
+    """FK: la celda debe existir en `modelo.clave` (por defecto la pk)."""
+    modelo: type
+    clave: str = 'pk'
+    filtro: dict = field(default_factory=dict)
+    mensaje: str = None
+
+
+@dataclass(frozen=True)
+class Columna:
+    """
+    `campo` es el attname del modelo ('id_cliente_id'); `fuentes` los
+    encabezados del archivo que lo alimentan (el primero no vacío gana; por
+    defecto el propio campo). `mensaje` admite {valor} con la celda original.
+    """
+    campo: str
+    tipo: str = 'texto'
+    fuentes: tuple = ()
+    requerida: bool = False
+    default: object = None
+    # False: una celda con valor no convertible queda en `default` en vez de ser error
+    estricta: bool = True
+    opciones: tuple = ()
+    referencia: Referencia = None
+    mensaje: str = None
+
+    def __post_init__(self):
+        if self.tipo not in TIPOS:
+            raise ValueError(f'Tipo de columna desconocido: {self.tipo}')
+
+    @property
+    def encabezados(self):
+        return self.fuentes or (self.campo,)
+
+    @property
+    def nombre(self):
+        return self.encabezados[0]
+
+
+@dataclass(frozen=True)
+class EsquemaImportacion:
+    modelo: type
+    columnas: tuple
+    # encabezados que deben venir en el archivo ('Columnas invalidas' si faltan)
+    requeridas: tuple = ()
+    # campo único para upsert; None = sólo inserta
+    clave: str = None
+    fijos: dict = field(default_factory=dict)
+
+    def faltantes(self, encabezados):
+        return [col for col in self.requeridas if col not in set(encabezados)]
+
+
+@dataclass
+class ResultadoImportacion:
+    insertadas: int = 0
+    actualizadas: int = 0
+    validas: int = 0
+    filas: int = 0
+    errores: list = field(default_factory=list)
+    filas_con_error: int = 0
+    metricas: dict = field(default_factory=dict)
+
+
+# -------------------------
+# Conversión por columna
+# -------------------------
+
+def _convertir(df, columna):
+    """Retorna (texto limpio, valores convertidos, máscara 'había valor pero no se pudo convertir')."""
+    texto = columna_texto(df, *columna.encabezados)
+    vacia = texto == ''
+
+    if columna.tipo == 'texto':
+        return texto, texto.where(~vacia, None), pd.Series(False, index=df.index)
+
+    # con una sola fuente se convierte la columna original (numérica / fecha de Excel)
+    origen = df if len(columna.encabezados) == 1 else texto.to_frame(columna.nombre)
+    if columna.tipo in ('entero', 'decimal'):
+        valores = columna_numero(origen, columna.nombre, entero=columna.tipo == 'entero')
+    elif columna.tipo in ('fecha', 'fecha_hora'):
+        valores = columna_fecha(origen, columna.nombre)
+        if columna.tipo == 'fecha':
+            valores = valores.dt.date.where(valores.notna(), None)
+    elif columna.tipo == 'booleano':
+        minusculas = texto.str.lower()
+        valores = pd.Series(None, index=df.index, dtype=object)
+        valores[minusculas.isin(_VERDADEROS)] = True
+        valores[minusculas.isin(_FALSOS)] = False
+    else:
+        valores = pd.to_timedelta(texto.where(~vacia), errors='coerce')
+
+    invalidos = valores.isna() & ~vacia
+    return texto, valores, invalidos
+
+
+def _mensaje(columna, texto, por_defecto):
+    mensaje = columna.mensaje or por_defecto
+    if '{valor}' in mensaje:
+        return texto.map(lambda valor: mensaje.format(valor=valor))
+    return mensaje
+
+
+def _claves_referencia(referencia):
+    """{clave como texto: pk} de la tabla referenciada, en una consulta."""
+    qs = referencia.modelo._base_manager.filter(**referencia.filtro)
+    if referencia.clave == 'pk':
+        return {str(pk): pk for pk in qs.values_list('pk', flat=True)}
+    return {str(clave): pk for clave, pk in qs.values_list(referencia.clave, 'pk')}
+
+
+def _resolver(texto, claves):
+    tabla = pd.DataFrame({'_pk': list(claves.values())}, index=pd.Index(list(claves), dtype=object))
+    resultado = texto.rename('_clave').to_frame().merge(tabla, left_on='_clave', right_index=True, how='left')
+    resultado.index = texto.index
+    return resultado['_pk']
+
+
+def _huellas_filas(esquema, convertidas, fijos, validas):
+    """{clave como texto: hash de 16 hex de la fila convertida} de las filas válidas."""
+    filas = pd.DataFrame(convertidas)[validas]
+    for campo, valor in sorted(fijos.items()):
+        filas[campo] = valor
+    hashes = pd.util.hash_pandas_object(filas.astype(str), index=False)
+    claves = filas[esquema.clave].astype(str)
+    return dict(zip(claves, (f'{h:016x}' for h in hashes)))
+
+
+def _validar_parte(esquema, df, referencias):
+    """Convierte y valida un trozo. Retorna (columnas convertidas, errores, máscara de válidas)."""
+    convertidas = {}
+    validaciones = []
+    pendientes = []
+    for columna in esquema.columnas:
+        texto, valores, invalidos = _convertir(df, columna)
+        vacia = texto == ''
+
+        if columna.default is not None:
+            relleno = vacia | (invalidos if not columna.estricta else False)
+            valores = valores.where(~relleno, columna.default)
+        elif not columna.estricta:
+            valores = valores.where(~invalidos, None)
+
+        if columna.requerida:
+            por_defecto = (
+                f'{columna.nombre} es obligatorio' if columna.tipo == 'texto' else f'{columna.nombre} invalido'
+            )
+            validaciones.append((valores.isna(), _mensaje(columna, texto, por_defecto)))
+        if columna.estricta and columna.tipo != 'texto':
+            validaciones.append((invalidos, _mensaje(columna, texto, f'{columna.nombre} invalido')))
+        if columna.opciones:
+            fuera = valores.notna() & ~valores.isin(columna.opciones)
+            validaciones.append((fuera, _mensaje(columna, texto, f'{columna.nombre} invalido ({{valor}})')))
+        if columna.referencia is not None:
+            pendientes.append((columna, texto, vacia))
+        convertidas[columna.campo] = valores
+
+    # las FKs se revisan después de las columnas, como en los importadores fila por fila
+    for columna, texto, vacia in pendientes:
+        pk = _resolver(texto, referencias[columna.campo])
+        mensaje = columna.referencia.mensaje or f'{columna.nombre} no existe'
+        validaciones.append((~vacia & pk.isna(), _mensaje(columna, texto, mensaje)))
+        convertidas[columna.campo] = pk
+
+    errores, validas = errores_por_fila(validaciones, df.index)
+    return convertidas, errores, validas
+
+
+def importar_esquema(esquema, datos, fijos=None, dry_run=False, progreso=None,
+                     chunk_filas=IMPORTACION_CHUNK_FILAS, omitir_sin_cambios=True):
+    """
+    Valida e importa `datos` según `esquema`: un DataFrame o un iterable de
+    DataFrames (leer_por_trozos), así el archivo nunca está entero en memoria.
+    `fijos` se suma a esquema.fijos (valores iguales para todas las filas). Si
+    alguna fila tiene errores no se escribe nada. Debe llamarse dentro de
+    transaction.atomic().
+
+    Con `esquema.clave` y `omitir_sin_cambios`, las filas cuya huella coincide
+    con la de la importación anterior no se copian (métrica 'sin_cambios').
+    """
+    inicio = time.perf_counter()
+    if isinstance(datos, pd.DataFrame):
+        totales = len(datos)
+        trozos = (datos.iloc[desde:desde + chunk_filas] for desde in range(0, len(datos), chunk_filas))
+    else:
+        totales = None
+        trozos = datos
+    resultado = ResultadoImportacion()
+    fijos = {**esquema.fijos, **(fijos or {})}
+    referencias = {
+        columna.campo: _claves_referencia(columna.referencia)
+        for columna in esquema.columnas if columna.referencia is not None
+    }
+    carga = CargaMasiva(esquema.modelo, conflicto=esquema.clave)
+    omitir_sin_cambios = omitir_sin_cambios and bool(esquema.clave) and not dry_run
+    huellas_nuevas = {}
+    claves_sin_cambio = set()
+    sin_cambios = 0
+
+    segundos_validacion = 0.0
+    segundos_copia = 0.0
+    if progreso:
+        progreso(0, totales=totales, forzar=True)
+
+    for parte in trozos:
+        resultado.filas += len(parte)
+        t0 = time.perf_counter()
+        convertidas, errores, validas = _validar_parte(esquema, parte, referencias)
+        segundos_validacion += time.perf_counter() - t0
+
+        resultado.filas_con_error += len(errores)
+        resultado.validas += int(validas.sum())
+        espacio = IMPORTACION_MAX_ERRORES - len(resultado.errores)
+        if espacio > 0:
+            resultado.errores.extend(errores[:espacio])
+
+        # con errores ya no se escribe nada; se sigue validando para reportarlos
+        if not dry_run and not resultado.filas_con_error:
+            t0 = time.perf_counter()
+            if omitir_sin_cambios and validas.any():
+                huellas = _huellas_filas(esquema, convertidas, fijos, validas)
+                iguales = claves_sin_cambios(esquema.modelo, esquema.clave, huellas)
+                if iguales:
+                    omitidas = validas & convertidas[esquema.clave].astype(str).isin(iguales)
+                    sin_cambios += int(omitidas.sum())
+                    validas = validas & ~omitidas
+                huellas_nuevas.update((c, h) for c, h in huellas.items() if c not in iguales)
+                claves_sin_cambio.update(iguales)
+            carga.copiar(carga.filas_de_columnas({**convertidas, **fijos}, mascara=validas))
+            segundos_copia += time.perf_counter() - t0
+        if progreso:
+            progreso(resultado.filas)
+
+    segundos_insercion = 0.0
+    if not dry_run and not resultado.filas_con_error:
+        t0 = time.perf_counter()
+        resultado.insertadas, resultado.actualizadas = carga.insertar(empresa_id=fijos.get('id_empresa_id'))
+        guardar_huellas(esquema.modelo, huellas_nuevas, claves_sin_cambio)
+        segundos_insercion = time.perf_counter() - t0
+
+    total = time.perf_counter() - inicio
+    resultado.metricas = {
+        'filas': resultado.filas,
+        'filas_validas': resultado.validas,
+        'filas_con_error': resultado.filas_con_error,
+        'sin_cambios': sin_cambios,
+        'segundos_validacion': round(segundos_validacion, 3),
+        'segundos_copia': round(segundos_copia, 3),
+        'segundos_insercion': round(segundos_insercion, 3),
+        'segundos_total': round(total, 3),
+        'filas_por_segundo': round(resultado.filas / total, 1) if total else None,
+        'copy': carga.usa_copy,
+    }
+    return resultado
+
+
+# -------------------------
+# Vista base
+# -------------------------
+
+class ImportacionEsquemaView(ImportacionEnSegundoPlanMixin, APIView):
+    """
+    POST multipart con `file`. `?dry_run=1` valida sin escribir; `?forzar=1`
+    reimporta aunque el archivo o las filas no hayan cambiado. Respuestas:
+    201 {"importados", "actualizados"?, "metricas"} / 400 con "faltantes" o "detalles".
+    """
+    esquema = None
+
+    def valores_fijos(self, request):
+        """Valores por request (p. ej. la empresa del usuario); puede lanzar ErrorImportacion."""
+        return {}
+
+    def es_simulacion(self, request):
+        return self.parametro_activo(request, 'dry_run')
+
+    def datasets_importacion(self, **kwargs):
+        if self.esquema is None:
+            return ()
+        referencias = tuple(c.referencia.modelo for c in self.esquema.columnas if c.referencia)
+        return (self.esquema.modelo,) + referencias
+
+    def validar_importacion(self, request, archivo, *args, **kwargs):
+        try:
+            self.valores_fijos(request)
+        except ErrorImportacion as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return None
+
+    @transaction.atomic
+    def importar(self, request, *args, **kwargs):
+        archivo = request.FILES.get(self.campo_archivo)
+        if not archivo:
+            return Response({"error": "No se envio ningun archivo"}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            fijos = self.valores_fijos(request)
+        except ErrorImportacion as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            trozos = leer_por_trozos(archivo)
+            primero = next(trozos, None)
+        except Exception as e:
+            return Response({"error": f"Archivo invalido: {str(e)}"}, status=status.HTTP_400_BAD_REQUEST)
+
+        if primero is None:
+            return Response({"error": "Archivo vacio"}, status=status.HTTP_400_BAD_REQUEST)
+        faltantes = self.esquema.faltantes(primero.columns)
+        if faltantes:
+            return Response(
+                {"error": "Columnas invalidas", "faltantes": faltantes},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        # sólo encabezados: el primer trozo de un archivo con datos nunca está vacío
+        if primero.empty:
+            return Response({"error": "Archivo vacio: no tiene filas de datos"}, status=status.HTTP_400_BAD_REQUEST)
+
+        dry_run = self.es_simulacion(request)
+        resultado = importar_esquema(
+            self.esquema, itertools.chain([primero], trozos), fijos,
+            dry_run=dry_run, progreso=reporte_progreso(),
+            omitir_sin_cambios=not self.parametro_activo(request, 'forzar'),
+        )
+
+        if resultado.errores:
+            return Response(
+                {
+                    "error": "Errores de validacion en plantilla",
+                    "detalles": resultado.errores,
+                    "metricas": resultado.metricas,
+                },
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        if dry_run:
+            return Response(
+                {"simulacion": True, "validas": resultado.validas, "metricas": resultado.metricas},
+                status=status.HTTP_200_OK,
+            )
+
+        data = {"importados": resultado.insertadas}
+        if self.esquema.clave:
+            data["actualizados"] = resultado.actualizadas
+        data["metricas"] = resultado.metricas
+        return Response(data, status=status.HTTP_201_CREATED)
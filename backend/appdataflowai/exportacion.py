@@ -0,0 +1,291 @@
+# appdataflowai/exportacion.py
+"""
+Exportaciones a Excel / CSV / Parquet sin cargar el dataset en memoria.
+
+Las vistas *Export* armaban un Workbook completo (serializer.data o un
+DataFrame de `.values()`), algunas recorrían después cada celda para ajustar
+anchos, y copiaban el archivo de un BytesIO a un HttpResponse: tres copias del
+dataset en memoria. Aquí:
+
+- las filas salen de `values_list(...).iterator(chunk_size=...)`, sin instanciar
+  modelos ni pasar por DRF;
+- el libro es openpyxl `write_only` (las filas van directo a disco);
+- los anchos de columna se estiman con las primeras EXPORTACION_MUESTRA_ANCHOS
+  filas, que se retienen sólo hasta fijarlos;
+- el .xlsx se guarda en un archivo temporal anónimo que FileResponse envía por
+  bloques y que se borra al cerrarse.
+
+Con `?file=csv` (exportar()) la misma consulta se escribe como CSV en un
+StreamingHttpResponse: el BOM y los encabezados salen antes de ejecutar la
+consulta y las filas se entregan en bloques de EXPORTACION_BUFFER_BYTES.
+`?file=parquet` escribe un row group por trozo.
+`?async=1` lo convierte en un trabajo con el archivo en caché
+(appdataflowai/trabajos_exportacion.py).
+
+Las columnas se describen como (encabezado, campo) o (encabezado, campo, formato):
+`campo` es una ruta de `values_list` (puede repetirse, p. ej. id_registro / id)
+y `formato(valor)` transforma el valor antes de escribirlo.
+"""
+import contextvars
+import csv
+import datetime as dt
+import itertools
+import tempfile
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+from django.conf import settings
+from django.http import FileResponse, StreamingHttpResponse
+from django.utils import timezone
+
+from .versiones_dataset import TODAS_LAS_EMPRESAS
+
+EXPORTACION_CHUNK_FILAS = getattr(settings, 'EXPORTACION_CHUNK_FILAS', 5000)
+EXPORTACION_MUESTRA_ANCHOS = getattr(settings, 'EXPORTACION_MUESTRA_ANCHOS', 500)
+EXPORTACION_ANCHO_MAX = 60
+# bytes de CSV acumulados antes de entregar un trozo al servidor WSGI
+EXPORTACION_BUFFER_BYTES = getattr(settings, 'EXPORTACION_BUFFER_BYTES', 64 * 1024)
+XLSX_CONTENT_TYPE = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+CSV_CONTENT_TYPE = 'text/csv; charset=utf-8'
+PARQUET_CONTENT_TYPE = 'application/vnd.apache.parquet'
+FORMATOS_EXPORTACION = ('xlsx', 'csv', 'parquet')
+
+# dentro de un trabajo de exportación (trabajos_exportacion.py): exportar() escribe en él en vez de responder
+artefacto_actual = contextvars.ContextVar('artefacto_exportacion', default=None)
+
+
+def columnas_de(*campos):
+    """Columnas con el nombre del campo como encabezado."""
+    return [(campo, campo) for campo in campos]
+
+
+def filas_queryset(qs, columnas, chunk_size=EXPORTACION_CHUNK_FILAS):
+    """Tuplas en el orden de `columnas`, leídas del cursor por trozos."""
+    campos = list(dict.fromkeys(columna[1] for columna in columnas))
+    posiciones = [campos.index(columna[1]) for columna in columnas]
+    formatos = [(i, columna[2]) for i, columna in enumerate(columnas) if len(columna) > 2 and columna[2]]
+    directo = posiciones == list(range(len(campos))) and not formatos
+
+    for valores in qs.values_list(*campos).iterator(chunk_size=chunk_size):
+        if directo:
+            yield valores
+            continue
+        fila = [valores[p] for p in posiciones]
+        for i, formato in formatos:
+            fila[i] = formato(fila[i])
+        yield fila
+
+
+def _anchos(encabezados, muestra):
+    anchos = [len(str(encabezado)) for encabezado in encabezados]
+    for fila in muestra:
+        for i, valor in enumerate(fila):
+            if valor is not None:
+                anchos[i] = max(anchos[i], len(str(valor)))
+    return [min(ancho + 2, EXPORTACION_ANCHO_MAX) for ancho in anchos]
+
+
+def _sin_zona_horaria(fila, indices):
+    # Excel no guarda zona horaria: openpyxl rechaza datetimes aware
+    fila = list(fila)
+    for i in indices:
+        if isinstance(fila[i], dt.datetime) and timezone.is_aware(fila[i]):
+            fila[i] = timezone.make_naive(fila[i])
+    return fila
+
+
+def escribir_xlsx(destino, filas, encabezados, hoja='Datos'):
+    """Escribe `filas` (iterable de secuencias) en `destino` (ruta o archivo) con openpyxl write_only."""
+    from openpyxl import Workbook
+    from openpyxl.utils import get_column_letter
+
+    filas = iter(filas)
+    muestra = []
+    for fila in filas:
+        muestra.append(fila)
+        if len(muestra) >= EXPORTACION_MUESTRA_ANCHOS:
+            break
+    fechas = sorted({
+        i for fila in muestra for i, valor in enumerate(fila) if isinstance(valor, dt.datetime)
+    })
+
+    libro = Workbook(write_only=True)
+    ws = libro.create_sheet(hoja)
+    # en write_only los anchos sólo se pueden fijar antes de la primera fila
+    for i, ancho in enumerate(_anchos(encabezados, muestra), start=1):
+        ws.column_dimensions[get_column_letter(i)].width = ancho
+
+    ws.append(list(encabezados))
+    for fila in muestra:
+        ws.append(_sin_zona_horaria(fila, fechas) if fechas else fila)
+    del muestra
+    for fila in filas:
+        ws.append(_sin_zona_horaria(fila, fechas) if fechas else fila)
+    libro.save(destino)
+    return destino
+
+
+def respuesta_archivo(escribir, filas, encabezados, nombre_archivo, content_type, hoja='Datos'):
+    """FileResponse con el archivo escrito en un temporal (se borra al terminar de enviarlo)."""
+    temporal = tempfile.TemporaryFile()
+    try:
+        escribir(temporal, filas, encabezados, hoja=hoja)
+        temporal.seek(0)
+    except Exception:
+        temporal.close()
+        raise
+    return FileResponse(temporal, as_attachment=True, filename=nombre_archivo, content_type=content_type)
+
+
+def respuesta_xlsx(filas, encabezados, nombre_archivo, hoja='Datos'):
+    return respuesta_archivo(escribir_xlsx, filas, encabezados, nombre_archivo, XLSX_CONTENT_TYPE, hoja=hoja)
+
+
+def exportar_xlsx(qs, columnas, nombre_archivo, hoja='Datos'):
+    """Exporta `qs` con `columnas` [(encabezado, campo[, formato])] como adjunto .xlsx."""
+    return respuesta_xlsx(
+        filas_queryset(qs, columnas),
+        [columna[0] for columna in columnas],
+        nombre_archivo,
+        hoja=hoja,
+    )
+
+
+# -------------------------
+# CSV
+# -------------------------
+
+class _Eco:
+    """Destino de csv.writer que devuelve la línea en lugar de guardarla."""
+
+    def write(self, linea):
+        return linea
+
+
+def iterar_csv(filas, encabezados, buffer_bytes=EXPORTACION_BUFFER_BYTES):
+    """Bytes UTF-8 del CSV (BOM una sola vez, para Excel) por bloques de ~buffer_bytes."""
+    escritor = csv.writer(_Eco())
+    # primer trozo antes de tocar la base: el cliente recibe respuesta de inmediato
+    yield ('\ufeff' + escritor.writerow(encabezados)).encode('utf-8')
+
+    bloque = []
+    tamano = 0
+    for fila in filas:
+        linea = escritor.writerow(fila)
+        bloque.append(linea)
+        tamano += len(linea)
+        if tamano >= buffer_bytes:
+            yield ''.join(bloque).encode('utf-8')
+            bloque = []
+            tamano = 0
+    if bloque:
+        yield ''.join(bloque).encode('utf-8')
+
+
+def respuesta_csv(filas, encabezados, nombre_archivo):
+    response = StreamingHttpResponse(iterar_csv(filas, encabezados), content_type=CSV_CONTENT_TYPE)
+    response['Content-Disposition'] = f'attachment; filename="{nombre_archivo}"'
+    return response
+
+
+def exportar_csv(qs, columnas, nombre_archivo):
+    """Exporta `qs` con `columnas` [(encabezado, campo[, formato])] como adjunto .csv en streaming."""
+    return respuesta_csv(filas_queryset(qs, columnas), [columna[0] for columna in columnas], nombre_archivo)
+
+
+def escribir_csv(destino, filas, encabezados, hoja=None):
+    """El mismo CSV que respuesta_csv() en `destino` (archivo binario abierto)."""
+    for trozo in iterar_csv(filas, encabezados):
+        destino.write(trozo)
+    return destino
+
+
+# -------------------------
+# Parquet (pyarrow)
+# -------------------------
+
+def _tipo_arrow(array):
+    if pa.types.is_null(array.type):
+        # columna vacía en el primer lote: texto
+        return pa.string()
+    if pa.types.is_decimal(array.type):
+        # la precisión inferida sale del primer lote; la escala es la del DecimalField
+        return pa.decimal128(38, array.type.scale)
+    return array.type
+
+
+def escribir_parquet(destino, filas, encabezados, hoja=None, filas_por_grupo=EXPORTACION_CHUNK_FILAS):
+    """Parquet en `destino`, un row group por cada `filas_por_grupo` filas (el esquema sale del primer lote)."""
+    filas = iter(filas)
+    esquema = None
+    texto = set()
+    escritor = None
+    try:
+        while True:
+            lote = list(itertools.islice(filas, filas_por_grupo))
+            if not lote and escritor is not None:
+                break
+            columnas = list(zip(*lote)) if lote else [()] * len(encabezados)
+            if esquema is None:
+                inferidos = [pa.array(columna) for columna in columnas]
+                texto = {i for i, array in enumerate(inferidos) if pa.types.is_null(array.type)}
+                esquema = pa.schema([
+                    pa.field(str(encabezado), _tipo_arrow(array)) for encabezado, array in zip(encabezados, inferidos)
+                ])
+                escritor = pq.ParquetWriter(destino, esquema)
+            arrays = [
+                pa.array(
+                    [None if v is None else str(v) for v in columna] if i in texto else columna,
+                    type=esquema.field(i).type,
+                )
+                for i, columna in enumerate(columnas)
+            ]
+            escritor.write_table(pa.Table.from_arrays(arrays, schema=esquema))
+            if len(lote) < filas_por_grupo:
+                break
+    finally:
+        if escritor is not None:
+            escritor.close()
+    return destino
+
+
+ESCRITORES = {'xlsx': escribir_xlsx, 'csv': escribir_csv, 'parquet': escribir_parquet}
+CONTENT_TYPES = {'xlsx': XLSX_CONTENT_TYPE, 'csv': CSV_CONTENT_TYPE, 'parquet': PARQUET_CONTENT_TYPE}
+
+
+def formato_solicitado(request, defecto='xlsx'):
+    """`?file=xlsx|csv|parquet`; cualquier otro valor usa el formato por defecto de la vista."""
+    params = getattr(request, 'query_params', request.GET)
+    formato = (params.get('file') or '').strip().lower()
+    return formato if formato in FORMATOS_EXPORTACION else defecto
+
+
+def exportar(request, qs, columnas, nombre_base, hoja='Datos', defecto='xlsx',
+             modelos=None, empresa_dataset=TODAS_LAS_EMPRESAS, privado=False):
+    """
+    Respuesta de las vistas *Export*: `nombre_base`.xlsx / .csv / .parquet según ?file=.
+
+    Con ?async=1 (o EXPORTACION_ASINCRONA) se encola un trabajo que deja el
+    archivo en disco y lo reutiliza mientras los datos no cambien
+    (trabajos_exportacion.py). `modelos` son los datasets de los que sale el
+    archivo (por defecto el del queryset), versionados para `empresa_dataset`;
+    `privado` ata el archivo al usuario (datos que dependen de quién pide).
+    """
+    formato = formato_solicitado(request, defecto)
+    encabezados = [columna[0] for columna in columnas]
+
+    artefacto = artefacto_actual.get()
+    if artefacto is not None:
+        # dentro de un trabajo de exportación: el archivo va al disco del worker
+        return artefacto.escribir(formato, filas_queryset(qs, columnas), encabezados, hoja)
+
+    nombre_archivo = f'{nombre_base}.{formato}'
+    from .trabajos_exportacion import encolar_exportacion, exportacion_en_segundo_plano
+    if exportacion_en_segundo_plano(request):
+        return encolar_exportacion(request, formato, nombre_archivo, modelos or (qs.model,), empresa_dataset, privado)
+
+    if formato == 'csv':
+        return respuesta_csv(filas_queryset(qs, columnas), encabezados, nombre_archivo)
+    return respuesta_archivo(
+        ESCRITORES[formato], filas_queryset(qs, columnas), encabezados, nombre_archivo, CONTENT_TYPES[formato], hoja=hoja
+    )
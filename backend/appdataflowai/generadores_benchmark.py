@@ -0,0 +1,340 @@
+# appdataflowai/generadores_benchmark.py
+"""
+Datos sintéticos para `python manage.py benchmark_importaciones`.
+
+Cada Objetivo describe una vista de importación real (URL, campo del archivo,
+formatos que acepta), el generador de filas de su plantilla y, si existe, la
+vista de exportación del mismo dataset. Los generadores son deterministas:
+misma semilla + mismas filas = mismo archivo, así dos corridas del benchmark
+comparan lo mismo.
+
+`preparar(usuario, filas)` crea lo que la plantilla referencia (catálogo y
+clientes Bluetti, clientes Conetcom, broker del usuario); el benchmark lo corre
+dentro de la transacción que revierte al final.
+"""
+import csv
+import datetime as dt
+import random
+from dataclasses import dataclass, field
+
+from .models import (
+    CanalesBluetti,
+    CuentasClientesBluetti,
+    DashboardVentas,
+    InventariosBelkin,
+    LeadsBrokers,
+    ProductosBluetti,
+    ServiciosLoopTotek,
+    UsuariosBrokers,
+    VentasBluetti,
+    conetcom_clientes,
+    conetcom_facturacion,
+    conetcom_trafico_consumo,
+)
+
+FECHA_BASE = dt.date(2024, 1, 1)
+CIUDADES = ('Bogota', 'Medellin', 'Cali', 'Barranquilla', 'Cartagena', 'Bucaramanga', 'Pereira')
+CANALES = ('Retail', 'Online', 'Mayorista', 'Distribuidor')
+# empresa / producto fijos de las vistas Belkin, Bluetti y Loop
+BELKIN = {'id_empresa_id': 1, 'id_producto_id': 22}
+BLUETTI = {'id_empresa_id': 1, 'id_producto_id': 23}
+LOOP = {'id_empresa_id': 1, 'id_producto_id': 24}
+CONETCOM_PRODUCTO_ID = 24
+BLUETTI_CLIENTES = 40
+BLUETTI_PRODUCTOS = 120
+# las plantillas Conetcom dependientes referencian a lo sumo esta cantidad de clientes
+CONETCOM_CLIENTES_MAX = 20_000
+
+
+@dataclass(frozen=True)
+class Objetivo:
+    nombre: str
+    modelo: type
+    url_importacion: str
+    encabezados: tuple
+    fila: object
+    kwargs_url: dict = field(default_factory=dict)
+    campo_archivo: str = 'file'
+    formatos: tuple = ('csv', 'xlsx')
+    url_exportacion: str = None
+    # False: la vista no usa ImportacionEnSegundoPlanMixin (sin ?sync ni id_carga)
+    mixin: bool = True
+    alcance: object = None
+    preparar: object = None
+
+    def filas(self, cantidad, semilla=0):
+        rng = random.Random(f'{self.nombre}:{semilla}')
+        for i in range(cantidad):
+            yield self.fila(rng, i, cantidad)
+
+    def filtro(self, usuario):
+        """Filtro del dataset que ve la vista de exportación (para contar filas)."""
+        return self.alcance(usuario) if self.alcance else {}
+
+
+def escribir_archivo(objetivo, ruta, cantidad, formato, semilla=0):
+    """Escribe la plantilla de `objetivo` con `cantidad` filas en `ruta` (csv o xlsx, write_only)."""
+    if formato == 'csv':
+        with open(ruta, 'w', newline='', encoding='utf-8') as destino:
+            escritor = csv.writer(destino)
+            escritor.writerow(objetivo.encabezados)
+            escritor.writerows(objetivo.filas(cantidad, semilla))
+        return ruta
+
+    from openpyxl import Workbook
+
+    libro = Workbook(write_only=True)
+    hoja = libro.create_sheet('Datos')
+    hoja.append(list(objetivo.encabezados))
+    for fila in objetivo.filas(cantidad, semilla):
+        hoja.append(list(fila))
+    libro.save(ruta)
+    return ruta
+
+
+def _fecha(rng):
+    return FECHA_BASE + dt.timedelta(days=rng.randrange(730))
+
+
+# -------------------------
+# Filas por plantilla
+# -------------------------
+
+def _fila_dashboard_ventas(rng, i, total):
+    fecha = _fecha(rng)
+    cantidad = rng.randint(1, 60)
+    precio = round(rng.uniform(5, 400), 2)
+    transacciones = rng.randint(1, cantidad)
+    return (
+        f'PDV-{i % 800:04d}', f'Punto {i % 800}', rng.choice(CANALES), rng.choice(CIUDADES),
+        f'Region {i % 6}', cantidad, round(cantidad * precio, 2), round(cantidad * precio / transacciones, 2),
+        transacciones, rng.randint(0, 3), fecha, fecha.month, fecha.year,
+        fecha.strftime('%A'), f'SKU-{rng.randrange(5000):05d}', f'Producto {rng.randrange(5000)}',
+        f'Categoria {rng.randrange(15)}', f'Subcategoria {rng.randrange(60)}',
+    )
+
+
+def _fila_ventas_bluetti(rng, i, total):
+    producto = rng.randrange(BLUETTI_PRODUCTOS)
+    cantidad = rng.randint(1, 30)
+    return (
+        _fecha(rng), f'BENCH Cliente {rng.randrange(BLUETTI_CLIENTES)}', f'BENCH-SKU-{producto:04d}',
+        cantidad, round(rng.uniform(80, 2500), 2), round(rng.uniform(40, 1500), 2),
+        rng.choice(('sell_in', 'sell_out')),
+    )
+
+
+def _fila_inventarios_belkin(rng, i, total):
+    fecha = _fecha(rng)
+    return (
+        fecha, fecha.year, fecha.strftime('%B'), rng.choice(CANALES), f'Punto {rng.randrange(900)}',
+        f'Categoria {rng.randrange(12)}', 'Belkin', f'Producto {rng.randrange(1500)}', rng.randint(0, 500),
+    )
+
+
+def _id_cliente_conetcom(numero):
+    return f'BENCH-CLI-{numero:07d}'
+
+
+def _fila_conetcom_clientes(rng, i, total):
+    alta = _fecha(rng)
+    return (
+        _id_cliente_conetcom(i), f'Cliente {i}', alta,
+        rng.choice(('activo', 'activo', 'activo', 'suspendido', 'cancelado')),
+        rng.choice(('residencial', 'empresarial', 'mayorista')), rng.choice(CIUDADES), f'Departamento {i % 32}',
+        rng.choice(('venta_directa', 'web', 'aliado', 'call_center')), alta, rng.random() < 0.05,
+    )
+
+
+def _fila_conetcom_facturacion(rng, i, total):
+    emision = _fecha(rng)
+    monto = round(rng.uniform(40_000, 400_000), 2)
+    estado = rng.choice(('pagada', 'pagada', 'pendiente', 'parcial', 'vencida'))
+    pagado = monto if estado == 'pagada' else round(monto * rng.random(), 2) if estado == 'parcial' else None
+    return (
+        f'BENCH-FAC-{i:08d}', _id_cliente_conetcom(rng.randrange(_clientes_conetcom(total))), emision,
+        emision + dt.timedelta(days=30), monto, estado, pagado,
+        emision + dt.timedelta(days=rng.randint(1, 30)) if pagado else None,
+        rng.choice(('PSE', 'Tarjeta', 'Efectivo', 'Debito automatico')) if pagado else None,
+    )
+
+
+def _fila_conetcom_trafico(rng, i, total):
+    return (
+        f'BENCH-TRA-{i:08d}', _id_cliente_conetcom(rng.randrange(_clientes_conetcom(total))), _fecha(rng),
+        round(rng.uniform(0.1, 60), 3), round(rng.uniform(0.05, 12), 3), round(rng.uniform(50, 900), 1),
+        round(rng.uniform(10, 500), 1), rng.randint(1, 400),
+    )
+
+
+def _fila_leads(rng, i, total):
+    return (
+        f'Empresa {i}', f'contacto{i}@empresa{i % 5000}.com', f'Contacto {i}', f'+57 3{rng.randrange(10**9):09d}',
+        'Colombia', rng.choice(('Retail', 'Manufactura', 'Salud', 'Finanzas', 'Tecnologia')),
+        rng.choice(('PE', 'ME', 'GR')), f'{rng.randint(1_000, 250_000):,}', 'USD', f'{rng.randint(5, 95)}%',
+        rng.choice(('', 'hot', 'cold')), rng.choice(('Web', 'Referido', 'Evento')), '',
+        rng.choice(('prospecting', 'qualifications_sql', 'negociacion')),
+    )
+
+
+def _fila_loop(rng, i, total):
+    fecha = _fecha(rng)
+    estado = rng.choice(('FINALIZADO', 'FINALIZADO', 'FINALIZADO', 'CANCELADO', 'REPROGRAMADO', 'NO_INSTALADO'))
+    return (
+        fecha, rng.randint(1, 5) if estado == 'FINALIZADO' else None, estado, rng.randint(0, 4), fecha.year,
+        fecha.strftime('%B'), rng.choice(('DIRECTO', 'RETAIL')), f'Categoria {rng.randrange(8)}',
+        f'Servicio {rng.randrange(40)}', 'Cliente ausente' if estado == 'CANCELADO' else None,
+        'Reagendado' if estado == 'REPROGRAMADO' else None, rng.choice(('BOGOTA', 'MEDELLIN', 'CALI')),
+        rng.choice(CIUDADES), f'Sector {rng.randrange(200)}', f'OT-{i:08d}', f'Instalador {rng.randrange(150)}', None,
+    )
+
+
+# -------------------------
+# Datos previos que referencian las plantillas
+# -------------------------
+
+def _preparar_bluetti(usuario, filas):
+    canal = CanalesBluetti.objects.create(codigo_canal='BENCH', nombre_canal='BENCH Canal', **BLUETTI)
+    CuentasClientesBluetti.objects.bulk_create(
+        CuentasClientesBluetti(canal=canal, nombre_cliente=f'BENCH Cliente {k}', pais='Colombia', **BLUETTI)
+        for k in range(BLUETTI_CLIENTES)
+    )
+    ProductosBluetti.objects.bulk_create(
+        ProductosBluetti(sku=f'BENCH-SKU-{k:04d}', nombre_producto=f'BENCH Producto {k}', **BLUETTI)
+        for k in range(BLUETTI_PRODUCTOS)
+    )
+
+
+def _clientes_conetcom(filas):
+    return max(1, min(filas, CONETCOM_CLIENTES_MAX))
+
+
+def _preparar_conetcom(usuario, filas):
+    rng = random.Random('conetcom_clientes:previos')
+    conetcom_clientes.objects.bulk_create(
+        (
+            conetcom_clientes(
+                id_cliente=_id_cliente_conetcom(k), fecha_alta_cliente=_fecha(rng), estado_cliente='activo',
+                tipo_cliente='residencial', ciudad=rng.choice(CIUDADES), region_departamento='Cundinamarca',
+                canal_adquisicion='web', id_empresa_id=usuario.id_empresa_id, id_producto_id=CONETCOM_PRODUCTO_ID,
+            )
+            for k in range(_clientes_conetcom(filas))
+        ),
+        batch_size=5000,
+    )
+
+
+def _preparar_broker(usuario, filas):
+    if not UsuariosBrokers.objects.filter(id_usuario_id=usuario.id_usuario).exists():
+        UsuariosBrokers.objects.create(id_usuario_id=usuario.id_usuario)
+
+
+def _objetivo_conetcom_dependiente(nombre, modelo, url, encabezados, fila):
+    # las filas referencian los clientes que crea _preparar_conetcom para el mismo total
+    return Objetivo(
+        nombre=nombre, modelo=modelo, url_importacion=url, encabezados=encabezados, fila=fila,
+        alcance=lambda usuario: {'id_empresa_id': usuario.id_empresa_id}, preparar=_preparar_conetcom,
+    )
+
+
+OBJETIVOS = {
+    objetivo.nombre: objetivo
+    for objetivo in (
+        Objetivo(
+            nombre='dashboard_ventas',
+            modelo=DashboardVentas,
+            url_importacion='importar-datos',
+            kwargs_url={'id_producto': 2},
+            campo_archivo='archivo',
+            formatos=('xlsx',),
+            encabezados=(
+                'id_punto_venta', 'punto_venta', 'canal', 'ciudad', 'region', 'cantidad_vendida', 'dinero_vendido',
+                'ticket_promedio', 'numero_transacciones', 'devoluciones', 'fecha_venta', 'mes', 'anio',
+                'dia_semana', 'sku', 'nombre_producto', 'categoria', 'subcategoria',
+            ),
+            fila=_fila_dashboard_ventas,
+            alcance=lambda usuario: {'id_empresa_id': usuario.id_empresa_id},
+        ),
+        Objetivo(
+            nombre='ventas_bluetti',
+            modelo=VentasBluetti,
+            url_importacion='ventas_bluetti_bulk_import',
+            url_exportacion='ventas_bluetti_export',
+            encabezados=(
+                'fecha_venta', 'cliente', 'sku', 'cantidad', 'precio_unitario', 'costo_unitario', 'tipo_venta',
+            ),
+            fila=_fila_ventas_bluetti,
+            alcance=lambda usuario: BLUETTI,
+            preparar=_preparar_bluetti,
+        ),
+        Objetivo(
+            nombre='inventarios_belkin',
+            modelo=InventariosBelkin,
+            url_importacion='inventarios_belkin_bulk_import',
+            url_exportacion='inventarios_belkin_export',
+            encabezados=(
+                'fecha_inventario', 'ano', 'mes', 'canal_cliente', 'punto_venta', 'categoria', 'marca',
+                'producto', 'cantidad_inventario',
+            ),
+            fila=_fila_inventarios_belkin,
+            alcance=lambda usuario: BELKIN,
+        ),
+        Objetivo(
+            nombre='conetcom_clientes',
+            modelo=conetcom_clientes,
+            url_importacion='conetcom_clientes_import_url',
+            encabezados=(
+                'id_cliente', 'nombre_cliente', 'fecha_alta_cliente', 'estado_cliente', 'tipo_cliente', 'ciudad',
+                'region_departamento', 'canal_adquisicion', 'fecha_inicio_contrato', 'indicador_vip',
+            ),
+            fila=_fila_conetcom_clientes,
+            alcance=lambda usuario: {'id_empresa_id': usuario.id_empresa_id},
+        ),
+        _objetivo_conetcom_dependiente(
+            'conetcom_facturacion', conetcom_facturacion, 'conetcom_facturacion_import_url',
+            (
+                'id_factura', 'id_cliente', 'fecha_emision', 'fecha_vencimiento', 'valor_total_facturado',
+                'estado_factura', 'valor_pagado', 'fecha_pago', 'metodo_pago',
+            ),
+            _fila_conetcom_facturacion,
+        ),
+        _objetivo_conetcom_dependiente(
+            'conetcom_trafico', conetcom_trafico_consumo, 'conetcom_trafico_consumo_import_url',
+            (
+                'id_registro', 'id_cliente', 'fecha', 'consumo_descarga_gb', 'consumo_subida_gb',
+                'velocidad_pico_mbps', 'velocidad_promedio_mbps', 'numero_sesiones',
+            ),
+            _fila_conetcom_trafico,
+        ),
+        Objetivo(
+            nombre='leads_brokers',
+            modelo=LeadsBrokers,
+            url_importacion='brokers-leads-import',
+            url_exportacion='brokers-leads-export',
+            formatos=('csv',),
+            mixin=False,
+            encabezados=(
+                'nombre_lead', 'correo', 'persona_de_contacto', 'telefono', 'pais', 'industria', 'tamano_empresa',
+                'ticket_estimado', 'moneda_ticket', 'probabilidad_cierre', 'campo_etiqueta', 'fuente_lead',
+                'comentarios', 'etapa',
+            ),
+            fila=_fila_leads,
+            alcance=lambda usuario: {'id_broker__id_usuario_id': usuario.id_usuario},
+            preparar=_preparar_broker,
+        ),
+        Objetivo(
+            nombre='servicios_loop_totek',
+            modelo=ServiciosLoopTotek,
+            url_importacion='loopserviciostotek_bulk_import',
+            url_exportacion='loopserviciostotek_export',
+            encabezados=(
+                'fecha_servicio', 'satisfaccion_cliente', 'estado_servicio', 'cantidad_instalada', 'ano', 'mes',
+                'tipo_empresa', 'categoria_servicio', 'descripcion_servicio', 'motivo_cancelacion',
+                'motivo_reprogramacion', 'ciudad_principal', 'ciudad', 'municipio_sector', 'codigo_ot',
+                'nombre_instalador', 'notas',
+            ),
+            fila=_fila_loop,
+            alcance=lambda usuario: LOOP,
+        ),
+    )
+}
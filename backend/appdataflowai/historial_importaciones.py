@@ -0,0 +1,181 @@
+# appdataflowai/historial_importaciones.py
+"""
+Deduplicación de importaciones repetidas.
+
+Cada archivo que llega a una vista de importación (ImportacionEnSegundoPlanMixin)
+se identifica con un sha256 de su contenido, leído por bloques, combinado con
+el destino (vista + parámetros de la URL). Si la empresa ya importó con éxito
+esa misma huella y los datasets destino no cambiaron desde entonces, el POST
+responde 200 con el resultado anterior (`"duplicado": true`) sin volver a leer
+ni encolar nada. `?forzar=1` importa de todos modos.
+
+"No cambiaron" = la versión global de cada dataset (versiones_dataset.py) es la
+que quedó al terminar esa importación: si después se borraron o editaron filas,
+el mismo archivo se vuelve a importar.
+
+Para esquemas con clave natural (los importadores conetcom), el motor de
+esquemas guarda además un hash por fila en `huellas_filas_importacion`: al
+subir un archivo que se solapa con uno anterior sólo se escriben las filas
+nuevas o cambiadas (`"sin_cambios"` en las métricas). Cada huella guarda la
+versión global del dataset que dejó su importación: si después alguien editó o
+borró filas, las huellas no coinciden con la versión y el archivo se escribe
+entero.
+"""
+import hashlib
+import json
+
+from django.db import transaction
+from rest_framework import status
+from rest_framework.response import Response
+
+from .models import HistorialImportacion, HuellaFilaImportacion
+from .versiones_dataset import TODAS_LAS_EMPRESAS, es_versionado, nombre_dataset, versiones_datasets
+
+HUELLA_BLOQUE_BYTES = 1024 * 1024
+HUELLAS_FILAS_BATCH_SIZE = 1000
+
+
+def huella_archivo(archivo, tipo, parametros=None):
+    """sha256 de (vista, parámetros, contenido). El archivo queda rebobinado."""
+    contenido = getattr(archivo, 'sha256', None)
+    if not contenido:
+        sha256 = hashlib.sha256()
+        archivo.seek(0)
+        for bloque in archivo.chunks(HUELLA_BLOQUE_BYTES):
+            sha256.update(bloque)
+        archivo.seek(0)
+        contenido = sha256.hexdigest()
+    destino = json.dumps({'tipo': tipo, 'parametros': parametros or {}}, sort_keys=True, default=str)
+    return hashlib.sha256(f'{destino}|{contenido}'.encode()).hexdigest()
+
+
+def versiones_destino(modelos):
+    """{dataset: versión} de los datasets que escribe (o referencia) una importación."""
+    modelos = [m for m in modelos if es_versionado(m)]
+    return {nombre_dataset(m): v for m, v in zip(modelos, versiones_datasets(TODAS_LAS_EMPRESAS, modelos))}
+
+
+def importacion_previa(empresa_id, huella, versiones):
+    """La última importación de `huella`, sólo si los datasets siguen como ella los dejó."""
+    previa = (
+        HistorialImportacion.objects
+        .filter(id_empresa_id=empresa_id, huella=huella)
+        .order_by('-fecha')
+        .first()
+    )
+    # sin datasets conocidos no hay cómo saber si cambiaron: se importa
+    if previa is None or not versiones or previa.versiones != versiones:
+        return None
+    return previa
+
+
+def respuesta_duplicada(previa):
+    return Response(
+        {
+            'duplicado': True,
+            'mensaje': 'Este archivo ya fue importado; se devuelve el resultado anterior (usar ?forzar=1 para reimportar)',
+            'fecha_importacion': previa.fecha,
+            'archivo': previa.nombre_archivo,
+            'resultado': previa.resultado,
+        },
+        status=status.HTTP_200_OK,
+    )
+
+
+def registrar_importacion(tipo, huella, nombre_archivo, codigo_http, resultado, empresa_id=None, usuario_id=None,
+                          modelos=()):
+    """
+    Sólo las importaciones exitosas: un archivo que falló se puede volver a intentar.
+    Se registra en el commit, después de que la importación subió la versión de
+    `modelos`, para guardar las versiones en que quedaron.
+    """
+    if not huella or codigo_http >= 400:
+        return
+    # la respuesta puede traer fechas / Decimal: se guarda como la vería el cliente
+    resultado = json.loads(json.dumps(resultado, default=str))
+
+    def registrar():
+        HistorialImportacion.objects.create(
+            id_empresa_id=empresa_id,
+            id_usuario_id=usuario_id,
+            tipo=tipo,
+            huella=huella,
+            nombre_archivo=nombre_archivo,
+            codigo_http=codigo_http,
+            resultado=resultado,
+            versiones=versiones_destino(modelos),
+        )
+    transaction.on_commit(registrar)
+
+
+# -------------------------
+# Huellas por fila (clave natural)
+# -------------------------
+
+def _version_global(modelo):
+    return versiones_datasets(TODAS_LAS_EMPRESAS, [modelo])[0]
+
+
+def huellas_guardadas(modelo, claves):
+    """{clave: huella} de `claves` de `modelo` que siguen vigentes (misma versión del dataset), por lotes."""
+    if not es_versionado(modelo):
+        # sin versión no hay cómo saber si la fila se editó después
+        return {}
+    etiqueta = modelo._meta.label_lower
+    version = _version_global(modelo)
+    claves = list(claves)
+    guardadas = {}
+    for i in range(0, len(claves), HUELLAS_FILAS_BATCH_SIZE):
+        guardadas.update(
+            HuellaFilaImportacion.objects
+            .filter(modelo=etiqueta, version=version, clave__in=claves[i:i + HUELLAS_FILAS_BATCH_SIZE])
+            .values_list('clave', 'huella')
+        )
+    return guardadas
+
+
+def claves_sin_cambios(modelo, campo_clave, huellas):
+    """
+    Claves de `huellas` ({clave: huella}) cuya huella coincide con la guardada y
+    cuya fila sigue en la tabla (una fila borrada a mano se vuelve a insertar).
+    """
+    guardadas = huellas_guardadas(modelo, huellas)
+    iguales = [clave for clave, huella in huellas.items() if guardadas.get(clave) == huella]
+    existentes = set()
+    for i in range(0, len(iguales), HUELLAS_FILAS_BATCH_SIZE):
+        lote = iguales[i:i + HUELLAS_FILAS_BATCH_SIZE]
+        existentes.update(
+            str(clave) for clave in
+            modelo._base_manager.filter(**{f'{campo_clave}__in': lote}).values_list(campo_clave, flat=True)
+        )
+    return existentes
+
+
+def guardar_huellas(modelo, huellas, sin_cambios=()):
+    """
+    Upsert de {clave: huella} tras escribir las filas. Al confirmar la transacción
+    (ya con la versión que dejó la importación) se sellan con esa versión las
+    huellas nuevas y las de `sin_cambios`, las claves del archivo que no se tocaron.
+    """
+    if not es_versionado(modelo) or not (huellas or sin_cambios):
+        return
+    etiqueta = modelo._meta.label_lower
+    objs = [HuellaFilaImportacion(modelo=etiqueta, clave=clave, huella=huella) for clave, huella in huellas.items()]
+    with transaction.atomic():
+        HuellaFilaImportacion.objects.bulk_create(
+            objs,
+            batch_size=HUELLAS_FILAS_BATCH_SIZE,
+            update_conflicts=True,
+            unique_fields=['modelo', 'clave'],
+            update_fields=['huella', 'version'],
+        )
+
+    claves = [*huellas, *(c for c in sin_cambios if c not in huellas)]
+
+    def sellar():
+        version = _version_global(modelo)
+        for i in range(0, len(claves), HUELLAS_FILAS_BATCH_SIZE):
+            (HuellaFilaImportacion.objects
+             .filter(modelo=etiqueta, clave__in=claves[i:i + HUELLAS_FILAS_BATCH_SIZE])
+             .update(version=version))
+    transaction.on_commit(sellar)
@@ -0,0 +1,256 @@
+# appdataflowai/importacion.py
+"""
+Motor de importación de DataFrames a modelos de dashboard.
+
+En vez de recorrer el DataFrame con iterrows(), resolver el campo del modelo y
+convertir celda por celda y hacer un INSERT por fila, la conversión de tipos se
+hace una vez por columna con operaciones vectorizadas de pandas (según el tipo
+del campo del modelo) y las filas válidas entran con bulk_create por lotes.
+
+Los errores se siguen reportando por fila con la numeración de Excel
+(`Fila N`, encabezado = fila 1). Si un lote falla en la BD se reintenta fila
+por fila para atribuir el error a la fila correcta.
+"""
+import datetime as dt
+import math
+
+import numpy as np
+import pandas as pd
+from django.conf import settings
+from django.db import models, transaction
+
+from .versiones_dataset import marcar_dataset_modificado
+
+IMPORTACION_BATCH_SIZE = getattr(settings, 'IMPORTACION_BATCH_SIZE', 1000)
+IMPORTACION_MAX_ERRORES = 50
+
+
+def _sin_nulos(convertida, nulos):
+    """Serie object con None donde el valor original era nulo o no se pudo convertir."""
+    resultado = convertida.astype(object)
+    return resultado.where(~(nulos | convertida.isna()), None)
+
+
+def _coercionar_serie(serie, field):
+    """
+    Devuelve (serie convertida con valores Python / None, máscara de inválidos).
+    Inválido = la celda tenía valor pero no se pudo convertir al tipo del campo.
+    """
+    nulos = serie.isna()
+
+    if isinstance(field, models.DateTimeField):
+        conv = pd.to_datetime(serie, errors='coerce')
+        invalidos = conv.isna() & ~nulos
+        return _sin_nulos(pd.Series(conv.dt.to_pydatetime(), index=serie.index), nulos | invalidos), invalidos
+
+    if isinstance(field, models.DateField):
+        conv = pd.to_datetime(serie, errors='coerce')
+        invalidos = conv.isna() & ~nulos
+        return _sin_nulos(conv.dt.date, nulos | invalidos), invalidos
+
+    if isinstance(field, models.TimeField):
+        # Excel ya entrega datetime.time; el resto (texto "08:30", fechas) pasa por to_datetime
+        es_time = serie.map(lambda v: isinstance(v, dt.time))
+        conv = pd.to_datetime(serie.where(~es_time), errors='coerce')
+        horas = conv.dt.time.where(~es_time, serie)
+        invalidos = horas.isna() & ~nulos
+        return _sin_nulos(horas, nulos | invalidos), invalidos
+
+    if isinstance(field, models.IntegerField):
+        conv = pd.to_numeric(serie, errors='coerce')
+        invalidos = (conv.isna() | conv.isin([math.inf, -math.inf])) & ~nulos
+        validos = ~(nulos | invalidos)
+        # int(valor) trunca, igual que la conversión anterior celda por celda; vacías = None
+        enteros = [int(v) if ok else None for v, ok in zip(conv, validos)]
+        return pd.Series(enteros, index=serie.index, dtype=object), invalidos
+
+    if isinstance(field, (models.DecimalField, models.FloatField)):
+        conv = pd.to_numeric(serie, errors='coerce')
+        invalidos = (conv.isna() | conv.isin([math.inf, -math.inf])) & ~nulos
+        validos = ~(nulos | invalidos)
+        decimales = [float(v) if ok else None for v, ok in zip(conv, validos)]
+        return pd.Series(decimales, index=serie.index, dtype=object), invalidos
+
+    return _sin_nulos(serie, nulos), pd.Series(False, index=serie.index)
+
+
+def coercionar_dataframe(df, modelo, campos):
+    """
+    Convierte las columnas `campos` de `df` según los campos de `modelo`.
+    Devuelve (DataFrame convertido, {indice_fila: mensaje de error}); el mensaje
+    corresponde al primer campo inválido de la fila, en el orden de `campos`.
+    """
+    convertido = {}
+    errores = {}
+    for campo in campos:
+        field = modelo._meta.get_field(campo)
+        serie, invalidos = _coercionar_serie(df[campo], field)
+        convertido[campo] = serie
+        for idx in df.index[invalidos.to_numpy()]:
+            if idx not in errores:
+                errores[idx] = f"{campo}: valor inválido {df.at[idx, campo]!r} para {field.get_internal_type()}"
+    return pd.DataFrame(convertido, index=df.index), errores
+
+
+def _insertar_lote(modelo, lote, errores, fila_base):
+    """bulk_create del lote; si falla, fila por fila para saber cuál es la mala."""
+    try:
+        with transaction.atomic():
+            modelo.objects.bulk_create([obj for _, obj in lote])
+        return len(lote)
+    except Exception:
+        pass
+
+    creados = 0
+    for idx, obj in lote:
+        try:
+            with transaction.atomic():
+                obj.save(force_insert=True)
+            creados += 1
+        except Exception as e:
+            errores.append(f'Fila {idx + fila_base}: {e}')
+    return creados
+
+
+def importar_dataframe(modelo, df, campos, fijos=None, batch_size=IMPORTACION_BATCH_SIZE,
+                       max_errores=IMPORTACION_MAX_ERRORES, fila_base=2, progreso=None):
+    """
+    Inserta las filas de `df` (columnas `campos`) en `modelo`.
+    `fijos` son valores asignados a todas las filas (p. ej. id_empresa / id_producto).
+    Se detiene al superar `max_errores`, como la importación fila por fila.
+    `progreso(procesadas)` se llama después de cada lote, si se pasa.
+    Retorna (creados, errores).
+    """
+    fijos = fijos or {}
+    convertido, errores_fila = coercionar_dataframe(df, modelo, campos)
+
+    creados = 0
+    errores = []
+    lote = []
+    procesadas = 0
+    detenido = False
+
+    for idx, datos in zip(convertido.index, convertido.to_dict('records')):
+        procesadas += 1
+        if idx in errores_fila:
+            errores.append(f'Fila {idx + fila_base}: {errores_fila[idx]}')
+            if len(errores) > max_errores:
+                detenido = True
+                break
+            continue
+
+        lote.append((idx, modelo(**datos, **fijos)))
+        if len(lote) >= batch_size:
+            creados += _insertar_lote(modelo, lote, errores, fila_base)
+            lote = []
+            if progreso:
+                progreso(procesadas)
+            if len(errores) > max_errores:
+                detenido = True
+                break
+
+    if lote:
+        creados += _insertar_lote(modelo, lote, errores, fila_base)
+        if progreso:
+            progreso(procesadas)
+    if detenido or len(errores) > max_errores:
+        errores.append('Detenido por exceso de errores')
+
+    if creados:
+        empresa = fijos.get('id_empresa')
+        marcar_dataset_modificado(modelo, getattr(empresa, 'pk', fijos.get('id_empresa_id')))
+    return creados, errores
+
+
+# -------------------------
+# Validación por columnas (importadores con reglas propias)
+# -------------------------
+
+def columna_texto(df, *columnas):
+    """
+    Texto limpio por columna ('' si falta o es nulo), como _clean_cell celda a
+    celda. Con varias columnas toma la primera no vacía de cada fila (los
+    fallbacks tipo cliente -> cliente_nombre -> cliente_id).
+    """
+    resultado = pd.Series('', index=df.index, dtype=object)
+    for col in columnas:
+        if col not in df.columns:
+            continue
+        serie = df[col]
+        texto = serie.astype(str).str.strip().where(serie.notna(), '')
+        resultado = resultado.where(resultado != '', texto)
+    return resultado
+
+
+def columna_numero(df, col, entero=False):
+    """
+    Número por columna (NaN / <NA> si falta o no es convertible), como
+    _to_float_or_none / _to_int_or_none. `entero` trunca igual que int(float(x)).
+    """
+    if col not in df.columns:
+        numeros = pd.Series(np.nan, index=df.index)
+    elif pd.api.types.is_numeric_dtype(df[col]) and not pd.api.types.is_bool_dtype(df[col]):
+        numeros = df[col].astype(float)
+    else:
+        numeros = pd.to_numeric(columna_texto(df, col), errors='coerce')
+    numeros = numeros.where(np.isfinite(numeros))
+    if entero:
+        return np.trunc(numeros).astype('Int64')
+    return numeros
+
+
+def columna_fecha(df, col):
+    """Fechas por columna (NaT si falta o no se puede interpretar), como _parse_date_or_none."""
+    if col not in df.columns:
+        return pd.Series(pd.NaT, index=df.index, dtype='datetime64[ns]')
+    serie = df[col]
+    if pd.api.types.is_datetime64_any_dtype(serie):
+        return serie
+    texto = columna_texto(df, col)
+    fechas = pd.to_datetime(texto.where(texto != ''), errors='coerce')
+    # formatos mezclados: lo que no entró con el formato inferido se interpreta celda a celda
+    faltan = fechas.isna() & (texto != '')
+    if faltan.any():
+        fechas[faltan] = pd.to_datetime(texto[faltan], errors='coerce', format='mixed')
+    return fechas
+
+
+def tabla_lookup(lookup, columnas):
+    """
+    Dict clave -> valor (o dict de valores) de un _build_*_lookup como DataFrame
+    indexado por clave, para resolver_lookup(). Se omite la clave vacía.
+    """
+    claves = [clave for clave in lookup if clave != '']
+    if claves and isinstance(lookup[claves[0]], dict):
+        filas = [[lookup[c].get(col) for col in columnas] for c in claves]
+    else:
+        filas = [[lookup[c]] for c in claves]
+    return pd.DataFrame(filas, index=pd.Index(claves, dtype=object), columns=list(columnas))
+
+
+def resolver_lookup(texto, tabla):
+    """
+    merge de `texto` (en minúsculas, como _cell_key) contra una tabla_lookup().
+    Devuelve las columnas de la tabla alineadas con `texto` (NaN sin coincidencia).
+    """
+    claves = texto.str.lower().rename('_clave').to_frame()
+    resultado = claves.merge(tabla, left_on='_clave', right_index=True, how='left')
+    resultado.index = texto.index
+    return resultado.drop(columns='_clave')
+
+
+def errores_por_fila(validaciones, index, fila_base=2):
+    """
+    `validaciones`: lista de (máscara, mensaje) en el orden en que se revisaban
+    fila por fila; `mensaje` es texto o una Series alineada. Cada fila reporta
+    sólo su primer error. Retorna (['Fila N: ...'] en orden de fila, máscara de válidas).
+    """
+    mensajes = pd.Series(None, index=index, dtype=object)
+    for mascara, mensaje in validaciones:
+        nuevos = mascara.fillna(False).astype(bool) & mensajes.isna()
+        if nuevos.any():
+            mensajes[nuevos] = mensaje[nuevos] if isinstance(mensaje, pd.Series) else mensaje
+    con_error = mensajes.notna()
+    errores = [f'Fila {idx + fila_base}: {mensaje}' for idx, mensaje in mensajes[con_error].items()]
+    return errores, ~con_error
+
@@ -0,0 +1,135 @@
+# appdataflowai/lectura_archivos.py
+"""
+Lectura de archivos de importación (CSV / Excel) por trozos y con memoria acotada.
+
+`pd.read_excel` abre el libro con openpyxl en modo normal: arma todas las
+celdas como objetos y la memoria llega a ~10x el tamaño del .xlsx. Aquí las
+hojas se recorren con `openpyxl.load_workbook(read_only=True)` (lee el XML en
+streaming) y las filas salen en DataFrames de `filas` filas:
+
+    for df in leer_por_trozos(archivo, filas=50_000):
+        ...                       # índice continuo: 'Fila N' = idx + 2 como antes
+
+    df = leer_archivo(archivo)    # todo el archivo, sin el pico de pd.read_excel
+
+Los CSV usan `pd.read_csv(chunksize=...)`. Los .xls (formato binario viejo) no
+los lee openpyxl y pasan por pd.read_excel.
+"""
+import itertools
+
+import pandas as pd
+from django.conf import settings
+
+LECTURA_CHUNK_FILAS = getattr(settings, 'IMPORTACION_CHUNK_FILAS', 50_000)
+
+
+def _es_csv(archivo):
+    return archivo.name.lower().endswith('.csv')
+
+
+def _es_xls(archivo):
+    return archivo.name.lower().endswith('.xls')
+
+
+def _encabezados(fila):
+    """Como pandas: celdas vacías -> 'Unnamed: i', repetidos -> 'col.1', 'col.2'..."""
+    encabezados = []
+    vistos = {}
+    for i, valor in enumerate(fila):
+        nombre = f'Unnamed: {i}' if valor is None or str(valor).strip() == '' else str(valor).strip()
+        if nombre in vistos:
+            vistos[nombre] += 1
+            nombre = f'{nombre}.{vistos[nombre]}'
+        else:
+            vistos[nombre] = 0
+        encabezados.append(nombre)
+    return encabezados
+
+
+def _filas_hoja(hoja):
+    """
+    Filas de valores de una hoja read_only, sin las vacías del final (openpyxl
+    reporta filas con formato pero sin datos); las vacías intermedias se
+    conservan para que la numeración de filas coincida con la hoja.
+    """
+    vacias = 0
+    for fila in hoja.iter_rows(values_only=True):
+        if all(valor is None or valor == '' for valor in fila):
+            vacias += 1
+            continue
+        for _ in range(vacias):
+            yield ()
+        vacias = 0
+        yield fila
+
+
+def _trozos_xlsx(archivo, filas, hoja):
+    from openpyxl import load_workbook
+
+    libro = load_workbook(archivo, read_only=True, data_only=True)
+    try:
+        hoja = libro.worksheets[hoja] if isinstance(hoja, int) else libro[hoja]
+        filas_hoja = _filas_hoja(hoja)
+        primera = next(filas_hoja, None)
+        if primera is None:
+            return
+        encabezados = _encabezados(primera)
+        ancho = len(encabezados)
+        inicio = 0
+        while True:
+            lote = list(itertools.islice(filas_hoja, filas))
+            if not lote:
+                if inicio == 0:
+                    # sólo encabezados: DataFrame vacío con sus columnas, como read_excel
+                    yield pd.DataFrame(columns=encabezados)
+                return
+            # filas más cortas / más largas que el encabezado, como read_excel
+            lote = [tuple(fila[:ancho]) + (None,) * (ancho - len(fila)) for fila in lote]
+            df = pd.DataFrame.from_records(lote, columns=encabezados)
+            df.index = pd.RangeIndex(inicio, inicio + len(df))
+            inicio += len(df)
+            # celdas tipadas de openpyxl -> int64 / float64 / datetime64 donde la columna es homogénea
+            yield df.infer_objects()
+    finally:
+        libro.close()
+
+
+def leer_por_trozos(archivo, filas=LECTURA_CHUNK_FILAS, hoja=0):
+    """
+    DataFrames de hasta `filas` filas, con encabezados sin espacios e índice continuo.
+    Un archivo con sólo encabezados da un único DataFrame vacío con sus columnas;
+    uno sin nada, ningún DataFrame.
+    """
+    if hasattr(archivo, 'seek'):
+        archivo.seek(0)
+    if _es_csv(archivo):
+        try:
+            trozos = pd.read_csv(archivo, chunksize=filas)
+        except pd.errors.EmptyDataError:
+            return
+    elif _es_xls(archivo):
+        df = pd.read_excel(archivo, sheet_name=hoja)
+        trozos = (df.iloc[i:i + filas] for i in range(0, max(len(df), 1), filas))
+    else:
+        trozos = _trozos_xlsx(archivo, filas, hoja)
+
+    for df in trozos:
+        df.columns = [str(c).strip() for c in df.columns]
+        yield df
+
+
+def leer_archivo(archivo, date_columns=None, hoja=0):
+    """El archivo completo en un DataFrame (encabezados sin espacios); `date_columns` a datetime."""
+    trozos = list(leer_por_trozos(archivo, hoja=hoja))
+    if not trozos:
+        df = pd.DataFrame()
+    elif len(trozos) == 1:
+        df = trozos[0]
+    else:
+        df = pd.concat(trozos)
+        del trozos
+
+    for col in date_columns or ():
+        if col in df.columns:
+            df[col] = pd.to_datetime(df[col], errors='coerce')
+    return df
@@ -0,0 +1,84 @@
+# appdataflowai/management/commands/benchmark_carga_masiva.py
+"""
+Throughput de inserción de filas de importación: bulk_create con instancias del
+modelo (lo que hacían los *BulkImportView) frente a CargaMasiva
+(appdataflowai/carga_masiva.py: COPY + INSERT ... SELECT en PostgreSQL,
+bulk_create por lotes en otros motores).
+
+    python manage.py benchmark_carga_masiva --filas 200000
+    python manage.py benchmark_carga_masiva --filas 100000 --empresa 1 --producto 22
+
+Usa VentasBelkin con filas sintéticas; cada corrida va en una transacción que
+se revierte al final, así que la tabla queda como estaba.
+"""
+import datetime as dt
+import time
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+
+from appdataflowai.carga_masiva import CargaMasiva
+from appdataflowai.models import VentasBelkin
+
+
+def _filas(cantidad, empresa_id, producto_id):
+    base = dt.date(2024, 1, 1)
+    for i in range(cantidad):
+        yield {
+            'fecha_venta': base + dt.timedelta(days=i % 365),
+            'canal_cliente': ('Retail', 'Online', 'Mayorista')[i % 3],
+            'punto_venta': f'PDV {i % 500}',
+            'categoria': f'Categoria {i % 12}',
+            'marca': 'Belkin',
+            'producto': f'Producto {i % 800}',
+            'precio_unitario_venta': Decimal('19.90'),
+            'cantidad': i % 40 + 1,
+            'total_ventas': Decimal('19.90') * (i % 40 + 1),
+            'id_empresa_id': empresa_id,
+            'id_producto_id': producto_id,
+        }
+
+
+def _bulk_create(filas):
+    objs = [VentasBelkin(**fila) for fila in filas]
+    VentasBelkin.objects.bulk_create(objs, batch_size=1000)
+    return len(objs)
+
+
+def _carga_masiva(filas):
+    carga = CargaMasiva(VentasBelkin)
+    carga.copiar(carga.normalizar(fila) for fila in filas)
+    insertadas, _ = carga.insertar()
+    return insertadas
+
+
+class Command(BaseCommand):
+    help = "Filas/s de bulk_create vs CargaMasiva (COPY) sobre VentasBelkin; todo se revierte"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--filas', type=int, default=100_000)
+        parser.add_argument('--empresa', type=int, default=1)
+        parser.add_argument('--producto', type=int, default=22)
+
+    def handle(self, *args, **options):
+        cantidad = options['filas']
+        self.stdout.write(f"Motor: {connection.vendor}; {cantidad} filas de VentasBelkin")
+
+        resultados = {}
+        for nombre, cargar in (('bulk_create', _bulk_create), ('carga_masiva', _carga_masiva)):
+            filas = _filas(cantidad, options['empresa'], options['producto'])
+            with transaction.atomic():
+                inicio = time.perf_counter()
+                insertadas = cargar(filas)
+                segundos = time.perf_counter() - inicio
+                transaction.set_rollback(True)
+            resultados[nombre] = insertadas / segundos if segundos else 0
+            self.stdout.write(
+                f"{nombre:<13} {insertadas:>9} filas  {segundos:8.2f} s  {resultados[nombre]:>10.0f} filas/s"
+            )
+
+        if resultados['bulk_create']:
+            self.stdout.write(self.style.SUCCESS(
+                f"CargaMasiva: {resultados['carga_masiva'] / resultados['bulk_create']:.1f}x bulk_create"
+            ))
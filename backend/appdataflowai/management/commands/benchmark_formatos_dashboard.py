@@ -0,0 +1,106 @@
+# appdataflowai/management/commands/benchmark_formatos_dashboard.py
+"""
+Compara tamaño de payload y tiempo de render de los listados de dashboards
+entre el JSON por filas actual y los formatos de appdataflowai/renderers.py.
+
+    python manage.py benchmark_formatos_dashboard --empresa 1 --limit 20000 --repeticiones 5
+
+El serializer se ejecuta una sola vez por dashboard; lo que se mide es el
+render (JSON por filas vs columnar / msgpack / arrow) sobre los mismos datos.
+"""
+import time
+
+from django.core.management.base import BaseCommand
+from rest_framework.renderers import JSONRenderer
+
+from appdataflowai import renderers
+from appdataflowai.models import (
+    DashboardARPU,
+    DashboardChurnRate,
+    DashboardCompras,
+    DashboardFinanzas,
+    DashboardIspVentas,
+    DashboardSales,
+    DashboardSalesreview,
+    DashboardVentas,
+    DashboardVentasDataflow,
+    DashDfVentas,
+)
+from appdataflowai.serializers import (
+    DashboardARPUSerializer,
+    DashboardChurnRateSerializer,
+    DashboardComprasSerializer,
+    DashboardFinanzasSerializer,
+    DashboardIspVentasSerializer,
+    DashboardSalesreviewSerializer,
+    DashboardSalesSerializer,
+    DashboardVentasDataflowSerializer,
+    DashboardVentasSerializer,
+    DashVeinteVentaSerializer,
+)
+
+# (vista, modelo, serializer, filtra por id_empresa)
+DASHBOARDS = (
+    ('DashboardVentasDataflowView', DashboardVentasDataflow, DashboardVentasDataflowSerializer, False),
+    ('DashboardVentasView', DashboardVentas, DashboardVentasSerializer, True),
+    ('DashboardSalesView', DashboardSales, DashboardSalesSerializer, True),
+    ('DashboardFinanzasView', DashboardFinanzas, DashboardFinanzasSerializer, True),
+    ('DashboardComprasView', DashboardCompras, DashboardComprasSerializer, True),
+    ('DashboardSalesreviewView', DashboardSalesreview, DashboardSalesreviewSerializer, True),
+    ('DashboardIspVentas_List', DashboardIspVentas, DashboardIspVentasSerializer, True),
+    ('DashboardChurnRateView', DashboardChurnRate, DashboardChurnRateSerializer, True),
+    ('DashboardARPUListView', DashboardARPU, DashboardARPUSerializer, True),
+    ('DashVeinteVentaListCreateView', DashDfVentas, DashVeinteVentaSerializer, True),
+)
+
+
+def _formatos():
+    return [
+        ('json', JSONRenderer()),
+        ('columnar', renderers.ColumnarJSONRenderer()),
+        ('msgpack', renderers.MsgpackColumnarRenderer()),
+        ('arrow', renderers.ArrowStreamRenderer()),
+    ]
+
+
+class Command(BaseCommand):
+    help = "Benchmark de tamaño/tiempo de render: JSON por filas vs formatos columnares en cada dashboard"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--empresa', type=int, default=None, help='id_empresa a medir (default: todas)')
+        parser.add_argument('--limit', type=int, default=20000, help='Máximo de filas por dashboard')
+        parser.add_argument('--repeticiones', type=int, default=3, help='Renders por formato (se toma el mejor)')
+
+    def handle(self, *args, **options):
+        formatos = _formatos()
+
+        for vista, model, serializer_class, por_empresa in DASHBOARDS:
+            qs = model.objects.all()
+            if por_empresa and options['empresa'] is not None:
+                qs = qs.filter(id_empresa_id=options['empresa'])
+            qs = qs.order_by('pk')[:options['limit']]
+
+            inicio = time.perf_counter()
+            data = serializer_class(qs, many=True).data
+            t_serializer = (time.perf_counter() - inicio) * 1000
+
+            self.stdout.write(self.style.MIGRATE_HEADING(
+                f"{vista}: {len(data)} filas (serializer {t_serializer:.1f} ms)"
+            ))
+            if not data:
+                continue
+
+            base = None
+            for nombre, renderer in formatos:
+                mejor = None
+                for _ in range(max(1, options['repeticiones'])):
+                    inicio = time.perf_counter()
+                    cuerpo = renderer.render(data)
+                    ms = (time.perf_counter() - inicio) * 1000
+                    mejor = ms if mejor is None else min(mejor, ms)
+                size = len(cuerpo)
+                if base is None:
+                    base = size
+                self.stdout.write(
+                    f"  {nombre:<9} {size:>12,d} bytes  {size / base:6.1%}  render {mejor:8.1f} ms"
+                )
@@ -0,0 +1,288 @@
+# appdataflowai/management/commands/benchmark_importaciones.py
+"""
+Benchmark de punta a punta de las vistas de importación / exportación, con los
+archivos sintéticos de appdataflowai/generadores_benchmark.py.
+
+    python manage.py benchmark_importaciones --filas 1k 100k --salida base.json
+    python manage.py benchmark_importaciones --filas 100k --objetivos ventas_bluetti leads_brokers
+    python manage.py benchmark_importaciones --filas 100k --comparar base.json --tolerancia 0.2
+
+Cada importación pasa por la URL real con el test client de Django (JWT del
+usuario de --usuario; `?sync=1&forzar=1` para medir en el request y saltar la
+deduplicación). Los archivos de más de 10 MB se suben por partes
+(importaciones/cargas/) como lo haría el frontend. Si el objetivo tiene vista
+de exportación, se descarga después lo importado.
+
+Por corrida se registra: segundos, filas/s, consultas SQL (execute_wrapper) y
+pico de RSS del proceso (muestreado de /proc/self/statm; ru_maxrss fuera de
+Linux, que sólo crece). Cada objetivo y tamaño van en una transacción que se
+revierte al final: la base queda como estaba (el usuario y las empresas /
+productos fijos de las vistas deben existir).
+
+Con --comparar falla (CommandError) si filas/s cae, o consultas / RSS suben,
+más de --tolerancia respecto de la línea base.
+"""
+import json
+import os
+import resource
+import sys
+import tempfile
+import threading
+import time
+
+import jwt
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test import Client
+from django.test.utils import setup_test_environment
+from django.urls import reverse
+from django.utils import timezone
+
+from appdataflowai.authentication import construir_payload_acceso
+from appdataflowai.generadores_benchmark import OBJETIVOS, escribir_archivo
+from appdataflowai.models import Usuario
+
+MULTIPART_MAX_BYTES = 10 * 1024 * 1024
+SUFIJOS = {'k': 1_000, 'm': 1_000_000}
+
+
+def _cantidad(valor):
+    """'1k' / '100k' / '1m' / '2500' -> int."""
+    texto = str(valor).strip().lower()
+    factor = SUFIJOS.get(texto[-1:], 1)
+    try:
+        return int(float(texto[:-1] if factor > 1 else texto) * factor)
+    except ValueError:
+        raise CommandError(f'--filas inválido: {valor}')
+
+
+def _rss_actual():
+    try:
+        with open('/proc/self/statm') as statm:
+            return int(statm.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except OSError:
+        rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Linux reporta KB, macOS bytes
+        return rss if sys.platform == 'darwin' else rss * 1024
+
+
+class _Medicion:
+    """Tiempo, consultas y pico de RSS de lo que corre dentro del `with`."""
+
+    intervalo = 0.01
+
+    def __enter__(self):
+        self.consultas = 0
+        self.pico = _rss_actual()
+        self._fin = threading.Event()
+        self._muestreo = threading.Thread(target=self._muestrear, daemon=True)
+        self._muestreo.start()
+        self._wrapper = connection.execute_wrapper(self._contar)
+        self._wrapper.__enter__()
+        self._inicio = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.segundos = time.perf_counter() - self._inicio
+        self._wrapper.__exit__(*exc)
+        self._fin.set()
+        self._muestreo.join()
+        self.pico = max(self.pico, _rss_actual())
+        return False
+
+    def _contar(self, execute, sql, params, many, context):
+        self.consultas += 1
+        return execute(sql, params, many, context)
+
+    def _muestrear(self):
+        while not self._fin.wait(self.intervalo):
+            self.pico = max(self.pico, _rss_actual())
+
+
+def _datos(respuesta):
+    try:
+        return respuesta.json()
+    except (ValueError, TypeError):
+        return {}
+
+
+class Command(BaseCommand):
+    help = "Filas/s, consultas y pico de RSS de importaciones / exportaciones reales con datos sintéticos"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--filas', nargs='+', type=_cantidad, default=[1_000, 100_000],
+                            help="Tamaños a medir (1k, 100k, 1m...)")
+        parser.add_argument('--objetivos', nargs='+', choices=sorted(OBJETIVOS), default=sorted(OBJETIVOS))
+        parser.add_argument('--formato', choices=('csv', 'xlsx'), default='csv',
+                            help="Formato del archivo (si la vista no lo acepta se usa el que acepta)")
+        parser.add_argument('--semilla', type=int, default=0)
+        parser.add_argument('--usuario', help="id_usuario o correo (por defecto el primero de la empresa 1)")
+        parser.add_argument('--salida', help="Guardar los resultados como línea base JSON")
+        parser.add_argument('--comparar', help="Línea base JSON contra la que comparar")
+        parser.add_argument('--tolerancia', type=float, default=0.2)
+
+    def handle(self, *args, **options):
+        usuario = self._usuario(options['usuario'])
+        setup_test_environment()
+        token = jwt.encode(construir_payload_acceso(usuario), settings.SECRET_KEY, algorithm='HS256')
+        self.cliente = Client(headers={'authorization': f'Bearer {token}'})
+        self.stdout.write(f"Motor: {connection.vendor}; usuario {usuario.correo} (empresa {usuario.id_empresa_id})")
+
+        resultados = []
+        directorio = tempfile.mkdtemp(prefix='benchmark_importaciones_')
+        try:
+            for nombre in options['objetivos']:
+                objetivo = OBJETIVOS[nombre]
+                formato = options['formato'] if options['formato'] in objetivo.formatos else objetivo.formatos[0]
+                for filas in options['filas']:
+                    ruta = os.path.join(directorio, f'{nombre}_{filas}.{formato}')
+                    escribir_archivo(objetivo, ruta, filas, formato, semilla=options['semilla'])
+                    try:
+                        resultados.extend(self._correr(objetivo, usuario, ruta, filas, formato))
+                    finally:
+                        os.remove(ruta)
+        finally:
+            os.rmdir(directorio)
+
+        for resultado in resultados:
+            self.stdout.write(
+                f"{resultado['objetivo']:<22} {resultado['operacion']:<11} {resultado['filas']:>9} filas"
+                f"  {resultado['segundos']:8.2f} s  {resultado['filas_por_segundo']:>9.0f} filas/s"
+                f"  {resultado['consultas']:>6} consultas  pico {resultado['pico_rss_mb']:8.1f} MB"
+                f"  HTTP {resultado['estado_http']}"
+            )
+
+        if options['salida']:
+            with open(options['salida'], 'w', encoding='utf-8') as destino:
+                json.dump({
+                    'motor': connection.vendor,
+                    'semilla': options['semilla'],
+                    'fecha': timezone.now().isoformat(),
+                    'resultados': resultados,
+                }, destino, indent=2)
+            self.stdout.write(self.style.SUCCESS(f"Línea base guardada en {options['salida']}"))
+
+        if options['comparar']:
+            self._comparar(resultados, options['comparar'], options['tolerancia'])
+
+    def _usuario(self, valor):
+        if valor:
+            filtro = {'id_usuario': int(valor)} if str(valor).isdigit() else {'correo': valor}
+        else:
+            filtro = {'id_empresa_id': 1}
+        usuario = Usuario.objects.filter(**filtro).order_by('id_usuario').first()
+        if usuario is None:
+            raise CommandError('No hay usuario para autenticar las vistas (usar --usuario)')
+        return usuario
+
+    def _correr(self, objetivo, usuario, ruta, filas, formato):
+        resultados = []
+        with transaction.atomic():
+            if objetivo.preparar:
+                objetivo.preparar(usuario, filas)
+
+            with _Medicion() as medicion:
+                respuesta = self._importar(objetivo, ruta)
+            if respuesta.status_code >= 400:
+                self.stderr.write(f"{objetivo.nombre} ({filas}): HTTP {respuesta.status_code} {_datos(respuesta)}"[:2000])
+            resultados.append(self._resultado(objetivo, 'importacion', filas, formato, medicion, respuesta,
+                                              os.path.getsize(ruta)))
+
+            if objetivo.url_exportacion:
+                exportadas = objetivo.modelo.objects.filter(**objetivo.filtro(usuario)).count()
+                with _Medicion() as medicion:
+                    respuesta = self.cliente.get(reverse(objetivo.url_exportacion))
+                    tamano = sum(len(trozo) for trozo in respuesta.streaming_content) \
+                        if respuesta.streaming else len(respuesta.content)
+                resultados.append(self._resultado(objetivo, 'exportacion', exportadas, formato, medicion,
+                                                  respuesta, tamano))
+            transaction.set_rollback(True)
+        return resultados
+
+    def _importar(self, objetivo, ruta):
+        url = reverse(objetivo.url_importacion, kwargs=objetivo.kwargs_url)
+        if objetivo.mixin:
+            url += '?sync=1&forzar=1'
+        if objetivo.mixin and os.path.getsize(ruta) > MULTIPART_MAX_BYTES:
+            return self._importar_por_partes(url, ruta)
+        with open(ruta, 'rb') as archivo:
+            return self.cliente.post(url, {objetivo.campo_archivo: archivo})
+
+    def _importar_por_partes(self, url, ruta):
+        inicio = self.cliente.post(
+            reverse('carga-archivo-inicio'),
+            {'nombre_archivo': os.path.basename(ruta), 'tamano_total': os.path.getsize(ruta)},
+            content_type='application/json',
+        )
+        if inicio.status_code >= 400:
+            return inicio
+        carga = inicio.json()
+        codigo = carga['id_carga']
+        try:
+            with open(ruta, 'rb') as archivo:
+                for numero in range(carga['total_partes']):
+                    parte = self.cliente.put(
+                        reverse('carga-archivo-parte', kwargs={'codigo': codigo, 'numero': numero}),
+                        archivo.read(carga['tamano_parte']),
+                        content_type='application/octet-stream',
+                    )
+                    if parte.status_code >= 400:
+                        return parte
+            completa = self.cliente.post(reverse('carga-archivo-completar', kwargs={'codigo': codigo}))
+            if completa.status_code >= 400:
+                return completa
+            return self.cliente.post(url, {'id_carga': codigo})
+        finally:
+            # la fila se revierte con la transacción, el archivo en CARGAS_DIR no
+            self.cliente.delete(reverse('carga-archivo', kwargs={'codigo': codigo}))
+
+    @staticmethod
+    def _resultado(objetivo, operacion, filas, formato, medicion, respuesta, tamano):
+        return {
+            'objetivo': objetivo.nombre,
+            'operacion': operacion,
+            'formato': formato if operacion == 'importacion' else None,
+            'filas': filas,
+            'bytes': tamano,
+            'estado_http': respuesta.status_code,
+            'segundos': round(medicion.segundos, 4),
+            'filas_por_segundo': round(filas / medicion.segundos, 1) if medicion.segundos else 0,
+            'consultas': medicion.consultas,
+            'pico_rss_mb': round(medicion.pico / (1024 * 1024), 1),
+        }
+
+    def _comparar(self, resultados, ruta, tolerancia):
+        with open(ruta, encoding='utf-8') as origen:
+            base = json.load(origen)
+        if base.get('motor') != connection.vendor:
+            self.stdout.write(self.style.WARNING(
+                f"La línea base es de {base.get('motor')}, esta corrida de {connection.vendor}"
+            ))
+
+        def clave(resultado):
+            return resultado['objetivo'], resultado['operacion'], resultado['formato'], resultado['filas']
+
+        anteriores = {clave(resultado): resultado for resultado in base.get('resultados', [])}
+        regresiones = []
+        for actual in resultados:
+            previo = anteriores.get(clave(actual))
+            if previo is None:
+                continue
+            etiqueta = '{} {} {}'.format(*clave(actual)[:2], actual['filas'])
+            if actual['estado_http'] >= 400 > previo['estado_http']:
+                regresiones.append(f"{etiqueta}: HTTP {actual['estado_http']} (antes {previo['estado_http']})")
+            if actual['filas_por_segundo'] < previo['filas_por_segundo'] * (1 - tolerancia):
+                regresiones.append(
+                    f"{etiqueta}: {actual['filas_por_segundo']:.0f} filas/s (antes {previo['filas_por_segundo']:.0f})"
+                )
+            if actual['consultas'] > previo['consultas'] * (1 + tolerancia):
+                regresiones.append(f"{etiqueta}: {actual['consultas']} consultas (antes {previo['consultas']})")
+            if actual['pico_rss_mb'] > previo['pico_rss_mb'] * (1 + tolerancia):
+                regresiones.append(
+                    f"{etiqueta}: pico {actual['pico_rss_mb']:.1f} MB (antes {previo['pico_rss_mb']:.1f})"
+                )
+
+        if regresiones:
+            raise CommandError('Regresiones respecto de {}:\n  {}'.format(ruta, '\n  '.join(regresiones)))
+        self.stdout.write(self.style.SUCCESS(f"Sin regresiones respecto de {ruta} (tolerancia {tolerancia:.0%})"))
@@ -0,0 +1,125 @@
+# appdataflowai/management/commands/benchmark_lectura_excel.py
+"""
+Memoria pico y tiempo de lectura de un .xlsx: pd.read_excel frente a
+leer_por_trozos / leer_archivo (appdataflowai/lectura_archivos.py).
+
+    python manage.py benchmark_lectura_excel --filas 200000
+    python manage.py benchmark_lectura_excel --archivo ventas_2025.xlsx --chunk 20000
+
+Sin --archivo genera un libro sintético con columnas como las de
+VentasSelloutBluetti (openpyxl write_only, en un temporal). La memoria se mide
+con tracemalloc (incluye los buffers de numpy); no toca la base de datos.
+"""
+import datetime as dt
+import os
+import tempfile
+import time
+import tracemalloc
+
+import pandas as pd
+from django.core.management.base import BaseCommand
+
+from appdataflowai.lectura_archivos import leer_archivo, leer_por_trozos
+
+ENCABEZADOS = ['fecha_venta', 'canal', 'cliente', 'sku', 'producto', 'cantidad', 'precio_unitario', 'total']
+
+
+def _generar_xlsx(ruta, filas):
+    from openpyxl import Workbook
+
+    libro = Workbook(write_only=True)
+    hoja = libro.create_sheet('Datos')
+    hoja.append(ENCABEZADOS)
+    base = dt.datetime(2025, 1, 1)
+    for i in range(filas):
+        cantidad = i % 40 + 1
+        hoja.append([
+            base + dt.timedelta(days=i % 365),
+            ('Retail', 'Online', 'Mayorista')[i % 3],
+            f'Cliente {i % 900}',
+            f'SKU-{i % 2500:05d}',
+            f'Producto {i % 2500}',
+            cantidad,
+            19.9,
+            round(19.9 * cantidad, 2),
+        ])
+    libro.save(ruta)
+
+
+class _Archivo:
+    """Lo mínimo de un UploadedFile que usan los lectores: name + read/seek."""
+
+    def __init__(self, ruta):
+        self.name = ruta
+        self._f = open(ruta, 'rb')
+
+    def __getattr__(self, nombre):
+        return getattr(self._f, nombre)
+
+    def close(self):
+        self._f.close()
+
+
+def _medir(funcion):
+    tracemalloc.start()
+    inicio = time.perf_counter()
+    filas = funcion()
+    segundos = time.perf_counter() - inicio
+    _, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return filas, segundos, pico
+
+
+class Command(BaseCommand):
+    help = "Memoria pico de pd.read_excel vs lectura read_only por trozos"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--archivo', help=".xlsx a leer (por defecto uno sintético)")
+        parser.add_argument('--filas', type=int, default=100_000, help="Filas del libro sintético")
+        parser.add_argument('--chunk', type=int, default=50_000, help="Filas por trozo")
+
+    def handle(self, *args, **options):
+        ruta = options['archivo']
+        temporal = None
+        if not ruta:
+            temporal = tempfile.NamedTemporaryFile(suffix='.xlsx', delete=False)
+            temporal.close()
+            ruta = temporal.name
+            self.stdout.write(f"Generando {options['filas']} filas en {ruta}...")
+            _generar_xlsx(ruta, options['filas'])
+
+        try:
+            mb = os.path.getsize(ruta) / (1024 * 1024)
+            self.stdout.write(f"Archivo: {mb:.1f} MB")
+
+            def read_excel():
+                return len(pd.read_excel(ruta))
+
+            def por_trozos():
+                archivo = _Archivo(ruta)
+                try:
+                    # cada trozo se suelta antes de leer el siguiente, como en el motor de esquemas
+                    return sum(len(df) for df in leer_por_trozos(archivo, filas=options['chunk']))
+                finally:
+                    archivo.close()
+
+            def completo():
+                archivo = _Archivo(ruta)
+                try:
+                    return len(leer_archivo(archivo))
+                finally:
+                    archivo.close()
+
+            for nombre, funcion in (
+                ('pd.read_excel', read_excel),
+                ('leer_por_trozos', por_trozos),
+                ('leer_archivo', completo),
+            ):
+                filas, segundos, pico = _medir(funcion)
+                self.stdout.write(
+                    f"{nombre:<16} {filas:>9} filas  {segundos:8.2f} s  pico {pico / (1024 * 1024):9.1f} MB"
+                    f"  ({pico / (1024 * 1024) / mb if mb else 0:.1f}x el archivo)"
+                )
+        finally:
+            if temporal is not None:
+                os.remove(ruta)
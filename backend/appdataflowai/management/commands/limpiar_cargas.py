@@ -0,0 +1,24 @@
+# appdataflowai/management/commands/limpiar_cargas.py
+"""
+Borra las subidas por partes (appdataflowai/cargas_archivo.py) sin actividad
+en las últimas CARGA_EXPIRACION_HORAS, con sus archivos en CARGAS_DIR.
+
+    python manage.py limpiar_cargas
+    python manage.py limpiar_cargas --horas 6
+
+Pensado para un cron diario.
+"""
+from django.core.management.base import BaseCommand
+
+from appdataflowai.cargas_archivo import CARGA_EXPIRACION_HORAS, limpiar_cargas_vencidas
+
+
+class Command(BaseCommand):
+    help = "Borra las cargas por partes vencidas y sus archivos"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--horas', type=int, default=CARGA_EXPIRACION_HORAS)
+
+    def handle(self, *args, **options):
+        borradas = limpiar_cargas_vencidas(options['horas'])
+        self.stdout.write(f"{borradas} carga(s) borrada(s)")
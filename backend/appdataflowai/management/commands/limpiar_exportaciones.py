@@ -0,0 +1,33 @@
+# appdataflowai/management/commands/limpiar_exportaciones.py
+"""
+Recorta el directorio de exportaciones (appdataflowai/trabajos_exportacion.py)
+a EXPORTACION_ARTEFACTOS_MAX_BYTES, borrando primero los archivos menos usados,
+y borra los archivos que ya no pertenecen a ningún trabajo.
+
+    python manage.py limpiar_exportaciones
+    python manage.py limpiar_exportaciones --max-mb 512
+
+Pensado para un cron diario (los workers ya recortan al terminar cada trabajo).
+"""
+from django.core.management.base import BaseCommand
+
+from appdataflowai.trabajos_exportacion import (
+    EXPORTACION_ARTEFACTOS_MAX_BYTES,
+    limpiar_huerfanos,
+    recortar_artefactos,
+)
+
+
+class Command(BaseCommand):
+    help = "Expulsa los archivos de exportación menos usados y borra los huérfanos"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--max-mb', type=int, default=EXPORTACION_ARTEFACTOS_MAX_BYTES // (1024 * 1024))
+
+    def handle(self, *args, **options):
+        expirados, liberados = recortar_artefactos(options['max_mb'] * 1024 * 1024)
+        huerfanos = limpiar_huerfanos()
+        self.stdout.write(
+            f"{expirados} archivo(s) expirado(s), {liberados // (1024 * 1024)} MB liberados, "
+            f"{huerfanos} huérfano(s) borrado(s)"
+        )
@@ -0,0 +1,40 @@
+# appdataflowai/management/commands/procesar_exportaciones.py
+"""
+Worker de exportaciones en segundo plano (appdataflowai/trabajos_exportacion.py).
+
+    python manage.py procesar_exportaciones             # sondea la tabla cada --intervalo s
+    python manage.py procesar_exportaciones --una-vez   # vacía la cola y termina
+
+Útil con EXPORTACION_WORKERS=0 en los procesos web. El directorio de archivos
+(EXPORTACION_ARTEFACTOS_DIR) tiene que ser el mismo que ven los procesos web
+que sirven la descarga.
+"""
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from appdataflowai.trabajos_exportacion import procesar_exportaciones_pendientes
+from appdataflowai.versiones_dataset import cache_es_local
+
+
+class Command(BaseCommand):
+    help = "Procesa los trabajos de exportación pendientes"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--una-vez', action='store_true', help="Vaciar la cola y salir")
+        parser.add_argument('--intervalo', type=float, default=2.0, help="Segundos entre sondeos")
+
+    def handle(self, *args, **options):
+        if cache_es_local():
+            raise CommandError(
+                "El cache default es LocMem: las versiones de dataset no serían las de "
+                "los procesos web. Configurar un CACHE_BACKEND compartido."
+            )
+
+        while True:
+            procesados = procesar_exportaciones_pendientes()
+            if procesados:
+                self.stdout.write(f"{procesados} trabajo(s) procesado(s)")
+            if options['una_vez']:
+                return
+            time.sleep(options['intervalo'])
@@ -0,0 +1,45 @@
+# appdataflowai/management/commands/procesar_importaciones.py
+"""
+Worker de importaciones en segundo plano (appdataflowai/trabajos_importacion.py).
+
+    python manage.py procesar_importaciones             # sondea la tabla cada --intervalo s
+    python manage.py procesar_importaciones --una-vez   # vacía la cola y termina
+
+Útil con IMPORTACION_WORKERS=0 en los procesos web, o para recuperar trabajos
+que quedaron pendientes tras un reinicio. Varios workers pueden correr a la vez
+(los trabajos se toman con SELECT ... FOR UPDATE SKIP LOCKED).
+"""
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.urls import get_resolver
+
+from appdataflowai.trabajos_importacion import VISTAS_IMPORTACION, procesar_pendientes
+from appdataflowai.versiones_dataset import cache_es_local
+
+
+class Command(BaseCommand):
+    help = "Procesa los trabajos de importación pendientes"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--una-vez', action='store_true', help="Vaciar la cola y salir")
+        parser.add_argument('--intervalo', type=float, default=2.0, help="Segundos entre sondeos")
+
+    def handle(self, *args, **options):
+        if cache_es_local():
+            raise CommandError(
+                "El cache default es LocMem: las versiones de dataset que sube este proceso "
+                "no las verían los procesos web. Configurar un CACHE_BACKEND compartido."
+            )
+
+        # importar las urls carga todos los módulos de vistas y registra sus importadores
+        get_resolver().url_patterns
+        self.stdout.write(f"{len(VISTAS_IMPORTACION)} vistas de importación registradas")
+
+        while True:
+            procesados = procesar_pendientes()
+            if procesados:
+                self.stdout.write(f"{procesados} trabajo(s) procesado(s)")
+            if options['una_vez']:
+                return
+            time.sleep(options['intervalo'])
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.4 on 2026-10-18 09:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('appdataflowai', '0070_servicioslooptotek'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='registrossesion',
+            name='codigo_registro',
+            field=models.UUIDField(blank=True, db_column='codigo_registro', editable=False, null=True, unique=True),
+        ),
+    ]
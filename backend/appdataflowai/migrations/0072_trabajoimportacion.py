@@ -0,0 +1,47 @@
+# Generated by Django 5.2.4 on 2026-10-18 11:40
+
+import django.db.models.deletion
+import django.utils.timezone
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('appdataflowai', '0071_registrossesion_codigo_registro'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TrabajoImportacion',
+            fields=[
+                ('id_trabajo', models.AutoField(db_column='id_trabajo', primary_key=True, serialize=False)),
+                ('codigo', models.UUIDField(db_column='codigo', default=uuid.uuid4, editable=False, unique=True)),
+                ('tipo', models.CharField(db_column='tipo', max_length=150)),
+                ('estado', models.CharField(choices=[('pendiente', 'Pendiente'), ('procesando', 'Procesando'), ('completado', 'Completado'), ('fallido', 'Fallido')], db_column='estado', db_index=True, default='pendiente', max_length=20)),
+                ('nombre_archivo', models.CharField(db_column='nombre_archivo', max_length=255)),
+                ('campo_archivo', models.CharField(db_column='campo_archivo', default='file', max_length=50)),
+                ('contenido', models.BinaryField(db_column='contenido')),
+                ('datos', models.JSONField(blank=True, db_column='datos', default=dict)),
+                ('parametros', models.JSONField(blank=True, db_column='parametros', default=dict)),
+                ('filas_totales', models.IntegerField(blank=True, db_column='filas_totales', null=True)),
+                ('filas_procesadas', models.IntegerField(db_column='filas_procesadas', default=0)),
+                ('codigo_http', models.IntegerField(blank=True, db_column='codigo_http', null=True)),
+                ('resultado', models.JSONField(blank=True, db_column='resultado', null=True)),
+                ('errores', models.JSONField(blank=True, db_column='errores', default=list)),
+                ('worker', models.CharField(blank=True, db_column='worker', max_length=150, null=True)),
+                ('fecha_creacion', models.DateTimeField(db_column='fecha_creacion', default=django.utils.timezone.now)),
+                ('fecha_inicio', models.DateTimeField(blank=True, db_column='fecha_inicio', null=True)),
+                ('fecha_actualizacion', models.DateTimeField(blank=True, db_column='fecha_actualizacion', null=True)),
+                ('fecha_fin', models.DateTimeField(blank=True, db_column='fecha_fin', null=True)),
+                ('id_empresa', models.ForeignKey(blank=True, db_column='id_empresa', null=True, on_delete=django.db.models.deletion.SET_NULL, to='appdataflowai.empresa')),
+                ('id_usuario', models.ForeignKey(blank=True, db_column='id_usuario', null=True, on_delete=django.db.models.deletion.SET_NULL, to='appdataflowai.usuario')),
+            ],
+            options={
+                'verbose_name_plural': 'Trabajos de Importación',
+                'db_table': 'trabajos_importacion',
+                'indexes': [models.Index(fields=['estado', 'id_trabajo'], name='trabajos_imp_estado_idx')],
+            },
+        ),
+    ]
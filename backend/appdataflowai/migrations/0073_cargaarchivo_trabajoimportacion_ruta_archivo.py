@@ -0,0 +1,47 @@
+# Generated by Django 5.2.4 on 2026-10-18 13:05
+
+import django.db.models.deletion
+import django.utils.timezone
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('appdataflowai', '0072_trabajoimportacion'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='trabajoimportacion',
+            name='contenido',
+            field=models.BinaryField(blank=True, db_column='contenido', default=b''),
+        ),
+        migrations.AddField(
+            model_name='trabajoimportacion',
+            name='ruta_archivo',
+            field=models.CharField(blank=True, db_column='ruta_archivo', max_length=500, null=True),
+        ),
+        migrations.CreateModel(
+            name='CargaArchivo',
+            fields=[
+                ('id_carga', models.AutoField(db_column='id_carga', primary_key=True, serialize=False)),
+                ('codigo', models.UUIDField(db_column='codigo', default=uuid.uuid4, editable=False, unique=True)),
+                ('nombre_archivo', models.CharField(db_column='nombre_archivo', max_length=255)),
+                ('tamano_total', models.BigIntegerField(db_column='tamano_total')),
+                ('tamano_parte', models.IntegerField(db_column='tamano_parte')),
+                ('partes_recibidas', models.JSONField(blank=True, db_column='partes_recibidas', default=list)),
+                ('sha256', models.CharField(blank=True, db_column='sha256', max_length=64, null=True)),
+                ('estado', models.CharField(choices=[('recibiendo', 'Recibiendo'), ('completa', 'Completa')], db_column='estado', default='recibiendo', max_length=20)),
+                ('fecha_creacion', models.DateTimeField(db_column='fecha_creacion', default=django.utils.timezone.now)),
+                ('fecha_actualizacion', models.DateTimeField(db_column='fecha_actualizacion', default=django.utils.timezone.now)),
+                ('id_empresa', models.ForeignKey(blank=True, db_column='id_empresa', null=True, on_delete=django.db.models.deletion.SET_NULL, to='appdataflowai.empresa')),
+                ('id_usuario', models.ForeignKey(blank=True, db_column='id_usuario', null=True, on_delete=django.db.models.deletion.SET_NULL, to='appdataflowai.usuario')),
+            ],
+            options={
+                'verbose_name_plural': 'Cargas de Archivo',
+                'db_table': 'cargas_archivo',
+            },
+        ),
+    ]
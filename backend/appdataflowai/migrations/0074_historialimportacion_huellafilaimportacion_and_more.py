@@ -0,0 +1,53 @@
+# Generated by Django 5.2.4 on 2026-10-18 13:50
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('appdataflowai', '0073_cargaarchivo_trabajoimportacion_ruta_archivo'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='trabajoimportacion',
+            name='huella',
+            field=models.CharField(blank=True, db_column='huella', max_length=64, null=True),
+        ),
+        migrations.CreateModel(
+            name='HistorialImportacion',
+            fields=[
+                ('id_historial', models.AutoField(db_column='id_historial', primary_key=True, serialize=False)),
+                ('tipo', models.CharField(db_column='tipo', max_length=150)),
+                ('huella', models.CharField(db_column='huella', max_length=64)),
+                ('nombre_archivo', models.CharField(db_column='nombre_archivo', max_length=255)),
+                ('codigo_http', models.IntegerField(db_column='codigo_http')),
+                ('resultado', models.JSONField(blank=True, db_column='resultado', null=True)),
+                ('fecha', models.DateTimeField(db_column='fecha', default=django.utils.timezone.now)),
+                ('id_empresa', models.ForeignKey(blank=True, db_column='id_empresa', null=True, on_delete=django.db.models.deletion.CASCADE, to='appdataflowai.empresa')),
+                ('id_usuario', models.ForeignKey(blank=True, db_column='id_usuario', null=True, on_delete=django.db.models.deletion.SET_NULL, to='appdataflowai.usuario')),
+            ],
+            options={
+                'verbose_name_plural': 'Historial de Importaciones',
+                'db_table': 'historial_importaciones',
+                'indexes': [models.Index(fields=['huella', 'id_empresa'], name='historial_imp_huella_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='HuellaFilaImportacion',
+            fields=[
+                ('id_huella', models.BigAutoField(db_column='id_huella', primary_key=True, serialize=False)),
+                ('modelo', models.CharField(db_column='modelo', max_length=100)),
+                ('clave', models.CharField(db_column='clave', max_length=255)),
+                ('huella', models.CharField(db_column='huella', max_length=16)),
+            ],
+            options={
+                'verbose_name_plural': 'Huellas de Filas Importadas',
+                'db_table': 'huellas_filas_importacion',
+                'constraints': [models.UniqueConstraint(fields=('modelo', 'clave'), name='huella_fila_modelo_clave_uniq')],
+            },
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.4 on 2026-10-18 14:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('appdataflowai', '0074_historialimportacion_huellafilaimportacion_and_more'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='leadsbrokers',
+            index=models.Index(fields=['id_broker', 'correo'], name='leads_broker_correo_idx'),
+        ),
+    ]
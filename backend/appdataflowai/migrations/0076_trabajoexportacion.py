@@ -0,0 +1,49 @@
+# Generated by Django 5.2.4 on 2026-10-18 17:05
+
+import django.db.models.deletion
+import django.utils.timezone
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('appdataflowai', '0075_leadsbrokers_leads_broker_correo_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TrabajoExportacion',
+            fields=[
+                ('id_trabajo', models.AutoField(db_column='id_trabajo', primary_key=True, serialize=False)),
+                ('codigo', models.UUIDField(db_column='codigo', default=uuid.uuid4, editable=False, unique=True)),
+                ('privado', models.BooleanField(db_column='privado', default=False)),
+                ('tipo', models.CharField(db_column='tipo', max_length=255)),
+                ('parametros', models.JSONField(blank=True, db_column='parametros', default=dict)),
+                ('kwargs_url', models.JSONField(blank=True, db_column='kwargs_url', default=dict)),
+                ('formato', models.CharField(db_column='formato', max_length=10)),
+                ('clave', models.CharField(db_column='clave', db_index=True, max_length=64)),
+                ('estado', models.CharField(choices=[('pendiente', 'Pendiente'), ('procesando', 'Procesando'), ('completado', 'Completado'), ('fallido', 'Fallido'), ('expirado', 'Expirado')], db_column='estado', db_index=True, default='pendiente', max_length=20)),
+                ('nombre_archivo', models.CharField(db_column='nombre_archivo', max_length=255)),
+                ('ruta_archivo', models.CharField(blank=True, db_column='ruta_archivo', max_length=500, null=True)),
+                ('tamano_bytes', models.BigIntegerField(blank=True, db_column='tamano_bytes', null=True)),
+                ('filas', models.IntegerField(blank=True, db_column='filas', null=True)),
+                ('codigo_http', models.IntegerField(blank=True, db_column='codigo_http', null=True)),
+                ('error', models.JSONField(blank=True, db_column='error', null=True)),
+                ('worker', models.CharField(blank=True, db_column='worker', max_length=150, null=True)),
+                ('fecha_creacion', models.DateTimeField(db_column='fecha_creacion', default=django.utils.timezone.now)),
+                ('fecha_inicio', models.DateTimeField(blank=True, db_column='fecha_inicio', null=True)),
+                ('fecha_actualizacion', models.DateTimeField(blank=True, db_column='fecha_actualizacion', null=True)),
+                ('fecha_fin', models.DateTimeField(blank=True, db_column='fecha_fin', null=True)),
+                ('fecha_ultimo_acceso', models.DateTimeField(blank=True, db_column='fecha_ultimo_acceso', null=True)),
+                ('id_empresa', models.ForeignKey(blank=True, db_column='id_empresa', null=True, on_delete=django.db.models.deletion.SET_NULL, to='appdataflowai.empresa')),
+                ('id_usuario', models.ForeignKey(blank=True, db_column='id_usuario', null=True, on_delete=django.db.models.deletion.SET_NULL, to='appdataflowai.usuario')),
+            ],
+            options={
+                'verbose_name_plural': 'Trabajos de Exportación',
+                'db_table': 'trabajos_exportacion',
+                'indexes': [models.Index(fields=['estado', 'id_trabajo'], name='trabajos_exp_estado_idx')],
+            },
+        ),
+    ]
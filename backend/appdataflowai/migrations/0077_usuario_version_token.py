@@ -0,0 +1,18 @@
+# Generated by Django 5.2.4 on 2026-10-18 12:53
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('appdataflowai', '0076_trabajoexportacion'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='usuario',
+            name='version_token',
+            field=models.IntegerField(db_column='version_token', default=0),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.4 on 2026-10-18 13:01
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('appdataflowai', '0077_usuario_version_token'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='historialimportacion',
+            name='versiones',
+            field=models.JSONField(blank=True, db_column='versiones', null=True),
+        ),
+    ]
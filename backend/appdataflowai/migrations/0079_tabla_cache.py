@@ -0,0 +1,21 @@
+# Crea la tabla de DatabaseCache (cache `default` por defecto, ver settings.CACHES)
+# en el primer migrate, para que el deploy no dependa de correr createcachetable a mano.
+
+from django.core.management import call_command
+from django.db import migrations
+
+
+def crear_tabla_cache(apps, schema_editor):
+    # no hace nada si CACHES no usa DatabaseCache o si la tabla ya existe
+    call_command('createcachetable', database=schema_editor.connection.alias, verbosity=0)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('appdataflowai', '0078_historialimportacion_versiones'),
+    ]
+
+    operations = [
+        migrations.RunPython(crear_tabla_cache, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.4 on 2026-10-18 13:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('appdataflowai', '0079_tabla_cache'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='huellafilaimportacion',
+            name='version',
+            field=models.BigIntegerField(blank=True, db_column='version', null=True),
+        ),
+    ]
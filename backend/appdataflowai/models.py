@@ -112,6 +112,8 @@ class Usuario(models.Model):
     correo = models.EmailField(max_length=255, db_column='correo', unique=True)
     contrasena = models.CharField(max_length=255, db_column='contrasena')  
     id_estado = models.ForeignKey(Estado, on_delete=models.PROTECT, db_column='id_estado')
+    # `tv` de los access tokens; subirla revoca los emitidos antes (authentication.revocar_tokens_usuario)
+    version_token = models.IntegerField(db_column='version_token', default=0)
     
     class Meta:
         db_table = 'usuarios'
@@ -911,6 +913,9 @@ class RegistrosSesion(models.Model):
 
     fecha_inicio_sesion = models.DateTimeField(db_column='fecha_inicio_sesion', default=timezone.now)
 
+    # id generado en el login (antes del INSERT) para poder devolverlo sin esperar a la BD
+    codigo_registro = models.UUIDField(db_column='codigo_registro', null=True, blank=True, unique=True, editable=False)
+
     class Meta:
         db_table = 'registros_sesion'
         verbose_name_plural = 'Registros de Sesión'
@@ -1776,6 +1781,10 @@ class LeadsBrokers(models.Model):
     class Meta:
         db_table = 'leads_brokers'
         verbose_name_plural = 'Leads Brokers'
+        indexes = [
+            # deduplicación de leads por broker al importar CSV
+            models.Index(fields=['id_broker', 'correo'], name='leads_broker_correo_idx'),
+        ]
 
     def __str__(self):
         return f'{self.nombre_lead} ({self.id_lead})'
@@ -2614,3 +2623,204 @@ class ServiciosLoopTotek(models.Model):
         db_table = 'servicios_loop_totek'
         verbose_name_plural = 'Servicios Loop Totek'
         ordering = ['-fecha_servicio']
+
+
+# ==========================
+# Trabajos de importación en segundo plano (appdataflowai/trabajos_importacion.py)
+# ==========================
+class TrabajoImportacion(models.Model):
+    ESTADO_PENDIENTE = 'pendiente'
+    ESTADO_PROCESANDO = 'procesando'
+    ESTADO_COMPLETADO = 'completado'
+    ESTADO_FALLIDO = 'fallido'
+    ESTADO_CHOICES = [
+        (ESTADO_PENDIENTE, 'Pendiente'),
+        (ESTADO_PROCESANDO, 'Procesando'),
+        (ESTADO_COMPLETADO, 'Completado'),
+        (ESTADO_FALLIDO, 'Fallido'),
+    ]
+
+    id_trabajo = models.AutoField(primary_key=True, db_column='id_trabajo')
+    # id público que se devuelve al cliente (el autoincremental no se expone)
+    codigo = models.UUIDField(db_column='codigo', default=uuid.uuid4, unique=True, editable=False)
+
+    id_empresa = models.ForeignKey('Empresa', on_delete=models.SET_NULL, db_column='id_empresa', null=True, blank=True)
+    id_usuario = models.ForeignKey('Usuario', on_delete=models.SET_NULL, db_column='id_usuario', null=True, blank=True)
+
+    # vista de importación que procesa el archivo (nombre de clase registrado)
+    tipo = models.CharField(max_length=150, db_column='tipo')
+    estado = models.CharField(max_length=20, db_column='estado', choices=ESTADO_CHOICES, default=ESTADO_PENDIENTE, db_index=True)
+
+    nombre_archivo = models.CharField(max_length=255, db_column='nombre_archivo')
+    campo_archivo = models.CharField(max_length=50, db_column='campo_archivo', default='file')
+    contenido = models.BinaryField(db_column='contenido', default=b'', blank=True)
+    # archivos subidos por partes (CargaArchivo): se leen del disco, no de `contenido`
+    ruta_archivo = models.CharField(max_length=500, db_column='ruta_archivo', null=True, blank=True)
+    # huella de contenido + destino (historial_importaciones.py); se registra al terminar bien
+    huella = models.CharField(max_length=64, db_column='huella', null=True, blank=True)
+    datos = models.JSONField(db_column='datos', default=dict, blank=True)
+    parametros = models.JSONField(db_column='parametros', default=dict, blank=True)
+
+    filas_totales = models.IntegerField(db_column='filas_totales', null=True, blank=True)
+    filas_procesadas = models.IntegerField(db_column='filas_procesadas', default=0)
+    codigo_http = models.IntegerField(db_column='codigo_http', null=True, blank=True)
+    resultado = models.JSONField(db_column='resultado', null=True, blank=True)
+    errores = models.JSONField(db_column='errores', default=list, blank=True)
+
+    worker = models.CharField(max_length=150, db_column='worker', null=True, blank=True)
+    fecha_creacion = models.DateTimeField(db_column='fecha_creacion', default=timezone.now)
+    fecha_inicio = models.DateTimeField(db_column='fecha_inicio', null=True, blank=True)
+    fecha_actualizacion = models.DateTimeField(db_column='fecha_actualizacion', null=True, blank=True)
+    fecha_fin = models.DateTimeField(db_column='fecha_fin', null=True, blank=True)
+
+    class Meta:
+        db_table = 'trabajos_importacion'
+        verbose_name_plural = 'Trabajos de Importación'
+        indexes = [
+            models.Index(fields=['estado', 'id_trabajo'], name='trabajos_imp_estado_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.tipo} ({self.estado}) {self.codigo}'
+
+
+class CargaArchivo(models.Model):
+    """Subida por partes de un archivo grande (appdataflowai/cargas_archivo.py)."""
+    ESTADO_RECIBIENDO = 'recibiendo'
+    ESTADO_COMPLETA = 'completa'
+    ESTADO_CHOICES = [
+        (ESTADO_RECIBIENDO, 'Recibiendo'),
+        (ESTADO_COMPLETA, 'Completa'),
+    ]
+
+    id_carga = models.AutoField(primary_key=True, db_column='id_carga')
+    codigo = models.UUIDField(db_column='codigo', default=uuid.uuid4, unique=True, editable=False)
+
+    id_empresa = models.ForeignKey('Empresa', on_delete=models.SET_NULL, db_column='id_empresa', null=True, blank=True)
+    id_usuario = models.ForeignKey('Usuario', on_delete=models.SET_NULL, db_column='id_usuario', null=True, blank=True)
+
+    nombre_archivo = models.CharField(max_length=255, db_column='nombre_archivo')
+    tamano_total = models.BigIntegerField(db_column='tamano_total')
+    tamano_parte = models.IntegerField(db_column='tamano_parte')
+    # números de parte (desde 0) ya escritos en disco
+    partes_recibidas = models.JSONField(db_column='partes_recibidas', default=list, blank=True)
+    # el que declara el cliente al iniciar; al completar, el calculado
+    sha256 = models.CharField(max_length=64, db_column='sha256', null=True, blank=True)
+    estado = models.CharField(max_length=20, db_column='estado', choices=ESTADO_CHOICES, default=ESTADO_RECIBIENDO)
+
+    fecha_creacion = models.DateTimeField(db_column='fecha_creacion', default=timezone.now)
+    fecha_actualizacion = models.DateTimeField(db_column='fecha_actualizacion', default=timezone.now)
+
+    class Meta:
+        db_table = 'cargas_archivo'
+        verbose_name_plural = 'Cargas de Archivo'
+
+    @property
+    def total_partes(self):
+        return max(1, -(-self.tamano_total // self.tamano_parte))
+
+    def __str__(self):
+        return f'{self.nombre_archivo} ({self.estado}) {self.codigo}'
+
+
+class HistorialImportacion(models.Model):
+    """Importaciones terminadas por empresa, por huella del archivo (appdataflowai/historial_importaciones.py)."""
+    id_historial = models.AutoField(primary_key=True, db_column='id_historial')
+    id_empresa = models.ForeignKey('Empresa', on_delete=models.CASCADE, db_column='id_empresa', null=True, blank=True)
+    id_usuario = models.ForeignKey('Usuario', on_delete=models.SET_NULL, db_column='id_usuario', null=True, blank=True)
+
+    # vista de importación (nombre de clase) y sha256 de contenido + destino
+    tipo = models.CharField(max_length=150, db_column='tipo')
+    huella = models.CharField(max_length=64, db_column='huella')
+    nombre_archivo = models.CharField(max_length=255, db_column='nombre_archivo')
+    codigo_http = models.IntegerField(db_column='codigo_http')
+    resultado = models.JSONField(db_column='resultado', null=True, blank=True)
+    # {dataset: versión} al terminar; si cambian, el mismo archivo ya no es duplicado
+    versiones = models.JSONField(db_column='versiones', null=True, blank=True)
+    fecha = models.DateTimeField(db_column='fecha', default=timezone.now)
+
+    class Meta:
+        db_table = 'historial_importaciones'
+        verbose_name_plural = 'Historial de Importaciones'
+        indexes = [
+            models.Index(fields=['huella', 'id_empresa'], name='historial_imp_huella_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.tipo} {self.nombre_archivo} ({self.fecha:%Y-%m-%d})'
+
+
+class HuellaFilaImportacion(models.Model):
+    """Hash del último contenido importado de cada fila con clave natural (modelo + clave)."""
+    id_huella = models.BigAutoField(primary_key=True, db_column='id_huella')
+    modelo = models.CharField(max_length=100, db_column='modelo')
+    clave = models.CharField(max_length=255, db_column='clave')
+    huella = models.CharField(max_length=16, db_column='huella')
+    # versión global del dataset al confirmar la importación; si cambió, la huella no vale
+    version = models.BigIntegerField(db_column='version', null=True, blank=True)
+
+    class Meta:
+        db_table = 'huellas_filas_importacion'
+        verbose_name_plural = 'Huellas de Filas Importadas'
+        constraints = [
+            models.UniqueConstraint(fields=['modelo', 'clave'], name='huella_fila_modelo_clave_uniq'),
+        ]
+
+
+class TrabajoExportacion(models.Model):
+    """Exportación en segundo plano y su archivo en disco (appdataflowai/trabajos_exportacion.py)."""
+    ESTADO_PENDIENTE = 'pendiente'
+    ESTADO_PROCESANDO = 'procesando'
+    ESTADO_COMPLETADO = 'completado'
+    ESTADO_FALLIDO = 'fallido'
+    # el archivo se borró para liberar espacio; un request igual genera otro trabajo
+    ESTADO_EXPIRADO = 'expirado'
+    ESTADO_CHOICES = [
+        (ESTADO_PENDIENTE, 'Pendiente'),
+        (ESTADO_PROCESANDO, 'Procesando'),
+        (ESTADO_COMPLETADO, 'Completado'),
+        (ESTADO_FALLIDO, 'Fallido'),
+        (ESTADO_EXPIRADO, 'Expirado'),
+    ]
+
+    id_trabajo = models.AutoField(primary_key=True, db_column='id_trabajo')
+    codigo = models.UUIDField(db_column='codigo', default=uuid.uuid4, unique=True, editable=False)
+
+    id_empresa = models.ForeignKey('Empresa', on_delete=models.SET_NULL, db_column='id_empresa', null=True, blank=True)
+    id_usuario = models.ForeignKey('Usuario', on_delete=models.SET_NULL, db_column='id_usuario', null=True, blank=True)
+    # datos por usuario (p. ej. leads del broker): sólo lo descarga quien lo pidió
+    privado = models.BooleanField(db_column='privado', default=False)
+
+    # vista de exportación (ruta del módulo + clase) y query string con que se pidió
+    tipo = models.CharField(max_length=255, db_column='tipo')
+    parametros = models.JSONField(db_column='parametros', default=dict, blank=True)
+    kwargs_url = models.JSONField(db_column='kwargs_url', default=dict, blank=True)
+    formato = models.CharField(max_length=10, db_column='formato')
+    # sha256 de tipo + empresa (+ usuario) + filtros + formato + versión de los datasets
+    clave = models.CharField(max_length=64, db_column='clave', db_index=True)
+    estado = models.CharField(max_length=20, db_column='estado', choices=ESTADO_CHOICES, default=ESTADO_PENDIENTE, db_index=True)
+
+    nombre_archivo = models.CharField(max_length=255, db_column='nombre_archivo')
+    ruta_archivo = models.CharField(max_length=500, db_column='ruta_archivo', null=True, blank=True)
+    tamano_bytes = models.BigIntegerField(db_column='tamano_bytes', null=True, blank=True)
+    filas = models.IntegerField(db_column='filas', null=True, blank=True)
+    codigo_http = models.IntegerField(db_column='codigo_http', null=True, blank=True)
+    error = models.JSONField(db_column='error', null=True, blank=True)
+
+    worker = models.CharField(max_length=150, db_column='worker', null=True, blank=True)
+    fecha_creacion = models.DateTimeField(db_column='fecha_creacion', default=timezone.now)
+    fecha_inicio = models.DateTimeField(db_column='fecha_inicio', null=True, blank=True)
+    fecha_actualizacion = models.DateTimeField(db_column='fecha_actualizacion', null=True, blank=True)
+    fecha_fin = models.DateTimeField(db_column='fecha_fin', null=True, blank=True)
+    # para expulsar primero los archivos que nadie descarga
+    fecha_ultimo_acceso = models.DateTimeField(db_column='fecha_ultimo_acceso', null=True, blank=True)
+
+    class Meta:
+        db_table = 'trabajos_exportacion'
+        verbose_name_plural = 'Trabajos de Exportación'
+        indexes = [
+            models.Index(fields=['estado', 'id_trabajo'], name='trabajos_exp_estado_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.tipo} {self.formato} ({self.estado}) {self.codigo}'
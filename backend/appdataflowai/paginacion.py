@@ -0,0 +1,189 @@
+# appdataflowai/paginacion.py
+"""
+Paginación keyset (cursor) para los listados de dashboards.
+
+Es opt-in: sólo se activa si el request trae `?cursor=` o `?page_size=`.
+Sin esos parámetros la vista devuelve la lista completa como siempre.
+
+El orden es estable sobre (columna de fecha, pk), con los NULL al final, y el
+cursor `next` es opaco: base64 de {"f": campo, "o": asc/desc, "d": fecha, "pk": pk}.
+Cada página es un WHERE sobre el índice en lugar de un OFFSET.
+Respuesta paginada:
+    {"results": [...], "next": "<cursor>" | null, "page_size": N}
+"""
+import base64
+import datetime as dt
+import json
+
+from django.conf import settings
+from django.db import models
+from django.db.models import F, Q
+from django.utils.dateparse import parse_date, parse_datetime
+from rest_framework.exceptions import ValidationError
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+
+KEYSET_PAGE_SIZE = getattr(settings, 'KEYSET_PAGE_SIZE', 500)
+KEYSET_MAX_PAGE_SIZE = getattr(settings, 'KEYSET_MAX_PAGE_SIZE', 5000)
+
+
+def _codificar_cursor(data):
+    raw = json.dumps(data, separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def _decodificar_cursor(token):
+    try:
+        padding = '=' * (-len(token) % 4)
+        data = json.loads(base64.urlsafe_b64decode(token + padding).decode('utf-8'))
+    except Exception:
+        raise ValidationError({'cursor': 'Cursor inválido'})
+    if not isinstance(data, dict) or 'pk' not in data:
+        raise ValidationError({'cursor': 'Cursor inválido'})
+    return data
+
+
+def _valor_a_json(valor):
+    if isinstance(valor, (dt.date, dt.datetime)):
+        return valor.isoformat()
+    return valor
+
+
+def _valor_desde_json(field, valor):
+    if valor is None:
+        return None
+    if isinstance(field, models.DateTimeField):
+        return parse_datetime(valor)
+    if isinstance(field, models.DateField):
+        return parse_date(valor)
+    return valor
+
+
+class KeysetPagination(BasePagination):
+    """
+    Uso en ModelViewSet: `pagination_class = KeysetPagination` (lee `date_field`
+    y `keyset_descending` de la vista).
+    Uso en APIView:
+        paginador = KeysetPagination(date_field='fecha_venta')
+        page = paginador.paginate_queryset(qs, request)
+        if page is not None:
+            return paginador.get_paginated_response(Serializer(page, many=True).data)
+    """
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+    page_size = KEYSET_PAGE_SIZE
+    max_page_size = KEYSET_MAX_PAGE_SIZE
+
+    def __init__(self, date_field=None, descending=False):
+        self.date_field = date_field
+        self.descending = descending
+        self.next_cursor = None
+
+    def _activa(self, request):
+        params = request.query_params if hasattr(request, 'query_params') else request.GET
+        return self.cursor_query_param in params or self.page_size_query_param in params
+
+    def _get_page_size(self, params):
+        valor = params.get(self.page_size_query_param)
+        if not valor:
+            return self.page_size
+        try:
+            size = int(valor)
+        except (TypeError, ValueError):
+            raise ValidationError({self.page_size_query_param: 'Debe ser un entero'})
+        if size <= 0:
+            raise ValidationError({self.page_size_query_param: 'Debe ser mayor que 0'})
+        return min(size, self.max_page_size)
+
+    def _ordenar(self, queryset):
+        pk_name = queryset.model._meta.pk.name
+        if self.descending:
+            orden = [F(pk_name).desc()]
+            if self.date_field:
+                orden.insert(0, F(self.date_field).desc(nulls_last=True))
+        else:
+            orden = [F(pk_name).asc()]
+            if self.date_field:
+                orden.insert(0, F(self.date_field).asc(nulls_last=True))
+        return queryset.order_by(*orden)
+
+    def _filtrar_desde(self, queryset, cursor):
+        pk = cursor['pk']
+        op = 'lt' if self.descending else 'gt'
+        if not self.date_field:
+            return queryset.filter(**{f'pk__{op}': pk})
+
+        field = queryset.model._meta.get_field(self.date_field)
+        fecha = _valor_desde_json(field, cursor.get('d'))
+        if fecha is None:
+            # ya estamos en la cola de NULLs: sólo avanza el pk
+            return queryset.filter(**{f'{self.date_field}__isnull': True, f'pk__{op}': pk})
+        return queryset.filter(
+            Q(**{f'{self.date_field}__{op}': fecha})
+            | Q(**{self.date_field: fecha, f'pk__{op}': pk})
+            | Q(**{f'{self.date_field}__isnull': True})
+        )
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if view is not None:
+            self.date_field = self.date_field or getattr(view, 'keyset_date_field', None) or getattr(view, 'date_field', None)
+            self.descending = self.descending or getattr(view, 'keyset_descending', False)
+
+        if not self._activa(request):
+            return None
+
+        self.request = request
+        params = request.query_params if hasattr(request, 'query_params') else request.GET
+        self.page_size_actual = self._get_page_size(params)
+
+        token = params.get(self.cursor_query_param)
+        if token:
+            cursor = _decodificar_cursor(token)
+            if cursor.get('f') != self.date_field or cursor.get('o') != ('desc' if self.descending else 'asc'):
+                raise ValidationError({'cursor': 'El cursor no corresponde a este listado'})
+            queryset = self._filtrar_desde(queryset, cursor)
+
+        filas = list(self._ordenar(queryset)[:self.page_size_actual + 1])
+        hay_mas = len(filas) > self.page_size_actual
+        filas = filas[:self.page_size_actual]
+
+        self.next_cursor = None
+        if hay_mas and filas:
+            ultima = filas[-1]
+            self.next_cursor = _codificar_cursor({
+                'f': self.date_field,
+                'o': 'desc' if self.descending else 'asc',
+                'd': _valor_a_json(getattr(ultima, self.date_field)) if self.date_field else None,
+                'pk': ultima.pk,
+            })
+        return filas
+
+    def get_paginated_response(self, data):
+        return Response({
+            'results': data,
+            'next': self.next_cursor,
+            'page_size': self.page_size_actual,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'properties': {
+                'results': schema,
+                'next': {'type': 'string', 'nullable': True},
+                'page_size': {'type': 'integer'},
+            },
+        }
+
+
+def paginar_keyset(request, queryset, date_field, serializar, descending=False):
+    """
+    Atajo para APIView: devuelve el Response paginado si el request pidió
+    cursor/page_size, o None para que la vista siga devolviendo la lista completa.
+    `serializar` recibe la lista de filas de la página y devuelve los datos.
+    """
+    paginador = KeysetPagination(date_field=date_field, descending=descending)
+    filas = paginador.paginate_queryset(queryset, request)
+    if filas is None:
+        return None
+    return paginador.get_paginated_response(serializar(filas))
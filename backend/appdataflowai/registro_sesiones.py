@@ -0,0 +1,137 @@
+# appdataflowai/registro_sesiones.py
+"""
+Buffer write-behind para RegistrosSesion.
+
+El login ya no hace INSERT + refresh_from_db en el request: el registro se arma
+en memoria (con nombre_empresa / nombres desde el usuario ya cargado y un
+codigo_registro UUID generado aquí) y se escribe con bulk_create cuando el
+buffer llega a REGISTROS_SESION_BUFFER_SIZE o pasan
+REGISTROS_SESION_FLUSH_SECONDS. Se vacía también al apagar el proceso (atexit).
+Si el buffer está desactivado (tamaño <= 1) o el flush falla, se escribe en
+modo síncrono registro por registro.
+"""
+import atexit
+import logging
+import threading
+import uuid
+
+from django.conf import settings
+from django.db import close_old_connections
+from django.utils import timezone
+
+from .models import RegistrosSesion
+
+logger = logging.getLogger(__name__)
+
+REGISTROS_SESION_BUFFER_SIZE = getattr(settings, 'REGISTROS_SESION_BUFFER_SIZE', 200)
+REGISTROS_SESION_FLUSH_SECONDS = getattr(settings, 'REGISTROS_SESION_FLUSH_SECONDS', 5)
+
+
+class _BufferRegistrosSesion:
+
+    def __init__(self, max_size, flush_seconds):
+        self.max_size = max_size
+        self.flush_seconds = flush_seconds
+        self._pendientes = []
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._hilo = None
+        self._detener = threading.Event()
+
+    @property
+    def activo(self):
+        return self.max_size > 1 and self.flush_seconds > 0
+
+    def registrar(self, usuario, fecha=None):
+        """
+        Encola un RegistrosSesion para `usuario` y devuelve
+        {'id_registro': <uuid>, 'fecha_inicio_sesion': <iso>} sin tocar la BD.
+        """
+        empresa = getattr(usuario, 'id_empresa', None)
+        registro = RegistrosSesion(
+            id_empresa=empresa,
+            nombre_empresa=getattr(empresa, 'nombre_empresa', '') or '',
+            id_usuario=usuario,
+            nombres=getattr(usuario, 'nombres', '') or '',
+            fecha_inicio_sesion=fecha or timezone.now(),
+            codigo_registro=uuid.uuid4(),
+        )
+
+        if not self.activo or not self._asegurar_hilo():
+            self._guardar_sincrono([registro])
+        else:
+            with self._lock:
+                self._pendientes.append(registro)
+                lleno = len(self._pendientes) >= self.max_size
+            if lleno:
+                self.flush()
+
+        return {
+            'id_registro': str(registro.codigo_registro),
+            'fecha_inicio_sesion': registro.fecha_inicio_sesion.isoformat(),
+        }
+
+    def flush(self):
+        """Escribe todo lo pendiente con bulk_create; si falla, cae a escritura síncrona."""
+        with self._flush_lock:
+            with self._lock:
+                lote, self._pendientes = self._pendientes, []
+            if not lote:
+                return 0
+            try:
+                RegistrosSesion.objects.bulk_create(lote, batch_size=500)
+                return len(lote)
+            except Exception:
+                logger.exception("Flush de RegistrosSesion falló (%s registros); reintentando uno a uno", len(lote))
+                return self._guardar_sincrono(lote)
+
+    def _guardar_sincrono(self, registros):
+        guardados = 0
+        for registro in registros:
+            try:
+                registro.save()
+                guardados += 1
+            except Exception:
+                logger.exception("No se pudo guardar RegistrosSesion para usuario %s", registro.id_usuario_id)
+        return guardados
+
+    def _asegurar_hilo(self):
+        if self._hilo is not None and self._hilo.is_alive():
+            return True
+        try:
+            self._hilo = threading.Thread(target=self._bucle, name='registros-sesion-flush', daemon=True)
+            self._hilo.start()
+            return True
+        except RuntimeError:
+            # p. ej. durante el apagado del intérprete
+            logger.warning("No se pudo iniciar el hilo de flush de RegistrosSesion; escritura síncrona")
+            return False
+
+    def _bucle(self):
+        while not self._detener.wait(self.flush_seconds):
+            close_old_connections()
+            try:
+                self.flush()
+            except Exception:
+                logger.exception("Error en flush periódico de RegistrosSesion")
+            finally:
+                close_old_connections()
+
+    def cerrar(self):
+        self._detener.set()
+        try:
+            self.flush()
+        except Exception:
+            logger.exception("Error vaciando RegistrosSesion al apagar")
+
+    def pendientes(self):
+        with self._lock:
+            return len(self._pendientes)
+
+
+buffer_registros_sesion = _BufferRegistrosSesion(REGISTROS_SESION_BUFFER_SIZE, REGISTROS_SESION_FLUSH_SECONDS)
+atexit.register(buffer_registros_sesion.cerrar)
+
+
+def registrar_inicio_sesion(usuario):
+    return buffer_registros_sesion.registrar(usuario)
@@ -0,0 +1,184 @@
+# appdataflowai/renderers.py
+"""
+Formatos de respuesta compactos para los listados de dashboards.
+
+El JSON por filas de DRF repite el nombre de cada campo en cada fila; en los
+dashboards grandes las claves son la mayor parte del payload. Estos renderers
+se eligen por negociación de contenido (header Accept) o con `?format=`:
+
+    ?format=columnar   Accept: application/vnd.dataflow.columnar+json
+    ?format=msgpack    Accept: application/x-msgpack
+    ?format=arrow      Accept: application/vnd.apache.arrow.stream
+
+Forma columnar:
+    {
+      "columns": ["fecha_venta", "canal", ...],
+      "count": 1234,
+      "data": {"fecha_venta": [...], "canal": [0, 1, 0, ...]},
+      "dictionaries": {"canal": ["Online", "Tienda"]}
+    }
+Las columnas de texto con pocos valores distintos van codificadas como índices
+sobre `dictionaries`. Si la respuesta es paginada ({"results": [...], ...}) sólo
+`results` se vuelve columnar; los errores y respuestas que no son listas de
+filas se devuelven tal cual.
+"""
+import datetime as dt
+import decimal
+import uuid
+
+from django.conf import settings
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+from rest_framework.settings import api_settings
+
+import msgpack
+import pyarrow as pa
+
+COLUMNAR_DICT_MAX_UNIQUE = getattr(settings, 'COLUMNAR_DICT_MAX_UNIQUE', 1024)
+
+
+def _es_tabla(data):
+    return isinstance(data, list) and all(isinstance(fila, dict) for fila in data)
+
+
+def _codificar_diccionario(valores):
+    """Índices + diccionario si la columna es texto de baja cardinalidad; si no, None."""
+    unicos = {}
+    for v in valores:
+        if v is None:
+            continue
+        if not isinstance(v, str):
+            return None
+        if v not in unicos:
+            if len(unicos) >= COLUMNAR_DICT_MAX_UNIQUE:
+                return None
+            unicos[v] = len(unicos)
+    # sólo compensa si los valores se repiten
+    if not unicos or len(unicos) * 2 > len(valores):
+        return None
+    indices = [None if v is None else unicos[v] for v in valores]
+    return indices, list(unicos)
+
+
+def a_columnar(filas):
+    """Convierte una lista de dicts (salida de un serializer many=True) a columnas."""
+    columnas = []
+    vistos = set()
+    for fila in filas:
+        for clave in fila:
+            if clave not in vistos:
+                vistos.add(clave)
+                columnas.append(clave)
+
+    data = {}
+    diccionarios = {}
+    for col in columnas:
+        valores = [fila.get(col) for fila in filas]
+        codificada = _codificar_diccionario(valores)
+        if codificada is None:
+            data[col] = valores
+        else:
+            data[col], diccionarios[col] = codificada
+
+    return {
+        'columns': columnas,
+        'count': len(filas),
+        'data': data,
+        'dictionaries': diccionarios,
+    }
+
+
+def preparar_columnar(data):
+    """Aplica a_columnar a una lista de filas o al `results` de una respuesta paginada."""
+    if _es_tabla(data):
+        return a_columnar(data)
+    if isinstance(data, dict) and _es_tabla(data.get('results')):
+        return {**data, 'results': a_columnar(data['results'])}
+    return data
+
+
+def _valor_plano(valor):
+    # mismos criterios que el JSONEncoder de DRF para tipos que msgpack no conoce
+    if isinstance(valor, (dt.datetime, dt.date, dt.time)):
+        return valor.isoformat()
+    if isinstance(valor, decimal.Decimal):
+        return float(valor) if api_settings.COERCE_DECIMAL_TO_STRING is False else str(valor)
+    if isinstance(valor, uuid.UUID):
+        return str(valor)
+    raise TypeError(f'Tipo no serializable: {type(valor).__name__}')
+
+
+class ColumnarJSONRenderer(JSONRenderer):
+    media_type = 'application/vnd.dataflow.columnar+json'
+    format = 'columnar'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        return super().render(preparar_columnar(data), accepted_media_type, renderer_context)
+
+
+class MsgpackColumnarRenderer(BaseRenderer):
+    media_type = 'application/x-msgpack'
+    format = 'msgpack'
+    charset = None
+    render_style = 'binary'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        return msgpack.packb(preparar_columnar(data), default=_valor_plano, use_bin_type=True)
+
+
+def _columna_arrow(valores, diccionario=None):
+    if diccionario is not None:
+        return pa.DictionaryArray.from_arrays(
+            pa.array(valores, type=pa.int32()),
+            pa.array(diccionario, type=pa.string()),
+        )
+    try:
+        return pa.array(valores)
+    except (pa.ArrowInvalid, pa.ArrowTypeError, TypeError):
+        # columnas mixtas (p. ej. decimales serializados como texto): todo a string
+        return pa.array([None if v is None else str(v) for v in valores], type=pa.string())
+
+
+class ArrowStreamRenderer(BaseRenderer):
+    """
+    Arrow IPC (stream). Las columnas de diccionario viajan como DictionaryArray;
+    en respuestas paginadas el cursor `next` va en la metadata del schema.
+    """
+    media_type = 'application/vnd.apache.arrow.stream'
+    format = 'arrow'
+    charset = None
+    render_style = 'binary'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+
+        metadata = {}
+        filas = data
+        if isinstance(data, dict) and _es_tabla(data.get('results')):
+            filas = data['results']
+            metadata = {k: str(v) for k, v in data.items() if k != 'results' and v is not None}
+        elif not _es_tabla(data):
+            # errores / respuestas no tabulares: una fila con los valores como texto
+            filas = [{k: None if v is None else str(v) for k, v in dict(data).items()}] if isinstance(data, dict) else []
+
+        columnar = a_columnar(filas)
+        arrays = [
+            _columna_arrow(columnar['data'][col], columnar['dictionaries'].get(col))
+            for col in columnar['columns']
+        ]
+        tabla = pa.Table.from_arrays(arrays, names=columnar['columns'])
+        if metadata:
+            tabla = tabla.replace_schema_metadata(metadata)
+
+        sink = pa.BufferOutputStream()
+        with pa.ipc.new_stream(sink, tabla.schema) as writer:
+            writer.write_table(tabla)
+        return sink.getvalue().to_pybytes()
+
+
+# JSON por filas sigue siendo el primero (respuesta por defecto sin Accept/format)
+DASHBOARD_RENDERER_CLASSES = tuple(api_settings.DEFAULT_RENDERER_CLASSES) + (
+    ColumnarJSONRenderer, MsgpackColumnarRenderer, ArrowStreamRenderer,
+)
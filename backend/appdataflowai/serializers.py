@@ -1,6 +1,7 @@
 # appdataflowai/serializers.py
 from rest_framework import serializers
 from .models import Producto, ServiciosLoopTotek
+from .versiones_dataset import marcar_objetos_modificados
 
 class ProductoSerializer(serializers.ModelSerializer):
     estado = serializers.CharField(source='id_estado.estado')  # Mostrar nombre del estado
@@ -1968,7 +1969,9 @@ class ProductosBelkinBulkSerializer(serializers.ListSerializer):
             )
             for item in validated_data
         ]
-        return ProductosBelkin.objects.bulk_create(objs, batch_size=1000)
+        creados = ProductosBelkin.objects.bulk_create(objs, batch_size=1000)
+        marcar_objetos_modificados(ProductosBelkin, creados)
+        return creados
 
 
 class ProductosBelkinBulkItemSerializer(ProductosBelkinSerializer):
@@ -2041,7 +2044,9 @@ class PdvBelkinBulkSerializer(serializers.ListSerializer):
             )
             for item in validated_data
         ]
-        return PdvBelkin.objects.bulk_create(objs, batch_size=1000)
+        creados = PdvBelkin.objects.bulk_create(objs, batch_size=1000)
+        marcar_objetos_modificados(PdvBelkin, creados)
+        return creados
 
 
 class PdvBelkinBulkItemSerializer(PdvBelkinSerializer):
@@ -2133,7 +2138,9 @@ class VentasBelkinBulkSerializer(serializers.ListSerializer):
             )
             for item in validated_data
         ]
-        return VentasBelkin.objects.bulk_create(objs, batch_size=1000)
+        creados = VentasBelkin.objects.bulk_create(objs, batch_size=1000)
+        marcar_objetos_modificados(VentasBelkin, creados)
+        return creados
 
 
 class VentasBelkinBulkItemSerializer(VentasBelkinSerializer):
@@ -2213,7 +2220,9 @@ class InventariosBelkinBulkSerializer(serializers.ListSerializer):
             )
             for item in validated_data
         ]
-        return InventariosBelkin.objects.bulk_create(objs, batch_size=1000)
+        creados = InventariosBelkin.objects.bulk_create(objs, batch_size=1000)
+        marcar_objetos_modificados(InventariosBelkin, creados)
+        return creados
 
 
 class InventariosBelkinBulkItemSerializer(InventariosBelkinSerializer):
@@ -2317,7 +2326,9 @@ class ProductosBluettiBulkSerializer(serializers.ListSerializer):
             )
             for item in validated_data
         ]
-        return ProductosBluetti.objects.bulk_create(objs, batch_size=1000)
+        creados = ProductosBluetti.objects.bulk_create(objs, batch_size=1000)
+        marcar_objetos_modificados(ProductosBluetti, creados)
+        return creados
 
 
 class ProductosBluettiBulkItemSerializer(ProductosBluettiSerializer):
@@ -2370,7 +2381,9 @@ class CanalesBluettiBulkSerializer(serializers.ListSerializer):
             )
             for item in validated_data
         ]
-        return CanalesBluetti.objects.bulk_create(objs, batch_size=1000)
+        creados = CanalesBluetti.objects.bulk_create(objs, batch_size=1000)
+        marcar_objetos_modificados(CanalesBluetti, creados)
+        return creados
 
 
 # Item serializer que usa el ListSerializer anterior
@@ -2429,7 +2442,9 @@ class CuentasClientesBluettiBulkSerializer(serializers.ListSerializer):
             )
             for item in validated_data
         ]
-        return CuentasClientesBluetti.objects.bulk_create(objs, batch_size=1000)
+        creados = CuentasClientesBluetti.objects.bulk_create(objs, batch_size=1000)
+        marcar_objetos_modificados(CuentasClientesBluetti, creados)
+        return creados
 
 
 class CuentasClientesBluettiBulkItemSerializer(CuentasClientesBluettiSerializer):
@@ -2494,7 +2509,9 @@ class VentasBluettiBulkSerializer(serializers.ListSerializer):
             )
             for item in validated_data
         ]
-        return VentasBluetti.objects.bulk_create(objs, batch_size=1000)
+        creados = VentasBluetti.objects.bulk_create(objs, batch_size=1000)
+        marcar_objetos_modificados(VentasBluetti, creados)
+        return creados
 
 
 class VentasBluettiBulkItemSerializer(VentasBluettiSerializer):
@@ -2553,7 +2570,9 @@ class InventariosBluettiBulkSerializer(serializers.ListSerializer):
             )
             for item in validated_data
         ]
-        return InventariosBluetti.objects.bulk_create(objs, batch_size=1000)
+        creados = InventariosBluetti.objects.bulk_create(objs, batch_size=1000)
+        marcar_objetos_modificados(InventariosBluetti, creados)
+        return creados
 
 
 class InventariosBluettiBulkItemSerializer(InventariosBluettiSerializer):
@@ -2612,7 +2631,9 @@ class VentasSelloutBluettiBulkSerializer(serializers.ListSerializer):
             )
             for item in validated_data
         ]
-        return VentasSelloutBluetti.objects.bulk_create(objs, batch_size=1000)
+        creados = VentasSelloutBluetti.objects.bulk_create(objs, batch_size=1000)
+        marcar_objetos_modificados(VentasSelloutBluetti, creados)
+        return creados
 
 
 class VentasSelloutBluettiBulkItemSerializer(VentasSelloutBluettiSerializer):
@@ -2669,7 +2690,9 @@ class InventariosSelloutBluettiBulkSerializer(serializers.ListSerializer):
             )
             for item in validated_data
         ]
-        return InventariosSelloutBluetti.objects.bulk_create(objs, batch_size=1000)
+        creados = InventariosSelloutBluetti.objects.bulk_create(objs, batch_size=1000)
+        marcar_objetos_modificados(InventariosSelloutBluetti, creados)
+        return creados
 
 
 class InventariosSelloutBluettiBulkItemSerializer(InventariosSelloutBluettiSerializer):
@@ -2726,7 +2749,9 @@ class MetasComercialesBluettiBulkSerializer(serializers.ListSerializer):
             )
             for item in validated_data
         ]
-        return MetasComercialesBluetti.objects.bulk_create(objs, batch_size=1000)
+        creados = MetasComercialesBluetti.objects.bulk_create(objs, batch_size=1000)
+        marcar_objetos_modificados(MetasComercialesBluetti, creados)
+        return creados
 
 
 class MetasComercialesBluettiBulkItemSerializer(MetasComercialesBluettiSerializer):
@@ -2790,7 +2815,9 @@ class ServiciosLoopTotekBulkSerializer(serializers.ListSerializer):
             )
             for item in validated_data
         ]
-        return ServiciosLoopTotek.objects.bulk_create(objs, batch_size=1000)
+        creados = ServiciosLoopTotek.objects.bulk_create(objs, batch_size=1000)
+        marcar_objetos_modificados(ServiciosLoopTotek, creados)
+        return creados
 
 
 class ServiciosLoopTotekBulkItemSerializer(ServiciosLoopTotekSerializer):
@@ -0,0 +1,75 @@
+# appdataflowai/streaming.py
+"""
+Respuestas JSON en streaming para listados grandes.
+
+`serializer.data` con many=True arma en memoria la lista completa de dicts antes
+de renderizar; el pico de memoria es varias veces el payload. Con `?stream=1`
+los listados iteran el queryset con `.iterator(chunk_size=...)`, serializan fila
+por fila y escriben el arreglo JSON por trozos en un StreamingHttpResponse:
+la memoria se mantiene plana sin importar la cantidad de filas.
+
+El cuerpo es el mismo arreglo JSON que la respuesta normal. Sólo aplica al JSON
+por filas; con otros formatos negociados (columnar, msgpack...) la vista sigue
+el camino normal.
+"""
+from django.conf import settings
+from django.http import StreamingHttpResponse
+from rest_framework.utils.encoders import JSONEncoder
+
+STREAMING_CHUNK_SIZE = getattr(settings, 'STREAMING_CHUNK_SIZE', 2000)
+# bytes acumulados antes de entregar un trozo al servidor WSGI
+STREAMING_BUFFER_BYTES = getattr(settings, 'STREAMING_BUFFER_BYTES', 64 * 1024)
+
+_VALORES_SI = ('1', 'true', 'si', 'yes')
+
+
+def streaming_solicitado(request):
+    params = request.query_params if hasattr(request, 'query_params') else request.GET
+    if (params.get('stream') or '').lower() not in _VALORES_SI:
+        return False
+    renderer = getattr(request, 'accepted_renderer', None)
+    return renderer is None or getattr(renderer, 'format', 'json') == 'json'
+
+
+def _filas(queryset, chunk_size):
+    if hasattr(queryset, 'iterator'):
+        return queryset.iterator(chunk_size=chunk_size)
+    return iter(queryset)
+
+
+def iterar_json(queryset, serializer_class, context=None, chunk_size=STREAMING_CHUNK_SIZE):
+    """
+    Genera el arreglo JSON de `queryset` serializado con `serializer_class`
+    en trozos de ~STREAMING_BUFFER_BYTES. `queryset` puede ser cualquier iterable.
+    """
+    serializer = serializer_class(context=context or {})
+    encoder = JSONEncoder(ensure_ascii=False, separators=(',', ':'))
+
+    buffer = ['[']
+    tamano = 1
+    primero = True
+    for obj in _filas(queryset, chunk_size):
+        fila = encoder.encode(serializer.to_representation(obj))
+        if not primero:
+            buffer.append(',')
+            tamano += 1
+        buffer.append(fila)
+        tamano += len(fila)
+        primero = False
+        if tamano >= STREAMING_BUFFER_BYTES:
+            yield ''.join(buffer).encode('utf-8')
+            buffer = []
+            tamano = 0
+    buffer.append(']')
+    yield ''.join(buffer).encode('utf-8')
+
+
+def respuesta_json_streaming(queryset, serializer_class, context=None, chunk_size=STREAMING_CHUNK_SIZE):
+    respuesta = StreamingHttpResponse(
+        iterar_json(queryset, serializer_class, context=context, chunk_size=chunk_size),
+        content_type='application/json',
+    )
+    # evitar que un proxy (nginx) acumule todo el cuerpo antes de enviarlo
+    respuesta['X-Accel-Buffering'] = 'no'
+    return respuesta
+
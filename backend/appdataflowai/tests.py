@@ -1,3 +1,462 @@
-from django.test import TestCase
-#Hola soy julian 
-# Create your tests here.
+import datetime as dt
+import json
+import multiprocessing
+import os
+import resource
+import sys
+import unittest
+from decimal import Decimal
+
+import jwt
+import pandas as pd
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import transaction
+from django.test import SimpleTestCase, TestCase, tag
+from django.urls import reverse
+
+from .actualizacion_masiva import actualizar_por_clave
+from .authentication import construir_payload_acceso, revocar_tokens_usuario
+from .carga_masiva import CargaMasiva
+from .cargas_archivo import ErrorCarga, eliminar_carga, iniciar_carga, limpiar_cargas_vencidas, ruta_carga
+from .models import (
+    Areas,
+    CanalesBluetti,
+    CargaArchivo,
+    Categoria,
+    DashboardSales,
+    Empresa,
+    Estado,
+    HistorialImportacion,
+    PermisoAcceso,
+    Producto,
+    ProductosBelkin,
+    TipoPlan,
+    TrabajoImportacion,
+    Usuario,
+    conetcom_planes,
+)
+from .serializers import DashboardSalesSerializer
+from .streaming import iterar_json
+from .trabajos_importacion import procesar_trabajo
+from .views import ProductosBelkinBulkImportView
+
+# ids fijos de las vistas Belkin / Bluetti / Loop Totek (views.py)
+EMPRESA_ID = 1
+PRODUCTOS_ID = (22, 23, 24)
+
+
+class DatosBase(TestCase):
+    """Empresa 1 con los productos 22-24 y un usuario, como esperan las vistas de alcance fijo."""
+
+    @classmethod
+    def setUpTestData(cls):
+        estado = Estado.objects.create(estado='Activo')
+        area = Areas.objects.create(area_trabajo='Datos')
+        cls.empresa = Empresa.objects.create(
+            id_empresa=EMPRESA_ID,
+            id_categoria=Categoria.objects.create(descripcion_categoria='Tecnologia'),
+            id_plan=TipoPlan.objects.create(tipo_plan='Pro', valor_plan=0),
+            id_estado=estado,
+            nombre_empresa='Empresa Test', nombre_corto='test', direccion='Calle 1',
+            fecha_registros=dt.date(2024, 1, 1), telefono='1', ciudad='Bogota', pais='Colombia',
+        )
+        for id_producto in PRODUCTOS_ID:
+            Producto.objects.create(
+                id_producto=id_producto, producto=f'Producto {id_producto}', id_area=area,
+                id_estado=estado, iframe='', slug=f'producto-{id_producto}',
+            )
+        cls.usuario = Usuario.objects.create(
+            id_empresa=cls.empresa, id_permiso_acceso=PermisoAcceso.objects.create(rol='Admin'),
+            id_area=area, nombres='Test', correo='test@dataflow.ai', contrasena='x', id_estado=estado,
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def token(self, usuario=None):
+        return jwt.encode(construir_payload_acceso(usuario or self.usuario), settings.SECRET_KEY, algorithm='HS256')
+
+    def auth(self, usuario=None):
+        return {'HTTP_AUTHORIZATION': f'Bearer {self.token(usuario)}'}
+
+
+# -------------------------
+# Revocación de tokens (authentication.py)
+# -------------------------
+
+class RevocacionTokensTests(DatosBase):
+    url = '/api/usuario/info/'
+
+    def test_token_revocado_se_rechaza(self):
+        headers = self.auth()
+        self.assertEqual(self.client.get(self.url, **headers).status_code, 200)
+
+        revocar_tokens_usuario(self.usuario.id_usuario)
+
+        respuesta = self.client.get(self.url, **headers)
+        self.assertEqual(respuesta.status_code, 401)
+        self.assertEqual(self.client.get(self.url, **self.auth()).status_code, 200)
+
+    def test_revocacion_sobrevive_a_la_cache(self):
+        # reinicio / otro proceso: la cache no tiene la versión y se lee de la BD
+        anterior = self.auth()
+        revocar_tokens_usuario(self.usuario.id_usuario)
+        nuevo = self.auth()
+        cache.clear()
+
+        self.assertEqual(self.client.get(self.url, **anterior).status_code, 401)
+        self.assertEqual(self.client.get(self.url, **nuevo).status_code, 200)
+
+    def test_usuario_inexistente_se_rechaza(self):
+        headers = self.auth()
+        Usuario.objects.filter(pk=self.usuario.pk).delete()
+        cache.clear()
+        self.assertEqual(self.client.get(self.url, **headers).status_code, 401)
+
+
+# -------------------------
+# Paginación keyset (paginacion.py)
+# -------------------------
+
+class PaginacionKeysetTests(DatosBase):
+    url = '/api/dashboard-sales/'
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        # fechas repetidas y NULL: el orden es (sale_date, pk) con los NULL al final
+        fechas = [dt.date(2024, 1, 3), dt.date(2024, 1, 1), None, dt.date(2024, 1, 1),
+                  dt.date(2024, 1, 2), None, dt.date(2024, 1, 3)]
+        DashboardSales.objects.bulk_create(
+            DashboardSales(id_empresa=cls.empresa, sale_date=fecha, sku=f'SKU-{i}') for i, fecha in enumerate(fechas)
+        )
+        cls.esperado = [
+            v.pk for v in sorted(DashboardSales.objects.all(), key=lambda v: (v.sale_date is None, v.sale_date, v.pk))
+        ]
+
+    def paginas(self, page_size):
+        ids, cursor = [], None
+        while True:
+            params = {'page_size': page_size}
+            if cursor:
+                params['cursor'] = cursor
+            data = self.client.get(self.url, params, **self.auth()).json()
+            ids.extend(fila['id_registro'] for fila in data['results'])
+            cursor = data['next']
+            if cursor is None:
+                return ids
+
+    def test_recorre_todas_las_filas_una_vez_en_orden(self):
+        for page_size in (1, 2, 3, 7, 50):
+            with self.subTest(page_size=page_size):
+                self.assertEqual(self.paginas(page_size), self.esperado)
+
+    def test_sin_parametros_devuelve_la_lista_completa(self):
+        data = self.client.get(self.url, **self.auth()).json()
+        self.assertEqual(len(data), len(self.esperado))
+
+    def test_cursor_invalido(self):
+        respuesta = self.client.get(self.url, {'cursor': 'no-es-un-cursor'}, **self.auth())
+        self.assertEqual(respuesta.status_code, 400)
+
+
+# -------------------------
+# Streaming JSON (streaming.py)
+# -------------------------
+
+STREAMING_RSS_FILAS = 1_000_000
+# crecimiento de RSS permitido al serializar STREAMING_RSS_FILAS (~600 MB de JSON)
+STREAMING_RSS_MAX_MB = 64
+
+
+def _ventas_en_memoria(filas):
+    """Fixture de DashboardSales sin guardar: 1M filas sin tocar la BD."""
+    base = dt.date(2024, 1, 1)
+    for i in range(filas):
+        yield DashboardSales(
+            id_registro=i + 1, id_empresa_id=EMPRESA_ID, point_of_sale=f'PDV {i % 300}',
+            channel=('Online', 'Tienda', 'Mayorista')[i % 3], city=f'Ciudad {i % 40}',
+            quantity_sold=i % 50, sales_amount=Decimal('1234.56'), sale_date=base + dt.timedelta(days=i % 365),
+            sku=f'SKU-{i % 5000:05d}', brand=f'Marca {i % 25}', gross_profit=Decimal('321.09'),
+        )
+
+
+def _rss_kb():
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reporta KB, macOS bytes
+    return rss // 1024 if sys.platform == 'darwin' else rss
+
+
+def _medir_streaming(filas, cola):
+    inicial = _rss_kb()
+    total = sum(len(trozo) for trozo in iterar_json(_ventas_en_memoria(filas), DashboardSalesSerializer))
+    cola.put((inicial, _rss_kb(), total))
+
+
+class StreamingJSONTests(SimpleTestCase):
+
+    def test_mismo_cuerpo_que_la_respuesta_normal(self):
+        filas = list(_ventas_en_memoria(500))
+        cuerpo = b''.join(iterar_json(filas, DashboardSalesSerializer))
+        self.assertEqual(json.loads(cuerpo), json.loads(json.dumps(DashboardSalesSerializer(filas, many=True).data)))
+        self.assertEqual(b''.join(iterar_json([], DashboardSalesSerializer)), b'[]')
+
+    @tag('lento')
+    @unittest.skipUnless('fork' in multiprocessing.get_all_start_methods(), "requiere fork")
+    def test_pico_rss_plano_con_un_millon_de_filas(self):
+        # en un proceso hijo: ru_maxrss es el pico del proceso y el del runner ya viene alto
+        ctx = multiprocessing.get_context('fork')
+        cola = ctx.Queue()
+        proceso = ctx.Process(target=_medir_streaming, args=(STREAMING_RSS_FILAS, cola))
+        proceso.start()
+        inicial, pico, total = cola.get()
+        proceso.join()
+
+        self.assertGreater(total, 500 * 1024 * 1024)
+        self.assertLess((pico - inicial) / 1024, STREAMING_RSS_MAX_MB)
+
+
+# -------------------------
+# Carga con COPY / upsert (carga_masiva.py)
+# -------------------------
+
+class CargaMasivaTests(DatosBase):
+    """En PostgreSQL prueba el camino COPY + INSERT ... ON CONFLICT; en SQLite, el de bulk_create."""
+
+    def plan(self, id_plan, nombre, precio):
+        return {
+            'id_plan': id_plan, 'nombre_plan': nombre, 'velocidad_descarga_mbps': 100,
+            'velocidad_subida_mbps': 20, 'precio_mensual': precio, 'duracion_minima_contrato_meses': 12,
+            'tipo_tecnologia': 'Fibra', 'id_empresa_id': EMPRESA_ID, 'id_producto_id': 24,
+        }
+
+    def cargar(self, filas, conflicto='id_plan'):
+        with transaction.atomic():
+            carga = CargaMasiva(conetcom_planes, conflicto=conflicto)
+            carga.copiar(carga.normalizar(fila) for fila in filas)
+            return carga.insertar(empresa_id=EMPRESA_ID)
+
+    def test_inserta_y_actualiza_por_clave(self):
+        self.assertEqual(self.cargar([self.plan('P1', 'Basico', '50000'), self.plan('P2', 'Plus', '80000')]), (2, 0))
+
+        # P1 cambia, P3 es nueva y P2 se repite: gana la última fila del archivo
+        resultado = self.cargar([
+            self.plan('P1', 'Basico', '55000'),
+            self.plan('P2', 'Plus', '1'),
+            self.plan('P3', 'Max', '120000'),
+            self.plan('P2', 'Plus 2', '90000'),
+        ])
+        self.assertEqual(resultado, (1, 2))
+        planes = {p.id_plan: p for p in conetcom_planes.objects.all()}
+        self.assertEqual(set(planes), {'P1', 'P2', 'P3'})
+        self.assertEqual(planes['P1'].precio_mensual, Decimal('55000'))
+        self.assertEqual((planes['P2'].nombre_plan, planes['P2'].precio_mensual), ('Plus 2', Decimal('90000')))
+
+    def test_celdas_vacias_de_pandas_son_null_y_obligatorias_fallan(self):
+        carga = CargaMasiva(conetcom_planes)
+        fila = carga.normalizar({**self.plan('P1', 'Basico', '50000'), 'precio_mensual': '12.5'})
+        self.assertEqual(fila[carga.campos.index('precio_mensual')], Decimal('12.5'))
+        with self.assertRaisesMessage(ValidationError, 'nombre_plan: es obligatorio'):
+            carga.normalizar(self.plan('P1', float('nan'), '50000'))
+
+
+# -------------------------
+# Actualización masiva (actualizacion_masiva.py)
+# -------------------------
+
+class ActualizacionMasivaTests(DatosBase):
+    filtro = {'id_empresa_id': EMPRESA_ID, 'id_producto_id': 23}
+
+    def setUp(self):
+        super().setUp()
+        self.canales = [
+            CanalesBluetti.objects.create(codigo_canal=f'C{i}', nombre_canal=f'Canal {i}', **self.filtro)
+            for i in range(3)
+        ]
+
+    def actualizar(self, filas):
+        return actualizar_por_clave(CanalesBluetti, [pd.DataFrame(filas)], filtro=self.filtro,
+                                    excluir=('id_empresa', 'id_producto'))
+
+    def test_solo_escribe_las_filas_que_cambian(self):
+        c0, c1, c2 = self.canales
+        actualizadas, sin_cambios, faltantes, errores = self.actualizar({
+            'id_registro': [c0.pk, c1.pk, c2.pk, 9999],
+            'nombre_canal': ['Canal 0', 'Nuevo 1', None, 'X'],
+            'codigo_canal': ['C0', 'C1', 'C2-B', 'X'],
+        })
+        self.assertEqual((actualizadas, sin_cambios, faltantes, errores), (2, 1, 1, []))
+        c1.refresh_from_db()
+        c2.refresh_from_db()
+        self.assertEqual(c1.nombre_canal, 'Nuevo 1')
+        # celda vacía = no tocar el campo
+        self.assertEqual((c2.codigo_canal, c2.nombre_canal), ('C2-B', 'Canal 2'))
+
+    def test_fila_en_blanco_no_cuenta_como_cambio(self):
+        c0 = self.canales[0]
+        resultado = self.actualizar({'id_registro': [c0.pk], 'nombre_canal': [None], 'codigo_canal': [float('nan')]})
+        self.assertEqual(resultado, (0, 1, 0, []))
+
+    def test_id_invalido_y_fuera_del_alcance(self):
+        otro = CanalesBluetti.objects.create(codigo_canal='O', nombre_canal='Otro', id_empresa_id=EMPRESA_ID,
+                                             id_producto_id=22)
+        actualizadas, sin_cambios, faltantes, errores = self.actualizar({
+            'id_registro': ['abc', otro.pk],
+            'nombre_canal': ['X', 'X'],
+        })
+        self.assertEqual((actualizadas, faltantes), (0, 1))
+        self.assertEqual(errores, ['Fila 2: id_registro invalido'])
+        otro.refresh_from_db()
+        self.assertEqual(otro.nombre_canal, 'Otro')
+
+
+# -------------------------
+# Importaciones repetidas (historial_importaciones.py)
+# -------------------------
+
+class DeduplicacionImportacionesTests(DatosBase):
+    """Las versiones de dataset se suben en el commit: cada escritura corre sus on_commit."""
+    url = '/api/productos-belkin/bulk-import/'
+    contenido = (
+        b'ean,part_number,nombre_producto,marca,categoria,sku_suplidor\n'
+        b'111,PN-1,Cargador,Belkin,Energia,S1\n'
+        b'222,PN-2,Cable,Belkin,Cables,S2\n'
+    )
+
+    def importar(self, **params):
+        archivo = SimpleUploadedFile('productos.csv', self.contenido, content_type='text/csv')
+        url = self.url + ('?' + '&'.join(f'{k}={v}' for k, v in params.items()) if params else '')
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.client.post(url, {'file': archivo})
+
+    def borrar(self, ids):
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.client.delete('/api/productos-belkin/bulk-delete/', {'ids': ids}, content_type='application/json')
+
+    def test_mismo_archivo_devuelve_el_resultado_anterior(self):
+        primera = self.importar()
+        self.assertEqual(primera.status_code, 201)
+        self.assertEqual(primera.json()['importados'], 2)
+
+        segunda = self.importar()
+        self.assertEqual(segunda.status_code, 200)
+        self.assertTrue(segunda.json()['duplicado'])
+        self.assertEqual(ProductosBelkin.objects.count(), 2)
+
+    def test_forzar_reimporta(self):
+        self.importar()
+        self.assertEqual(self.importar(forzar=1).status_code, 201)
+        self.assertEqual(ProductosBelkin.objects.count(), 4)
+
+    def test_reimporta_si_el_dataset_cambio(self):
+        self.importar()
+        ids = list(ProductosBelkin.objects.values_list('pk', flat=True))
+        self.assertEqual(self.borrar(ids).json()['deleted'], 2)
+
+        respuesta = self.importar()
+        self.assertEqual(respuesta.status_code, 201)
+        self.assertEqual(ProductosBelkin.objects.count(), 2)
+        self.assertEqual(HistorialImportacion.objects.count(), 2)
+
+    def test_borrado_masivo_cambia_el_etag(self):
+        self.importar()
+        etag = self.client.get('/api/productos-belkin/')['ETag']
+        self.assertEqual(self.client.get('/api/productos-belkin/', HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        ids = list(ProductosBelkin.objects.values_list('pk', flat=True)[:1])
+        self.borrar(ids)
+        self.assertEqual(self.client.get('/api/productos-belkin/', HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+
+
+class HuellasFilasTests(DatosBase):
+    """Upsert de conetcom_planes por id_plan: las filas iguales a la última importación no se reescriben."""
+    encabezado = ('id_plan,nombre_plan,velocidad_descarga_mbps,velocidad_subida_mbps,precio_mensual,'
+                  'duracion_minima_contrato_meses,tipo_tecnologia\n')
+
+    def importar(self, *filas):
+        contenido = (self.encabezado + ''.join(f'{f},Basico,100,20,50000,12,Fibra\n' for f in filas)).encode()
+        archivo = SimpleUploadedFile('planes.csv', contenido, content_type='text/csv')
+        with self.captureOnCommitCallbacks(execute=True):
+            respuesta = self.client.post(reverse('conetcom_planes_import_url'), {'file': archivo}, **self.auth())
+        self.assertEqual(respuesta.status_code, 201, respuesta.content)
+        return respuesta.json()['metricas']['sin_cambios']
+
+    def test_omite_las_filas_sin_cambios(self):
+        self.assertEqual(self.importar('P1'), 0)
+        self.assertEqual(self.importar('P1', 'P2'), 1)
+        self.assertEqual(self.importar('P1', 'P2', 'P3'), 2)
+
+    def test_fila_editada_despues_de_importar_se_reescribe(self):
+        self.importar('P1')
+        plan = conetcom_planes.objects.get(id_plan='P1')
+        plan.nombre_plan = 'EDITADO'
+        with self.captureOnCommitCallbacks(execute=True):
+            plan.save()
+
+        self.assertEqual(self.importar('P1', 'P2'), 0)
+        plan.refresh_from_db()
+        self.assertEqual(plan.nombre_plan, 'Basico')
+
+
+# -------------------------
+# Importación por esquema (esquemas_importacion.py)
+# -------------------------
+
+class ArchivoSinFilasTests(DatosBase):
+
+    def importar(self, contenido):
+        archivo = SimpleUploadedFile('planes.csv', contenido, content_type='text/csv')
+        return self.client.post(reverse('conetcom_planes_import_url'), {'file': archivo}, **self.auth())
+
+    def test_archivo_vacio_o_solo_encabezados(self):
+        for contenido, error in ((b'\n\n', 'Archivo vacio'),
+                                 (HuellasFilasTests.encabezado.encode(), 'Archivo vacio: no tiene filas de datos')):
+            with self.subTest(contenido=contenido):
+                respuesta = self.importar(contenido)
+                self.assertEqual(respuesta.status_code, 400)
+                self.assertEqual(respuesta.json(), {'error': error})
+
+    def test_solo_encabezados_equivocados_reporta_las_faltantes(self):
+        respuesta = self.importar(b'id_plan,nombre_plan,precio_mensual\n')
+        self.assertEqual(respuesta.status_code, 400)
+        self.assertEqual(respuesta.json()['faltantes'], [
+            'velocidad_descarga_mbps', 'velocidad_subida_mbps', 'duracion_minima_contrato_meses', 'tipo_tecnologia',
+        ])
+
+# -------------------------
+# Cargas por partes en trabajos de importación (cargas_archivo.py / trabajos_importacion.py)
+# -------------------------
+
+class CargasEnTrabajosTests(DatosBase):
+
+    def setUp(self):
+        super().setUp()
+        self.carga = iniciar_carga(self.usuario, 'productos.csv', 10)
+        self.addCleanup(lambda: os.path.exists(ruta_carga(self.carga)) and os.remove(ruta_carga(self.carga)))
+        self.trabajo = TrabajoImportacion.objects.create(
+            id_empresa=self.empresa, id_usuario=self.usuario, tipo=ProductosBelkinBulkImportView.__name__,
+            nombre_archivo='productos.csv', ruta_archivo=ruta_carga(self.carga),
+        )
+
+    def test_no_borra_la_carga_de_un_trabajo_pendiente(self):
+        with self.assertRaises(ErrorCarga) as ctx:
+            eliminar_carga(self.carga)
+        self.assertEqual(ctx.exception.status, 409)
+        CargaArchivo.objects.filter(pk=self.carga.pk).update(fecha_actualizacion=dt.datetime(2020, 1, 1, tzinfo=dt.timezone.utc))
+        self.assertEqual(limpiar_cargas_vencidas(), 0)
+        self.assertTrue(os.path.exists(ruta_carga(self.carga)))
+
+        TrabajoImportacion.objects.filter(pk=self.trabajo.pk).update(estado=TrabajoImportacion.ESTADO_COMPLETADO)
+        self.assertEqual(limpiar_cargas_vencidas(), 1)
+        self.assertFalse(os.path.exists(ruta_carga(self.carga)))
+
+    def test_archivo_borrado_falla_el_trabajo_sin_detener_el_worker(self):
+        os.remove(ruta_carga(self.carga))
+        with self.captureOnCommitCallbacks(execute=True):
+            procesar_trabajo(self.trabajo)
+        self.trabajo.refresh_from_db()
+        self.assertEqual((self.trabajo.estado, self.trabajo.codigo_http), (TrabajoImportacion.ESTADO_FALLIDO, 410))
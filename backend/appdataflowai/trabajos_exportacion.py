@@ -0,0 +1,429 @@
+# appdataflowai/trabajos_exportacion.py
+"""
+Exportaciones como trabajos en segundo plano, con el archivo en caché.
+
+Con `?async=1` (o EXPORTACION_ASINCRONA=True) las vistas *Export* no arman el
+archivo en el request: exportacion.exportar() llama a `encolar_exportacion`, que
+guarda el trabajo en la tabla `trabajos_exportacion` y responde 202 con su
+código. Un pool local de hilos (el mismo esquema que trabajos_importacion.py:
+la tabla es la cola, SELECT ... FOR UPDATE SKIP LOCKED) vuelve a llamar al
+`get` de la vista con los mismos filtros; esta vez exportar() escribe el
+xlsx / csv / parquet en EXPORTACION_ARTEFACTOS_DIR.
+
+- La clave del archivo es un sha256 de: vista + kwargs de la URL, empresa del
+  token (y usuario si la vista es `privado`), query string (sin file / async),
+  formato y la versión de los datasets de los que sale (versiones_dataset.py).
+  Un request idéntico responde 200 con el trabajo ya completado hasta que
+  cambien los datos: cualquier escritura sube la versión y la clave cambia.
+- Un trabajo igual pendiente o en proceso se reutiliza (202 con el mismo código).
+- El directorio no pasa de EXPORTACION_ARTEFACTOS_MAX_BYTES: al terminar cada
+  trabajo se borran los archivos menos usados (último acceso / fin) y sus
+  trabajos quedan 'expirado'; `python manage.py limpiar_exportaciones` hace lo
+  mismo y además borra archivos huérfanos.
+- `?sync=1` fuerza la exportación en el request aunque EXPORTACION_ASINCRONA esté activo.
+El estado y la descarga se consultan en EstadoTrabajoExportacionView /
+DescargaTrabajoExportacionView.
+"""
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.db.models.functions import Coalesce
+from django.http import HttpRequest, QueryDict
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.module_loading import import_string
+from rest_framework import status
+from rest_framework.request import Request
+from rest_framework.response import Response
+
+from .exportacion import ESCRITORES, artefacto_actual
+from .models import TrabajoExportacion, Usuario
+from .trabajos_importacion import Latido, PoolTrabajos, _nombre_worker, autenticar_en_worker
+from .versiones_dataset import empresa_del_token, nombre_dataset, versiones_datasets
+
+logger = logging.getLogger(__name__)
+
+EXPORTACION_ASINCRONA = getattr(settings, 'EXPORTACION_ASINCRONA', False)
+EXPORTACION_WORKERS = getattr(settings, 'EXPORTACION_WORKERS', 1)
+EXPORTACION_TRABAJO_TIMEOUT_SECONDS = getattr(settings, 'EXPORTACION_TRABAJO_TIMEOUT_SECONDS', 600)
+EXPORTACION_ARTEFACTOS_DIR = getattr(
+    settings, 'EXPORTACION_ARTEFACTOS_DIR', os.path.join(tempfile.gettempdir(), 'dataflowai_exportaciones')
+)
+EXPORTACION_ARTEFACTOS_MAX_BYTES = getattr(settings, 'EXPORTACION_ARTEFACTOS_MAX_BYTES', 5 * 1024 * 1024 * 1024)
+# mínimo de segundos entre escrituras del conteo de filas en la tabla
+EXPORTACION_PROGRESO_SEGUNDOS = 5.0
+EXPORTACION_LATIDO_SEGUNDOS = max(1, min(30, EXPORTACION_TRABAJO_TIMEOUT_SECONDS // 4))
+
+# parámetros que no cambian el contenido del archivo
+PARAMETROS_FUERA_DE_CLAVE = ('file', 'async', 'sync')
+
+
+def _parametro_activo(params, nombre):
+    return str(params.get(nombre) or '').lower() in ('1', 'true', 'si')
+
+
+def exportacion_en_segundo_plano(request):
+    """True si el request pide (o la configuración impone) la exportación como trabajo."""
+    params = getattr(request, 'query_params', request.GET)
+    if _parametro_activo(params, 'sync'):
+        return False
+    return _parametro_activo(params, 'async') or EXPORTACION_ASINCRONA
+
+
+# -------------------------
+# Clave del archivo
+# -------------------------
+
+def _vista_de(request):
+    contexto = getattr(request, 'parser_context', None) or {}
+    return contexto.get('view'), dict(contexto.get('kwargs') or {})
+
+
+def tipo_de_vista(vista):
+    return f'{type(vista).__module__}.{type(vista).__qualname__}'
+
+
+def clave_exportacion(tipo, kwargs_url, empresa_id, usuario_id, parametros, formato, versiones):
+    base = json.dumps(
+        [tipo, kwargs_url, empresa_id, usuario_id, sorted(parametros.items()), formato, versiones],
+        sort_keys=True, default=str,
+    )
+    return hashlib.sha256(base.encode('utf-8')).hexdigest()
+
+
+def _parametros_de(request):
+    params = getattr(request, 'query_params', request.GET)
+    # listas (?canal=1&canal=2) se conservan en orden
+    return {
+        clave: valores if len(valores) > 1 else valores[0]
+        for clave, valores in params.lists()
+        if clave not in PARAMETROS_FUERA_DE_CLAVE
+    }
+
+
+def ruta_artefacto(trabajo):
+    return os.path.join(EXPORTACION_ARTEFACTOS_DIR, f'{trabajo.codigo}.{trabajo.formato}')
+
+
+def artefacto_disponible(trabajo):
+    return (
+        trabajo.estado == TrabajoExportacion.ESTADO_COMPLETADO
+        and bool(trabajo.ruta_archivo)
+        and os.path.exists(trabajo.ruta_archivo)
+    )
+
+
+# -------------------------
+# Encolar (dentro del request)
+# -------------------------
+
+def encolar_exportacion(request, formato, nombre_archivo, modelos, empresa_dataset, privado=False):
+    """
+    Responde 200 con el trabajo completado de un request idéntico (mismos datos),
+    202 con el trabajo igual ya en cola, o encola uno nuevo (202).
+    """
+    vista, kwargs_url = _vista_de(request)
+    if vista is None:
+        return Response({'error': 'Exportación en segundo plano no disponible para esta vista'},
+                        status=status.HTTP_400_BAD_REQUEST)
+
+    usuario = getattr(request, 'user', None)
+    if not getattr(usuario, 'is_authenticated', False) or not hasattr(usuario, 'id_usuario'):
+        usuario = None
+    empresa_id = empresa_del_token(request)
+    usuario_id = getattr(usuario, 'id_usuario', None)
+    if privado and usuario_id is None:
+        return Response({'error': 'Usuario no autenticado'}, status=status.HTTP_401_UNAUTHORIZED)
+
+    tipo = tipo_de_vista(vista)
+    parametros = _parametros_de(request)
+    versiones = {nombre_dataset(m): v for m, v in zip(modelos, versiones_datasets(empresa_dataset, modelos))}
+    clave = clave_exportacion(
+        tipo, kwargs_url, empresa_id, usuario_id if privado else None, parametros, formato, versiones,
+    )
+
+    previos = TrabajoExportacion.objects.filter(
+        clave=clave,
+        estado__in=[
+            TrabajoExportacion.ESTADO_COMPLETADO,
+            TrabajoExportacion.ESTADO_PENDIENTE,
+            TrabajoExportacion.ESTADO_PROCESANDO,
+        ],
+    ).order_by('-id_trabajo')
+    for previo in previos:
+        if previo.estado != TrabajoExportacion.ESTADO_COMPLETADO:
+            pool_exportaciones.despertar()
+            return Response(_respuesta_encolado(previo), status=status.HTTP_202_ACCEPTED)
+        if artefacto_disponible(previo):
+            TrabajoExportacion.objects.filter(pk=previo.pk).update(fecha_ultimo_acceso=timezone.now())
+            return Response({**serializar_trabajo_exportacion(previo), 'en_cache': True}, status=status.HTTP_200_OK)
+
+    trabajo = TrabajoExportacion.objects.create(
+        id_empresa_id=empresa_id if isinstance(empresa_id, int) else None,
+        id_usuario_id=usuario_id,
+        privado=privado,
+        tipo=tipo,
+        parametros=parametros,
+        kwargs_url=kwargs_url,
+        formato=formato,
+        clave=clave,
+        nombre_archivo=nombre_archivo,
+    )
+    transaction.on_commit(pool_exportaciones.despertar)
+    return Response(_respuesta_encolado(trabajo), status=status.HTTP_202_ACCEPTED)
+
+
+def _respuesta_encolado(trabajo):
+    return {
+        'mensaje': 'Exportación en cola',
+        'id_trabajo': str(trabajo.codigo),
+        'estado': trabajo.estado,
+        'url_estado': reverse('estado-trabajo-exportacion', kwargs={'codigo': trabajo.codigo}),
+    }
+
+
+# -------------------------
+# Worker
+# -------------------------
+
+class _Artefacto:
+    """Destino de exportar() dentro del worker: escribe el archivo y cuenta las filas."""
+
+    def __init__(self, trabajo, ruta):
+        self.trabajo = trabajo
+        self.ruta = ruta
+        self.filas = 0
+        self._ultimo_progreso = time.monotonic()
+
+    def _contar(self, filas):
+        for fila in filas:
+            self.filas += 1
+            yield fila
+            ahora = time.monotonic()
+            if ahora - self._ultimo_progreso >= EXPORTACION_PROGRESO_SEGUNDOS:
+                self._ultimo_progreso = ahora
+                TrabajoExportacion.objects.filter(pk=self.trabajo.pk).update(filas=self.filas)
+
+    def escribir(self, formato, filas, encabezados, hoja):
+        with open(self.ruta, 'wb') as destino:
+            ESCRITORES[formato](destino, self._contar(filas), encabezados, hoja=hoja)
+        return self
+
+
+def _solicitud_exportacion(trabajo, usuario):
+    """Request de DRF con el mismo query string (y el formato) con que se pidió la exportación."""
+    http_request = HttpRequest()
+    http_request.method = 'GET'
+    params = QueryDict(mutable=True)
+    for clave, valor in trabajo.parametros.items():
+        params.setlist(clave, valor if isinstance(valor, list) else [valor])
+    params['file'] = trabajo.formato
+    http_request.GET = params
+    autenticar_en_worker(http_request, usuario, 'trabajo-exportacion')
+    solicitud = Request(http_request)
+    if usuario is not None:
+        solicitud.user = usuario
+    return solicitud
+
+
+def procesar_trabajo_exportacion(trabajo):
+    try:
+        vista_cls = import_string(trabajo.tipo)
+    except ImportError:
+        _finalizar(trabajo, TrabajoExportacion.ESTADO_FALLIDO, status.HTTP_500_INTERNAL_SERVER_ERROR,
+                   error={'error': f'Vista de exportación desconocida: {trabajo.tipo}'})
+        return
+
+    usuario = None
+    if trabajo.id_usuario_id:
+        usuario = Usuario.objects.select_related('id_empresa').filter(pk=trabajo.id_usuario_id).first()
+
+    os.makedirs(EXPORTACION_ARTEFACTOS_DIR, exist_ok=True)
+    ruta = ruta_artefacto(trabajo)
+    temporal = f'{ruta}.tmp'
+    solicitud = _solicitud_exportacion(trabajo, usuario)
+    vista = vista_cls()
+    vista.request = solicitud
+    vista.args = ()
+    vista.kwargs = dict(trabajo.kwargs_url)
+    vista.format_kwarg = None
+    solicitud.parser_context = {'view': vista, 'args': (), 'kwargs': vista.kwargs}
+
+    artefacto = _Artefacto(trabajo, temporal)
+    token = artefacto_actual.set(artefacto)
+    try:
+        # el latido cubre también la consulta antes de la primera fila
+        with Latido(TrabajoExportacion, trabajo.pk, EXPORTACION_LATIDO_SEGUNDOS):
+            respuesta = vista.get(solicitud, **trabajo.kwargs_url)
+    except Exception as exc:
+        logger.exception("Trabajo de exportación %s falló", trabajo.codigo)
+        _borrar(temporal)
+        _finalizar(trabajo, TrabajoExportacion.ESTADO_FALLIDO, status.HTTP_500_INTERNAL_SERVER_ERROR,
+                   error={'error': str(exc)})
+        return
+    finally:
+        artefacto_actual.reset(token)
+
+    if respuesta is not artefacto:
+        # la vista respondió antes de exportar (401, 400 por filtros, ...)
+        _borrar(temporal)
+        _finalizar(trabajo, TrabajoExportacion.ESTADO_FALLIDO,
+                   getattr(respuesta, 'status_code', status.HTTP_500_INTERNAL_SERVER_ERROR),
+                   error=getattr(respuesta, 'data', None))
+        return
+
+    os.replace(temporal, ruta)
+    _finalizar(trabajo, TrabajoExportacion.ESTADO_COMPLETADO, status.HTTP_200_OK,
+               ruta_archivo=ruta, tamano_bytes=os.path.getsize(ruta), filas=artefacto.filas)
+
+
+def _finalizar(trabajo, estado, codigo_http, error=None, **cambios):
+    ahora = timezone.now()
+    TrabajoExportacion.objects.filter(pk=trabajo.pk).update(
+        estado=estado,
+        codigo_http=codigo_http,
+        error=error,
+        fecha_fin=ahora,
+        fecha_actualizacion=ahora,
+        **cambios,
+    )
+
+
+def _borrar(ruta):
+    try:
+        os.remove(ruta)
+    except FileNotFoundError:
+        pass
+
+
+def tomar_siguiente():
+    """Marca como 'procesando' el siguiente trabajo disponible y lo devuelve (o None)."""
+    vencido = timezone.now() - timedelta(seconds=EXPORTACION_TRABAJO_TIMEOUT_SECONDS)
+    with transaction.atomic():
+        pendientes = TrabajoExportacion.objects.filter(estado=TrabajoExportacion.ESTADO_PENDIENTE)
+        colgados = TrabajoExportacion.objects.filter(
+            estado=TrabajoExportacion.ESTADO_PROCESANDO,
+            fecha_actualizacion__lt=vencido,
+        )
+        trabajo = (
+            (pendientes | colgados)
+            .select_for_update(skip_locked=True)
+            .order_by('id_trabajo')
+            .first()
+        )
+        if trabajo is None:
+            return None
+        ahora = timezone.now()
+        trabajo.estado = TrabajoExportacion.ESTADO_PROCESANDO
+        trabajo.fecha_inicio = ahora
+        trabajo.fecha_actualizacion = ahora
+        trabajo.worker = _nombre_worker()
+        trabajo.filas = 0
+        trabajo.save(update_fields=['estado', 'fecha_inicio', 'fecha_actualizacion', 'worker', 'filas'])
+        return trabajo
+
+
+def procesar_exportaciones_pendientes():
+    """Procesa trabajos hasta vaciar la cola. Devuelve cuántos procesó."""
+    procesados = 0
+    while True:
+        close_old_connections()
+        try:
+            trabajo = tomar_siguiente()
+            if trabajo is None:
+                return procesados
+            procesar_trabajo_exportacion(trabajo)
+            procesados += 1
+            recortar_artefactos()
+        except Exception:
+            logger.exception("Error en el worker de exportaciones")
+            return procesados
+        finally:
+            close_old_connections()
+
+
+pool_exportaciones = PoolTrabajos(
+    EXPORTACION_WORKERS, procesar=procesar_exportaciones_pendientes, nombre='exportaciones',
+)
+
+
+# -------------------------
+# Expulsión (tamaño máximo del directorio)
+# -------------------------
+
+def recortar_artefactos(max_bytes=EXPORTACION_ARTEFACTOS_MAX_BYTES):
+    """
+    Deja los archivos completados dentro de `max_bytes`, conservando los de uso
+    más reciente; los demás se borran y su trabajo queda 'expirado'.
+    Devuelve (expirados, bytes liberados).
+    """
+    completados = (
+        TrabajoExportacion.objects
+        .filter(estado=TrabajoExportacion.ESTADO_COMPLETADO)
+        .order_by(Coalesce('fecha_ultimo_acceso', 'fecha_fin').desc(nulls_last=True), '-id_trabajo')
+        .values_list('id_trabajo', 'ruta_archivo', 'tamano_bytes')
+    )
+    acumulado = 0
+    expirar = []
+    liberados = 0
+    for id_trabajo, ruta, tamano in completados.iterator():
+        tamano = tamano or 0
+        if ruta and acumulado + tamano <= max_bytes and os.path.exists(ruta):
+            acumulado += tamano
+            continue
+        if ruta:
+            _borrar(ruta)
+            liberados += tamano
+        expirar.append(id_trabajo)
+    if expirar:
+        TrabajoExportacion.objects.filter(pk__in=expirar).update(
+            estado=TrabajoExportacion.ESTADO_EXPIRADO, fecha_actualizacion=timezone.now(),
+        )
+    return len(expirar), liberados
+
+
+def limpiar_huerfanos():
+    """Borra archivos del directorio sin un trabajo completado que los use. Devuelve cuántos borró."""
+    if not os.path.isdir(EXPORTACION_ARTEFACTOS_DIR):
+        return 0
+    en_uso = {
+        str(codigo) for codigo in TrabajoExportacion.objects
+        .filter(estado__in=[TrabajoExportacion.ESTADO_COMPLETADO, TrabajoExportacion.ESTADO_PROCESANDO])
+        .values_list('codigo', flat=True)
+    }
+    borrados = 0
+    for nombre in os.listdir(EXPORTACION_ARTEFACTOS_DIR):
+        # <codigo>.<formato> o <codigo>.<formato>.tmp mientras se escribe
+        if nombre.split('.', 1)[0] in en_uso:
+            continue
+        _borrar(os.path.join(EXPORTACION_ARTEFACTOS_DIR, nombre))
+        borrados += 1
+    return borrados
+
+
+def serializar_trabajo_exportacion(trabajo):
+    data = {
+        'id_trabajo': str(trabajo.codigo),
+        'tipo': trabajo.tipo.rsplit('.', 1)[-1],
+        'estado': trabajo.estado,
+        'formato': trabajo.formato,
+        'archivo': trabajo.nombre_archivo,
+        'filas': trabajo.filas,
+        'tamano_bytes': trabajo.tamano_bytes,
+        'codigo_http': trabajo.codigo_http,
+        'error': trabajo.error,
+        'fecha_creacion': trabajo.fecha_creacion,
+        'fecha_inicio': trabajo.fecha_inicio,
+        'fecha_fin': trabajo.fecha_fin,
+        'url_estado': reverse('estado-trabajo-exportacion', kwargs={'codigo': trabajo.codigo}),
+    }
+    if trabajo.estado == TrabajoExportacion.ESTADO_COMPLETADO:
+        data['url_descarga'] = reverse('descarga-trabajo-exportacion', kwargs={'codigo': trabajo.codigo})
+    return data
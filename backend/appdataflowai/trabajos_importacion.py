@@ -0,0 +1,505 @@
+# appdataflowai/trabajos_importacion.py
+"""
+Importaciones masivas como trabajos en segundo plano.
+
+Las vistas de importación (ImportarDatosView, los *BulkImportView de Belkin /
+Bluetti / Loop Totek y los conetcom *_import_views) heredan
+`ImportacionEnSegundoPlanMixin`: el POST guarda el archivo en la tabla
+`trabajos_importacion` y responde 202 con el código del trabajo; un pool local
+de hilos lo procesa llamando al mismo `importar(request)` que antes corría en
+el request. No hay broker: la tabla es la cola y los workers toman trabajos con
+SELECT ... FOR UPDATE SKIP LOCKED.
+
+- Es opt-in: `?async=1` encola el archivo; sin él (o con `?sync=1`) la importación
+  corre en el request como antes. IMPORTACION_ASINCRONA=True lo vuelve el modo
+  por defecto, para cuando todos los clientes consulten el estado del trabajo.
+- En lugar del archivo se puede mandar `id_carga` de una subida por partes ya
+  completada (appdataflowai/cargas_archivo.py): el trabajo guarda sólo la ruta.
+- Un archivo idéntico ya importado por la empresa responde el resultado anterior
+  si los datasets destino no cambiaron desde entonces
+  (appdataflowai/historial_importaciones.py); `?forzar=1` lo reimporta.
+- IMPORTACION_WORKERS hilos por proceso web (0 = este proceso no procesa; usar
+  `python manage.py procesar_importaciones`).
+- Mientras un worker procesa un trabajo, un hilo (`Latido`) renueva su
+  fecha_actualizacion cada IMPORTACION_LATIDO_SEGUNDOS, reporte o no progreso la
+  vista. Un trabajo 'procesando' sin latido por IMPORTACION_TRABAJO_TIMEOUT_SECONDS
+  (el proceso murió) vuelve a tomarse.
+El estado se consulta en EstadoImportacionView.
+"""
+import contextvars
+import logging
+import os
+import socket
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import close_old_connections, connection, transaction
+from django.http import HttpRequest, QueryDict
+from django.utils import timezone
+from django.utils.datastructures import MultiValueDict
+from rest_framework import status
+from rest_framework.response import Response
+
+from .cargas_archivo import ArchivoCarga, ErrorCarga, abrir_carga
+from .historial_importaciones import (
+    huella_archivo,
+    importacion_previa,
+    registrar_importacion,
+    respuesta_duplicada,
+    versiones_destino,
+)
+from .models import TrabajoImportacion, Usuario
+
+logger = logging.getLogger(__name__)
+
+IMPORTACION_ASINCRONA = getattr(settings, 'IMPORTACION_ASINCRONA', False)
+IMPORTACION_WORKERS = getattr(settings, 'IMPORTACION_WORKERS', 2)
+IMPORTACION_TRABAJO_TIMEOUT_SECONDS = getattr(settings, 'IMPORTACION_TRABAJO_TIMEOUT_SECONDS', 600)
+# mínimo de segundos entre escrituras de progreso en la tabla
+IMPORTACION_PROGRESO_SEGUNDOS = 1.0
+# varios latidos por timeout: una pausa larga de la BD no basta para que otro worker lo retome
+IMPORTACION_LATIDO_SEGUNDOS = max(1, min(30, IMPORTACION_TRABAJO_TIMEOUT_SECONDS // 4))
+
+# nombre de clase -> vista de importación
+VISTAS_IMPORTACION = {}
+
+_progreso_actual = contextvars.ContextVar('progreso_importacion', default=None)
+
+
+# -------------------------
+# Progreso
+# -------------------------
+
+class _Progreso:
+
+    def __init__(self, id_trabajo):
+        self.id_trabajo = id_trabajo
+        self._ultimo = 0.0
+
+    def __call__(self, procesadas, totales=None, forzar=False):
+        ahora = time.monotonic()
+        if not forzar and ahora - self._ultimo < IMPORTACION_PROGRESO_SEGUNDOS:
+            return
+        self._ultimo = ahora
+        cambios = {'filas_procesadas': procesadas, 'fecha_actualizacion': timezone.now()}
+        if totales is not None:
+            cambios['filas_totales'] = totales
+        TrabajoImportacion.objects.filter(pk=self.id_trabajo).update(**cambios)
+
+
+class Latido:
+    """
+    Hilo que renueva fecha_actualizacion del trabajo `pk` de `modelo` cada
+    `intervalo` segundos mientras dura el bloque `with`, aunque la vista no
+    reporte progreso: tomar_siguiente() sólo retoma trabajos cuyo worker dejó
+    de latir.
+    """
+
+    def __init__(self, modelo, pk, intervalo=IMPORTACION_LATIDO_SEGUNDOS):
+        self.modelo = modelo
+        self.pk = pk
+        self.intervalo = intervalo
+        self._detener = threading.Event()
+        self._hilo = threading.Thread(target=self._correr, name=f'latido-{modelo.__name__}-{pk}', daemon=True)
+
+    def __enter__(self):
+        self._hilo.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._detener.set()
+        self._hilo.join()
+
+    def _correr(self):
+        try:
+            while not self._detener.wait(self.intervalo):
+                self.modelo.objects.filter(pk=self.pk, estado=self.modelo.ESTADO_PROCESANDO).update(
+                    fecha_actualizacion=timezone.now(),
+                )
+        except Exception:
+            logger.exception("Latido del trabajo %s %s falló", self.modelo.__name__, self.pk)
+        finally:
+            # el hilo tiene su propia conexión
+            connection.close()
+
+
+def reporte_progreso():
+    """
+    Callable(procesadas, totales=None) del trabajo en curso, o None si la
+    importación corre dentro del request. Las vistas lo pasan a importar_dataframe.
+    """
+    return _progreso_actual.get()
+
+
+# -------------------------
+# Request reconstruido para el worker
+# -------------------------
+
+def autenticar_en_worker(http_request, usuario, etiqueta):
+    """Deja resuelta la identidad de `usuario` en un request armado por un worker."""
+    from .authentication import IDENTIDAD_ATTR, Identidad, construir_payload_acceso
+
+    if usuario is None:
+        return
+    # resolver_identidad() toma esta identidad sin volver a decodificar el token
+    http_request.META['HTTP_AUTHORIZATION'] = f'Bearer {etiqueta}'
+    setattr(usuario, 'is_authenticated', True)
+    setattr(http_request, IDENTIDAD_ATTR, Identidad(None, construir_payload_acceso(usuario), usuario=usuario))
+
+
+class _SolicitudImportacion:
+    """
+    Lo que las vistas de importación usan de un Request de DRF: FILES, data,
+    user, query_params y el header Authorization (la identidad ya va resuelta).
+    """
+
+    def __init__(self, trabajo, usuario):
+        if trabajo.ruta_archivo:
+            archivo = ArchivoCarga(trabajo.ruta_archivo, trabajo.nombre_archivo)
+        else:
+            archivo = SimpleUploadedFile(trabajo.nombre_archivo, bytes(trabajo.contenido))
+        self.archivo = archivo
+        self._request = HttpRequest()
+        self._request.method = 'POST'
+        self.META = self._request.META
+        self.user = usuario
+        autenticar_en_worker(self._request, usuario, 'trabajo-importacion')
+        self.FILES = MultiValueDict({trabajo.campo_archivo: [archivo]})
+        self.data = {**trabajo.datos, trabajo.campo_archivo: archivo}
+        self.query_params = self.GET = QueryDict('')
+        self.method = 'POST'
+
+
+def _errores_de_respuesta(data):
+    if not isinstance(data, dict):
+        return []
+    errores = data.get('errores') or data.get('detalles') or data.get('errors') or []
+    if not errores and data.get('error'):
+        errores = [data['error']]
+    if isinstance(errores, dict):
+        errores = [f'{k}: {v}' for k, v in errores.items()]
+    return [str(e) for e in list(errores)[:200]]
+
+
+def _filas_de_respuesta(data):
+    if not isinstance(data, dict):
+        return None
+    filas = 0
+    encontrado = False
+    for clave in ('creados', 'importados', 'actualizados', 'created', 'updated'):
+        valor = data.get(clave)
+        if isinstance(valor, int):
+            filas += valor
+            encontrado = True
+    return filas if encontrado else None
+
+
+def procesar_trabajo(trabajo):
+    vista_cls = VISTAS_IMPORTACION.get(trabajo.tipo)
+    if vista_cls is None:
+        _finalizar(trabajo, TrabajoImportacion.ESTADO_FALLIDO, status.HTTP_500_INTERNAL_SERVER_ERROR,
+                   {'error': f'Tipo de importación desconocido: {trabajo.tipo}'})
+        return
+
+    usuario = None
+    if trabajo.id_usuario_id:
+        usuario = Usuario.objects.select_related('id_empresa').filter(pk=trabajo.id_usuario_id).first()
+
+    try:
+        solicitud = _SolicitudImportacion(trabajo, usuario)
+    except OSError as exc:
+        # la carga por partes ya no está en disco: el trabajo falla, el worker sigue
+        logger.warning("Trabajo de importación %s: no se pudo abrir %s (%s)", trabajo.codigo, trabajo.ruta_archivo, exc)
+        _finalizar(trabajo, TrabajoImportacion.ESTADO_FALLIDO, status.HTTP_410_GONE,
+                   {'error': 'El archivo de la carga ya no está disponible'})
+        return
+
+    vista = vista_cls()
+    vista.request = solicitud
+    vista.args = ()
+    vista.kwargs = dict(trabajo.parametros)
+    vista.format_kwarg = None
+
+    progreso = _Progreso(trabajo.pk)
+    token = _progreso_actual.set(progreso)
+    try:
+        with Latido(TrabajoImportacion, trabajo.pk):
+            respuesta = vista.importar(solicitud, **trabajo.parametros)
+    except Exception as exc:
+        logger.exception("Trabajo de importación %s falló", trabajo.codigo)
+        _finalizar(trabajo, TrabajoImportacion.ESTADO_FALLIDO, status.HTTP_500_INTERNAL_SERVER_ERROR,
+                   {'error': str(exc)})
+        return
+    finally:
+        _progreso_actual.reset(token)
+        solicitud.archivo.close()
+
+    data = getattr(respuesta, 'data', None)
+    codigo = getattr(respuesta, 'status_code', status.HTTP_200_OK)
+    estado = TrabajoImportacion.ESTADO_COMPLETADO if codigo < 400 else TrabajoImportacion.ESTADO_FALLIDO
+    _finalizar(trabajo, estado, codigo, data, vista.datasets_importacion(**trabajo.parametros))
+
+
+def _finalizar(trabajo, estado, codigo_http, data, modelos=()):
+    cambios = {
+        'estado': estado,
+        'codigo_http': codigo_http,
+        'resultado': data,
+        'errores': _errores_de_respuesta(data),
+        'fecha_fin': timezone.now(),
+        'fecha_actualizacion': timezone.now(),
+        # el archivo ya no se necesita; no dejar MBs por trabajo en la tabla
+        'contenido': b'',
+    }
+    filas = _filas_de_respuesta(data)
+    if filas is not None:
+        cambios['filas_procesadas'] = filas
+    TrabajoImportacion.objects.filter(pk=trabajo.pk).update(**cambios)
+    registrar_importacion(
+        trabajo.tipo, trabajo.huella, trabajo.nombre_archivo, codigo_http, data,
+        empresa_id=trabajo.id_empresa_id, usuario_id=trabajo.id_usuario_id, modelos=modelos,
+    )
+
+
+# -------------------------
+# Cola (tabla) y pool de workers
+# -------------------------
+
+def _nombre_worker():
+    return f'{socket.gethostname()}:{os.getpid()}:{threading.get_ident()}'
+
+
+def tomar_siguiente():
+    """Marca como 'procesando' el siguiente trabajo disponible y lo devuelve (o None)."""
+    vencido = timezone.now() - timedelta(seconds=IMPORTACION_TRABAJO_TIMEOUT_SECONDS)
+    with transaction.atomic():
+        pendientes = TrabajoImportacion.objects.filter(estado=TrabajoImportacion.ESTADO_PENDIENTE)
+        colgados = TrabajoImportacion.objects.filter(
+            estado=TrabajoImportacion.ESTADO_PROCESANDO,
+            fecha_actualizacion__lt=vencido,
+        )
+        trabajo = (
+            (pendientes | colgados)
+            .select_for_update(skip_locked=True)
+            .order_by('id_trabajo')
+            .first()
+        )
+        if trabajo is None:
+            return None
+        ahora = timezone.now()
+        trabajo.estado = TrabajoImportacion.ESTADO_PROCESANDO
+        trabajo.fecha_inicio = ahora
+        trabajo.fecha_actualizacion = ahora
+        trabajo.worker = _nombre_worker()
+        trabajo.filas_procesadas = 0
+        trabajo.save(update_fields=['estado', 'fecha_inicio', 'fecha_actualizacion', 'worker', 'filas_procesadas'])
+        return trabajo
+
+
+def procesar_pendientes():
+    """Procesa trabajos hasta vaciar la cola. Devuelve cuántos procesó."""
+    procesados = 0
+    while True:
+        close_old_connections()
+        try:
+            trabajo = tomar_siguiente()
+            if trabajo is None:
+                return procesados
+            procesar_trabajo(trabajo)
+            procesados += 1
+        except Exception:
+            logger.exception("Error en el worker de importaciones")
+            return procesados
+        finally:
+            close_old_connections()
+
+
+class PoolTrabajos:
+    """Hilos locales que vacían una cola-tabla con `procesar()` (importaciones, exportaciones)."""
+
+    def __init__(self, workers, procesar=procesar_pendientes, nombre='importaciones'):
+        self.workers = workers
+        self.procesar = procesar
+        self.nombre = nombre
+        self._executor = None
+        self._activos = 0
+        self._lock = threading.Lock()
+
+    def despertar(self):
+        if self.workers <= 0:
+            return
+        with self._lock:
+            if self._activos >= self.workers:
+                # los hilos activos siguen tomando trabajos hasta vaciar la cola
+                return
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix=self.nombre)
+            self._activos += 1
+        self._executor.submit(self._correr)
+
+    def _correr(self):
+        try:
+            self.procesar()
+        finally:
+            with self._lock:
+                self._activos -= 1
+
+
+pool_importaciones = PoolTrabajos(IMPORTACION_WORKERS)
+
+
+def encolar_importacion(vista, request, archivo, campo_archivo, parametros, huella=None):
+    usuario = getattr(request, 'user', None)
+    if not getattr(usuario, 'is_authenticated', False) or not hasattr(usuario, 'id_usuario'):
+        usuario = None
+    datos = {}
+    for clave in getattr(request, 'data', {}) or {}:
+        if clave == campo_archivo:
+            continue
+        valor = request.data.get(clave)
+        if isinstance(valor, (str, int, float, bool)) or valor is None:
+            datos[clave] = valor
+    # el worker no tiene query string: opciones como ?forzar=1 viajan con los datos
+    for clave, valor in getattr(request, 'query_params', request.GET).items():
+        datos.setdefault(clave, valor)
+
+    trabajo = TrabajoImportacion.objects.create(
+        id_empresa_id=getattr(usuario, 'id_empresa_id', None),
+        id_usuario_id=getattr(usuario, 'id_usuario', None),
+        tipo=type(vista).__name__,
+        nombre_archivo=archivo.name,
+        campo_archivo=campo_archivo,
+        # una carga por partes ya está en disco: no copiarla a la tabla
+        contenido=b'' if isinstance(archivo, ArchivoCarga) else archivo.read(),
+        ruta_archivo=archivo.ruta if isinstance(archivo, ArchivoCarga) else None,
+        huella=huella,
+        datos=datos,
+        parametros=parametros,
+    )
+    transaction.on_commit(pool_importaciones.despertar)
+    return trabajo
+
+
+def serializar_trabajo(trabajo):
+    inicio = trabajo.fecha_inicio
+    fin = trabajo.fecha_fin or (trabajo.fecha_actualizacion if trabajo.estado == TrabajoImportacion.ESTADO_PROCESANDO else None)
+    filas_por_segundo = None
+    if inicio and fin and trabajo.filas_procesadas:
+        segundos = (fin - inicio).total_seconds()
+        if segundos > 0:
+            filas_por_segundo = round(trabajo.filas_procesadas / segundos, 1)
+    return {
+        'id_trabajo': str(trabajo.codigo),
+        'tipo': trabajo.tipo,
+        'estado': trabajo.estado,
+        'archivo': trabajo.nombre_archivo,
+        'filas_totales': trabajo.filas_totales,
+        'filas_procesadas': trabajo.filas_procesadas,
+        'filas_por_segundo': filas_por_segundo,
+        'codigo_http': trabajo.codigo_http,
+        'resultado': trabajo.resultado,
+        'errores': trabajo.errores,
+        'fecha_creacion': trabajo.fecha_creacion,
+        'fecha_inicio': trabajo.fecha_inicio,
+        'fecha_fin': trabajo.fecha_fin,
+    }
+
+
+class ImportacionEnSegundoPlanMixin:
+    """
+    Para vistas de importación: la vista implementa `importar(self, request, **kwargs)`
+    (el antiguo `post`) y este mixin provee el `post` que encola el archivo.
+    """
+    campo_archivo = 'file'
+    # datasets que escribe o referencia la vista: un archivo repetido sólo es duplicado si no cambiaron
+    modelos_importacion = ()
+    # vistas con JWT manual: sin usuario autenticado se deja que importar() responda el 401
+    requiere_usuario = False
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        VISTAS_IMPORTACION[cls.__name__] = cls
+
+    def post(self, request, *args, **kwargs):
+        archivo = request.FILES.get(self.campo_archivo)
+        if archivo is None and request.data.get('id_carga'):
+            try:
+                archivo = abrir_carga(request.data.get('id_carga'), request.user)
+            except ErrorCarga as e:
+                return Response({'error': str(e)}, status=e.status)
+            # importar() lo encuentra como si hubiera llegado en el multipart
+            request.FILES[self.campo_archivo] = archivo
+        try:
+            return self._encolar_o_importar(request, archivo, *args, **kwargs)
+        finally:
+            if isinstance(archivo, ArchivoCarga):
+                archivo.close()
+
+    def _encolar_o_importar(self, request, archivo, *args, **kwargs):
+        simulacion = self.es_simulacion(request)
+        huella = None
+        if archivo is not None and not simulacion:
+            huella = huella_archivo(archivo, type(self).__name__, kwargs)
+            empresa_id = getattr(request.user, 'id_empresa_id', None)
+            previa = None
+            if not self.parametro_activo(request, 'forzar'):
+                previa = importacion_previa(empresa_id, huella, versiones_destino(self.datasets_importacion(**kwargs)))
+            if previa is not None:
+                return respuesta_duplicada(previa)
+
+        sin_usuario = self.requiere_usuario and not getattr(request.user, 'is_authenticated', False)
+        if not self.en_segundo_plano(request) or archivo is None or sin_usuario or simulacion:
+            # sin archivo / sin token la vista responde su propio 400 / 401
+            respuesta = self.importar(request, *args, **kwargs)
+            if huella and not sin_usuario:
+                usuario = request.user
+                registrar_importacion(
+                    type(self).__name__, huella, archivo.name, respuesta.status_code, respuesta.data,
+                    empresa_id=getattr(usuario, 'id_empresa_id', None),
+                    usuario_id=getattr(usuario, 'id_usuario', None),
+                    modelos=self.datasets_importacion(**kwargs),
+                )
+            return respuesta
+
+        error = self.validar_importacion(request, archivo, *args, **kwargs)
+        if error is not None:
+            return error
+
+        trabajo = encolar_importacion(self, request, archivo, self.campo_archivo, kwargs, huella=huella)
+        return Response(
+            {
+                'mensaje': 'Importación en cola',
+                'id_trabajo': str(trabajo.codigo),
+                'estado': trabajo.estado,
+            },
+            status=status.HTTP_202_ACCEPTED,
+        )
+
+    def datasets_importacion(self, **kwargs):
+        """Modelos destino para la deduplicación; `kwargs` son los de la URL."""
+        return self.modelos_importacion
+
+    @staticmethod
+    def parametro_activo(request, nombre):
+        """?nombre=1 en la URL o en los datos del formulario (en el worker sólo quedan los datos)."""
+        params = getattr(request, 'query_params', request.GET)
+        valor = params.get(nombre) or request.data.get(nombre) or ''
+        return str(valor).lower() in ('1', 'true', 'si')
+
+    def en_segundo_plano(self, request):
+        """?async=1 encola; IMPORTACION_ASINCRONA lo vuelve el modo por defecto (salvo ?sync=1)."""
+        if self.parametro_activo(request, 'sync'):
+            return False
+        return self.parametro_activo(request, 'async') or IMPORTACION_ASINCRONA
+
+    def es_simulacion(self, request):
+        """True si el request sólo valida (no escribe): se resuelve sin encolar y no va al historial."""
+        return False
+
+    def validar_importacion(self, request, archivo, *args, **kwargs):
+        """Validaciones rápidas antes de encolar; devolver un Response de error o None."""
+        return None
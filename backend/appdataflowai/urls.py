@@ -39,6 +39,7 @@ from .views import (
 
     DashboardVentasDataflowView,
     DashboardVentasView,
+    AgregacionDatasetView,
     DashboardFinanzasView,
     DashboardComprasView,
 
@@ -48,6 +49,13 @@ from .views import (
 
     ImportarDatosView,
     EstadoImportacionView,
+    EstadoTrabajoImportacionView,
+    EstadoTrabajoExportacionView,
+    DescargaTrabajoExportacionView,
+    CargaArchivoInicioView,
+    CargaArchivoView,
+    CargaArchivoParteView,
+    CargaArchivoCompletarView,
 
 
     CambiarContrasenaView,
@@ -324,6 +332,7 @@ urlpatterns = [
 
     path('dashboard-dataflow/', DashboardVentasDataflowView.as_view(), name='dashboard-dataflow'),
     path('dashboard-ventas/', DashboardVentasView.as_view(), name='dashboard-ventas'),
+    path('agregaciones/<str:dataset>/', AgregacionDatasetView.as_view(), name='agregaciones-dataset'),
     path('dashboard-finanzas/', DashboardFinanzasView.as_view(), name='dashboard-finanzas'),
     path('dashboard-compras/', DashboardComprasView.as_view(), name='dashboard-compras'),
     path('dashboard-Salesreview/', DashboardSalesreviewView.as_view(), name='dashboard-Salesreview'),
@@ -333,6 +342,13 @@ urlpatterns = [
 
     path('importar/<int:id_producto>/', ImportarDatosView.as_view(), name='importar-datos'),
     path('estado-importacion/<int:id_producto>/', EstadoImportacionView.as_view(), name='estado-importacion'),
+    path('importaciones/trabajos/<uuid:codigo>/', EstadoTrabajoImportacionView.as_view(), name='estado-trabajo-importacion'),
+    path('exportaciones/trabajos/<uuid:codigo>/', EstadoTrabajoExportacionView.as_view(), name='estado-trabajo-exportacion'),
+    path('exportaciones/trabajos/<uuid:codigo>/descarga/', DescargaTrabajoExportacionView.as_view(), name='descarga-trabajo-exportacion'),
+    path('importaciones/cargas/', CargaArchivoInicioView.as_view(), name='carga-archivo-inicio'),
+    path('importaciones/cargas/<uuid:codigo>/', CargaArchivoView.as_view(), name='carga-archivo'),
+    path('importaciones/cargas/<uuid:codigo>/partes/<int:numero>/', CargaArchivoParteView.as_view(), name='carga-archivo-parte'),
+    path('importaciones/cargas/<uuid:codigo>/completar/', CargaArchivoCompletarView.as_view(), name='carga-archivo-completar'),
 
 
 
@@ -0,0 +1,271 @@
+# appdataflowai/versiones_dataset.py
+"""
+Versión por (empresa, dataset) para ETag / 304 en los listados.
+
+Los datasets versionados son los modelos de DATASETS_VERSIONADOS (los que leen
+etag_dataset, cache_respuesta y las exportaciones). Su versión vive en el cache
+`default` de Django, que tiene que ser compartido entre procesos (DatabaseCache
+por defecto; checks.py avisa si es LocMem), y se incrementa:
+  - con post_save, conectado en apps.py sólo a esos modelos,
+  - explícitamente en los caminos que no disparan señales: bulk_create,
+    bulk_update y QuerySet.update(), con `marcar_dataset_modificado`,
+  - en los borrados, con `borrar_y_marcar`. No hay receptores de post_delete:
+    con uno conectado Django deja de hacer el fast delete y un borrado masivo
+    carga las filas y manda una señal por cada una.
+
+Dentro de una transacción los cambios se acumulan y se aplican una sola vez en
+el commit.
+
+Las vistas GET de listado usan `@etag_dataset(Modelo, ...)`: calculan el ETag
+con la versión antes de consultar y responden 304 si coincide con If-None-Match.
+Cada cambio sube también la versión global (TODAS_LAS_EMPRESAS) del dataset,
+que usan los listados que no filtran por empresa (`empresa=todas_las_empresas`).
+Si el cache se pierde, la versión se reinicia con un valor basado en el reloj,
+de modo que un ETag viejo nunca vuelve a coincidir.
+"""
+import hashlib
+import threading
+import time
+from functools import wraps
+
+from django.apps import apps
+from django.core.cache import cache, caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.exceptions import ImproperlyConfigured
+from django.db import DEFAULT_DB_ALIAS, connections, models, transaction
+from django.utils.cache import patch_vary_headers
+from rest_framework import status
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework.response import Response
+
+VERSION_DATASET_CACHE_PREFIX = 'ds_ver'
+# versión agregada de todas las empresas, para listados que no filtran por empresa
+TODAS_LAS_EMPRESAS = '*'
+
+# modelos de appdataflowai con versión; agregar aquí antes de usarlos en etag_dataset / cache_respuesta
+DATASETS_VERSIONADOS = (
+    'DashboardVentasDataflow', 'DashboardVentas', 'DashboardSales', 'DashboardFinanzas',
+    'DashboardCompras', 'DashboardSalesreview', 'DashboardChurnRate',
+    'DashboardSalesCorporativo', 'DashboardSalesCorporativoMetas',
+    'DashDfTiendas', 'DashDfProductos', 'DashDfInventarios', 'DashDfVentas', 'DashDfMetas',
+    'ProductosBelkin', 'PdvBelkin', 'VentasBelkin', 'InventariosBelkin',
+    'ProductosBluetti', 'CanalesBluetti', 'CuentasClientesBluetti', 'VentasBluetti',
+    'InventariosBluetti', 'VentasSelloutBluetti', 'InventariosSelloutBluetti', 'MetasComercialesBluetti',
+    'ServiciosLoopTotek', 'LeadsBrokers',
+    'conetcom_clientes', 'conetcom_planes', 'conetcom_facturacion', 'conetcom_pagos',
+    'conetcom_tickets_soporte', 'conetcom_trafico_consumo', 'conetcom_campanas',
+    'conetcom_interacciones_campanas',
+)
+
+_local = threading.local()
+
+
+def modelos_versionados():
+    return [apps.get_model('appdataflowai', nombre) for nombre in DATASETS_VERSIONADOS]
+
+
+def es_versionado(model):
+    return model._meta.app_label == 'appdataflowai' and model.__name__ in DATASETS_VERSIONADOS
+
+
+def cache_es_local():
+    """True si el cache `default` es LocMem: cada proceso tendría sus propias versiones."""
+    return isinstance(caches['default'], LocMemCache)
+
+
+def nombre_dataset(model):
+    return model._meta.label_lower
+
+
+def _clave(empresa_id, dataset):
+    return f'{VERSION_DATASET_CACHE_PREFIX}:{empresa_id if empresa_id is not None else "-"}:{dataset}'
+
+
+def _semilla():
+    # milisegundos desde epoch: siempre mayor que cualquier versión previa a un reinicio del cache
+    return int(time.time() * 1000)
+
+
+def _tiene_empresa(model):
+    return any(f.name == 'id_empresa' for f in model._meta.concrete_fields)
+
+
+def versiones_datasets(empresa_id, models):
+    """Devuelve [versión, ...] para cada modelo, inicializando las que falten."""
+    sin_version = [nombre_dataset(m) for m in models if not es_versionado(m)]
+    if sin_version:
+        # sin registrar nadie sube su versión y el ETag no cambiaría nunca
+        raise ImproperlyConfigured(f"Datasets sin versión (agregar a DATASETS_VERSIONADOS): {', '.join(sin_version)}")
+    # modelos sin id_empresa (p. ej. DashboardVentasDataflow) versionan de forma global
+    claves = [_clave(empresa_id if _tiene_empresa(m) else None, nombre_dataset(m)) for m in models]
+    actuales = cache.get_many(claves)
+    versiones = []
+    for clave in claves:
+        if clave not in actuales:
+            cache.add(clave, _semilla(), timeout=None)
+            actuales[clave] = cache.get(clave, 0)
+        versiones.append(actuales[clave])
+    return versiones
+
+
+def _incrementar(empresa_id, dataset):
+    clave = _clave(empresa_id, dataset)
+    try:
+        cache.incr(clave)
+    except ValueError:
+        # clave inexistente (cache nuevo o expulsado)
+        cache.set(clave, _semilla(), timeout=None)
+
+
+def _aplicar_pendientes():
+    pendientes = getattr(_local, 'pendientes', None)
+    _local.pendientes = None
+    for empresa_id, dataset in pendientes or ():
+        _incrementar(empresa_id, dataset)
+
+
+def _callback_registrado(connection):
+    return any(item[1] is _aplicar_pendientes for item in connection.run_on_commit)
+
+
+def marcar_dataset_modificado(model, empresa_id=None, using=DEFAULT_DB_ALIAS):
+    """
+    Invalida la versión de (empresa_id, model). Fuera de una transacción se aplica
+    en el momento; dentro, una vez en el commit (y nada si hay rollback).
+    """
+    dataset = nombre_dataset(model)
+    connection = connections[using]
+    if not connection.in_atomic_block:
+        _incrementar(empresa_id, dataset)
+        if empresa_id is not None:
+            _incrementar(TODAS_LAS_EMPRESAS, dataset)
+        return
+
+    pendientes = getattr(_local, 'pendientes', None)
+    if pendientes is None or not _callback_registrado(connection):
+        # sin pendientes o la transacción anterior hizo rollback y descartó el callback
+        pendientes = _local.pendientes = set()
+        transaction.on_commit(_aplicar_pendientes, using=using)
+    pendientes.add((empresa_id, dataset))
+    if empresa_id is not None:
+        pendientes.add((TODAS_LAS_EMPRESAS, dataset))
+
+
+def marcar_objetos_modificados(model, objs):
+    """Para bulk_create / bulk_update: una marca por empresa presente en `objs`."""
+    empresas = {getattr(obj, 'id_empresa_id', None) for obj in objs}
+    for empresa_id in empresas:
+        marcar_dataset_modificado(model, empresa_id)
+
+
+def _empresa_de_instancia(instance):
+    return getattr(instance, 'id_empresa_id', None)
+
+
+def dataset_guardado(sender, instance, raw=False, using=DEFAULT_DB_ALIAS, **kwargs):
+    if raw:
+        return
+    marcar_dataset_modificado(sender, _empresa_de_instancia(instance), using=using)
+
+
+def borrar_y_marcar(objetivo):
+    """
+    `objetivo.delete()` (instancia o QuerySet) y marca de las versiones afectadas,
+    incluidos los datasets versionados que se borran en cascada. Devuelve lo mismo
+    que delete().
+    """
+    if isinstance(objetivo, models.QuerySet):
+        model, using = objetivo.model, objetivo.db
+        if _tiene_empresa(model):
+            empresas = set(objetivo.order_by().values_list('id_empresa', flat=True).distinct())
+        else:
+            empresas = {None}
+    else:
+        using = objetivo._state.db or DEFAULT_DB_ALIAS
+        empresas = {_empresa_de_instancia(objetivo)}
+
+    borrados, por_modelo = objetivo.delete()
+    for label, cantidad in por_modelo.items():
+        afectado = apps.get_model(label)
+        if not cantidad or not es_versionado(afectado):
+            continue
+        # las filas en cascada son de la misma empresa que las borradas
+        for empresa_id in empresas if _tiene_empresa(afectado) else (None,):
+            marcar_dataset_modificado(afectado, empresa_id, using=using)
+    return borrados, por_modelo
+
+
+# -------------------------
+# ETag en vistas GET
+# -------------------------
+
+def empresa_del_token(request):
+    """id_empresa del usuario autenticado o, en vistas con JWT manual, de la identidad del token."""
+    empresa_id = getattr(request.user, 'id_empresa_id', None)
+    if empresa_id is not None:
+        return empresa_id
+    from .authentication import resolver_identidad
+    try:
+        return resolver_identidad(request).id_empresa
+    except AuthenticationFailed:
+        return None
+
+
+def todas_las_empresas(request):
+    """Para vistas que listan todas las empresas: versión global, pero sólo con token válido."""
+    return TODAS_LAS_EMPRESAS if empresa_del_token(request) is not None else None
+
+
+def _etag_coincide(request, etag):
+    cabecera = request.META.get('HTTP_IF_NONE_MATCH')
+    if not cabecera:
+        return False
+    for candidato in cabecera.split(','):
+        candidato = candidato.strip()
+        if candidato == '*':
+            return True
+        if candidato.startswith('W/'):
+            candidato = candidato[2:]
+        if candidato == etag:
+            return True
+    return False
+
+
+def calcular_etag(request, empresa_id, models):
+    versiones = versiones_datasets(empresa_id, models)
+    renderer = getattr(request, 'accepted_renderer', None)
+    base = '|'.join([
+        str(empresa_id),
+        ','.join(f'{nombre_dataset(m)}={v}' for m, v in zip(models, versiones)),
+        request.get_full_path(),
+        getattr(renderer, 'format', '') or '',
+    ])
+    return '"%s"' % hashlib.sha1(base.encode('utf-8')).hexdigest()
+
+
+def etag_dataset(*models, empresa=empresa_del_token):
+    """
+    Decorador para el `get` (o `list`) de una vista de listado.
+    `empresa` es un callable(request) -> id_empresa o un id fijo (Belkin / Bluetti).
+    Si no se puede determinar la empresa se llama a la vista sin ETag (que
+    responderá su propio 401).
+    """
+    def decorador(metodo):
+        @wraps(metodo)
+        def envoltura(self, request, *args, **kwargs):
+            empresa_id = empresa(request) if callable(empresa) else empresa
+            if empresa_id is None and callable(empresa):
+                return metodo(self, request, *args, **kwargs)
+
+            etag = calcular_etag(request, empresa_id, models)
+            if _etag_coincide(request, etag):
+                respuesta = Response(status=status.HTTP_304_NOT_MODIFIED)
+            else:
+                respuesta = metodo(self, request, *args, **kwargs)
+                if respuesta.status_code != status.HTTP_200_OK:
+                    return respuesta
+            respuesta['ETag'] = etag
+            patch_vary_headers(respuesta, ('Accept', 'Authorization'))
+            return respuesta
+        return envoltura
+    return decorador
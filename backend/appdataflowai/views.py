@@ -17,10 +17,30 @@ from django.core.cache import cache
 from django.db import transaction
 from django.utils import timezone
 from rest_framework import status
+from rest_framework.exceptions import AuthenticationFailed
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
-from .models import Usuario, RegistrosSesion,ServiciosLoopTotek 
+from .authentication import (
+    resolver_identidad, construir_payload_acceso, codigo_error, respuesta_error_token,
+    id_usuario_o_error, SIN_TOKEN, TOKEN_EXPIRADO, USUARIO_NO_ENCONTRADO, CLAIMS_INCOMPLETOS,
+)
+from .registro_sesiones import registrar_inicio_sesion
+from .paginacion import paginar_keyset
+from .renderers import DASHBOARD_RENDERER_CLASSES
+from .versiones_dataset import borrar_y_marcar, etag_dataset, marcar_objetos_modificados, todas_las_empresas
+from .cache_respuestas import cache_respuesta
+from .streaming import respuesta_json_streaming, streaming_solicitado
+from .carga_masiva import CargaMasiva
+from .lectura_archivos import leer_archivo
+from .esquemas_importacion import Columna, EsquemaImportacion, ImportacionEsquemaView
+from .actualizacion_masiva import ActualizacionMasivaView
+from .cargas_archivo import ArchivoCarga
+from .models import TrabajoImportacion
+from .trabajos_importacion import (
+    ImportacionEnSegundoPlanMixin, pool_importaciones, reporte_progreso, serializar_trabajo,
+)
+from .models import Usuario, ServiciosLoopTotek
 from .serializers import PasswordRecoveryRequestSerializer, PasswordRecoveryConfirmSerializer
 
 logger = logging.getLogger(__name__)
@@ -224,7 +244,7 @@ class PasswordRecoveryConfirmView(APIView):
 class LoginView(APIView):
     """
     Vista para autenticación de usuarios.
-    Al autenticarse correctamente, además crea un registro en RegistrosSesion.
+    Al autenticarse correctamente, además encola un registro en RegistrosSesion.
     """
     def post(self, request):
         correo = (request.data.get('correo') or '').strip()
@@ -235,7 +255,7 @@ class LoginView(APIView):
 
         try:
             # Nota: mantengo tu verificación por correo + contraseña en texto plano
-            usuario = Usuario.objects.get(correo=correo, contrasena=contrasena)
+            usuario = Usuario.objects.select_related('id_empresa', 'id_estado', 'id_permiso_acceso').get(correo=correo, contrasena=contrasena)
         except Usuario.DoesNotExist:
             return Response({'error': 'Credenciales inválidas'}, status=status.HTTP_401_UNAUTHORIZED)
         except Exception:
@@ -253,17 +273,10 @@ class LoginView(APIView):
 
         # Generamos access token (2 horas) y refresh token (7 días)
         now = timezone.now()
-        access_token_exp = now + timedelta(hours=2)
         refresh_token_exp = now + timedelta(days=7)
 
-        # Payload para access token
-        access_payload = {
-            'id_usuario': usuario.id_usuario,
-            'correo': usuario.correo,
-            'type': 'access',
-            'exp': int(access_token_exp.timestamp()),
-            'iat': int(now.timestamp())
-        }
+        # Payload para access token (incluye empresa/rol/estado y versión de token)
+        access_payload = construir_payload_acceso(usuario, now=now)
 
         # Payload para refresh token
         refresh_payload = {
@@ -288,25 +301,12 @@ class LoginView(APIView):
             logger.exception("Error generando tokens JWT")
             return Response({'error': 'Error generando tokens'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
-        # Intentamos crear el registro de sesión (SIN refresh_token para no modificar el modelo)
+        # Registro de sesión: se encola (write-behind) y se escribe por lotes fuera del request
         registro_data = None
         try:
-            with transaction.atomic():
-                id_empresa_fk = getattr(usuario, 'id_empresa', None)
-                registro = RegistrosSesion.objects.create(
-                    id_empresa=id_empresa_fk,
-                    id_usuario=usuario,
-                    fecha_inicio_sesion=timezone.now()
-                    # NO incluimos refresh_token aquí para no modificar el modelo
-                )
-                registro.refresh_from_db()
-
-                registro_data = {
-                    'id_registro': registro.id_registro,
-                    'fecha_inicio_sesion': registro.fecha_inicio_sesion.isoformat()
-                }
+            registro_data = registrar_inicio_sesion(usuario)
         except Exception:
-            logger.exception("No se pudo crear RegistrosSesion tras login para usuario %s", getattr(usuario, 'id_usuario', None))
+            logger.exception("No se pudo registrar RegistrosSesion tras login para usuario %s", getattr(usuario, 'id_usuario', None))
             registro_data = None
 
         respuesta_usuario = {
@@ -353,17 +353,8 @@ class RefreshTokenView(APIView):
             if usuario.id_estado.id_estado != 1:
                 return Response({'error': 'Usuario inactivo'}, status=status.HTTP_403_FORBIDDEN)
 
-            # Generamos nuevo access token
-            now = timezone.now()
-            access_token_exp = now + timedelta(hours=2)
-            
-            access_payload = {
-                'id_usuario': usuario.id_usuario,
-                'correo': usuario.correo,
-                'type': 'access',
-                'exp': int(access_token_exp.timestamp()),
-                'iat': int(now.timestamp())
-            }
+            # Generamos nuevo access token (claims y versión actuales del usuario)
+            access_payload = construir_payload_acceso(usuario)
             
             access_token = jwt.encode(access_payload, settings.SECRET_KEY, algorithm='HS256')
             if isinstance(access_token, bytes):
@@ -438,35 +429,16 @@ class UsuarioInfoView(APIView):
 
         token = parts[1]
 
-        # 2) Decodificar token JWT
-        try:
-            payload = jwt.decode(token, settings.SECRET_KEY, algorithms=['HS256'])
-            id_usuario = payload.get('id_usuario')
-            if not id_usuario:
-                logger.warning("UsuarioInfoView: token válido pero sin id_usuario en payload")
-                return Response({'error': 'Token inválido (sin id_usuario)'}, status=status.HTTP_401_UNAUTHORIZED)
-        except jwt.ExpiredSignatureError:
-            return Response({'error': 'Token expirado'}, status=status.HTTP_401_UNAUTHORIZED)
-        except jwt.InvalidTokenError:
-            return Response({'error': 'Token inválido'}, status=status.HTTP_401_UNAUTHORIZED)
-        except Exception as e:
-            logger.exception("UsuarioInfoView: error decodificando token")
-            return Response({'error': 'Error al decodificar token'}, status=status.HTTP_401_UNAUTHORIZED)
-
-        # 3) Buscar usuario y serializar defensivamente
+        # 2) Identidad resuelta una sola vez por petición (JWTAuthentication / cache)
         try:
-            usuario = Usuario.objects.select_related(
-                'id_empresa__id_categoria',
-                'id_empresa__id_plan',
-                'id_empresa__id_estado',
-                'id_permiso_acceso'
-            ).get(id_usuario=id_usuario)
-        except Usuario.DoesNotExist:
-            logger.warning("UsuarioInfoView: usuario no encontrado id_usuario=%s", id_usuario)
-            return Response({'error': 'Usuario no encontrado'}, status=status.HTTP_404_NOT_FOUND)
+            usuario = resolver_identidad(request, token=token).usuario
+        except AuthenticationFailed as e:
+            if codigo_error(e) == USUARIO_NO_ENCONTRADO:
+                logger.warning("UsuarioInfoView: usuario no encontrado")
+            return respuesta_error_token(e, estados={USUARIO_NO_ENCONTRADO: status.HTTP_404_NOT_FOUND})
         except Exception:
             # si hay cualquier otro error en la consulta, lo loggeamos
-            logger.exception("UsuarioInfoView: error obteniendo usuario id_usuario=%s", id_usuario)
+            logger.exception("UsuarioInfoView: error obteniendo usuario")
             return Response({'error': 'Error interno al obtener usuario'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
         try:
@@ -554,22 +526,10 @@ class ProductosUsuarioView(APIView):
     junto con información relevante del producto, área y usuario.
     """
     def get(self, request):
-        token = request.headers.get('Authorization', '').split(' ')[-1]
-        try:
-            payload = jwt.decode(token, settings.SECRET_KEY, algorithms=['HS256'])
-            id_usuario = payload.get('id_usuario')
-        except jwt.ExpiredSignatureError:
-            return Response({'error': 'Token expirado'}, status=401)
-        except jwt.InvalidTokenError:
-            return Response({'error': 'Token inválido'}, status=401)
-
         try:
-            usuario = Usuario.objects.select_related(
-                'id_empresa',
-                'id_permiso_acceso'
-            ).get(id_usuario=id_usuario)
-        except Usuario.DoesNotExist:
-            return Response({'error': 'Usuario no encontrado'}, status=404)
+            usuario = resolver_identidad(request).usuario
+        except AuthenticationFailed as e:
+            return respuesta_error_token(e, estados={USUARIO_NO_ENCONTRADO: status.HTTP_404_NOT_FOUND})
 
         detalles = DetalleProducto.objects.select_related(
             'id_producto',
@@ -634,9 +594,8 @@ class ProductoListView(APIView):
             return Response({'error': 'Token no enviado'}, status=401)
 
         try:
-            token = auth_header[1].decode('utf-8')
-            jwt.decode(token, settings.SECRET_KEY, algorithms=['HS256'])
-        except (jwt.ExpiredSignatureError, jwt.DecodeError):
+            resolver_identidad(request)
+        except AuthenticationFailed:
             return Response({'error': 'Token inválido o expirado'}, status=401)
 
         # Obtener y serializar productos
@@ -678,19 +637,11 @@ class AdquirirDashboardView(APIView):
         if not auth or auth[0].lower() != b'bearer':
             return Response({'error': 'Token no enviado'}, status=status.HTTP_401_UNAUTHORIZED)
         try:
-            token = auth[1].decode()
-            payload = jwt.decode(token, settings.SECRET_KEY, algorithms=['HS256'])
-            id_usuario = payload['id_usuario']
-        except jwt.ExpiredSignatureError:
-            return Response({'error': 'Token expirado'}, status=status.HTTP_401_UNAUTHORIZED)
-        except jwt.InvalidTokenError:
-            return Response({'error': 'Token inválido'}, status=status.HTTP_401_UNAUTHORIZED)
+            usuario = resolver_identidad(request).usuario
+        except AuthenticationFailed as e:
+            return respuesta_error_token(e, estados={USUARIO_NO_ENCONTRADO: status.HTTP_404_NOT_FOUND})
 
-        # 2) Traer usuario y su plan
-        try:
-            usuario = Usuario.objects.select_related('id_empresa__id_plan').get(id_usuario=id_usuario)
-        except Usuario.DoesNotExist:
-            return Response({'error': 'Usuario no encontrado'}, status=status.HTTP_404_NOT_FOUND)
+        # 2) Plan de la empresa (ya cargado con el usuario)
         id_plan = usuario.id_empresa.id_plan.id_plan
         limite = PLAN_LIMITES.get(id_plan, 0)
 
@@ -860,19 +811,22 @@ class StripeWebhookAPIView(APIView):
 #
 from rest_framework.permissions import IsAuthenticated
 from django.utils.dateparse import parse_date
+from .models import DashboardVentasDataflow, DashboardVentas
 from .serializers import DashboardVentasDataflowSerializer
 from .serializers import DashboardVentasSerializer
 
 
 class DashboardVentasDataflowView(APIView):
     permission_classes = (IsAuthenticated,)
+    renderer_classes = DASHBOARD_RENDERER_CLASSES
 
+    @etag_dataset(DashboardVentasDataflow)
     def get(self, request):
         usuario = request.user
         if not hasattr(usuario, 'id_usuario'):
             return Response({'error': 'Usuario inválido en request'}, status=401)
 
-        qs = DashboardVentasDataflow.objects.filter(id_empresa=usuario.id_empresa).order_by('fecha_entrega')
+        qs = DashboardVentasDataflow.objects.filter(id_empresa_id=usuario.id_empresa_id).order_by('fecha_entrega')
         start = request.query_params.get('start')
         end = request.query_params.get('end')
         if start:
@@ -880,6 +834,15 @@ class DashboardVentasDataflowView(APIView):
         if end:
             qs = qs.filter(fecha_entrega__lte=parse_date(end))
 
+        # opt-in: ?cursor= / ?page_size= -> página keyset sobre (fecha_entrega, pk)
+        paginado = paginar_keyset(request, qs, 'fecha_entrega', lambda filas: DashboardVentasDataflowSerializer(filas, many=True).data)
+        if paginado is not None:
+            return paginado
+
+        # ?stream=1: arreglo JSON por trozos sin armar la lista completa en memoria
+        if streaming_solicitado(request):
+            return respuesta_json_streaming(qs, DashboardVentasDataflowSerializer)
+
         serializer = DashboardVentasDataflowSerializer(qs, many=True)
         return Response(serializer.data, status=200)
 
@@ -888,13 +851,16 @@ class DashboardVentasDataflowView(APIView):
 #####
 class DashboardVentasView(APIView):
     permission_classes = (IsAuthenticated,)
+    renderer_classes = DASHBOARD_RENDERER_CLASSES
 
+    @etag_dataset(DashboardVentas)
+    @cache_respuesta(DashboardVentas)
     def get(self, request):
         usuario = request.user
         if not hasattr(usuario, 'id_usuario'):
             return Response({'error': 'Usuario inválido en request'}, status=401)
 
-        queryset = DashboardVentas.objects.filter(id_empresa=usuario.id_empresa).order_by('fecha_venta')
+        queryset = DashboardVentas.objects.filter(id_empresa_id=usuario.id_empresa_id).order_by('fecha_venta')
         start = request.query_params.get('start')
         end = request.query_params.get('end')
         if start:
@@ -902,9 +868,51 @@ class DashboardVentasView(APIView):
         if end:
             queryset = queryset.filter(fecha_venta__lte=parse_date(end))
 
+        paginado = paginar_keyset(
+            request, queryset, 'fecha_venta',
+            lambda filas: DashboardVentasSerializer(filas, many=True, context={'usuario': usuario}).data,
+        )
+        if paginado is not None:
+            return paginado
+
+        # ?stream=1: arreglo JSON por trozos sin armar la lista completa en memoria
+        if streaming_solicitado(request):
+            return respuesta_json_streaming(queryset, DashboardVentasSerializer, context={'usuario': usuario})
+
         serializer = DashboardVentasSerializer(queryset, many=True, context={'usuario': usuario})
         return Response(serializer.data, status=200)
 
+
+#####
+# Agregaciones server-side (GROUP BY) de los dashboards de ventas
+from .agregaciones import DATASETS, agregar_dataset
+
+
+class AgregacionDatasetView(APIView):
+    """
+    GET /agregaciones/<dataset>/?bucket=month&group_by=marca&medidas=sum:dinero_vendido
+    Devuelve las filas ya agrupadas en vez de la tabla completa.
+    Los datasets con empresa fija (Belkin / Bluetti) no exigen token, igual que sus listados.
+    """
+
+    def get(self, request, dataset):
+        definicion = DATASETS.get(dataset)
+        if definicion is None:
+            return Response(
+                {'error': f"Dataset '{dataset}' no soportado", 'datasets': sorted(DATASETS)},
+                status=status.HTTP_404_NOT_FOUND,
+            )
+
+        empresa_id = None
+        if definicion.empresa_fija is None:
+            try:
+                empresa_id = resolver_identidad(request).id_empresa
+            except AuthenticationFailed as e:
+                return Response({'error': str(e)}, status=status.HTTP_401_UNAUTHORIZED)
+
+        resultado = agregar_dataset(definicion, request.query_params, empresa_id=empresa_id)
+        return Response({'dataset': dataset, **resultado}, status=status.HTTP_200_OK)
+
     
 
 
@@ -952,6 +960,9 @@ class DashboardSalesView(APIView):
     with optional filtering by date range (?start=YYYY-MM-DD&end=YYYY-MM-DD)
     """
 
+    renderer_classes = DASHBOARD_RENDERER_CLASSES
+
+    @etag_dataset(DashboardSales, empresa=todas_las_empresas)
     def get(self, request):
         # 1. Manual JWT authentication
         auth_header = get_authorization_header(request).split()
@@ -959,11 +970,10 @@ class DashboardSalesView(APIView):
             return Response({'error': 'Token not provided'}, status=status.HTTP_401_UNAUTHORIZED)
 
         try:
-            token = auth_header[1].decode('utf-8')
-            jwt.decode(token, settings.SECRET_KEY, algorithms=['HS256'])
-        except jwt.ExpiredSignatureError:
-            return Response({'error': 'Token expired'}, status=status.HTTP_401_UNAUTHORIZED)
-        except jwt.InvalidTokenError:
+            resolver_identidad(request)
+        except AuthenticationFailed as e:
+            if codigo_error(e) == TOKEN_EXPIRADO:
+                return Response({'error': 'Token expired'}, status=status.HTTP_401_UNAUTHORIZED)
             return Response({'error': 'Invalid token'}, status=status.HTTP_401_UNAUTHORIZED)
 
         # 2. Query and filters
@@ -975,7 +985,15 @@ class DashboardSalesView(APIView):
         if end:
             queryset = queryset.filter(sale_date__lte=parse_date(end))
 
-        # 3. Serialize
+        # 3. Optional keyset page (?cursor= / ?page_size=)
+        paginado = paginar_keyset(request, queryset, 'sale_date', lambda rows: DashboardSalesSerializer(rows, many=True).data)
+        if paginado is not None:
+            return paginado
+
+        # 4. Serialize (?stream=1 streams the JSON array in chunks instead of building the full list)
+        if streaming_solicitado(request):
+            return respuesta_json_streaming(queryset, DashboardSalesSerializer)
+
         serializer = DashboardSalesSerializer(queryset, many=True)
         return Response(serializer.data, status=status.HTTP_200_OK)
 
@@ -1010,6 +1028,9 @@ class DashboardFinanzasView(APIView):
     con filtrado opcional por rango de fechas (?start=YYYY-MM-DD&end=YYYY-MM-DD)
     """
 
+    renderer_classes = DASHBOARD_RENDERER_CLASSES
+
+    @etag_dataset(DashboardFinanzas, empresa=todas_las_empresas)
     def get(self, request):
         # 1. Autenticación JWT (manual)
         auth_header = get_authorization_header(request).split()
@@ -1017,12 +1038,9 @@ class DashboardFinanzasView(APIView):
             return Response({'error': 'Token no enviado'}, status=status.HTTP_401_UNAUTHORIZED)
 
         try:
-            token = auth_header[1].decode('utf-8')
-            jwt.decode(token, settings.SECRET_KEY, algorithms=['HS256'])
-        except jwt.ExpiredSignatureError:
-            return Response({'error': 'Token expirado'}, status=status.HTTP_401_UNAUTHORIZED)
-        except jwt.InvalidTokenError:
-            return Response({'error': 'Token inválido'}, status=status.HTTP_401_UNAUTHORIZED)
+            resolver_identidad(request)
+        except AuthenticationFailed as e:
+            return Response({'error': str(e)}, status=status.HTTP_401_UNAUTHORIZED)
 
         # 2. Consulta y filtros por fecha_registro
         queryset = DashboardFinanzas.objects.all().order_by('fecha_registro')
@@ -1033,7 +1051,16 @@ class DashboardFinanzasView(APIView):
         if end:
             queryset = queryset.filter(fecha_registro__lte=parse_date(end))
 
-        # 3. Serializar
+        # 3. Página keyset opcional (?cursor= / ?page_size=)
+        paginado = paginar_keyset(request, queryset, 'fecha_registro', lambda filas: DashboardFinanzasSerializer(filas, many=True).data)
+        if paginado is not None:
+            return paginado
+
+        # 4. Serializar
+        # ?stream=1: arreglo JSON por trozos sin armar la lista completa en memoria
+        if streaming_solicitado(request):
+            return respuesta_json_streaming(queryset, DashboardFinanzasSerializer)
+
         serializer = DashboardFinanzasSerializer(queryset, many=True)
         return Response(serializer.data, status=status.HTTP_200_OK)
 
@@ -1058,6 +1085,9 @@ class DashboardComprasView(APIView):
     con filtrado opcional por rango de fechas (?start=YYYY-MM-DD&end=YYYY-MM-DD)
     """
 
+    renderer_classes = DASHBOARD_RENDERER_CLASSES
+
+    @etag_dataset(DashboardCompras, empresa=todas_las_empresas)
     def get(self, request):
         # 1. Autenticación JWT manual
         auth_header = get_authorization_header(request).split()
@@ -1065,12 +1095,9 @@ class DashboardComprasView(APIView):
             return Response({'error': 'Token no enviado'}, status=status.HTTP_401_UNAUTHORIZED)
 
         try:
-            token = auth_header[1].decode('utf-8')
-            jwt.decode(token, settings.SECRET_KEY, algorithms=['HS256'])
-        except jwt.ExpiredSignatureError:
-            return Response({'error': 'Token expirado'}, status=status.HTTP_401_UNAUTHORIZED)
-        except jwt.InvalidTokenError:
-            return Response({'error': 'Token inválido'}, status=status.HTTP_401_UNAUTHORIZED)
+            resolver_identidad(request)
+        except AuthenticationFailed as e:
+            return Response({'error': str(e)}, status=status.HTTP_401_UNAUTHORIZED)
 
         # 2. Consulta y filtros por fecha_compra
         queryset = DashboardCompras.objects.all().order_by('fecha_compra')
@@ -1081,7 +1108,16 @@ class DashboardComprasView(APIView):
         if end:
             queryset = queryset.filter(fecha_compra__lte=parse_date(end))
 
-        # 3. Serialización
+        # 3. Página keyset opcional (?cursor= / ?page_size=)
+        paginado = paginar_keyset(request, queryset, 'fecha_compra', lambda filas: DashboardComprasSerializer(filas, many=True).data)
+        if paginado is not None:
+            return paginado
+
+        # 4. Serialización
+        # ?stream=1: arreglo JSON por trozos sin armar la lista completa en memoria
+        if streaming_solicitado(request):
+            return respuesta_json_streaming(queryset, DashboardComprasSerializer)
+
         serializer = DashboardComprasSerializer(queryset, many=True)
         return Response(serializer.data, status=status.HTTP_200_OK)
 
@@ -1114,6 +1150,8 @@ from .models import (
     Producto,
 )
 
+from .importacion import importar_dataframe
+
 logger = logging.getLogger(__name__)
 
 # Mapeo de producto-ID a modelo de dashboard
@@ -1126,25 +1164,41 @@ PRODUCTO_MODELO_MAP = {
     #  ...otros productos si los hubiera
 }
 
-class ImportarDatosView(APIView):
+class ImportarDatosView(ImportacionEnSegundoPlanMixin, APIView):
     """
     Importa un Excel y crea registros en el modelo correspondiente,
     asignando automáticamente id_empresa y id_producto desde el usuario y la URL.
+    El POST encola un trabajo (202 + id_trabajo); ver EstadoImportacionView.
     """
     parser_classes = [MultiPartParser]
+    campo_archivo = 'archivo'
+    requiere_usuario = True
+
+    def datasets_importacion(self, id_producto):
+        modelo = PRODUCTO_MODELO_MAP.get(int(id_producto))
+        return (modelo,) if modelo else ()
+
+    def validar_importacion(self, request, archivo, id_producto):
+        if not PRODUCTO_MODELO_MAP.get(int(id_producto)):
+            return Response({
+                'error': f'ID de producto inválido: {id_producto}. Válidos: {list(PRODUCTO_MODELO_MAP)}'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        if not archivo.name.lower().endswith(('.xlsx', '.xls')):
+            return Response({'error': 'Formato no válido (.xlsx/.xls)'}, status=status.HTTP_400_BAD_REQUEST)
+        if archivo.size > 10 * 1024 * 1024 and not isinstance(archivo, ArchivoCarga):
+            return Response({'error': 'Archivo >10MB'}, status=status.HTTP_400_BAD_REQUEST)
+        return None
 
-    def post(self, request, id_producto):
+    def importar(self, request, id_producto):
         # 1) Autenticación JWT y extracción de usuario
         auth = get_authorization_header(request).split()
         if not auth or auth[0].lower() != b'bearer':
             return Response({'error': 'Token no enviado'}, status=status.HTTP_401_UNAUTHORIZED)
         try:
-            token = auth[1].decode()
-            payload = jwt.decode(token, settings.SECRET_KEY, algorithms=['HS256'])
-            usuario = Usuario.objects.select_related('id_empresa').get(id_usuario=payload['id_usuario'])
-        except jwt.ExpiredSignatureError:
-            return Response({'error': 'Token expirado'}, status=status.HTTP_401_UNAUTHORIZED)
-        except (jwt.InvalidTokenError, Usuario.DoesNotExist):
+            usuario = resolver_identidad(request).usuario
+        except AuthenticationFailed as e:
+            if codigo_error(e) == TOKEN_EXPIRADO:
+                return Response({'error': 'Token expirado'}, status=status.HTTP_401_UNAUTHORIZED)
             return Response({'error': 'Token inválido o usuario no encontrado'}, status=status.HTTP_401_UNAUTHORIZED)
 
         # 2) Validar modelo y obtener instancia de Producto
@@ -1165,12 +1219,12 @@ class ImportarDatosView(APIView):
             return Response({'error': 'No se proporcionó archivo'}, status=status.HTTP_400_BAD_REQUEST)
         if not archivo.name.lower().endswith(('.xlsx', '.xls')):
             return Response({'error': 'Formato no válido (.xlsx/.xls)'}, status=status.HTTP_400_BAD_REQUEST)
-        if archivo.size > 10 * 1024 * 1024:
+        if archivo.size > 10 * 1024 * 1024 and not isinstance(archivo, ArchivoCarga):
             return Response({'error': 'Archivo >10MB'}, status=status.HTTP_400_BAD_REQUEST)
 
         # 4) Leer y normalizar DataFrame
         try:
-            df = pd.read_excel(archivo)
+            df = leer_archivo(archivo)
         except Exception as e:
             return Response({'error': f'Error leyendo Excel: {e}'}, status=status.HTTP_400_BAD_REQUEST)
         if df.empty:
@@ -1201,43 +1255,18 @@ class ImportarDatosView(APIView):
                 'encontrados': list(columnas)
             }, status=status.HTTP_400_BAD_REQUEST)
 
-        # 7) Procesar fila por fila
-        creados = 0
-        errores = []
-        for idx, row in df.iterrows():
-            datos = {}
-            try:
-                # Rellenar campos válidos
-                for campo in campos_validos:
-                    valor = row[campo]
-                    if pd.isna(valor):
-                        datos[campo] = None
-                    else:
-                        field = modelo._meta.get_field(campo)
-                        if isinstance(field, models.DateField):
-                            datos[campo] = pd.to_datetime(valor).date()
-                        elif isinstance(field, models.TimeField):
-                            datos[campo] = pd.to_datetime(valor).time()
-                        elif isinstance(field, models.IntegerField):
-                            datos[campo] = int(valor)
-                        elif isinstance(field, models.DecimalField):
-                            datos[campo] = float(valor)
-                        else:
-                            datos[campo] = valor
-
-                # Asignar foráneas obligatorias desde contexto
-                datos['id_empresa'] = usuario.id_empresa
-                datos['id_producto'] = producto_obj
-
-                # Crear registro
-                modelo.objects.create(**datos)
-                creados += 1
-
-            except Exception as e:
-                errores.append(f'Fila {idx+2}: {e}')
-                if len(errores) > 50:
-                    errores.append('Detenido por exceso de errores')
-                    break
+        # 7) Conversión vectorizada por columna + bulk_create por lotes
+        #    (id_empresa / id_producto sólo si el modelo tiene esas columnas)
+        nombres_modelo = {f.name for f in modelo._meta.fields}
+        fijos = {}
+        if 'id_empresa' in nombres_modelo:
+            fijos['id_empresa'] = usuario.id_empresa
+        if 'id_producto' in nombres_modelo:
+            fijos['id_producto'] = producto_obj
+        progreso = reporte_progreso()
+        if progreso:
+            progreso(0, totales=len(df), forzar=True)
+        creados, errores = importar_dataframe(modelo, df, campos_validos, fijos=fijos, progreso=progreso)
 
         # 8) Responder
         resp = {
@@ -1262,12 +1291,9 @@ class EstadoImportacionView(APIView):
         if not auth or auth[0].lower() != b'bearer':
             return Response({'error': 'Token no enviado'}, status=status.HTTP_401_UNAUTHORIZED)
         try:
-            token = auth[1].decode()
-            jwt.decode(token, settings.SECRET_KEY, algorithms=['HS256'])
-        except jwt.ExpiredSignatureError:
-            return Response({'error': 'Token expirado'}, status=status.HTTP_401_UNAUTHORIZED)
-        except jwt.InvalidTokenError:
-            return Response({'error': 'Token inválido'}, status=status.HTTP_401_UNAUTHORIZED)
+            usuario = resolver_identidad(request).usuario
+        except AuthenticationFailed as e:
+            return Response({'error': str(e)}, status=status.HTTP_401_UNAUTHORIZED)
 
         modelo = PRODUCTO_MODELO_MAP.get(int(id_producto))
         if not modelo:
@@ -1278,15 +1304,205 @@ class EstadoImportacionView(APIView):
             f.name for f in modelo._meta.fields
             if not isinstance(f, models.AutoField)
         ]
+        trabajos = TrabajoImportacion.objects.filter(
+            tipo=ImportarDatosView.__name__,
+            parametros__id_producto=int(id_producto),
+            id_empresa_id=usuario.id_empresa_id,
+        ).order_by('-id_trabajo')[:10]
         return Response({
             'id_producto': id_producto,
             'modelo': modelo.__name__,
             'total_registros': total,
             'campos': campos,
-            'tabla': modelo._meta.db_table
+            'tabla': modelo._meta.db_table,
+            'trabajos': [serializar_trabajo(t) for t in trabajos],
         }, status=status.HTTP_200_OK)
 
 
+class EstadoTrabajoImportacionView(APIView):
+    """
+    Estado y progreso de un trabajo de importación encolado (id_trabajo del 202).
+    """
+    def get(self, request, codigo):
+        auth = get_authorization_header(request).split()
+        if not auth or auth[0].lower() != b'bearer':
+            return Response({'error': 'Token no enviado'}, status=status.HTTP_401_UNAUTHORIZED)
+        try:
+            usuario = resolver_identidad(request).usuario
+        except AuthenticationFailed as e:
+            return Response({'error': str(e)}, status=status.HTTP_401_UNAUTHORIZED)
+
+        trabajo = TrabajoImportacion.objects.filter(codigo=codigo).first()
+        if trabajo is None or (trabajo.id_empresa_id and trabajo.id_empresa_id != usuario.id_empresa_id):
+            return Response({'error': 'Trabajo no encontrado'}, status=status.HTTP_404_NOT_FOUND)
+
+        if trabajo.estado == TrabajoImportacion.ESTADO_PENDIENTE:
+            # p. ej. el proceso que lo encoló se reinició antes de tomarlo
+            pool_importaciones.despertar()
+        return Response(serializar_trabajo(trabajo), status=status.HTTP_200_OK)
+
+
+# -------------------------
+# Exportaciones en segundo plano (appdataflowai/trabajos_exportacion.py)
+# -------------------------
+
+from django.http import FileResponse
+
+from .exportacion import CONTENT_TYPES
+from .models import TrabajoExportacion
+from .trabajos_exportacion import artefacto_disponible, pool_exportaciones, serializar_trabajo_exportacion
+
+
+def _trabajo_exportacion_de(request, codigo):
+    """(trabajo, None) si el token puede verlo; (None, Response de error) si no."""
+    auth = get_authorization_header(request).split()
+    if not auth or auth[0].lower() != b'bearer':
+        return None, Response({'error': 'Token no enviado'}, status=status.HTTP_401_UNAUTHORIZED)
+    try:
+        usuario = resolver_identidad(request).usuario
+    except AuthenticationFailed as e:
+        return None, Response({'error': str(e)}, status=status.HTTP_401_UNAUTHORIZED)
+
+    trabajo = TrabajoExportacion.objects.filter(codigo=codigo).first()
+    if (trabajo is None
+            or (trabajo.id_empresa_id and trabajo.id_empresa_id != usuario.id_empresa_id)
+            or (trabajo.privado and trabajo.id_usuario_id != usuario.id_usuario)):
+        return None, Response({'error': 'Trabajo no encontrado'}, status=status.HTTP_404_NOT_FOUND)
+    return trabajo, None
+
+
+class EstadoTrabajoExportacionView(APIView):
+    """
+    Estado de un trabajo de exportación (id_trabajo del 202); completado incluye url_descarga.
+    """
+    def get(self, request, codigo):
+        trabajo, error = _trabajo_exportacion_de(request, codigo)
+        if error is not None:
+            return error
+        if trabajo.estado == TrabajoExportacion.ESTADO_PENDIENTE:
+            pool_exportaciones.despertar()
+        return Response(serializar_trabajo_exportacion(trabajo), status=status.HTTP_200_OK)
+
+
+class DescargaTrabajoExportacionView(APIView):
+    """
+    Archivo de un trabajo completado. 409 mientras no termina; 410 si el archivo
+    se expulsó del directorio (repetir la exportación genera uno nuevo).
+    """
+    def get(self, request, codigo):
+        trabajo, error = _trabajo_exportacion_de(request, codigo)
+        if error is not None:
+            return error
+        if trabajo.estado == TrabajoExportacion.ESTADO_EXPIRADO or (
+                trabajo.estado == TrabajoExportacion.ESTADO_COMPLETADO and not artefacto_disponible(trabajo)):
+            return Response({'error': 'El archivo ya no está disponible'}, status=status.HTTP_410_GONE)
+        if trabajo.estado != TrabajoExportacion.ESTADO_COMPLETADO:
+            return Response(serializar_trabajo_exportacion(trabajo), status=status.HTTP_409_CONFLICT)
+
+        TrabajoExportacion.objects.filter(pk=trabajo.pk).update(fecha_ultimo_acceso=timezone.now())
+        return FileResponse(
+            open(trabajo.ruta_archivo, 'rb'),
+            as_attachment=True,
+            filename=trabajo.nombre_archivo,
+            content_type=CONTENT_TYPES[trabajo.formato],
+        )
+
+
+# -------------------------
+# Subida por partes (appdataflowai/cargas_archivo.py)
+# -------------------------
+
+from rest_framework.permissions import IsAuthenticated
+
+from .cargas_archivo import (
+    ErrorCarga,
+    completar_carga,
+    eliminar_carga,
+    iniciar_carga,
+    obtener_carga,
+    recibir_parte,
+    serializar_carga,
+)
+
+
+class CargaArchivoInicioView(APIView):
+    """
+    Inicia una subida por partes: {nombre_archivo, tamano_total, tamano_parte?, sha256?}.
+    Responde id_carga y cuántas partes enviar a CargaArchivoParteView.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        try:
+            carga = iniciar_carga(
+                request.user,
+                request.data.get('nombre_archivo'),
+                request.data.get('tamano_total'),
+                tamano_parte=request.data.get('tamano_parte'),
+                sha256=request.data.get('sha256'),
+            )
+        except ErrorCarga as e:
+            return Response({'error': str(e)}, status=e.status)
+        return Response(serializar_carga(carga), status=status.HTTP_201_CREATED)
+
+
+class CargaArchivoView(APIView):
+    """Estado de una carga (partes faltantes para reanudar) o DELETE para descartarla."""
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, codigo):
+        try:
+            carga = obtener_carga(codigo, request.user)
+        except ErrorCarga as e:
+            return Response({'error': str(e)}, status=e.status)
+        return Response(serializar_carga(carga), status=status.HTTP_200_OK)
+
+    def delete(self, request, codigo):
+        try:
+            carga = obtener_carga(codigo, request.user)
+        except ErrorCarga as e:
+            return Response({'error': str(e)}, status=e.status)
+        try:
+            eliminar_carga(carga)
+        except ErrorCarga as e:
+            return Response({'error': str(e)}, status=e.status)
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+
+class CargaArchivoParteView(APIView):
+    """PUT con el cuerpo binario de la parte `numero`; se copia a disco por bloques."""
+    permission_classes = [IsAuthenticated]
+
+    def put(self, request, codigo, numero):
+        longitud = request.META.get('CONTENT_LENGTH')
+        try:
+            carga = obtener_carga(codigo, request.user)
+            carga = recibir_parte(carga, numero, request.stream, int(longitud) if longitud else None)
+        except ErrorCarga as e:
+            return Response({'error': str(e)}, status=e.status)
+        return Response(
+            {
+                'id_carga': str(carga.codigo),
+                'numero': numero,
+                'partes_recibidas': len(carga.partes_recibidas),
+                'total_partes': carga.total_partes,
+            },
+            status=status.HTTP_200_OK,
+        )
+
+
+class CargaArchivoCompletarView(APIView):
+    """Cierra la carga; después se importa mandando `id_carga` a la vista de importación."""
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request, codigo):
+        try:
+            carga = completar_carga(obtener_carga(codigo, request.user))
+        except ErrorCarga as e:
+            return Response({'error': str(e)}, status=e.status)
+        return Response(serializar_carga(carga), status=status.HTTP_200_OK)
+
+
 
 
 """
@@ -1316,26 +1532,7 @@ class CambiarContrasenaView(APIView):
     """
 
     def _get_usuario_from_token(self, request):
-        auth = request.headers.get('Authorization', '')
-        token = auth.split('Bearer ')[-1] if 'Bearer ' in auth else auth.split(' ')[-1] if auth else ''
-        if not token:
-            raise AuthenticationFailed('No se proporcionó token')
-
-        try:
-            payload = jwt.decode(token, settings.SECRET_KEY, algorithms=['HS256'])
-            id_usuario = payload.get('id_usuario')
-            if not id_usuario:
-                raise AuthenticationFailed('Token inválido')
-        except jwt.ExpiredSignatureError:
-            raise AuthenticationFailed('Token expirado')
-        except jwt.InvalidTokenError:
-            raise AuthenticationFailed('Token inválido')
-
-        try:
-            usuario = Usuario.objects.get(id_usuario=id_usuario)
-            return usuario
-        except Usuario.DoesNotExist:
-            raise AuthenticationFailed('Usuario no encontrado')
+        return resolver_identidad(request).usuario
 
     def patch(self, request):
         try:
@@ -1364,6 +1561,7 @@ from rest_framework import status, serializers
 from rest_framework.exceptions import AuthenticationFailed
 
 from .models import Usuario, Empresa, Estado, TipoPlan, PermisoAcceso
+from .authentication import invalidar_cache_usuario, invalidar_cache_empresa
 
 
 def _get_usuario_from_token(request):
@@ -1371,29 +1569,7 @@ def _get_usuario_from_token(request):
     Extrae y valida el token JWT del header Authorization y devuelve la instancia Usuario.
     Lanza AuthenticationFailed si algo falla.
     """
-    auth = request.headers.get('Authorization', '')
-    token = ''
-    if auth:
-        token = auth.split('Bearer ')[-1] if 'Bearer ' in auth else auth.split(' ')[-1]
-
-    if not token:
-        raise AuthenticationFailed('No se proporcionó token')
-
-    try:
-        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=['HS256'])
-        id_usuario = payload.get('id_usuario')
-        if not id_usuario:
-            raise AuthenticationFailed('Token inválido')
-    except jwt.ExpiredSignatureError:
-        raise AuthenticationFailed('Token expirado')
-    except jwt.InvalidTokenError:
-        raise AuthenticationFailed('Token inválido')
-
-    try:
-        usuario = Usuario.objects.select_related('id_empresa__id_plan', 'id_estado', 'id_permiso_acceso').get(id_usuario=id_usuario)
-        return usuario
-    except Usuario.DoesNotExist:
-        raise AuthenticationFailed('Usuario no encontrado')
+    return resolver_identidad(request).usuario
 
 
 # Serializers para actualización
@@ -1500,6 +1676,8 @@ class PerfilMeView(APIView):
         except IntegrityError:
             return Response({'error': 'No se pudo actualizar usuario. Posible conflicto de datos.'}, status=status.HTTP_400_BAD_REQUEST)
 
+        invalidar_cache_usuario(usuario.id_usuario)
+
         return Response({
             'detail': 'Usuario actualizado correctamente',
             'usuario': {
@@ -1588,6 +1766,8 @@ class EmpresaView(APIView):
         except IntegrityError:
             return Response({'error': 'No se pudo actualizar la empresa. Posible conflicto de datos.'}, status=status.HTTP_400_BAD_REQUEST)
 
+        invalidar_cache_empresa(empresa.id_empresa)
+
         return Response({
             'detail': 'Empresa actualizada correctamente',
             'empresa': {
@@ -1629,6 +1809,7 @@ from rest_framework import status, serializers
 from rest_framework.exceptions import AuthenticationFailed
 
 from .models import Usuario, Empresa, Estado, TipoPlan, PermisoAcceso, Areas
+from .authentication import revocar_tokens_usuario
 
 logger = logging.getLogger(__name__)
 
@@ -1644,29 +1825,7 @@ PLAN_LIMITES = {
 
 
 def _get_usuario_from_token(request):
-    auth = request.headers.get('Authorization', '')
-    token = ''
-    if auth:
-        token = auth.split('Bearer ')[-1] if 'Bearer ' in auth else auth.split(' ')[-1]
-
-    if not token:
-        raise AuthenticationFailed('No se proporcionó token')
-
-    try:
-        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=['HS256'])
-        id_usuario = payload.get('id_usuario')
-        if not id_usuario:
-            raise AuthenticationFailed('Token inválido')
-    except jwt.ExpiredSignatureError:
-        raise AuthenticationFailed('Token expirado')
-    except jwt.InvalidTokenError:
-        raise AuthenticationFailed('Token inválido')
-
-    try:
-        usuario = Usuario.objects.select_related('id_empresa__id_plan', 'id_estado', 'id_permiso_acceso', 'id_area').get(id_usuario=id_usuario)
-        return usuario
-    except Usuario.DoesNotExist:
-        raise AuthenticationFailed('Usuario no encontrado')
+    return resolver_identidad(request).usuario
 
 
 # Serializers
@@ -1877,6 +2036,8 @@ class UsuarioEstadoChangeView(APIView):
 
         usuario_obj.id_estado = nuevo_estado
         usuario_obj.save()
+        # los access tokens llevan id_estado: revocarlos para que la desactivación sea inmediata
+        revocar_tokens_usuario(usuario_obj.id_usuario)
 
         return Response({
             'detail': 'Estado actualizado correctamente',
@@ -1920,6 +2081,7 @@ class UsuarioRolChangeView(APIView):
 
         usuario_obj.id_permiso_acceso = nuevo_rol
         usuario_obj.save()
+        revocar_tokens_usuario(usuario_obj.id_usuario)
 
         return Response({
             'detail': 'Rol actualizado correctamente',
@@ -1947,7 +2109,9 @@ class UsuarioDeleteView(APIView):
         if usuario_obj.id_usuario == usuario_autenticado.id_usuario:
             return Response({'error': 'No puedes eliminar tu propio usuario'}, status=status.HTTP_400_BAD_REQUEST)
 
+        id_objetivo = usuario_obj.id_usuario
         usuario_obj.delete()
+        revocar_tokens_usuario(id_objetivo)
         return Response({'detail': 'Usuario eliminado correctamente'}, status=status.HTTP_204_NO_CONTENT)
 
 
@@ -2057,26 +2221,7 @@ class AsgDashboardBasePerfilView(APIView):
     """
 
     def asgdashboard_get_usuario_from_token(self, request):
-        auth = request.headers.get('Authorization', '')
-        token = auth.split('Bearer ')[-1] if 'Bearer ' in auth else auth.split(' ')[-1] if auth else ''
-        if not token:
-            raise AuthenticationFailed('No se proporcionó token')
-
-        try:
-            payload = jwt.decode(token, settings.SECRET_KEY, algorithms=['HS256'])
-            id_usuario = payload.get('id_usuario')
-            if not id_usuario:
-                raise AuthenticationFailed('Token inválido')
-        except jwt.ExpiredSignatureError:
-            raise AuthenticationFailed('Token expirado')
-        except jwt.InvalidTokenError:
-            raise AuthenticationFailed('Token inválido')
-
-        try:
-            usuario = Usuario.objects.get(id_usuario=id_usuario)
-            return usuario
-        except Usuario.DoesNotExist:
-            raise AuthenticationFailed('Usuario no encontrado')
+        return resolver_identidad(request).usuario
 
 
 class AsgDashboardUsuariosEmpresaView(AsgDashboardBasePerfilView):
@@ -2329,13 +2474,15 @@ from .serializers import DashboardSalesreviewSerializer
 
 class DashboardSalesreviewView(APIView):
     permission_classes = (IsAuthenticated,)
+    renderer_classes = DASHBOARD_RENDERER_CLASSES
 
+    @etag_dataset(DashboardSalesreview)
     def get(self, request):
         usuario = request.user
         if not hasattr(usuario, 'id_usuario'):
             return Response({'error': 'Usuario inválido en request'}, status=status.HTTP_401_UNAUTHORIZED)
         try:
-            queryset = DashboardSalesreview.objects.filter(id_empresa=usuario.id_empresa).order_by('fecha_compra')
+            queryset = DashboardSalesreview.objects.filter(id_empresa_id=usuario.id_empresa_id).order_by('fecha_compra')
         except Exception as exc:
             return Response({'error': 'Error al consultar datos'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
         start = request.query_params.get('start')
@@ -2351,6 +2498,10 @@ class DashboardSalesreviewView(APIView):
                 return Response({'error': 'Formato de fecha "end" inválido. Use YYYY-MM-DD'}, status=status.HTTP_400_BAD_REQUEST)
             queryset = queryset.filter(fecha_compra__lte=date_end)
 
+        # ?stream=1: arreglo JSON por trozos sin armar la lista completa en memoria
+        if streaming_solicitado(request):
+            return respuesta_json_streaming(queryset, DashboardSalesreviewSerializer, context={'usuario': usuario})
+
         serializer = DashboardSalesreviewSerializer(queryset, many=True, context={'usuario': usuario})
         return Response(serializer.data, status=status.HTTP_200_OK)
 
@@ -2372,33 +2523,10 @@ from .serializers import TicketSerializer
 
 class TokenHelperMixin:
     """
-    Mixin con el método para obtener el usuario desde el token (misma lógica que tu ejemplo).
+    Mixin con el método para obtener el usuario desde el token (identidad ya resuelta en el request).
     """
     def _get_usuario_from_token(self, request):
-        auth = request.headers.get('Authorization', '')
-        token = ''
-        if 'Bearer ' in auth:
-            token = auth.split('Bearer ')[-1]
-        elif auth:
-            token = auth.split(' ')[-1]
-        if not token:
-            raise AuthenticationFailed('No se proporcionó token')
-
-        try:
-            payload = jwt.decode(token, settings.SECRET_KEY, algorithms=['HS256'])
-            id_usuario = payload.get('id_usuario')
-            if not id_usuario:
-                raise AuthenticationFailed('Token inválido')
-        except jwt.ExpiredSignatureError:
-            raise AuthenticationFailed('Token expirado')
-        except jwt.InvalidTokenError:
-            raise AuthenticationFailed('Token inválido')
-
-        try:
-            usuario = Usuario.objects.get(id_usuario=id_usuario)
-            return usuario
-        except Usuario.DoesNotExist:
-            raise AuthenticationFailed('Usuario no encontrado')
+        return resolver_identidad(request).usuario
 
 class TicketListCreateView(TokenHelperMixin, APIView):
     """
@@ -2486,17 +2614,10 @@ class HerramientasUsuarioView(APIView):
     sin información del usuario.
     """
     def get(self, request):
-        token = request.headers.get('Authorization', '').split(' ')[-1]
-        if not token:
-            return Response({'error': 'Token no proporcionado'}, status=status.HTTP_401_UNAUTHORIZED)
-
         try:
-            payload = jwt.decode(token, settings.SECRET_KEY, algorithms=['HS256'])
-            id_usuario = payload.get('id_usuario')
-        except jwt.ExpiredSignatureError:
-            return Response({'error': 'Token expirado'}, status=status.HTTP_401_UNAUTHORIZED)
-        except jwt.InvalidTokenError:
-            return Response({'error': 'Token inválido'}, status=status.HTTP_401_UNAUTHORIZED)
+            id_usuario = resolver_identidad(request).id_usuario
+        except AuthenticationFailed as e:
+            return respuesta_error_token(e, {SIN_TOKEN: 'Token no proporcionado'})
 
         # traemos los detalles vinculados al usuario (evita N+1)
         detalles = DetalleProductoHerramientas.objects.select_related(
@@ -2557,26 +2678,7 @@ class DashboardSalesreviewListCreate(APIView):
     """
 
     def _get_usuario_from_token(self, request):
-        auth = request.headers.get('Authorization', '')
-        token = auth.split('Bearer ')[-1] if 'Bearer ' in auth else auth.split(' ')[-1] if auth else ''
-        if not token:
-            raise AuthenticationFailed('No se proporcionó token')
-
-        try:
-            payload = jwt.decode(token, settings.SECRET_KEY, algorithms=['HS256'])
-            id_usuario = payload.get('id_usuario')
-            if not id_usuario:
-                raise AuthenticationFailed('Token inválido')
-        except jwt.ExpiredSignatureError:
-            raise AuthenticationFailed('Token expirado')
-        except jwt.InvalidTokenError:
-            raise AuthenticationFailed('Token inválido')
-
-        try:
-            usuario = Usuario.objects.select_related('id_empresa').get(id_usuario=id_usuario)
-            return usuario
-        except Usuario.DoesNotExist:
-            raise AuthenticationFailed('Usuario no encontrado')
+        return resolver_identidad(request).usuario
 
     def _apply_filters(self, qs, request):
         """
@@ -2652,26 +2754,7 @@ class DashboardSalesreviewDetail(APIView):
     """
 
     def _get_usuario_from_token(self, request):
-        auth = request.headers.get('Authorization', '')
-        token = auth.split('Bearer ')[-1] if 'Bearer ' in auth else auth.split(' ')[-1] if auth else ''
-        if not token:
-            raise AuthenticationFailed('No se proporcionó token')
-
-        try:
-            payload = jwt.decode(token, settings.SECRET_KEY, algorithms=['HS256'])
-            id_usuario = payload.get('id_usuario')
-            if not id_usuario:
-                raise AuthenticationFailed('Token inválido')
-        except jwt.ExpiredSignatureError:
-            raise AuthenticationFailed('Token expirado')
-        except jwt.InvalidTokenError:
-            raise AuthenticationFailed('Token inválido')
-
-        try:
-            usuario = Usuario.objects.select_related('id_empresa').get(id_usuario=id_usuario)
-            return usuario
-        except Usuario.DoesNotExist:
-            raise AuthenticationFailed('Usuario no encontrado')
+        return resolver_identidad(request).usuario
 
     def get(self, request, pk):
         try:
@@ -2733,7 +2816,7 @@ class DashboardSalesreviewDetail(APIView):
         if obj.id_empresa != empresa:
             return Response({'error': 'No autorizado para eliminar este registro'}, status=status.HTTP_403_FORBIDDEN)
 
-        obj.delete()
+        borrar_y_marcar(obj)
         return Response(status=status.HTTP_204_NO_CONTENT)
 
 
@@ -2750,26 +2833,7 @@ class DashboardSalesreviewBulkDelete(APIView):
     """
 
     def _get_usuario_from_token(self, request):
-        auth = request.headers.get('Authorization', '')
-        token = auth.split('Bearer ')[-1] if 'Bearer ' in auth else auth.split(' ')[-1] if auth else ''
-        if not token:
-            raise AuthenticationFailed('No se proporcionó token')
-
-        try:
-            payload = jwt.decode(token, settings.SECRET_KEY, algorithms=['HS256'])
-            id_usuario = payload.get('id_usuario')
-            if not id_usuario:
-                raise AuthenticationFailed('Token inválido')
-        except jwt.ExpiredSignatureError:
-            raise AuthenticationFailed('Token expirado')
-        except jwt.InvalidTokenError:
-            raise AuthenticationFailed('Token inválido')
-
-        try:
-            usuario = Usuario.objects.select_related('id_empresa').get(id_usuario=id_usuario)
-            return usuario
-        except Usuario.DoesNotExist:
-            raise AuthenticationFailed('Usuario no encontrado')
+        return resolver_identidad(request).usuario
 
     def post(self, request):
         try:
@@ -2820,17 +2884,26 @@ class DashboardSalesreviewBulkDelete(APIView):
         if count == 0:
             return Response({'deleted': 0, 'detail': 'No se encontraron registros para eliminar'}, status=status.HTTP_200_OK)
 
-        qs.delete()
+        borrar_y_marcar(qs)
         return Response({'deleted': count}, status=status.HTTP_200_OK)
 
 
-from io import BytesIO
-from openpyxl import Workbook
-from openpyxl.utils import get_column_letter
+from .exportacion import exportar
+
+# columnas de DashboardSalesreviewSerializer ('id' es alias de id_registro)
+SALESREVIEW_COLUMNAS_EXPORT = [
+    (campo, 'id_registro' if campo == 'id' else campo)
+    for campo in (
+        'id_registro', 'id', 'mes', 'mes_numero', 'semana', 'dia_compra', 'fecha_compra', 'fecha_envio',
+        'numero_pedido', 'numero_oc', 'estado', 'linea', 'fuente', 'sku_enviado', 'categoria', 'producto',
+        'precio_unidad_antes_iva', 'unidades', 'ingresos_antes_iva',
+    )
+]
 
 class DashboardSalesreviewExport(APIView):
     """
-    GET: Exporta los registros filtrados de la empresa del usuario como un archivo Excel (.xlsx).
+    GET: Exporta los registros filtrados de la empresa del usuario como un archivo Excel (.xlsx),
+    o CSV en streaming con ?file=csv.
     Soporta los mismos filtros que DashboardSalesreviewListCreate:
     - mes
     - mes_numero
@@ -2839,26 +2912,7 @@ class DashboardSalesreviewExport(APIView):
     """
 
     def _get_usuario_from_token(self, request):
-        auth = request.headers.get('Authorization', '')
-        token = auth.split('Bearer ')[-1] if 'Bearer ' in auth else auth.split(' ')[-1] if auth else ''
-        if not token:
-            raise AuthenticationFailed('No se proporcionó token')
-
-        try:
-            payload = jwt.decode(token, settings.SECRET_KEY, algorithms=['HS256'])
-            id_usuario = payload.get('id_usuario')
-            if not id_usuario:
-                raise AuthenticationFailed('Token inválido')
-        except jwt.ExpiredSignatureError:
-            raise AuthenticationFailed('Token expirado')
-        except jwt.InvalidTokenError:
-            raise AuthenticationFailed('Token inválido')
-
-        try:
-            usuario = Usuario.objects.select_related('id_empresa').get(id_usuario=id_usuario)
-            return usuario
-        except Usuario.DoesNotExist:
-            raise AuthenticationFailed('Usuario no encontrado')
+        return resolver_identidad(request).usuario
 
     def _apply_filters(self, qs, request):
         """
@@ -2906,73 +2960,12 @@ class DashboardSalesreviewExport(APIView):
         qs = DashboardSalesreview.objects.filter(id_empresa=empresa)
         qs = self._apply_filters(qs, request)
 
-        # serializar
-        serializer = DashboardSalesreviewSerializer(qs, many=True)
-        data = serializer.data  # lista de OrderedDicts
-
-        # Preparar workbook con openpyxl
-        wb = Workbook()
-        ws = wb.active
-        ws.title = "DashboardSalesReview"
-
-        # Determinar headers: si no hay registros usar fields del serializer
-        if data and len(data) > 0:
-            headers = list(data[0].keys())
-        else:
-            # si no hay datos, tomamos los campos definidos en el serializer Meta
-            try:
-                headers = list(DashboardSalesreviewSerializer.Meta.fields)
-            except Exception:
-                headers = [
-                    'id_registro','id','mes','mes_numero','semana','dia_compra','fecha_compra','fecha_envio',
-                    'numero_pedido','numero_oc','estado','linea','fuente','sku_enviado','categoria','producto',
-                    'precio_unidad_antes_iva','unidades','ingresos_antes_iva'
-                ]
-
-        # escribir headers
-        for col_idx, h in enumerate(headers, start=1):
-            cell = ws.cell(row=1, column=col_idx, value=h)
-
-        # escribir filas
-        for row_idx, row in enumerate(data, start=2):
-            for col_idx, h in enumerate(headers, start=1):
-                val = row.get(h, None)
-                # normalizar tipos: las fechas serializadas ya vienen como strings (YYYY-MM-DD) desde el serializer
-                ws.cell(row=row_idx, column=col_idx, value=val)
-
-        # opcional: autoajustar anchos de columna (básico)
-        for i, _ in enumerate(headers, start=1):
-            col = get_column_letter(i)
-            max_length = 0
-            for cell in ws[col]:
-                try:
-                    if cell.value:
-                        s = str(cell.value)
-                        if len(s) > max_length:
-                            max_length = len(s)
-                except Exception:
-                    pass
-            adjusted_width = min(max_length + 2, 60)
-            ws.column_dimensions[col].width = adjusted_width
-
-        # guardar en memoria
-        output = BytesIO()
-        wb.save(output)
-        output.seek(0)
-
         # nombre de archivo (incluye id_empresa o pk)
         empresa_id = getattr(empresa, 'id_empresa', None) or getattr(empresa, 'pk', None) or 'empresa'
         today = datetime.now().strftime('%Y%m%d_%H%M%S')
-        filename = f"dashboard_salesreview_{empresa_id}_{today}.xlsx"
+        filename = f"dashboard_salesreview_{empresa_id}_{today}"
 
-        # respuesta HttpResponse con attachment
-        from django.http import HttpResponse
-        response = HttpResponse(
-            output.read(),
-            content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
-        )
-        response['Content-Disposition'] = f'attachment; filename="{filename}"'
-        return response
+        return exportar(request, qs, SALESREVIEW_COLUMNAS_EXPORT, filename, hoja="DashboardSalesReview", empresa_dataset=empresa.pk)
     
 
 
@@ -3119,12 +3112,9 @@ class OdooSales2025View(APIView):
         if not auth_header or auth_header[0].lower() != b'bearer':
             return Response({'error': 'Token no enviado'}, status=status.HTTP_401_UNAUTHORIZED)
         try:
-            token = auth_header[1].decode('utf-8')
-            jwt.decode(token, settings.SECRET_KEY, algorithms=['HS256'])
-        except jwt.ExpiredSignatureError:
-            return Response({'error': 'Token expirado'}, status=status.HTTP_401_UNAUTHORIZED)
-        except jwt.InvalidTokenError:
-            return Response({'error': 'Token inválido'}, status=status.HTTP_401_UNAUTHORIZED)
+            resolver_identidad(request)
+        except AuthenticationFailed as e:
+            return Response({'error': str(e)}, status=status.HTTP_401_UNAUTHORIZED)
         except Exception as e:
             return Response({'error': f'Error validando token: {str(e)}'}, status=status.HTTP_401_UNAUTHORIZED)
 
@@ -3437,24 +3427,7 @@ from .serializers import DashboardSalesCorporativoSerializerProd15
 
 # Funcion comun para obtener usuario desde token (nombre con prod15 para evitar colisiones)
 def get_usuario_from_token_prod15(request):
-    auth = request.headers.get('Authorization', '')
-    token = auth.split('Bearer ')[-1] if 'Bearer ' in auth else auth.split(' ')[-1] if auth else ''
-    if not token:
-        raise AuthenticationFailed('No se proporciono token')
-    try:
-        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=['HS256'])
-        id_usuario = payload.get('id_usuario')
-        if not id_usuario:
-            raise AuthenticationFailed('Token invalido')
-    except jwt.ExpiredSignatureError:
-        raise AuthenticationFailed('Token expirado')
-    except jwt.InvalidTokenError:
-        raise AuthenticationFailed('Token invalido')
-    try:
-        usuario = Usuario.objects.select_related('id_empresa').get(id_usuario=id_usuario)
-        return usuario
-    except Usuario.DoesNotExist:
-        raise AuthenticationFailed('Usuario no encontrado')
+    return resolver_identidad(request).usuario
 
 class DashboardSalesCorporativoListCreateProd15(APIView):
     """
@@ -3587,7 +3560,7 @@ class DashboardSalesCorporativoDetailProd15(APIView):
         if obj.id_empresa != empresa:
             return Response({'error': 'No autorizado para eliminar este registro'}, status=status.HTTP_403_FORBIDDEN)
 
-        obj.delete()
+        borrar_y_marcar(obj)
         return Response(status=status.HTTP_204_NO_CONTENT)
 
 """ODOO_URL
@@ -3639,17 +3612,24 @@ class DashboardSalesCorporativoBulkDeleteProd15(APIView):
         if count == 0:
             return Response({'deleted': 0, 'detail': 'No se encontraron registros para eliminar'}, status=status.HTTP_200_OK)
 
-        qs.delete()
+        borrar_y_marcar(qs)
         return Response({'deleted': count}, status=status.HTTP_200_OK)
 
 
-from io import BytesIO
-from openpyxl import Workbook
-from openpyxl.utils import get_column_letter
+from .exportacion import exportar
+
+# columnas de DashboardSalesCorporativoSerializerProd15 ('id' es alias de id_registro)
+SALESCORPORATIVO_COLUMNAS_EXPORT = [
+    (campo, 'id_registro' if campo == 'id' else campo)
+    for campo in (
+        'id_registro', 'id', 'orden_compra', 'fecha', 'mes_nombre', 'categoria_cliente', 'nombre_cliente',
+        'categoria_producto', 'marca', 'producto', 'estado_cotizacion', 'unidades', 'precio_unitario', 'observaciones',
+    )
+]
 
 class DashboardSalesCorporativoExportProd15(APIView):
     """
-    GET: exporta registros filtrados de la empresa del usuario a xlsx.
+    GET: exporta registros filtrados de la empresa del usuario a xlsx (?file=csv: CSV en streaming).
     Soporta filtros: mes_nombre, nombre_cliente, marca, fecha_from, fecha_to
     """
 
@@ -3694,61 +3674,11 @@ class DashboardSalesCorporativoExportProd15(APIView):
         qs = DashboardSalesCorporativo.objects.filter(id_empresa=empresa)
         qs = self._apply_filters_export_prod15(qs, request)
 
-        serializer = DashboardSalesCorporativoSerializerProd15(qs, many=True)
-        data = serializer.data
-
-        wb = Workbook()
-        ws = wb.active
-        ws.title = "DashboardSalesCorporativo"
-
-        if data and len(data) > 0:
-            headers = list(data[0].keys())
-        else:
-            try:
-                headers = list(DashboardSalesCorporativoSerializerProd15.Meta.fields)
-            except Exception:
-                headers = [
-                    'id_registro','id','orden_compra','fecha','mes_nombre','categoria_cliente','nombre_cliente',
-                    'categoria_producto','marca','producto','estado_cotizacion','unidades','precio_unitario','observaciones'
-                ]
-
-        for col_idx, h in enumerate(headers, start=1):
-            ws.cell(row=1, column=col_idx, value=h)
-
-        for row_idx, row in enumerate(data, start=2):
-            for col_idx, h in enumerate(headers, start=1):
-                val = row.get(h, None)
-                ws.cell(row=row_idx, column=col_idx, value=val)
-
-        for i, _ in enumerate(headers, start=1):
-            col = get_column_letter(i)
-            max_length = 0
-            for cell in ws[col]:
-                try:
-                    if cell.value:
-                        s = str(cell.value)
-                        if len(s) > max_length:
-                            max_length = len(s)
-                except Exception:
-                    pass
-            adjusted_width = min(max_length + 2, 60)
-            ws.column_dimensions[col].width = adjusted_width
-
-        output = BytesIO()
-        wb.save(output)
-        output.seek(0)
-
         empresa_id = getattr(empresa, 'id_empresa', None) or getattr(empresa, 'pk', None) or 'empresa'
         today = datetime.now().strftime('%Y%m%d_%H%M%S')
-        filename = f"dashboard_salescorporativo_{empresa_id}_{today}.xlsx"
+        filename = f"dashboard_salescorporativo_{empresa_id}_{today}"
 
-        from django.http import HttpResponse
-        response = HttpResponse(
-            output.read(),
-            content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
-        )
-        response['Content-Disposition'] = f'attachment; filename=\"{filename}\"'
-        return response
+        return exportar(request, qs, SALESCORPORATIVO_COLUMNAS_EXPORT, filename, hoja="DashboardSalesCorporativo", empresa_dataset=empresa.pk)
 
 
 
@@ -3762,9 +3692,7 @@ from rest_framework import status
 from rest_framework.exceptions import AuthenticationFailed
 from django.shortcuts import get_object_or_404
 from datetime import datetime
-from io import BytesIO
-from openpyxl import Workbook
-from openpyxl.utils import get_column_letter
+from .exportacion import exportar
 
 from .models import DashboardSalesCorporativoMetas, Usuario
 from .serializers import DashboardSalesCorporativoMetasProduct15Serializer
@@ -3776,24 +3704,7 @@ class DashboardSalesCorporativoMetasProduct15_ListCreate(APIView):
     """
 
     def _get_usuario_from_token(self, request):
-        auth = request.headers.get('Authorization', '')
-        token = auth.split('Bearer ')[-1] if 'Bearer ' in auth else (auth.split(' ')[-1] if auth else '')
-        if not token:
-            raise AuthenticationFailed('No se proporciono token')
-        try:
-            payload = jwt.decode(token, settings.SECRET_KEY, algorithms=['HS256'])
-            id_usuario = payload.get('id_usuario')
-            if not id_usuario:
-                raise AuthenticationFailed('Token invalido')
-        except jwt.ExpiredSignatureError:
-            raise AuthenticationFailed('Token expirado')
-        except jwt.InvalidTokenError:
-            raise AuthenticationFailed('Token invalido')
-        try:
-            usuario = Usuario.objects.select_related('id_empresa').get(id_usuario=id_usuario)
-            return usuario
-        except Usuario.DoesNotExist:
-            raise AuthenticationFailed('Usuario no encontrado')
+        return resolver_identidad(request).usuario
 
     def _apply_filters(self, qs, request):
         q = qs
@@ -3856,24 +3767,7 @@ class DashboardSalesCorporativoMetasProduct15_Detail(APIView):
     """
 
     def _get_usuario_from_token(self, request):
-        auth = request.headers.get('Authorization', '')
-        token = auth.split('Bearer ')[-1] if 'Bearer ' in auth else (auth.split(' ')[-1] if auth else '')
-        if not token:
-            raise AuthenticationFailed('No se proporciono token')
-        try:
-            payload = jwt.decode(token, settings.SECRET_KEY, algorithms=['HS256'])
-            id_usuario = payload.get('id_usuario')
-            if not id_usuario:
-                raise AuthenticationFailed('Token invalido')
-        except jwt.ExpiredSignatureError:
-            raise AuthenticationFailed('Token expirado')
-        except jwt.InvalidTokenError:
-            raise AuthenticationFailed('Token invalido')
-        try:
-            usuario = Usuario.objects.select_related('id_empresa').get(id_usuario=id_usuario)
-            return usuario
-        except Usuario.DoesNotExist:
-            raise AuthenticationFailed('Usuario no encontrado')
+        return resolver_identidad(request).usuario
 
     def get(self, request, pk):
         try:
@@ -3930,7 +3824,7 @@ class DashboardSalesCorporativoMetasProduct15_Detail(APIView):
         obj = get_object_or_404(DashboardSalesCorporativoMetas, pk=pk)
         if obj.id_empresa != empresa:
             return Response({'error': 'No autorizado para eliminar este registro'}, status=status.HTTP_403_FORBIDDEN)
-        obj.delete()
+        borrar_y_marcar(obj)
         return Response(status=status.HTTP_204_NO_CONTENT)
 
 
@@ -3941,24 +3835,7 @@ class DashboardSalesCorporativoMetasProduct15_BulkDelete(APIView):
     Responde: {'deleted': <cantidad>}
     """
     def _get_usuario_from_token(self, request):
-        auth = request.headers.get('Authorization', '')
-        token = auth.split('Bearer ')[-1] if 'Bearer ' in auth else (auth.split(' ')[-1] if auth else '')
-        if not token:
-            raise AuthenticationFailed('No se proporciono token')
-        try:
-            payload = jwt.decode(token, settings.SECRET_KEY, algorithms=['HS256'])
-            id_usuario = payload.get('id_usuario')
-            if not id_usuario:
-                raise AuthenticationFailed('Token invalido')
-        except jwt.ExpiredSignatureError:
-            raise AuthenticationFailed('Token expirado')
-        except jwt.InvalidTokenError:
-            raise AuthenticationFailed('Token invalido')
-        try:
-            usuario = Usuario.objects.select_related('id_empresa').get(id_usuario=id_usuario)
-            return usuario
-        except Usuario.DoesNotExist:
-            raise AuthenticationFailed('Usuario no encontrado')
+        return resolver_identidad(request).usuario
 
     def post(self, request):
         try:
@@ -3996,35 +3873,27 @@ class DashboardSalesCorporativoMetasProduct15_BulkDelete(APIView):
         count = qs.count()
         if count == 0:
             return Response({'deleted': 0, 'detail': 'No se encontraron registros para eliminar'}, status=status.HTTP_200_OK)
-        qs.delete()
+        borrar_y_marcar(qs)
         return Response({'deleted': count}, status=status.HTTP_200_OK)
 
 
+# columnas de DashboardSalesCorporativoMetasProduct15Serializer ('id' es alias de id_registro)
+SALESCORPORATIVO_METAS_COLUMNAS_EXPORT = [
+    (campo, 'id_registro' if campo == 'id' else campo)
+    for campo in (
+        'id_registro', 'id', 'id_empresa', 'id_producto', 'ano', 'mes', 'categoria_cliente', 'nombre_cliente',
+        'categoria_producto', 'meta',
+    )
+]
+
 class DashboardSalesCorporativoMetasProduct15_Export(APIView):
     """
-    GET: Exporta los registros filtrados de la empresa del usuario como .xlsx
+    GET: Exporta los registros filtrados de la empresa del usuario como .xlsx (?file=csv: CSV en streaming)
     Soporta filtros: ano, mes, categoria_cliente, nombre_cliente, categoria_producto
     """
 
     def _get_usuario_from_token(self, request):
-        auth = request.headers.get('Authorization', '')
-        token = auth.split('Bearer ')[-1] if 'Bearer ' in auth else (auth.split(' ')[-1] if auth else '')
-        if not token:
-            raise AuthenticationFailed('No se proporciono token')
-        try:
-            payload = jwt.decode(token, settings.SECRET_KEY, algorithms=['HS256'])
-            id_usuario = payload.get('id_usuario')
-            if not id_usuario:
-                raise AuthenticationFailed('Token invalido')
-        except jwt.ExpiredSignatureError:
-            raise AuthenticationFailed('Token expirado')
-        except jwt.InvalidTokenError:
-            raise AuthenticationFailed('Token invalido')
-        try:
-            usuario = Usuario.objects.select_related('id_empresa').get(id_usuario=id_usuario)
-            return usuario
-        except Usuario.DoesNotExist:
-            raise AuthenticationFailed('Usuario no encontrado')
+        return resolver_identidad(request).usuario
 
     def _apply_filters(self, qs, request):
         q = qs
@@ -4061,54 +3930,12 @@ class DashboardSalesCorporativoMetasProduct15_Export(APIView):
 
         qs = DashboardSalesCorporativoMetas.objects.filter(id_empresa=empresa)
         qs = self._apply_filters(qs, request)
-        serializer = DashboardSalesCorporativoMetasProduct15Serializer(qs, many=True)
-        data = serializer.data
-
-        wb = Workbook()
-        ws = wb.active
-        ws.title = "DashboardSalesCorporativoMetas"
-
-        if data and len(data) > 0:
-            headers = list(data[0].keys())
-        else:
-            headers = list(DashboardSalesCorporativoMetasProduct15Serializer.Meta.fields)
-
-        for col_idx, h in enumerate(headers, start=1):
-            ws.cell(row=1, column=col_idx, value=h)
-
-        for row_idx, row in enumerate(data, start=2):
-            for col_idx, h in enumerate(headers, start=1):
-                val = row.get(h, None)
-                ws.cell(row=row_idx, column=col_idx, value=val)
-
-        for i, _ in enumerate(headers, start=1):
-            col = get_column_letter(i)
-            max_length = 0
-            for cell in ws[col]:
-                try:
-                    if cell.value:
-                        s = str(cell.value)
-                        if len(s) > max_length:
-                            max_length = len(s)
-                except Exception:
-                    pass
-            ws.column_dimensions[col].width = min(max_length + 2, 60)
-
-        output = BytesIO()
-        wb.save(output)
-        output.seek(0)
 
         empresa_id = getattr(empresa, 'id_empresa', None) or getattr(empresa, 'pk', None) or 'empresa'
         today = datetime.now().strftime('%Y%m%d_%H%M%S')
-        filename = f"dashboard_salescorporativometas_{empresa_id}_{today}.xlsx"
+        filename = f"dashboard_salescorporativometas_{empresa_id}_{today}"
 
-        from django.http import HttpResponse
-        response = HttpResponse(
-            output.read(),
-            content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
-        )
-        response['Content-Disposition'] = f'attachment; filename=\"{filename}\"'
-        return response
+        return exportar(request, qs, SALESCORPORATIVO_METAS_COLUMNAS_EXPORT, filename, hoja="DashboardSalesCorporativoMetas", empresa_dataset=empresa.pk)
 
 
 
@@ -4129,6 +3956,8 @@ class DashboardIspVentas_List(APIView):
     API para obtener los registros de Dashboard ISP Ventas
     Permite filtrar por empresa, año, mes, cliente, plan, etc.
     """
+    renderer_classes = DASHBOARD_RENDERER_CLASSES
+
     def get(self, request):
         queryset = DashboardIspVentas.objects.all()
 
@@ -4156,6 +3985,14 @@ class DashboardIspVentas_List(APIView):
         if estado_suscripcion:
             queryset = queryset.filter(estado_suscripcion__iexact=estado_suscripcion)
 
+        paginado = paginar_keyset(request, queryset, 'fecha_registro', lambda filas: DashboardIspVentasSerializer(filas, many=True).data)
+        if paginado is not None:
+            return paginado
+
+        # ?stream=1: arreglo JSON por trozos sin armar la lista completa en memoria
+        if streaming_solicitado(request):
+            return respuesta_json_streaming(queryset, DashboardIspVentasSerializer)
+
         serializer = DashboardIspVentasSerializer(queryset, many=True)
         return Response(serializer.data, status=status.HTTP_200_OK)
 
@@ -4321,25 +4158,11 @@ class ChatbotAPIView(APIView):
         if not auth_header or auth_header[0].lower() != b'bearer':
             return Response({'error': 'Token no enviado'}, status=status.HTTP_401_UNAUTHORIZED)
 
+        # Usuario y empresa (identidad resuelta una sola vez por petición)
         try:
-            token = auth_header[1].decode('utf-8')
-            payload = jwt.decode(token, settings.SECRET_KEY, algorithms=['HS256'])
-        except jwt.ExpiredSignatureError:
-            return Response({'error': 'Token expirado'}, status=status.HTTP_401_UNAUTHORIZED)
-        except jwt.DecodeError:
-            return Response({'error': 'Token inválido'}, status=status.HTTP_401_UNAUTHORIZED)
-        except Exception as e:
-            return Response({'error': 'Error validando token', 'detail': str(e)}, status=status.HTTP_401_UNAUTHORIZED)
-
-        id_usuario = payload.get('id_usuario')
-        if not id_usuario:
-            return Response({'error': 'Token no contiene id_usuario'}, status=status.HTTP_401_UNAUTHORIZED)
-
-        # Obtener usuario y su empresa
-        try:
-            usuario = Usuario.objects.select_related('id_empresa').get(id_usuario=id_usuario)
-        except Usuario.DoesNotExist:
-            return Response({'error': 'Usuario no encontrado'}, status=status.HTTP_401_UNAUTHORIZED)
+            usuario = resolver_identidad(request).usuario
+        except AuthenticationFailed as e:
+            return Response({'error': str(e)}, status=status.HTTP_401_UNAUTHORIZED)
         except Exception as e:
             return Response({'error': 'Error buscando usuario', 'detail': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
@@ -4511,17 +4334,20 @@ class DashboardChurnRateView(APIView):
       - tipo   : filtrar por tipo_plan (ej. basico, estandar, premium)
     """
     permission_classes = (IsAuthenticated,)
+    renderer_classes = DASHBOARD_RENDERER_CLASSES
 
+    @etag_dataset(DashboardChurnRate)
+    @cache_respuesta(DashboardChurnRate)
     def get(self, request):
         usuario = request.user
 
         # Verificamos que el user tenga id_empresa (sigue tu convención de usuario)
-        if not hasattr(usuario, 'id_empresa') or usuario.id_empresa is None:
+        if getattr(usuario, 'id_empresa_id', None) is None:
             return Response({'error': 'Usuario inválido en request o sin id_empresa.'},
                             status=status.HTTP_401_UNAUTHORIZED)
 
-        # Filtrado base por la empresa del usuario
-        queryset = DashboardChurnRate.objects.filter(id_empresa=usuario.id_empresa).order_by('-fecha_ultima_transaccion')
+        # Filtrado base por la empresa del usuario (claim del token, sin consultar Usuario)
+        queryset = DashboardChurnRate.objects.filter(id_empresa_id=usuario.id_empresa_id).order_by('-fecha_ultima_transaccion')
 
         # Filtros opcionales por query params
         start = request.query_params.get('start')
@@ -4543,6 +4369,19 @@ class DashboardChurnRateView(APIView):
         if tipo:
             queryset = queryset.filter(tipo_plan=tipo)
 
+        # opt-in: página keyset descendente sobre (fecha_ultima_transaccion, pk)
+        paginado = paginar_keyset(
+            request, queryset, 'fecha_ultima_transaccion',
+            lambda filas: DashboardChurnRateSerializer(filas, many=True, context={'usuario': usuario}).data,
+            descending=True,
+        )
+        if paginado is not None:
+            return paginado
+
+        # ?stream=1: arreglo JSON por trozos sin armar la lista completa en memoria
+        if streaming_solicitado(request):
+            return respuesta_json_streaming(queryset, DashboardChurnRateSerializer, context={'usuario': usuario})
+
         serializer = DashboardChurnRateSerializer(queryset, many=True, context={'usuario': usuario})
         return Response(serializer.data, status=status.HTTP_200_OK)
 
@@ -4577,6 +4416,8 @@ class DashboardARPUListView(APIView):
     Parametros opcionales: start (YYYY-MM-DD), end (YYYY-MM-DD), producto (id), empresa (id)
     """
 
+    renderer_classes = DASHBOARD_RENDERER_CLASSES
+
     def get(self, request):
         qs = DashboardARPU.objects.all().order_by('periodo_mes')
 
@@ -4600,6 +4441,14 @@ class DashboardARPUListView(APIView):
             except Exception:
                 return Response({'error': 'end no es una fecha valida (YYYY-MM-DD)'}, status=status.HTTP_400_BAD_REQUEST)
 
+        paginado = paginar_keyset(request, qs, 'periodo_mes', lambda filas: DashboardARPUSerializer(filas, many=True).data)
+        if paginado is not None:
+            return paginado
+
+        # ?stream=1: arreglo JSON por trozos sin armar la lista completa en memoria
+        if streaming_solicitado(request):
+            return respuesta_json_streaming(qs, DashboardARPUSerializer)
+
         serializer = DashboardARPUSerializer(qs, many=True)
         return Response(serializer.data, status=status.HTTP_200_OK)
 
@@ -5078,22 +4927,14 @@ def _extract_token_from_header(request):
         return None
     return auth_header.split(" ", 1)[1].strip()
 
-def _validate_and_get_usuario(token):
-    try:
-        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[LOGIN_TOKEN_ALGORITHM])
-    except jwt.ExpiredSignatureError:
-        raise ValueError("Token expirado")
-    except jwt.InvalidTokenError:
-        raise ValueError("Token inválido")
-
-    id_usuario = payload.get("id_usuario")
-    if not id_usuario:
-        raise ValueError("Token sin id_usuario")
-
+def _validate_and_get_usuario(token, request):
+    # la identidad ya resuelta en el request evita volver a decodificar el token
     try:
-        usuario = Usuario.objects.select_related("id_empresa", "id_estado").get(id_usuario=id_usuario)
-    except Usuario.DoesNotExist:
-        raise ValueError("Usuario no encontrado")
+        usuario = resolver_identidad(request, token=token).usuario
+    except AuthenticationFailed as e:
+        if codigo_error(e) == CLAIMS_INCOMPLETOS:
+            raise ValueError("Token sin id_usuario")
+        raise ValueError(str(e.detail))
 
     try:
         estado_id = usuario.id_estado.id_estado
@@ -5118,7 +4959,7 @@ class DashboardContextListAPIView(APIView):
                 return Response({"detail": "Authorization header missing or malformed"}, status=status.HTTP_401_UNAUTHORIZED)
 
             try:
-                usuario = _validate_and_get_usuario(token)
+                usuario = _validate_and_get_usuario(token, request)
             except ValueError as ve:
                 return Response({"detail": str(ve)}, status=status.HTTP_401_UNAUTHORIZED)
             except PermissionError as pe:
@@ -5153,7 +4994,7 @@ class ChatWebhookProxyAPIView(APIView):
                 return Response({"detail": "Authorization header missing or malformed"}, status=status.HTTP_401_UNAUTHORIZED)
 
             try:
-                usuario = _validate_and_get_usuario(token)
+                usuario = _validate_and_get_usuario(token, request)
             except ValueError as ve:
                 return Response({"detail": str(ve)}, status=status.HTTP_401_UNAUTHORIZED)
             except PermissionError as pe:
@@ -5483,30 +5324,21 @@ from .serializers import (
 
 def _get_company_id_from_token(request):
     """
-    Decodifica el JWT (header Bearer ...) y retorna el company_id (int) y posible Response de error.
+    Retorna el company_id (int) de la identidad ya resuelta en el request y posible Response de error.
     - Primero busca company id en el payload (company_id, id_empresa, empresa_id).
-    - Si no existe, busca id_usuario en el payload y consulta Usuario.id_empresa.
+    - Si no existe, usa Usuario.id_empresa del usuario resuelto (sin consultas extra).
     Retorna (company_id_int, None) o (None, Response(error...))
     """
-    auth_header = get_authorization_header(request).split()
-    if not auth_header or auth_header[0].lower() != b'bearer':
-        return None, Response({'error': 'Token no enviado'}, status=status.HTTP_401_UNAUTHORIZED)
-
-    try:
-        token = auth_header[1].decode('utf-8')
-    except Exception:
-        return None, Response({'error': 'Formato de token inválido'}, status=status.HTTP_401_UNAUTHORIZED)
-
     try:
-        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=['HS256'])
-    except jwt.ExpiredSignatureError:
-        return None, Response({'error': 'Token expirado'}, status=status.HTTP_401_UNAUTHORIZED)
-    except jwt.DecodeError:
-        return None, Response({'error': 'Token inválido'}, status=status.HTTP_401_UNAUTHORIZED)
-    except Exception:
-        return None, Response({'error': 'Error decodificando token'}, status=status.HTTP_401_UNAUTHORIZED)
+        identidad = resolver_identidad(request)
+    except AuthenticationFailed as e:
+        return None, respuesta_error_token(e, {
+            SIN_TOKEN: 'Token no enviado',
+            USUARIO_NO_ENCONTRADO: 'Usuario del token no existe',
+        })
 
     # 1) Intentar obtener company id directamente del payload
+    payload = identidad.payload
     company_id = payload.get('company_id') or payload.get('id_empresa') or payload.get('empresa_id')
     if company_id is not None:
         try:
@@ -5514,29 +5346,12 @@ def _get_company_id_from_token(request):
         except (TypeError, ValueError):
             return None, Response({'error': 'company_id inválido en token'}, status=status.HTTP_401_UNAUTHORIZED)
 
-    # 2) Fallback: obtener id_usuario del payload y consultar Usuario -> id_empresa
-    user_id = payload.get('id_usuario') or payload.get('user_id') or payload.get('id')
-    if user_id is None:
-        return None, Response({'error': 'Token no contiene company_id ni id_usuario'}, status=status.HTTP_401_UNAUTHORIZED)
-
-    try:
-        user_id = int(user_id)
-    except (TypeError, ValueError):
-        return None, Response({'error': 'id_usuario inválido en token'}, status=status.HTTP_401_UNAUTHORIZED)
-
-    try:
-        usuario = Usuario.objects.select_related('id_empresa').get(pk=user_id)
-    except Usuario.DoesNotExist:
-        return None, Response({'error': 'Usuario del token no existe'}, status=status.HTTP_401_UNAUTHORIZED)
-    except Exception:
-        return None, Response({'error': 'Error consultando usuario'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
-
-    empresa = getattr(usuario, 'id_empresa', None)
-    if not empresa:
+    # 2) Fallback: empresa del usuario resuelto
+    if identidad.id_empresa is None:
         return None, Response({'error': 'Usuario no tiene empresa asignada'}, status=status.HTTP_401_UNAUTHORIZED)
 
     try:
-        return int(empresa.id_empresa), None
+        return int(identidad.id_empresa), None
     except Exception:
         return None, Response({'error': 'Id de empresa inválido'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
@@ -5549,6 +5364,7 @@ class TiendaListCreateView(APIView):
     GET: lista las tiendas de la empresa (según token).
     POST: crea una tienda asignada a la empresa del token.
     """
+    @etag_dataset(DashDfTiendas)
     def get(self, request):
         company_id, err_response = _get_company_id_from_token(request)
         if err_response:
@@ -5648,7 +5464,7 @@ class TiendaDetailView(APIView):
         except:
             return Response({'error': 'Tienda no encontrada o no pertenece a su empresa'}, status=status.HTTP_404_NOT_FOUND)
 
-        tienda.delete()
+        borrar_y_marcar(tienda)
         return Response(status=status.HTTP_204_NO_CONTENT)
 
 
@@ -5660,6 +5476,7 @@ class DashVeinteProductListCreateView(APIView):
     GET: lista productos de la empresa del token.
     POST: crea un producto asignado a la empresa del token.
     """
+    @etag_dataset(DashDfProductos)
     def get(self, request):
         company_id, err = _get_company_id_from_token(request)
         if err:
@@ -5755,7 +5572,7 @@ class DashVeinteProductDetailView(APIView):
         except:
             return Response({'error': 'Producto no encontrado o no pertenece a su empresa'}, status=status.HTTP_404_NOT_FOUND)
 
-        producto.delete()
+        borrar_y_marcar(producto)
         return Response(status=status.HTTP_204_NO_CONTENT)
 
 
@@ -5767,6 +5584,7 @@ class DashVeinteInventarioListCreateView(APIView):
     GET: lista inventarios de la empresa.
     POST: crear inventario (id_empresa forzado desde token). Verifica que tienda/producto pertenezcan a la empresa.
     """
+    @etag_dataset(DashDfInventarios, DashDfTiendas, DashDfProductos)
     def get(self, request):
         company_id, err = _get_company_id_from_token(request)
         if err:
@@ -5906,7 +5724,7 @@ class DashVeinteInventarioDetailView(APIView):
         except:
             return Response({'error': 'Registro no encontrado o no pertenece a su empresa'}, status=status.HTTP_404_NOT_FOUND)
 
-        inventario.delete()
+        borrar_y_marcar(inventario)
         return Response(status=status.HTTP_204_NO_CONTENT)
 
 
@@ -5918,6 +5736,9 @@ class DashVeinteVentaListCreateView(APIView):
     GET: lista ventas de la empresa (filtros opcionales: start_date, end_date, id_tienda, id_producto).
     POST: crear venta (id_empresa forzado desde token). Verifica que tienda/producto pertenezcan a la empresa.
     """
+    renderer_classes = DASHBOARD_RENDERER_CLASSES
+
+    @etag_dataset(DashDfVentas, DashDfTiendas, DashDfProductos)
     def get(self, request):
         company_id, err = _get_company_id_from_token(request)
         if err:
@@ -5956,6 +5777,18 @@ class DashVeinteVentaListCreateView(APIView):
                 Q(id_producto__nombre_producto__icontains=search)
             )
 
+        paginado = paginar_keyset(
+            request, qs, 'fecha_venta',
+            lambda filas: DashVeinteVentaSerializer(filas, many=True).data,
+            descending=True,
+        )
+        if paginado is not None:
+            return paginado
+
+        # ?stream=1: arreglo JSON por trozos sin armar la lista completa en memoria
+        if streaming_solicitado(request):
+            return respuesta_json_streaming(qs.order_by('-fecha_venta'), DashVeinteVentaSerializer)
+
         serializer = DashVeinteVentaSerializer(qs.order_by('-fecha_venta'), many=True)
         return Response(serializer.data, status=status.HTTP_200_OK)
 
@@ -6121,7 +5954,7 @@ class DashVeinteVentaDetailView(APIView):
         except:
             return Response({'error': 'Registro no encontrado o no pertenece a su empresa'}, status=status.HTTP_404_NOT_FOUND)
 
-        venta.delete()
+        borrar_y_marcar(venta)
         return Response(status=status.HTTP_204_NO_CONTENT)
 
 
@@ -6133,6 +5966,7 @@ class DashVeinteMetaListCreateView(APIView):
     GET: lista metas de la empresa (filtros opcionales: start_date,end_date,id_tienda,id_producto,search)
     POST: crear meta (id_empresa forzado desde token). Verifica que tienda/producto pertenezcan a la empresa.
     """
+    @etag_dataset(DashDfMetas, DashDfTiendas, DashDfProductos)
     def get(self, request):
         company_id, err = _get_company_id_from_token(request)
         if err:
@@ -6332,7 +6166,7 @@ class DashVeinteMetaDetailView(APIView):
         except:
             return Response({'error': 'Registro no encontrado o no pertenece a su empresa'}, status=status.HTTP_404_NOT_FOUND)
 
-        meta.delete()
+        borrar_y_marcar(meta)
         return Response(status=status.HTTP_204_NO_CONTENT)
 
 
@@ -6365,34 +6199,12 @@ class PerfilBrokerView(APIView):
           Permite cambiar contraseña en texto plano si se envía contrasena_actual y contrasena_nueva.
     """
 
-    def _get_user_id_from_token(self, request):
-        auth_header = request.META.get('HTTP_AUTHORIZATION', '').split()
-        if not auth_header or auth_header[0].lower() != 'bearer':
-            return None, Response({'error': 'Token no enviado'}, status=status.HTTP_401_UNAUTHORIZED)
-        try:
-            token = auth_header[1]
-        except IndexError:
-            return None, Response({'error': 'Token no enviado'}, status=status.HTTP_401_UNAUTHORIZED)
-
-        try:
-            payload = jwt.decode(token, settings.SECRET_KEY, algorithms=['HS256'])
-            user_id = payload.get('id_usuario')
-            if not user_id:
-                return None, Response({'error': 'Token inválido (sin id_usuario)'}, status=status.HTTP_401_UNAUTHORIZED)
-            return user_id, None
-        except jwt.ExpiredSignatureError:
-            return None, Response({'error': 'Token expirado'}, status=status.HTTP_401_UNAUTHORIZED)
-        except jwt.DecodeError:
-            return None, Response({'error': 'Token inválido'}, status=status.HTTP_401_UNAUTHORIZED)
-        except Exception:
-            return None, Response({'error': 'Error al procesar token'}, status=status.HTTP_401_UNAUTHORIZED)
-
     def get(self, request):
-        user_id, error_response = self._get_user_id_from_token(request)
+        user_id, error_response = id_usuario_o_error(request)
         if error_response:
             return error_response
 
-        usuario = get_object_or_404(Usuario, id_usuario=user_id)
+        usuario = resolver_identidad(request).usuario
         try:
             broker = UsuariosBrokers.objects.select_related('id_usuario').get(id_usuario=usuario)
         except UsuariosBrokers.DoesNotExist:
@@ -6402,7 +6214,7 @@ class PerfilBrokerView(APIView):
         return Response(serializer.data, status=status.HTTP_200_OK)
 
     def put(self, request):
-        user_id, error_response = self._get_user_id_from_token(request)
+        user_id, error_response = id_usuario_o_error(request)
         if error_response:
             return error_response
 
@@ -6420,15 +6232,7 @@ class PerfilBrokerView(APIView):
         broker_ser = UsuariosBrokersSerializer(broker_obj)
 
         # Generar nuevo access token con datos actualizados (2 horas)
-        now = timezone.now()
-        access_exp = now + timedelta(hours=2)
-        payload = {
-            'id_usuario': usuario_obj.id_usuario,
-            'correo': usuario_obj.correo,
-            'type': 'access',
-            'exp': int(access_exp.timestamp()),
-            'iat': int(now.timestamp())
-        }
+        payload = construir_payload_acceso(usuario_obj)
         try:
             new_token = jwt.encode(payload, settings.SECRET_KEY, algorithm='HS256')
             if isinstance(new_token, bytes):
@@ -6470,38 +6274,14 @@ class LeadsBrokersListView(APIView):
     Opcional: ?q=texto para buscar por nombre_lead, persona_de_contacto o correo.
     """
 
-    def _get_user_id_from_token(self, request):
-        auth_header = request.META.get('HTTP_AUTHORIZATION', '').split()
-        if not auth_header or auth_header[0].lower() != 'bearer':
-            return None, Response({'error': 'Token no enviado'}, status=status.HTTP_401_UNAUTHORIZED)
-        try:
-            token = auth_header[1]
-        except IndexError:
-            return None, Response({'error': 'Token no enviado'}, status=status.HTTP_401_UNAUTHORIZED)
-
-        try:
-            payload = jwt.decode(token, settings.SECRET_KEY, algorithms=['HS256'])
-            user_id = payload.get('id_usuario')
-            if not user_id:
-                return None, Response({'error': 'Token inválido (sin id_usuario)'}, status=status.HTTP_401_UNAUTHORIZED)
-            return user_id, None
-        except jwt.ExpiredSignatureError:
-            return None, Response({'error': 'Token expirado'}, status=status.HTTP_401_UNAUTHORIZED)
-        except jwt.DecodeError:
-            return None, Response({'error': 'Token inválido'}, status=status.HTTP_401_UNAUTHORIZED)
-        except Exception:
-            return None, Response({'error': 'Error al procesar token'}, status=status.HTTP_401_UNAUTHORIZED)
-
     def get(self, request):
         # extraer user id del token
-        user_id, error_response = self._get_user_id_from_token(request)
+        user_id, error_response = id_usuario_o_error(request)
         if error_response:
             return error_response
 
-        usuario = get_object_or_404(Usuario, id_usuario=user_id)
-
         # obtener los brokers vinculados al usuario autenticado
-        broker_ids = list(UsuariosBrokers.objects.filter(id_usuario=usuario).values_list('id_broker', flat=True))
+        broker_ids = resolver_identidad(request).broker_ids
         if not broker_ids:
             return Response([], status=status.HTTP_200_OK)
 
@@ -6525,14 +6305,16 @@ class LeadsBrokersListView(APIView):
 
 
 # appdataflowai/views.py
-import csv
-import io
 import jwt
 from decimal import Decimal, InvalidOperation
+import pandas as pd
 from django.conf import settings
+from django.db import transaction
 from django.shortcuts import get_object_or_404
 from rest_framework.views import APIView
 from rest_framework.parsers import MultiPartParser, FormParser
+
+from .importacion import columna_texto
 from rest_framework.response import Response
 from rest_framework import status
 
@@ -6544,34 +6326,12 @@ class LeadsBrokersListCreateView(APIView):
     GET: Lista leads asociados a los brokers del usuario autenticado.
     POST: Crea un lead y lo asigna al primer broker del usuario autenticado.
     """
-    def _get_user_id_from_token(self, request):
-        auth_header = request.META.get('HTTP_AUTHORIZATION', '').split()
-        if not auth_header or auth_header[0].lower() != 'bearer':
-            return None, Response({'error': 'Token no enviado'}, status=status.HTTP_401_UNAUTHORIZED)
-        try:
-            token = auth_header[1]
-        except IndexError:
-            return None, Response({'error': 'Token no enviado'}, status=status.HTTP_401_UNAUTHORIZED)
-        try:
-            payload = jwt.decode(token, settings.SECRET_KEY, algorithms=['HS256'])
-            user_id = payload.get('id_usuario')
-            if not user_id:
-                return None, Response({'error': 'Token inválido (sin id_usuario)'}, status=status.HTTP_401_UNAUTHORIZED)
-            return user_id, None
-        except jwt.ExpiredSignatureError:
-            return None, Response({'error': 'Token expirado'}, status=status.HTTP_401_UNAUTHORIZED)
-        except jwt.DecodeError:
-            return None, Response({'error': 'Token inválido'}, status=status.HTTP_401_UNAUTHORIZED)
-        except Exception:
-            return None, Response({'error': 'Error al procesar token'}, status=status.HTTP_401_UNAUTHORIZED)
-
     def get(self, request):
-        user_id, error_response = self._get_user_id_from_token(request)
+        user_id, error_response = id_usuario_o_error(request)
         if error_response:
             return error_response
 
-        usuario = get_object_or_404(Usuario, id_usuario=user_id)
-        broker_ids = list(UsuariosBrokers.objects.filter(id_usuario=usuario).values_list('id_broker', flat=True))
+        broker_ids = resolver_identidad(request).broker_ids
         if not broker_ids:
             return Response([], status=status.HTTP_200_OK)
 
@@ -6588,12 +6348,11 @@ class LeadsBrokersListCreateView(APIView):
 
     def post(self, request):
         # crear lead asignado automáticamente al broker del usuario
-        user_id, error_response = self._get_user_id_from_token(request)
+        user_id, error_response = id_usuario_o_error(request)
         if error_response:
             return error_response
-        usuario = get_object_or_404(Usuario, id_usuario=user_id)
 
-        broker = UsuariosBrokers.objects.filter(id_usuario=usuario).first()
+        broker = resolver_identidad(request).broker
         if not broker:
             return Response({'error': 'Usuario no tiene broker asociado'}, status=status.HTTP_400_BAD_REQUEST)
 
@@ -6624,27 +6383,6 @@ class LeadsBrokersDetailView(APIView):
     GET: obtener lead por id (solo si pertenece a broker del usuario autenticado)
     PUT: actualizar lead (id_broker no se puede modificar)
     """
-    def _get_user_id_from_token(self, request):
-        auth_header = request.META.get('HTTP_AUTHORIZATION', '').split()
-        if not auth_header or auth_header[0].lower() != 'bearer':
-            return None, Response({'error': 'Token no enviado'}, status=status.HTTP_401_UNAUTHORIZED)
-        try:
-            token = auth_header[1]
-        except IndexError:
-            return None, Response({'error': 'Token no enviado'}, status=status.HTTP_401_UNAUTHORIZED)
-        try:
-            payload = jwt.decode(token, settings.SECRET_KEY, algorithms=['HS256'])
-            user_id = payload.get('id_usuario')
-            if not user_id:
-                return None, Response({'error': 'Token inválido (sin id_usuario)'}, status=status.HTTP_401_UNAUTHORIZED)
-            return user_id, None
-        except jwt.ExpiredSignatureError:
-            return None, Response({'error': 'Token expirado'}, status=status.HTTP_401_UNAUTHORIZED)
-        except jwt.DecodeError:
-            return None, Response({'error': 'Token inválido'}, status=status.HTTP_401_UNAUTHORIZED)
-        except Exception:
-            return None, Response({'error': 'Error al procesar token'}, status=status.HTTP_401_UNAUTHORIZED)
-
     def get_object_and_check(self, pk, usuario):
         lead = get_object_or_404(LeadsBrokers, pk=pk)
         # revisar que el lead pertenezca a uno de los brokers del usuario
@@ -6654,10 +6392,10 @@ class LeadsBrokersDetailView(APIView):
         return lead, None
 
     def get(self, request, pk):
-        user_id, err = self._get_user_id_from_token(request)
+        user_id, err = id_usuario_o_error(request)
         if err:
             return err
-        usuario = get_object_or_404(Usuario, id_usuario=user_id)
+        usuario = resolver_identidad(request).usuario
         lead, err = self.get_object_and_check(pk, usuario)
         if err:
             return err
@@ -6665,10 +6403,10 @@ class LeadsBrokersDetailView(APIView):
         return Response(serializer.data, status=status.HTTP_200_OK)
 
     def put(self, request, pk):
-        user_id, err = self._get_user_id_from_token(request)
+        user_id, err = id_usuario_o_error(request)
         if err:
             return err
-        usuario = get_object_or_404(Usuario, id_usuario=user_id)
+        usuario = resolver_identidad(request).usuario
         lead, err = self.get_object_and_check(pk, usuario)
         if err:
             return err
@@ -6693,42 +6431,74 @@ class LeadsBrokersDetailView(APIView):
         return Response(out_ser.data, status=status.HTTP_200_OK)
 
 
+# columnas del CSV de leads: campo -> encabezados aceptados, en orden de preferencia
+LEADS_COLUMNAS_CSV = {
+    'nombre_lead': ('nombre_lead', 'nombre', 'name'),
+    'correo': ('correo',),
+    'persona_de_contacto': ('persona_de_contacto', 'contacto'),
+    'telefono': ('telefono',),
+    'pais': ('pais',),
+    'industria': ('industria',),
+    'tamano_empresa': ('tamano_empresa',),
+    'moneda_ticket': ('moneda_ticket', 'moneda'),
+    'campo_etiqueta': ('campo_etiqueta', 'etiqueta'),
+    'fuente_lead': ('fuente_lead', 'fuente'),
+    'comentarios': ('comentarios',),
+    'etapa': ('etapa',),
+}
+_NUMERO_DECIMAL = r'[+-]?(?:\d+(?:\.\d*)?|\.\d+)(?:[eE][+-]?\d+)?'
+
+
+def _leads_decimal(texto):
+    """Serie de Decimal / None: los valores que no son número quedan en None."""
+    validos = texto.str.fullmatch(_NUMERO_DECIMAL)
+    decimales = texto.astype(object).where(validos, None)
+    return decimales.map(lambda v: None if v is None else Decimal(v))
+
+
 class LeadsBrokersImportView(APIView):
     """
     POST: importar leads desde CSV (multipart/form-data file). 
     Asigna id_broker automáticamente según el usuario autenticado (primer broker).
     CSV espera cabeceras: nombre_lead, correo, persona_de_contacto, telefono, pais, industria,
     tamano_empresa, ticket_estimado, moneda_ticket, probabilidad_cierre, campo_etiqueta, fuente_lead, comentarios, etapa
+
+    El CSV se lee por trozos (pandas chunksize) y cada trozo entra con bulk_create.
+    Los leads cuyo correo ya existe para el broker (o se repite en el archivo) se
+    omiten y se cuentan en 'duplicates'.
     """
     parser_classes = (MultiPartParser, FormParser)
+    chunk_filas = getattr(settings, 'IMPORTACION_CHUNK_FILAS', 50_000)
+    batch_size = getattr(settings, 'IMPORTACION_BATCH_SIZE', 1000)
 
-    def _get_user_id_from_token(self, request):
-        auth_header = request.META.get('HTTP_AUTHORIZATION', '').split()
-        if not auth_header or auth_header[0].lower() != 'bearer':
-            return None, Response({'error': 'Token no enviado'}, status=status.HTTP_401_UNAUTHORIZED)
-        try:
-            token = auth_header[1]
-        except IndexError:
-            return None, Response({'error': 'Token no enviado'}, status=status.HTTP_401_UNAUTHORIZED)
-        try:
-            payload = jwt.decode(token, settings.SECRET_KEY, algorithms=['HS256'])
-            user_id = payload.get('id_usuario')
-            if not user_id:
-                return None, Response({'error': 'Token inválido (sin id_usuario)'}, status=status.HTTP_401_UNAUTHORIZED)
-            return user_id, None
-        except jwt.ExpiredSignatureError:
-            return None, Response({'error': 'Token expirado'}, status=status.HTTP_401_UNAUTHORIZED)
-        except jwt.DecodeError:
-            return None, Response({'error': 'Token inválido'}, status=status.HTTP_401_UNAUTHORIZED)
-        except Exception:
-            return None, Response({'error': 'Error al procesar token'}, status=status.HTTP_401_UNAUTHORIZED)
+    def _insertar(self, objs, lineas, errors):
+        """bulk_create por lotes; un lote que falla se reintenta fila por fila para reportar la línea mala."""
+        created = 0
+        for i in range(0, len(objs), self.batch_size):
+            lote = objs[i:i + self.batch_size]
+            try:
+                with transaction.atomic():
+                    LeadsBrokers.objects.bulk_create(lote)
+                # bulk_create no dispara post_save (las filas por separado de abajo sí)
+                marcar_objetos_modificados(LeadsBrokers, lote)
+                created += len(lote)
+                continue
+            except Exception:
+                pass
+            for obj, line in zip(lote, lineas[i:i + self.batch_size]):
+                try:
+                    with transaction.atomic():
+                        obj.save(force_insert=True)
+                    created += 1
+                except Exception as e:
+                    errors.append({'line': line, 'error': str(e)})
+        return created
 
     def post(self, request):
-        user_id, err = self._get_user_id_from_token(request)
+        user_id, err = id_usuario_o_error(request)
         if err:
             return err
-        usuario = get_object_or_404(Usuario, id_usuario=user_id)
-        broker = UsuariosBrokers.objects.filter(id_usuario=usuario).first()
+        broker = resolver_identidad(request).broker
         if not broker:
             return Response({'error': 'Usuario no tiene broker asociado'}, status=status.HTTP_400_BAD_REQUEST)
 
@@ -6737,73 +6507,70 @@ class LeadsBrokersImportView(APIView):
         if not uploaded:
             return Response({'error': 'No se recibió archivo'}, status=status.HTTP_400_BAD_REQUEST)
 
-        # asumimos CSV UTF-8 (si no, adaptar)
+        # asumimos CSV UTF-8 (si no, adaptar); todo como texto para no perder ceros de teléfonos
         try:
-            text_io = io.TextIOWrapper(uploaded.file, encoding='utf-8')
-            reader = csv.DictReader(text_io)
+            trozos = pd.read_csv(
+                uploaded, encoding='utf-8', dtype=str, keep_default_na=False, chunksize=self.chunk_filas
+            )
         except Exception as e:
             return Response({'error': 'Error leyendo CSV', 'detail': str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
+        defaults = {
+            campo: LeadsBrokers._meta.get_field(campo).get_default()
+            for campo in ('moneda_ticket', 'etapa')
+        }
         created = 0
+        duplicates = 0
         errors = []
-        line = 1
-        for row in reader:
-            line += 1
-            # normalizar keys: usar directamente las cabeceras esperadas
-            data = {
-                'nombre_lead': row.get('nombre_lead') or row.get('nombre') or row.get('name'),
-                'correo': row.get('correo'),
-                'persona_de_contacto': row.get('persona_de_contacto') or row.get('contacto'),
-                'telefono': row.get('telefono'),
-                'pais': row.get('pais'),
-                'industria': row.get('industria'),
-                'tamano_empresa': row.get('tamano_empresa'),
-                'ticket_estimado': None,
-                'moneda_ticket': row.get('moneda_ticket') or row.get('moneda'),
-                'probabilidad_cierre': None,
-                'campo_etiqueta': row.get('campo_etiqueta') or row.get('etiqueta'),
-                'fuente_lead': row.get('fuente_lead') or row.get('fuente'),
-                'comentarios': row.get('comentarios'),
-                'etapa': row.get('etapa'),
-            }
-            # parse numeric fields
-            te = row.get('ticket_estimado') or row.get('ticket')
-            pc = row.get('probabilidad_cierre') or row.get('probabilidad')
-            from decimal import Decimal, InvalidOperation
-            if te:
-                try:
-                    # limpiar comas/puntos si vienen formateados
-                    te_clean = te.replace(',', '').replace('$', '').strip()
-                    data['ticket_estimado'] = Decimal(te_clean)
-                except Exception:
-                    data['ticket_estimado'] = None
-            if pc:
-                try:
-                    pc_clean = pc.replace('%', '').replace(',', '.').strip()
-                    data['probabilidad_cierre'] = Decimal(pc_clean)
-                except Exception:
-                    data['probabilidad_cierre'] = None
-
-            # validar mínimo: nombre_lead
-            if not data['nombre_lead']:
-                errors.append({'line': line, 'error': 'Falta nombre_lead'})
-                continue
-
-            try:
-                LeadsBrokers.objects.create(id_broker=broker, **data)
-                created += 1
-            except Exception as e:
-                errors.append({'line': line, 'error': str(e)})
+        try:
+            for df in trozos:
+                df.columns = [str(c).strip() for c in df.columns]
+                lineas = df.index + 2  # encabezado = línea 1
+                datos = {campo: columna_texto(df, *encabezados) for campo, encabezados in LEADS_COLUMNAS_CSV.items()}
+                for campo, default in defaults.items():
+                    datos[campo] = datos[campo].where(datos[campo] != '', default)
+
+                # limpiar separadores de miles / símbolos y porcentajes, por columna
+                ticket = columna_texto(df, 'ticket_estimado', 'ticket').str.replace(r'[,$]', '', regex=True)
+                probabilidad = columna_texto(df, 'probabilidad_cierre', 'probabilidad')
+                probabilidad = probabilidad.str.replace('%', '', regex=False).str.replace(',', '.', regex=False)
+                datos['ticket_estimado'] = _leads_decimal(ticket.str.strip())
+                datos['probabilidad_cierre'] = _leads_decimal(probabilidad.str.strip())
+
+                # validar mínimo: nombre_lead
+                sin_nombre = datos['nombre_lead'] == ''
+                errors.extend({'line': int(line), 'error': 'Falta nombre_lead'} for line in lineas[sin_nombre.to_numpy()])
+
+                # duplicados por (broker, correo): una consulta por trozo contra el índice
+                correo = datos['correo']
+                con_correo = ~sin_nombre & (correo != '')
+                existentes = set(
+                    LeadsBrokers.objects
+                    .filter(id_broker=broker, correo__in=correo[con_correo].unique().tolist())
+                    .values_list('correo', flat=True)
+                )
+                # los trozos anteriores ya están insertados: la consulta también los ve
+                repetidos = correo[con_correo].duplicated().reindex(df.index, fill_value=False)
+                duplicado = con_correo & (correo.isin(existentes) | repetidos)
+                duplicates += int(duplicado.sum())
+
+                insertar = ~sin_nombre & ~duplicado
+                filas = pd.DataFrame(datos)[insertar].to_dict('records')
+                objs = [LeadsBrokers(id_broker=broker, **fila) for fila in filas]
+                created += self._insertar(objs, [int(line) for line in lineas[insertar.to_numpy()]], errors)
+        except (UnicodeDecodeError, pd.errors.ParserError) as e:
+            return Response({'error': 'Error leyendo CSV', 'detail': str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
-        return Response({'created': created, 'errors': errors}, status=status.HTTP_201_CREATED if created else status.HTTP_400_BAD_REQUEST)
+        return Response(
+            {'created': created, 'duplicates': duplicates, 'errors': errors},
+            status=status.HTTP_201_CREATED if created or duplicates else status.HTTP_400_BAD_REQUEST,
+        )
 
 
 
 
 # app/views.py
 # app/views.py
-import csv
-import io
 from datetime import datetime
 
 from django.http import HttpResponse
@@ -6812,8 +6579,7 @@ from rest_framework.permissions import IsAuthenticated
 from rest_framework import status
 from rest_framework.response import Response
 
-from openpyxl import Workbook
-
+from .exportacion import exportar
 from .models import LeadsBrokers, UsuariosBrokers
 from .serializers import LeadsBrokersExportSerializer
 
@@ -6835,7 +6601,7 @@ class LeadsBrokersExportView(APIView):
             return Response({'error': 'Usuario no autenticado'}, status=status.HTTP_401_UNAUTHORIZED)
 
         # buscar el registro de broker asociado al usuario
-        broker = UsuariosBrokers.objects.filter(id_usuario=usuario).first()
+        broker = resolver_identidad(request).broker
         if not broker:
             # intenta buscar con otras convenciones (por si tu FK tiene nombre distinto)
             broker = UsuariosBrokers.objects.filter(usuario=usuario).first() or UsuariosBrokers.objects.filter(user=usuario).first()
@@ -6855,64 +6621,31 @@ class LeadsBrokersExportView(APIView):
                 Q(persona_de_contacto__icontains=q)
             )
 
-        serializer = LeadsBrokersExportSerializer(qs, many=True)
-        data = serializer.data
-
-        fmt = request.GET.get('file', 'csv').lower()
         now_str = datetime.utcnow().strftime('%Y%m%d_%H%M%S')
         filename_base = f"leads_brokers_export_{now_str}"
 
-        headers = [
-            'id_lead',
-            'nombre_lead',
-            'broker_id',
-            'broker_usuario',
-            'campo_etiqueta',
-            'probabilidad_cierre',
-            'ticket_estimado',
-            'ticket_estimado_str',
-            'moneda_ticket',
-            'telefono',
-            'correo',
-            'persona_de_contacto',
-            'etapa',
-            'pais',
-            'industria',
-            'tamano_empresa',
-            'fuente_lead',
-            'comentarios',
-        ]
-
-        if fmt == 'xlsx':
-            wb = Workbook()
-            ws = wb.active
-            ws.title = "Leads"
-            ws.append(headers)
-
-            for row in data:
-                ws.append([row.get(h, '') for h in headers])
-
-            out = io.BytesIO()
-            wb.save(out)
-            out.seek(0)
-            resp = HttpResponse(
-                out.read(),
-                content_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+        # todas las filas son del mismo broker: sus columnas se resuelven una vez
+        exportador = LeadsBrokersExportSerializer()
+        lead_broker = LeadsBrokers(id_broker=broker)
+        broker_id = exportador.get_broker_id(lead_broker)
+        broker_usuario = exportador.get_broker_usuario(lead_broker)
+        columnas = [
+            ('id_lead', 'id_lead'),
+            ('nombre_lead', 'nombre_lead'),
+            ('broker_id', 'id_broker', lambda _: broker_id),
+            ('broker_usuario', 'id_broker', lambda _: broker_usuario),
+            ('campo_etiqueta', 'campo_etiqueta'),
+            ('probabilidad_cierre', 'probabilidad_cierre'),
+            ('ticket_estimado', 'ticket_estimado'),
+            ('ticket_estimado_str', 'ticket_estimado', lambda v: '' if v is None else f"{v}"),
+        ] + [
+            (campo, campo) for campo in (
+                'moneda_ticket', 'telefono', 'correo', 'persona_de_contacto', 'etapa', 'pais',
+                'industria', 'tamano_empresa', 'fuente_lead', 'comentarios',
             )
-            resp['Content-Disposition'] = f'attachment; filename="{filename_base}.xlsx"'
-            return resp
-
-        # CSV por defecto (utf-8-sig para Excel)
-        output = io.StringIO()
-        writer = csv.writer(output)
-        writer.writerow(headers)
-        for row in data:
-            writer.writerow([row.get(h, '') for h in headers])
-
-        csv_content = output.getvalue()
-        resp = HttpResponse(csv_content.encode('utf-8-sig'), content_type='text/csv; charset=utf-8')
-        resp['Content-Disposition'] = f'attachment; filename="{filename_base}.csv"'
-        return resp
+        ]
+        # CSV por defecto (utf-8 con BOM para Excel)
+        return exportar(request, qs, columnas, filename_base, hoja="Leads", defecto='csv', privado=True)
 
 
 
@@ -6927,7 +6660,6 @@ from rest_framework import status
 from rest_framework.authentication import get_authorization_header
 from django.conf import settings
 import jwt
-from jwt import ExpiredSignatureError, DecodeError, InvalidTokenError
 
 from .models import UsuariosBrokers, FacturacionLeadsBrokers, PagosBrokersLeads
 from .serializers import FacturaBrokerSerializer, PagoBrokerSerializer
@@ -6944,38 +6676,19 @@ class BrokerLiqPagosView(APIView):
         if not auth_header or auth_header[0].lower() != b'bearer' or len(auth_header) < 2:
             return Response({'error': 'Token no enviado'}, status=status.HTTP_401_UNAUTHORIZED)
 
-        token = auth_header[1].decode('utf-8')
         try:
-            payload = jwt.decode(token, settings.SECRET_KEY, algorithms=['HS256'])
-        except ExpiredSignatureError:
-            return Response({'error': 'Token expirado'}, status=status.HTTP_401_UNAUTHORIZED)
-        except (DecodeError, InvalidTokenError):
-            return Response({'error': 'Token inválido'}, status=status.HTTP_401_UNAUTHORIZED)
-        except Exception:
-            return Response({'error': 'Error validando token'}, status=status.HTTP_401_UNAUTHORIZED)
-
-        # Extraer id_usuario desde distintos claims posibles
-        usuario_id = payload.get('id_usuario') or payload.get('user_id') or payload.get('sub')
-        if not usuario_id:
-            return Response({'error': 'ID de usuario no encontrado en token'}, status=status.HTTP_401_UNAUTHORIZED)
+            identidad = resolver_identidad(request)
+        except AuthenticationFailed as e:
+            return respuesta_error_token(e, {CLAIMS_INCOMPLETOS: 'ID de usuario no encontrado en token'})
 
-        # Intentar resolver el broker relacionado con este usuario.
-        # --- SUPOSICIÓN: UsuariosBrokers tiene alguna referencia al Usuario (p. ej. id_usuario FK).
-        # Probaremos varias formas para ser tolerantes a la estructura de tu modelo.
-        broker = None
-        try:
-            # intento común: UsuariosBrokers tiene FK llamado 'id_usuario' apuntando a Usuario
-            broker = UsuariosBrokers.objects.get(id_usuario__id_usuario=usuario_id)
-        except Exception:
+        # Broker relacionado con este usuario (resuelto una sola vez en la identidad).
+        broker = identidad.broker
+        if broker is None:
             try:
-                # alternativa: UsuariosBrokers.id_usuario directamente guarda el pk del usuario
-                broker = UsuariosBrokers.objects.get(id_usuario=usuario_id)
-            except Exception:
-                try:
-                    # alternativa: el id_usuario del token es en realidad el id_broker
-                    broker = UsuariosBrokers.objects.get(pk=usuario_id)
-                except UsuariosBrokers.DoesNotExist:
-                    return Response({'error': 'Broker no encontrado para este usuario'}, status=status.HTTP_404_NOT_FOUND)
+                # alternativa: el id_usuario del token es en realidad el id_broker
+                broker = UsuariosBrokers.objects.get(pk=identidad.id_usuario)
+            except UsuariosBrokers.DoesNotExist:
+                return Response({'error': 'Broker no encontrado para este usuario'}, status=status.HTTP_404_NOT_FOUND)
 
         # obtener facturas y prefetch de pagos y lead
         facturas_qs = FacturacionLeadsBrokers.objects.filter(id_broker=broker).select_related('id_lead').prefetch_related('pagos').order_by('-fecha_facturacion')
@@ -7019,20 +6732,9 @@ def _validate_jwt_from_request(request):
         raise ValueError('Token no enviado')
 
     try:
-        token = auth_header[1].decode('utf-8')
-    except Exception:
-        raise ValueError('Formato de token inválido')
-
-    try:
-        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=['HS256'])
-    except jwt.ExpiredSignatureError:
-        raise ValueError('Token expirado')
-    except jwt.DecodeError:
-        raise ValueError('Token inválido')
-    except Exception:
-        raise ValueError('Error validando token')
-
-    return payload
+        return resolver_identidad(request).payload
+    except AuthenticationFailed as e:
+        raise ValueError(str(e))
 
 
 class TutorialesListView(APIView):
@@ -7107,6 +6809,7 @@ class ProductosBelkinListCreateView(APIView):
     POST: crear producto individual
     """
 
+    @etag_dataset(ProductosBelkin, empresa=BELKIN_DEFAULT_EMPRESA_ID)
     def get(self, request):
         qs = ProductosBelkin.objects.filter(
             id_empresa_id=BELKIN_DEFAULT_EMPRESA_ID,
@@ -7167,142 +6870,35 @@ class ProductosBelkinDetailView(APIView):
         if not instance:
             return Response({'error': 'Producto no encontrado'}, status=status.HTTP_404_NOT_FOUND)
 
-        instance.delete()
+        borrar_y_marcar(instance)
         return Response(status=status.HTTP_204_NO_CONTENT)
 
 
-class ProductosBelkinBulkImportView(APIView):
-
-    @transaction.atomic
-    def post(self, request):
-        file = request.FILES.get("file")
-
-        if not file:
-            return Response(
-                {"error": "No se envio ningun archivo"},
-                status=status.HTTP_400_BAD_REQUEST
-            )
-
-        try:
-            # Leer Excel o CSV
-            if file.name.endswith(".csv"):
-                df = pd.read_csv(file)
-            else:
-                df = pd.read_excel(file)
-
-        except Exception as e:
-            return Response(
-                {"error": f"Archivo invalido: {str(e)}"},
-                status=status.HTTP_400_BAD_REQUEST
-            )
-
-        # Columnas esperadas
-        columnas_requeridas = {
-            "ean",
-            "part_number",
-            "nombre_producto",
-            "marca",
-            "categoria",
-            "sku_suplidor",
-        }
-
-        if not columnas_requeridas.issubset(df.columns):
-            return Response(
-                {
-                    "error": "Columnas invalidas",
-                    "faltantes": list(columnas_requeridas - set(df.columns)),
-                },
-                status=status.HTTP_400_BAD_REQUEST
-            )
-
-        productos = []
-
-        for _, row in df.iterrows():
-            productos.append(
-                ProductosBelkin(
-                    ean=row["ean"],
-                    part_number=row["part_number"],
-                    nombre_producto=row["nombre_producto"],
-                    marca=row.get("marca", ""),
-                    categoria=row.get("categoria", ""),
-                    sku_suplidor=row.get("sku_suplidor", ""),
-                    id_empresa_id=BELKIN_DEFAULT_EMPRESA_ID,
-                    id_producto_id=BELKIN_DEFAULT_PRODUCTO_ID,
-                )
-            )
-
-        ProductosBelkin.objects.bulk_create(productos)
-
-        return Response(
-            {
-                "importados": len(productos),
-            },
-            status=status.HTTP_201_CREATED
-        )
-
-class ProductosBelkinBulkUpdateExcelView(APIView):
-
-    @transaction.atomic
-    def post(self, request):
-        file = request.FILES.get("file")
-
-        if not file:
-            return Response(
-                {"error": "No se envio ningun archivo"},
-                status=status.HTTP_400_BAD_REQUEST
-            )
-
-        try:
-            if file.name.endswith(".csv"):
-                df = pd.read_csv(file)
-            else:
-                df = pd.read_excel(file)
-        except Exception as e:
-            return Response(
-                {"error": f"Archivo invalido: {str(e)}"},
-                status=status.HTTP_400_BAD_REQUEST
-            )
-
-        # columnas obligatorias
-        required = {"id_registro"}
-        if not required.issubset(df.columns):
-            return Response(
-                {
-                    "error": "Falta columna obligatoria",
-                    "faltantes": list(required - set(df.columns))
-                },
-                status=status.HTTP_400_BAD_REQUEST
-            )
-
-        updated = 0
-
-        for _, row in df.iterrows():
-            instance = ProductosBelkin.objects.filter(
-                id_registro=row["id_registro"],
-                id_empresa_id=BELKIN_DEFAULT_EMPRESA_ID,
-                id_producto_id=BELKIN_DEFAULT_PRODUCTO_ID
-            ).first()
-
-            if not instance:
-                continue
-
-            data = row.dropna().to_dict()
-            data.pop("id_registro", None)
-
-            serializer = ProductosBelkinSerializer(
-                instance,
-                data=data,
-                partial=True
-            )
+class ProductosBelkinBulkImportView(ImportacionEsquemaView):
+    esquema = EsquemaImportacion(
+        modelo=ProductosBelkin,
+        requeridas=("ean", "part_number", "nombre_producto", "marca", "categoria", "sku_suplidor"),
+        columnas=(
+            Columna("ean"),
+            Columna("part_number"),
+            Columna("nombre_producto"),
+            Columna("marca"),
+            Columna("categoria"),
+            Columna("sku_suplidor"),
+        ),
+        fijos={
+            "id_empresa_id": BELKIN_DEFAULT_EMPRESA_ID,
+            "id_producto_id": BELKIN_DEFAULT_PRODUCTO_ID,
+        },
+    )
 
-            if serializer.is_valid():
-                serializer.save()
-                updated += 1
 
-        return Response(
-            {"updated": updated},
-            status=status.HTTP_200_OK
-        )
+class ProductosBelkinBulkUpdateExcelView(ActualizacionMasivaView):
+    modelo = ProductosBelkin
+    filtro = {
+        "id_empresa_id": BELKIN_DEFAULT_EMPRESA_ID,
+        "id_producto_id": BELKIN_DEFAULT_PRODUCTO_ID,
+    }
 
 
 
@@ -7318,11 +6914,11 @@ class ProductosBelkinBulkDeleteView(APIView):
         if not isinstance(ids, list):
             return Response({'error': 'ids debe ser una lista'}, status=status.HTTP_400_BAD_REQUEST)
 
-        deleted, _ = ProductosBelkin.objects.filter(
+        deleted, _ = borrar_y_marcar(ProductosBelkin.objects.filter(
             id_registro__in=ids,
             id_empresa_id=BELKIN_DEFAULT_EMPRESA_ID,
             id_producto_id=BELKIN_DEFAULT_PRODUCTO_ID
-        ).delete()
+        ))
 
         return Response({'deleted': deleted}, status=status.HTTP_200_OK)
 
@@ -7331,13 +6927,16 @@ class ProductosBelkinBulkDeleteView(APIView):
 from django.http import HttpResponse
 import pandas as pd
 
+from .exportacion import columnas_de, exportar
+
 class ProductosBelkinExportView(APIView):
 
     def get(self, request):
         qs = ProductosBelkin.objects.filter(
             id_empresa_id=BELKIN_DEFAULT_EMPRESA_ID,
             id_producto_id=BELKIN_DEFAULT_PRODUCTO_ID
-        ).values(
+        )
+        columnas = columnas_de(
             "ean",
             "part_number",
             "nombre_producto",
@@ -7345,18 +6944,7 @@ class ProductosBelkinExportView(APIView):
             "categoria",
             "sku_suplidor"
         )
-
-        df = pd.DataFrame(list(qs))
-
-        response = HttpResponse(
-            content_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
-        )
-        response["Content-Disposition"] = 'attachment; filename="productos_belkin.xlsx"'
-
-        with pd.ExcelWriter(response, engine="openpyxl") as writer:
-            df.to_excel(writer, index=False, sheet_name="Productos")
-
-        return response
+        return exportar(request, qs, columnas, "productos_belkin", hoja="Productos", empresa_dataset=BELKIN_DEFAULT_EMPRESA_ID)
 
 
 
@@ -7380,6 +6968,7 @@ from .serializers import (
 
 class PdvBelkinListCreateView(APIView):
 
+    @etag_dataset(PdvBelkin, empresa=BELKIN_DEFAULT_EMPRESA_ID)
     def get(self, request):
         qs = PdvBelkin.objects.filter(
             id_empresa_id=BELKIN_DEFAULT_EMPRESA_ID,
@@ -7436,106 +7025,34 @@ class PdvBelkinDetailView(APIView):
         if not instance:
             return Response({'error': 'PDV no encontrado'}, status=status.HTTP_404_NOT_FOUND)
 
-        instance.delete()
+        borrar_y_marcar(instance)
         return Response(status=status.HTTP_204_NO_CONTENT)
 
 
 
-class PdvBelkinBulkImportView(APIView):
+class PdvBelkinBulkImportView(ImportacionEsquemaView):
+    esquema = EsquemaImportacion(
+        modelo=PdvBelkin,
+        requeridas=("ean_pdv", "punto_venta", "cliente_canal"),
+        columnas=(
+            Columna("ean_pdv"),
+            Columna("punto_venta"),
+            Columna("cliente_canal"),
+        ),
+        fijos={
+            "id_empresa_id": BELKIN_DEFAULT_EMPRESA_ID,
+            "id_producto_id": BELKIN_DEFAULT_PRODUCTO_ID,
+        },
+    )
 
-    @transaction.atomic
-    def post(self, request):
-        file = request.FILES.get("file")
 
-        if not file:
-            return Response({"error": "No se envio ningun archivo"}, status=status.HTTP_400_BAD_REQUEST)
-
-        try:
-            if file.name.endswith(".csv"):
-                df = pd.read_csv(file)
-            else:
-                df = pd.read_excel(file)
-        except Exception as e:
-            return Response({"error": f"Archivo invalido: {str(e)}"}, status=status.HTTP_400_BAD_REQUEST)
-
-        columnas_requeridas = {
-            "ean_pdv",
-            "punto_venta",
-            "cliente_canal"
-        }
-
-        if not columnas_requeridas.issubset(df.columns):
-            return Response(
-                {
-                    "error": "Columnas invalidas",
-                    "faltantes": list(columnas_requeridas - set(df.columns)),
-                },
-                status=status.HTTP_400_BAD_REQUEST
-            )
-
-        pdvs = []
-
-        for _, row in df.iterrows():
-            pdvs.append(
-                PdvBelkin(
-                    ean_pdv=row["ean_pdv"],
-                    punto_venta=row["punto_venta"],
-                    cliente_canal=row["cliente_canal"],
-                    id_empresa_id=BELKIN_DEFAULT_EMPRESA_ID,
-                    id_producto_id=BELKIN_DEFAULT_PRODUCTO_ID,
-                )
-            )
-
-        PdvBelkin.objects.bulk_create(pdvs)
-
-        return Response({"importados": len(pdvs)}, status=status.HTTP_201_CREATED)
-
-
-
-class PdvBelkinBulkUpdateExcelView(APIView):
-
-    @transaction.atomic
-    def post(self, request):
-        file = request.FILES.get("file")
-
-        if not file:
-            return Response({"error": "No se envio ningun archivo"}, status=status.HTTP_400_BAD_REQUEST)
-
-        try:
-            if file.name.endswith(".csv"):
-                df = pd.read_csv(file)
-            else:
-                df = pd.read_excel(file)
-        except Exception as e:
-            return Response({"error": f"Archivo invalido: {str(e)}"}, status=status.HTTP_400_BAD_REQUEST)
-
-        if "id_registro" not in df.columns:
-            return Response(
-                {"error": "Falta columna obligatoria id_registro"},
-                status=status.HTTP_400_BAD_REQUEST
-            )
-
-        updated = 0
-
-        for _, row in df.iterrows():
-            instance = PdvBelkin.objects.filter(
-                id_registro=row["id_registro"],
-                id_empresa_id=BELKIN_DEFAULT_EMPRESA_ID,
-                id_producto_id=BELKIN_DEFAULT_PRODUCTO_ID
-            ).first()
-
-            if not instance:
-                continue
-
-            data = row.dropna().to_dict()
-            data.pop("id_registro", None)
-
-            serializer = PdvBelkinSerializer(instance, data=data, partial=True)
-            if serializer.is_valid():
-                serializer.save()
-                updated += 1
-
-        return Response({"updated": updated}, status=status.HTTP_200_OK)
+class PdvBelkinBulkUpdateExcelView(ActualizacionMasivaView):
+    modelo = PdvBelkin
+    filtro = {
+        "id_empresa_id": BELKIN_DEFAULT_EMPRESA_ID,
+        "id_producto_id": BELKIN_DEFAULT_PRODUCTO_ID,
+    }
+    error_sin_clave = {"error": "Falta columna obligatoria id_registro"}
 
 
 
@@ -7548,11 +7065,11 @@ class PdvBelkinBulkDeleteView(APIView):
         if not isinstance(ids, list):
             return Response({"error": "ids debe ser una lista"}, status=status.HTTP_400_BAD_REQUEST)
 
-        deleted, _ = PdvBelkin.objects.filter(
+        deleted, _ = borrar_y_marcar(PdvBelkin.objects.filter(
             id_registro__in=ids,
             id_empresa_id=BELKIN_DEFAULT_EMPRESA_ID,
             id_producto_id=BELKIN_DEFAULT_PRODUCTO_ID
-        ).delete()
+        ))
 
         return Response({"deleted": deleted}, status=status.HTTP_200_OK)
 
@@ -7564,23 +7081,13 @@ class PdvBelkinExportView(APIView):
         qs = PdvBelkin.objects.filter(
             id_empresa_id=BELKIN_DEFAULT_EMPRESA_ID,
             id_producto_id=BELKIN_DEFAULT_PRODUCTO_ID
-        ).values(
+        )
+        columnas = columnas_de(
             "ean_pdv",
             "punto_venta",
             "cliente_canal"
         )
-
-        df = pd.DataFrame(list(qs))
-
-        response = HttpResponse(
-            content_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
-        )
-        response["Content-Disposition"] = 'attachment; filename="pdv_belkin.xlsx"'
-
-        with pd.ExcelWriter(response, engine="openpyxl") as writer:
-            df.to_excel(writer, index=False, sheet_name="PDV")
-
-        return response
+        return exportar(request, qs, columnas, "pdv_belkin", hoja="PDV", empresa_dataset=BELKIN_DEFAULT_EMPRESA_ID)
 
 
 
@@ -7613,6 +7120,7 @@ class VentasBelkinListCreateView(APIView):
     POST: crear venta individual
     """
 
+    @etag_dataset(VentasBelkin, empresa=BELKIN_DEFAULT_EMPRESA_ID)
     def get(self, request):
         qs = VentasBelkin.objects.filter(
             id_empresa_id=BELKIN_DEFAULT_EMPRESA_ID,
@@ -7675,34 +7183,14 @@ class VentasBelkinDetailView(APIView):
         if not instance:
             return Response({"error": "Registro no encontrado"}, status=status.HTTP_404_NOT_FOUND)
 
-        instance.delete()
+        borrar_y_marcar(instance)
         return Response(status=status.HTTP_204_NO_CONTENT)
 
 
-class VentasBelkinBulkImportView(APIView):
-
-    @transaction.atomic
-    def post(self, request):
-        file = request.FILES.get("file")
-
-        if not file:
-            return Response(
-                {"error": "No se envio ningun archivo"},
-                status=status.HTTP_400_BAD_REQUEST
-            )
-
-        try:
-            if file.name.endswith(".csv"):
-                df = pd.read_csv(file)
-            else:
-                df = pd.read_excel(file)
-        except Exception as e:
-            return Response(
-                {"error": f"Archivo invalido: {str(e)}"},
-                status=status.HTTP_400_BAD_REQUEST
-            )
-
-        columnas_requeridas = {
+class VentasBelkinBulkImportView(ImportacionEsquemaView):
+    esquema = EsquemaImportacion(
+        modelo=VentasBelkin,
+        requeridas=(
             "fecha_venta",
             "canal_cliente",
             "punto_venta",
@@ -7711,103 +7199,33 @@ class VentasBelkinBulkImportView(APIView):
             "producto",
             "precio_unitario_venta",
             "cantidad",
-            "total_ventas"
-        }
-
-        if not columnas_requeridas.issubset(df.columns):
-            return Response(
-                {
-                    "error": "Columnas invalidas",
-                    "faltantes": list(columnas_requeridas - set(df.columns))
-                },
-                status=status.HTTP_400_BAD_REQUEST
-            )
-
-        ventas = []
-
-        for _, row in df.iterrows():
-            ventas.append(
-                VentasBelkin(
-                    fecha_venta=row["fecha_venta"],
-                    canal_cliente=row["canal_cliente"],
-                    punto_venta=row["punto_venta"],
-                    categoria=row["categoria"],
-                    marca=row["marca"],
-                    producto=row["producto"],
-                    precio_unitario_venta=row["precio_unitario_venta"],
-                    cantidad=row["cantidad"],
-                    total_ventas=row["total_ventas"],
-                    id_empresa_id=BELKIN_DEFAULT_EMPRESA_ID,
-                    id_producto_id=BELKIN_DEFAULT_PRODUCTO_ID
-                )
-            )
-
-        VentasBelkin.objects.bulk_create(ventas)
-
-        return Response(
-            {"importados": len(ventas)},
-            status=status.HTTP_201_CREATED
-        )
-
-
-class VentasBelkinBulkUpdateExcelView(APIView):
-
-    @transaction.atomic
-    def post(self, request):
-        file = request.FILES.get("file")
-
-        if not file:
-            return Response(
-                {"error": "No se envio ningun archivo"},
-                status=status.HTTP_400_BAD_REQUEST
-            )
-
-        try:
-            if file.name.endswith(".csv"):
-                df = pd.read_csv(file)
-            else:
-                df = pd.read_excel(file)
-        except Exception as e:
-            return Response(
-                {"error": f"Archivo invalido: {str(e)}"},
-                status=status.HTTP_400_BAD_REQUEST
-            )
-
-        if "id_registro" not in df.columns:
-            return Response(
-                {"error": "Falta columna obligatoria id_registro"},
-                status=status.HTTP_400_BAD_REQUEST
-            )
-
-        updated = 0
-
-        for _, row in df.iterrows():
-            instance = VentasBelkin.objects.filter(
-                id_registro=row["id_registro"],
-                id_empresa_id=BELKIN_DEFAULT_EMPRESA_ID,
-                id_producto_id=BELKIN_DEFAULT_PRODUCTO_ID
-            ).first()
-
-            if not instance:
-                continue
-
-            data = row.dropna().to_dict()
-            data.pop("id_registro", None)
-
-            serializer = VentasBelkinSerializer(
-                instance,
-                data=data,
-                partial=True
-            )
+            "total_ventas",
+        ),
+        columnas=(
+            Columna("fecha_venta", "fecha"),
+            Columna("canal_cliente"),
+            Columna("punto_venta"),
+            Columna("categoria"),
+            Columna("marca"),
+            Columna("producto"),
+            Columna("precio_unitario_venta", "decimal"),
+            Columna("cantidad", "entero"),
+            Columna("total_ventas", "decimal"),
+        ),
+        fijos={
+            "id_empresa_id": BELKIN_DEFAULT_EMPRESA_ID,
+            "id_producto_id": BELKIN_DEFAULT_PRODUCTO_ID,
+        },
+    )
 
-            if serializer.is_valid():
-                serializer.save()
-                updated += 1
 
-        return Response(
-            {"updated": updated},
-            status=status.HTTP_200_OK
-        )
+class VentasBelkinBulkUpdateExcelView(ActualizacionMasivaView):
+    modelo = VentasBelkin
+    filtro = {
+        "id_empresa_id": BELKIN_DEFAULT_EMPRESA_ID,
+        "id_producto_id": BELKIN_DEFAULT_PRODUCTO_ID,
+    }
+    error_sin_clave = {"error": "Falta columna obligatoria id_registro"}
 
 
 class VentasBelkinBulkDeleteView(APIView):
@@ -7822,11 +7240,11 @@ class VentasBelkinBulkDeleteView(APIView):
                 status=status.HTTP_400_BAD_REQUEST
             )
 
-        deleted, _ = VentasBelkin.objects.filter(
+        deleted, _ = borrar_y_marcar(VentasBelkin.objects.filter(
             id_registro__in=ids,
             id_empresa_id=BELKIN_DEFAULT_EMPRESA_ID,
             id_producto_id=BELKIN_DEFAULT_PRODUCTO_ID
-        ).delete()
+        ))
 
         return Response(
             {"deleted": deleted},
@@ -7840,7 +7258,8 @@ class VentasBelkinExportView(APIView):
         qs = VentasBelkin.objects.filter(
             id_empresa_id=BELKIN_DEFAULT_EMPRESA_ID,
             id_producto_id=BELKIN_DEFAULT_PRODUCTO_ID
-        ).values(
+        )
+        columnas = columnas_de(
             "fecha_venta",
             "canal_cliente",
             "punto_venta",
@@ -7851,18 +7270,7 @@ class VentasBelkinExportView(APIView):
             "cantidad",
             "total_ventas"
         )
-
-        df = pd.DataFrame(list(qs))
-
-        response = HttpResponse(
-            content_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
-        )
-        response["Content-Disposition"] = 'attachment; filename="ventas_belkin.xlsx"'
-
-        with pd.ExcelWriter(response, engine="openpyxl") as writer:
-            df.to_excel(writer, index=False, sheet_name="Ventas")
-
-        return response
+        return exportar(request, qs, columnas, "ventas_belkin", hoja="Ventas", empresa_dataset=BELKIN_DEFAULT_EMPRESA_ID)
 
 
 
@@ -7897,6 +7305,7 @@ class InventariosBelkinListCreateView(APIView):
     POST: crear inventario individual
     """
 
+    @etag_dataset(InventariosBelkin, empresa=BELKIN_DEFAULT_EMPRESA_ID)
     def get(self, request):
         qs = InventariosBelkin.objects.filter(
             id_empresa_id=BELKIN_DEFAULT_EMPRESA_ID,
@@ -7964,34 +7373,14 @@ class InventariosBelkinDetailView(APIView):
         if not instance:
             return Response({"error": "Inventario no encontrado"}, status=status.HTTP_404_NOT_FOUND)
 
-        instance.delete()
+        borrar_y_marcar(instance)
         return Response(status=status.HTTP_204_NO_CONTENT)
 
 
-class InventariosBelkinBulkImportView(APIView):
-
-    @transaction.atomic
-    def post(self, request):
-        file = request.FILES.get("file")
-
-        if not file:
-            return Response(
-                {"error": "No se envio ningun archivo"},
-                status=status.HTTP_400_BAD_REQUEST
-            )
-
-        try:
-            if file.name.endswith(".csv"):
-                df = pd.read_csv(file)
-            else:
-                df = pd.read_excel(file)
-        except Exception as e:
-            return Response(
-                {"error": f"Archivo invalido: {str(e)}"},
-                status=status.HTTP_400_BAD_REQUEST
-            )
-
-        columnas_requeridas = {
+class InventariosBelkinBulkImportView(ImportacionEsquemaView):
+    esquema = EsquemaImportacion(
+        modelo=InventariosBelkin,
+        requeridas=(
             "fecha_inventario",
             "ano",
             "mes",
@@ -8000,103 +7389,32 @@ class InventariosBelkinBulkImportView(APIView):
             "categoria",
             "marca",
             "producto",
-            "cantidad_inventario"
-        }
-
-        if not columnas_requeridas.issubset(df.columns):
-            return Response(
-                {
-                    "error": "Columnas invalidas",
-                    "faltantes": list(columnas_requeridas - set(df.columns))
-                },
-                status=status.HTTP_400_BAD_REQUEST
-            )
-
-        inventarios = []
-
-        for _, row in df.iterrows():
-            inventarios.append(
-                InventariosBelkin(
-                    fecha_inventario=row["fecha_inventario"],
-                    ano=row["ano"],
-                    mes=row["mes"],
-                    canal_cliente=row["canal_cliente"],
-                    punto_venta=row["punto_venta"],
-                    categoria=row["categoria"],
-                    marca=row["marca"],
-                    producto=row["producto"],
-                    cantidad_inventario=row["cantidad_inventario"],
-                    id_empresa_id=BELKIN_DEFAULT_EMPRESA_ID,
-                    id_producto_id=BELKIN_DEFAULT_PRODUCTO_ID
-                )
-            )
-
-        InventariosBelkin.objects.bulk_create(inventarios)
-
-        return Response(
-            {"importados": len(inventarios)},
-            status=status.HTTP_201_CREATED
-        )
-
-
-class InventariosBelkinBulkUpdateExcelView(APIView):
-
-    @transaction.atomic
-    def post(self, request):
-        file = request.FILES.get("file")
-
-        if not file:
-            return Response(
-                {"error": "No se envio ningun archivo"},
-                status=status.HTTP_400_BAD_REQUEST
-            )
-
-        try:
-            if file.name.endswith(".csv"):
-                df = pd.read_csv(file)
-            else:
-                df = pd.read_excel(file)
-        except Exception as e:
-            return Response(
-                {"error": f"Archivo invalido: {str(e)}"},
-                status=status.HTTP_400_BAD_REQUEST
-            )
-
-        if "id_registro" not in df.columns:
-            return Response(
-                {"error": "Falta columna obligatoria", "faltantes": ["id_registro"]},
-                status=status.HTTP_400_BAD_REQUEST
-            )
-
-        updated = 0
-
-        for _, row in df.iterrows():
-            instance = InventariosBelkin.objects.filter(
-                id_registro=row["id_registro"],
-                id_empresa_id=BELKIN_DEFAULT_EMPRESA_ID,
-                id_producto_id=BELKIN_DEFAULT_PRODUCTO_ID
-            ).first()
-
-            if not instance:
-                continue
-
-            data = row.dropna().to_dict()
-            data.pop("id_registro", None)
-
-            serializer = InventariosBelkinSerializer(
-                instance,
-                data=data,
-                partial=True
-            )
+            "cantidad_inventario",
+        ),
+        columnas=(
+            Columna("fecha_inventario", "fecha"),
+            Columna("ano", "entero"),
+            Columna("mes"),
+            Columna("canal_cliente"),
+            Columna("punto_venta"),
+            Columna("categoria"),
+            Columna("marca"),
+            Columna("producto"),
+            Columna("cantidad_inventario", "entero"),
+        ),
+        fijos={
+            "id_empresa_id": BELKIN_DEFAULT_EMPRESA_ID,
+            "id_producto_id": BELKIN_DEFAULT_PRODUCTO_ID,
+        },
+    )
 
-            if serializer.is_valid():
-                serializer.save()
-                updated += 1
 
-        return Response(
-            {"updated": updated},
-            status=status.HTTP_200_OK
-        )
+class InventariosBelkinBulkUpdateExcelView(ActualizacionMasivaView):
+    modelo = InventariosBelkin
+    filtro = {
+        "id_empresa_id": BELKIN_DEFAULT_EMPRESA_ID,
+        "id_producto_id": BELKIN_DEFAULT_PRODUCTO_ID,
+    }
 
 
 class InventariosBelkinBulkDeleteView(APIView):
@@ -8115,11 +7433,11 @@ class InventariosBelkinBulkDeleteView(APIView):
                 status=status.HTTP_400_BAD_REQUEST
             )
 
-        deleted, _ = InventariosBelkin.objects.filter(
+        deleted, _ = borrar_y_marcar(InventariosBelkin.objects.filter(
             id_registro__in=ids,
             id_empresa_id=BELKIN_DEFAULT_EMPRESA_ID,
             id_producto_id=BELKIN_DEFAULT_PRODUCTO_ID
-        ).delete()
+        ))
 
         return Response({"deleted": deleted}, status=status.HTTP_200_OK)
 
@@ -8131,7 +7449,8 @@ class InventariosBelkinExportView(APIView):
         qs = InventariosBelkin.objects.filter(
             id_empresa_id=BELKIN_DEFAULT_EMPRESA_ID,
             id_producto_id=BELKIN_DEFAULT_PRODUCTO_ID
-        ).values(
+        )
+        columnas = columnas_de(
             "fecha_inventario",
             "ano",
             "mes",
@@ -8142,18 +7461,7 @@ class InventariosBelkinExportView(APIView):
             "producto",
             "cantidad_inventario"
         )
-
-        df = pd.DataFrame(list(qs))
-
-        response = HttpResponse(
-            content_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
-        )
-        response["Content-Disposition"] = 'attachment; filename="inventarios_belkin.xlsx"'
-
-        with pd.ExcelWriter(response, engine="openpyxl") as writer:
-            df.to_excel(writer, index=False, sheet_name="Inventarios")
-
-        return response
+        return exportar(request, qs, columnas, "inventarios_belkin", hoja="Inventarios", empresa_dataset=BELKIN_DEFAULT_EMPRESA_ID)
 
 
 
@@ -8177,6 +7485,7 @@ from django.db import transaction
 from django.http import HttpResponse
 import pandas as pd
 
+from .exportacion import columnas_de, exportar
 from .models import (
     ProductosBluetti,
     CanalesBluetti,
@@ -8207,6 +7516,15 @@ from .serializers import (
     MetasComercialesBluettiBulkItemSerializer,
 )
 
+from .importacion import (
+    columna_fecha,
+    columna_numero,
+    columna_texto,
+    errores_por_fila,
+    resolver_lookup,
+    tabla_lookup,
+)
+
 # Defaults globales
 DEFAULT_EMPRESA_ID = 1
 DEFAULT_PRODUCTO_ID = 23
@@ -8257,19 +7575,18 @@ def _parse_date_or_none(value):
     return dt.date()
 
 
-def _read_bulk_file(file, date_columns=None):
-    if file.name.endswith(".csv"):
-        df = pd.read_csv(file)
-    else:
-        df = pd.read_excel(file)
+def _con_ano_mes(df, columna):
+    """ano / mes derivados de la columna de fecha (vacíos donde no hay fecha)."""
+    if columna in df.columns:
+        fecha = pd.to_datetime(df[columna], errors="coerce")
+        df["ano"] = fecha.dt.year
+        df["mes"] = fecha.dt.month
+    return df
 
-    df.columns = [str(c).strip() for c in df.columns]
 
-    if date_columns:
-        for col in date_columns:
-            if col in df.columns:
-                df[col] = pd.to_datetime(df[col], errors="coerce")
-    return df
+def _read_bulk_file(file, date_columns=None):
+    # openpyxl read_only por trozos: sin el pico de memoria de pd.read_excel
+    return leer_archivo(file, date_columns=date_columns)
 
 
 def _build_canal_lookup():
@@ -8377,6 +7694,7 @@ def _build_template_response(filename, sheet_name, columns, sample_rows=None, no
 # PRODUCTOS
 # ---------------------------
 class ProductosBluettiListCreateView(APIView):
+    @etag_dataset(ProductosBluetti, empresa=DEFAULT_EMPRESA_ID)
     def get(self, request):
         qs = ProductosBluetti.objects.filter(
             id_empresa_id=DEFAULT_EMPRESA_ID,
@@ -8425,14 +7743,15 @@ class ProductosBluettiDetailView(APIView):
         instance = self.get_object(pk)
         if not instance:
             return Response({'error': 'Producto no encontrado'}, status=status.HTTP_404_NOT_FOUND)
-        instance.delete()
+        borrar_y_marcar(instance)
         return Response(status=status.HTTP_204_NO_CONTENT)
 
 
-class ProductosBluettiBulkImportView(APIView):
+class ProductosBluettiBulkImportView(ImportacionEnSegundoPlanMixin, APIView):
+    modelos_importacion = (ProductosBluetti,)
 
     @transaction.atomic
-    def post(self, request):
+    def importar(self, request):
         file = request.FILES.get("file")
         if not file:
             return Response({"error": "No se envio ningun archivo"}, status=status.HTTP_400_BAD_REQUEST)
@@ -8478,45 +7797,16 @@ class ProductosBluettiBulkImportView(APIView):
             )
 
         ProductosBluetti.objects.bulk_create(productos, batch_size=1000)
+        marcar_objetos_modificados(ProductosBluetti, productos)
         return Response({"importados": len(productos)}, status=status.HTTP_201_CREATED)
 
 
-class ProductosBluettiBulkUpdateExcelView(APIView):
-
-    @transaction.atomic
-    def post(self, request):
-        file = request.FILES.get("file")
-        if not file:
-            return Response({"error": "No se envio ningun archivo"}, status=status.HTTP_400_BAD_REQUEST)
-        try:
-            if file.name.endswith(".csv"):
-                df = pd.read_csv(file)
-            else:
-                df = pd.read_excel(file)
-        except Exception as e:
-            return Response({"error": f"Archivo invalido: {str(e)}"}, status=status.HTTP_400_BAD_REQUEST)
-
-        required = {"id_registro"}
-        if not required.issubset(df.columns):
-            return Response({"error": "Falta columna obligatoria", "faltantes": list(required - set(df.columns))}, status=status.HTTP_400_BAD_REQUEST)
-
-        updated = 0
-        for _, row in df.iterrows():
-            instance = ProductosBluetti.objects.filter(
-                id_registro=row["id_registro"],
-                id_empresa_id=DEFAULT_EMPRESA_ID,
-                id_producto_id=DEFAULT_PRODUCTO_ID
-            ).first()
-            if not instance:
-                continue
-            data = row.dropna().to_dict()
-            data.pop("id_registro", None)
-            serializer = ProductosBluettiSerializer(instance, data=data, partial=True)
-            if serializer.is_valid():
-                serializer.save()
-                updated += 1
-
-        return Response({"updated": updated}, status=status.HTTP_200_OK)
+class ProductosBluettiBulkUpdateExcelView(ActualizacionMasivaView):
+    modelo = ProductosBluetti
+    filtro = {
+        "id_empresa_id": DEFAULT_EMPRESA_ID,
+        "id_producto_id": DEFAULT_PRODUCTO_ID,
+    }
 
 
 class ProductosBluettiBulkDeleteView(APIView):
@@ -8526,11 +7816,11 @@ class ProductosBluettiBulkDeleteView(APIView):
         if not isinstance(ids, list):
             return Response({'error': 'ids debe ser una lista'}, status=status.HTTP_400_BAD_REQUEST)
 
-        deleted, _ = ProductosBluetti.objects.filter(
+        deleted, _ = borrar_y_marcar(ProductosBluetti.objects.filter(
             id_registro__in=ids,
             id_empresa_id=DEFAULT_EMPRESA_ID,
             id_producto_id=DEFAULT_PRODUCTO_ID
-        ).delete()
+        ))
         return Response({'deleted': deleted}, status=status.HTTP_200_OK)
 
 
@@ -8539,20 +7829,16 @@ class ProductosBluettiExportView(APIView):
         qs = ProductosBluetti.objects.filter(
             id_empresa_id=DEFAULT_EMPRESA_ID,
             id_producto_id=DEFAULT_PRODUCTO_ID
-        ).values("sku", "ean", "nombre_producto", "marca", "categoria")
-
-        df = pd.DataFrame(list(qs))
-        response = HttpResponse(content_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet")
-        response["Content-Disposition"] = 'attachment; filename="productos_bluetti.xlsx"'
-        with pd.ExcelWriter(response, engine="openpyxl") as writer:
-            df.to_excel(writer, index=False, sheet_name="Productos")
-        return response
+        )
+        columnas = columnas_de("sku", "ean", "nombre_producto", "marca", "categoria")
+        return exportar(request, qs, columnas, "productos_bluetti", hoja="Productos", empresa_dataset=DEFAULT_EMPRESA_ID)
 
 
 # ---------------------------
 # CANALES
 # ---------------------------
 class CanalesBluettiListCreateView(APIView):
+    @etag_dataset(CanalesBluetti, empresa=DEFAULT_EMPRESA_ID)
     def get(self, request):
         qs = CanalesBluetti.objects.filter(id_empresa_id=DEFAULT_EMPRESA_ID, id_producto_id=DEFAULT_PRODUCTO_ID)
         serializer = CanalesBluettiSerializer(qs, many=True)
@@ -8598,13 +7884,15 @@ class CanalesBluettiDetailView(APIView):
         instance = self.get_object(pk)
         if not instance:
             return Response({'error': 'Canal no encontrado'}, status=status.HTTP_404_NOT_FOUND)
-        instance.delete()
+        borrar_y_marcar(instance)
         return Response(status=status.HTTP_204_NO_CONTENT)
 
 
-class CanalesBluettiBulkImportView(APIView):
+class CanalesBluettiBulkImportView(ImportacionEnSegundoPlanMixin, APIView):
+    modelos_importacion = (CanalesBluetti,)
+
     @transaction.atomic
-    def post(self, request):
+    def importar(self, request):
         file = request.FILES.get("file")
         if not file:
             return Response({"error": "No se envio ningun archivo"}, status=status.HTTP_400_BAD_REQUEST)
@@ -8640,39 +7928,16 @@ class CanalesBluettiBulkImportView(APIView):
             )
 
         CanalesBluetti.objects.bulk_create(objs, batch_size=1000)
+        marcar_objetos_modificados(CanalesBluetti, objs)
         return Response({"importados": len(objs)}, status=status.HTTP_201_CREATED)
 
 
-class CanalesBluettiBulkUpdateExcelView(APIView):
-    @transaction.atomic
-    def post(self, request):
-        file = request.FILES.get("file")
-        if not file:
-            return Response({"error": "No se envio ningun archivo"}, status=status.HTTP_400_BAD_REQUEST)
-        try:
-            if file.name.endswith(".csv"):
-                df = pd.read_csv(file)
-            else:
-                df = pd.read_excel(file)
-        except Exception as e:
-            return Response({"error": f"Archivo invalido: {str(e)}"}, status=status.HTTP_400_BAD_REQUEST)
-
-        required = {"id_registro"}
-        if not required.issubset(df.columns):
-            return Response({"error": "Falta columna obligatoria", "faltantes": list(required - set(df.columns))}, status=status.HTTP_400_BAD_REQUEST)
-
-        updated = 0
-        for _, row in df.iterrows():
-            instance = CanalesBluetti.objects.filter(id_registro=row["id_registro"], id_empresa_id=DEFAULT_EMPRESA_ID, id_producto_id=DEFAULT_PRODUCTO_ID).first()
-            if not instance:
-                continue
-            data = row.dropna().to_dict()
-            data.pop("id_registro", None)
-            serializer = CanalesBluettiSerializer(instance, data=data, partial=True)
-            if serializer.is_valid():
-                serializer.save()
-                updated += 1
-        return Response({"updated": updated}, status=status.HTTP_200_OK)
+class CanalesBluettiBulkUpdateExcelView(ActualizacionMasivaView):
+    modelo = CanalesBluetti
+    filtro = {
+        "id_empresa_id": DEFAULT_EMPRESA_ID,
+        "id_producto_id": DEFAULT_PRODUCTO_ID,
+    }
 
 
 class CanalesBluettiBulkDeleteView(APIView):
@@ -8681,25 +7946,22 @@ class CanalesBluettiBulkDeleteView(APIView):
         ids = request.data.get('ids')
         if not isinstance(ids, list):
             return Response({'error': 'ids debe ser una lista'}, status=status.HTTP_400_BAD_REQUEST)
-        deleted, _ = CanalesBluetti.objects.filter(id_registro__in=ids, id_empresa_id=DEFAULT_EMPRESA_ID, id_producto_id=DEFAULT_PRODUCTO_ID).delete()
+        deleted, _ = borrar_y_marcar(CanalesBluetti.objects.filter(id_registro__in=ids, id_empresa_id=DEFAULT_EMPRESA_ID, id_producto_id=DEFAULT_PRODUCTO_ID))
         return Response({'deleted': deleted}, status=status.HTTP_200_OK)
 
 
 class CanalesBluettiExportView(APIView):
     def get(self, request):
-        qs = CanalesBluetti.objects.filter(id_empresa_id=DEFAULT_EMPRESA_ID, id_producto_id=DEFAULT_PRODUCTO_ID).values("codigo_canal", "nombre_canal")
-        df = pd.DataFrame(list(qs))
-        response = HttpResponse(content_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet")
-        response["Content-Disposition"] = 'attachment; filename="canales_bluetti.xlsx"'
-        with pd.ExcelWriter(response, engine="openpyxl") as writer:
-            df.to_excel(writer, index=False, sheet_name="Canales")
-        return response
+        qs = CanalesBluetti.objects.filter(id_empresa_id=DEFAULT_EMPRESA_ID, id_producto_id=DEFAULT_PRODUCTO_ID)
+        columnas = columnas_de("codigo_canal", "nombre_canal")
+        return exportar(request, qs, columnas, "canales_bluetti", hoja="Canales", empresa_dataset=DEFAULT_EMPRESA_ID)
 
 
 # ---------------------------
 # CUENTAS / CLIENTES
 # ---------------------------
 class CuentasClientesBluettiListCreateView(APIView):
+    @etag_dataset(CuentasClientesBluetti, CanalesBluetti, empresa=DEFAULT_EMPRESA_ID)
     def get(self, request):
         qs = CuentasClientesBluetti.objects.filter(id_empresa_id=DEFAULT_EMPRESA_ID, id_producto_id=DEFAULT_PRODUCTO_ID)
         serializer = CuentasClientesBluettiSerializer(qs, many=True)
@@ -8741,13 +8003,15 @@ class CuentasClientesBluettiDetailView(APIView):
         instance = self.get_object(pk)
         if not instance:
             return Response({'error': 'Cuenta no encontrada'}, status=status.HTTP_404_NOT_FOUND)
-        instance.delete()
+        borrar_y_marcar(instance)
         return Response(status=status.HTTP_204_NO_CONTENT)
 
 
-class CuentasClientesBluettiBulkImportView(APIView):
+class CuentasClientesBluettiBulkImportView(ImportacionEnSegundoPlanMixin, APIView):
+    modelos_importacion = (CuentasClientesBluetti, CanalesBluetti)
+
     @transaction.atomic
-    def post(self, request):
+    def importar(self, request):
         file = request.FILES.get("file")
         if not file:
             return Response({"error": "No se envio ningun archivo"}, status=status.HTTP_400_BAD_REQUEST)
@@ -8824,39 +8088,16 @@ class CuentasClientesBluettiBulkImportView(APIView):
             )
 
         CuentasClientesBluetti.objects.bulk_create(objs, batch_size=1000)
+        marcar_objetos_modificados(CuentasClientesBluetti, objs)
         return Response({"importados": len(objs)}, status=status.HTTP_201_CREATED)
 
 
-class CuentasClientesBluettiBulkUpdateExcelView(APIView):
-    @transaction.atomic
-    def post(self, request):
-        file = request.FILES.get("file")
-        if not file:
-            return Response({"error": "No se envio ningun archivo"}, status=status.HTTP_400_BAD_REQUEST)
-        try:
-            if file.name.endswith(".csv"):
-                df = pd.read_csv(file)
-            else:
-                df = pd.read_excel(file)
-        except Exception as e:
-            return Response({"error": f"Archivo invalido: {str(e)}"}, status=status.HTTP_400_BAD_REQUEST)
-
-        required = {"id_registro"}
-        if not required.issubset(df.columns):
-            return Response({"error": "Falta columna obligatoria", "faltantes": list(required - set(df.columns))}, status=status.HTTP_400_BAD_REQUEST)
-
-        updated = 0
-        for _, row in df.iterrows():
-            instance = CuentasClientesBluetti.objects.filter(id_registro=row["id_registro"], id_empresa_id=DEFAULT_EMPRESA_ID, id_producto_id=DEFAULT_PRODUCTO_ID).first()
-            if not instance:
-                continue
-            data = row.dropna().to_dict()
-            data.pop("id_registro", None)
-            serializer = CuentasClientesBluettiSerializer(instance, data=data, partial=True)
-            if serializer.is_valid():
-                serializer.save()
-                updated += 1
-        return Response({"updated": updated}, status=status.HTTP_200_OK)
+class CuentasClientesBluettiBulkUpdateExcelView(ActualizacionMasivaView):
+    modelo = CuentasClientesBluetti
+    filtro = {
+        "id_empresa_id": DEFAULT_EMPRESA_ID,
+        "id_producto_id": DEFAULT_PRODUCTO_ID,
+    }
 
 
 class CuentasClientesBluettiBulkDeleteView(APIView):
@@ -8865,25 +8106,22 @@ class CuentasClientesBluettiBulkDeleteView(APIView):
         ids = request.data.get('ids')
         if not isinstance(ids, list):
             return Response({'error': 'ids debe ser una lista'}, status=status.HTTP_400_BAD_REQUEST)
-        deleted, _ = CuentasClientesBluetti.objects.filter(id_registro__in=ids, id_empresa_id=DEFAULT_EMPRESA_ID, id_producto_id=DEFAULT_PRODUCTO_ID).delete()
+        deleted, _ = borrar_y_marcar(CuentasClientesBluetti.objects.filter(id_registro__in=ids, id_empresa_id=DEFAULT_EMPRESA_ID, id_producto_id=DEFAULT_PRODUCTO_ID))
         return Response({'deleted': deleted}, status=status.HTTP_200_OK)
 
 
 class CuentasClientesBluettiExportView(APIView):
     def get(self, request):
-        qs = CuentasClientesBluetti.objects.filter(id_empresa_id=DEFAULT_EMPRESA_ID, id_producto_id=DEFAULT_PRODUCTO_ID).values("nombre_cliente", "canal_id", "pais", "region", "ciudad", "latitud", "longitud")
-        df = pd.DataFrame(list(qs))
-        response = HttpResponse(content_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet")
-        response["Content-Disposition"] = 'attachment; filename="cuentas_clientes_bluetti.xlsx"'
-        with pd.ExcelWriter(response, engine="openpyxl") as writer:
-            df.to_excel(writer, index=False, sheet_name="Cuentas")
-        return response
+        qs = CuentasClientesBluetti.objects.filter(id_empresa_id=DEFAULT_EMPRESA_ID, id_producto_id=DEFAULT_PRODUCTO_ID)
+        columnas = columnas_de("nombre_cliente", "canal_id", "pais", "region", "ciudad", "latitud", "longitud")
+        return exportar(request, qs, columnas, "cuentas_clientes_bluetti", hoja="Cuentas", empresa_dataset=DEFAULT_EMPRESA_ID)
 
 
 # ---------------------------
 # VENTAS
 # ---------------------------
 class VentasBluettiListCreateView(APIView):
+    @etag_dataset(VentasBluetti, CanalesBluetti, CuentasClientesBluetti, empresa=DEFAULT_EMPRESA_ID)
     def get(self, request):
         qs = VentasBluetti.objects.filter(id_empresa_id=DEFAULT_EMPRESA_ID, id_producto_id=DEFAULT_PRODUCTO_ID)
         serializer = VentasBluettiSerializer(qs, many=True)
@@ -8952,13 +8190,15 @@ class VentasBluettiDetailView(APIView):
         instance = self.get_object(pk)
         if not instance:
             return Response({'error': 'Venta no encontrada'}, status=status.HTTP_404_NOT_FOUND)
-        instance.delete()
+        borrar_y_marcar(instance)
         return Response(status=status.HTTP_204_NO_CONTENT)
 
 
-class VentasBluettiBulkImportView(APIView):
+class VentasBluettiBulkImportView(ImportacionEnSegundoPlanMixin, APIView):
+    modelos_importacion = (VentasBluetti, CanalesBluetti, CuentasClientesBluetti)
+
     @transaction.atomic
-    def post(self, request):
+    def importar(self, request):
         file = request.FILES.get("file")
         if not file:
             return Response({"error": "No se envio ningun archivo"}, status=status.HTTP_400_BAD_REQUEST)
@@ -8989,91 +8229,51 @@ class VentasBluettiBulkImportView(APIView):
                 status=status.HTTP_400_BAD_REQUEST
             )
 
-        cliente_lookup = _build_cliente_lookup()
-        canal_lookup = _build_canal_lookup()
-        producto_lookup = _build_producto_bluetti_lookup()
-
-        objs = []
-        errores = []
-        for idx, row in df.iterrows():
-            fecha = _parse_date_or_none(row.get("fecha_venta"))
-            cantidad = _to_int_or_none(row.get("cantidad"))
-            precio_unitario = _to_float_or_none(row.get("precio_unitario"))
-            costo_unitario = _to_float_or_none(row.get("costo_unitario"), default=0)
-            total_venta = _to_float_or_none(row.get("total_venta"))
-            costo_total = _to_float_or_none(row.get("costo_total"))
-
-            raw_cliente = row.get("cliente") if "cliente" in df.columns else None
-            if _clean_cell(raw_cliente) == "":
-                raw_cliente = row.get("cliente_nombre") if "cliente_nombre" in df.columns else None
-            if _clean_cell(raw_cliente) == "":
-                raw_cliente = row.get("cliente_id") if "cliente_id" in df.columns else None
-
-            cliente_info = cliente_lookup.get(_cell_key(raw_cliente))
-            producto, sku, error_producto = _resolve_venta_bluetti_producto(row, producto_lookup)
-
-            if not fecha:
-                errores.append(f"Fila {idx + 2}: fecha_venta invalida")
-                continue
-            if not cliente_info:
-                errores.append(f"Fila {idx + 2}: cliente no existe")
-                continue
-            if error_producto:
-                errores.append(f"Fila {idx + 2}: {error_producto}")
-                continue
-            if cantidad is None:
-                errores.append(f"Fila {idx + 2}: cantidad invalida")
-                continue
-            if precio_unitario is None:
-                errores.append(f"Fila {idx + 2}: precio_unitario invalido")
-                continue
-
-            cliente_id = cliente_info["cliente_id"]
-            canal_id_cliente = cliente_info["canal_id"]
-            if not canal_id_cliente:
-                errores.append(f"Fila {idx + 2}: el cliente no tiene canal asociado")
-                continue
-
-            raw_canal = row.get("canal") if "canal" in df.columns else None
-            if _clean_cell(raw_canal) == "":
-                raw_canal = row.get("canal_nombre") if "canal_nombre" in df.columns else None
-            if _clean_cell(raw_canal) == "":
-                raw_canal = row.get("codigo_canal") if "codigo_canal" in df.columns else None
-            if _clean_cell(raw_canal) == "":
-                raw_canal = row.get("canal_id") if "canal_id" in df.columns else None
-
-            canal_id_archivo = canal_lookup.get(_cell_key(raw_canal)) if _clean_cell(raw_canal) else None
-            if canal_id_archivo and canal_id_archivo != canal_id_cliente:
-                errores.append(
-                    f"Fila {idx + 2}: el canal del archivo no coincide con el canal asociado al cliente"
-                )
-                continue
-
-            tipo_venta = _clean_cell(row.get("tipo_venta")) or "sell_in"
-            if tipo_venta not in ("sell_in", "sell_out"):
-                errores.append(f"Fila {idx + 2}: tipo_venta debe ser sell_in o sell_out")
-                continue
-
-            total_venta_final = total_venta if total_venta is not None else round(cantidad * precio_unitario, 2)
-            costo_total_final = costo_total if costo_total is not None else round(cantidad * costo_unitario, 2)
-
-            objs.append(VentasBluetti(
-                fecha_venta=fecha,
-                ano=fecha.year,
-                mes=fecha.month,
-                canal_id=canal_id_cliente,
-                cliente_id=cliente_id,
-                sku=sku,
-                producto=producto,
-                cantidad=cantidad,
-                precio_unitario=precio_unitario,
-                total_venta=total_venta_final,
-                tipo_venta=tipo_venta,
-                costo_unitario=costo_unitario,
-                costo_total=costo_total_final,
-                id_empresa_id=DEFAULT_EMPRESA_ID,
-                id_producto_id=DEFAULT_PRODUCTO_ID,
-            ))
+        clientes = resolver_lookup(
+            columna_texto(df, "cliente", "cliente_nombre", "cliente_id"),
+            tabla_lookup(_build_cliente_lookup(), ["cliente_id", "canal_id"]),
+        )
+        canal_archivo = resolver_lookup(
+            columna_texto(df, "canal", "canal_nombre", "codigo_canal", "canal_id"),
+            tabla_lookup(_build_canal_lookup(), ["canal_id"]),
+        )["canal_id"]
+
+        # producto / sku contra el catalogo (mismas reglas que _resolve_venta_bluetti_producto)
+        catalogo = tabla_lookup(_build_producto_bluetti_lookup(), ["sku", "producto"])
+        raw_producto = columna_texto(df, "producto", "nombre_producto")
+        raw_sku = columna_texto(df, "sku")
+        por_producto = resolver_lookup(raw_producto, catalogo)
+        por_sku = resolver_lookup(raw_sku, catalogo)
+        existe_producto = por_producto["producto"].notna()
+        existe_sku = por_sku["producto"].notna()
+        producto = por_producto["producto"].where(existe_producto, por_sku["producto"]).fillna("")
+        sku = por_producto["sku"].where(existe_producto, por_sku["sku"]).fillna("")
+
+        fecha = columna_fecha(df, "fecha_venta")
+        cantidad = columna_numero(df, "cantidad", entero=True)
+        precio_unitario = columna_numero(df, "precio_unitario")
+        costo_unitario = columna_numero(df, "costo_unitario").fillna(0)
+        total_venta = columna_numero(df, "total_venta")
+        costo_total = columna_numero(df, "costo_total")
+        tipo_venta = columna_texto(df, "tipo_venta").replace("", "sell_in")
+        canal_cliente = clientes["canal_id"]
+
+        errores, validas = errores_por_fila([
+            (fecha.isna(), "fecha_venta invalida"),
+            (clientes["cliente_id"].isna(), "cliente no existe"),
+            ((raw_producto == "") & (raw_sku == ""), "Debes enviar producto o sku"),
+            ((raw_producto != "") & ~existe_producto, "Producto no existe en catalogo Bluetti: " + raw_producto),
+            ((raw_sku != "") & ~existe_sku, "SKU no existe en catalogo Bluetti: " + raw_sku),
+            (existe_producto & existe_sku & (por_producto["sku"] != por_sku["sku"]),
+             "Producto y SKU no pertenecen al mismo item del catalogo Bluetti"),
+            ((producto == "") | (sku == ""), "El producto Bluetti seleccionado debe tener nombre y SKU"),
+            (cantidad.isna(), "cantidad invalida"),
+            (precio_unitario.isna(), "precio_unitario invalido"),
+            (canal_cliente.fillna(0) == 0, "el cliente no tiene canal asociado"),
+            (canal_archivo.notna() & (canal_archivo != canal_cliente),
+             "el canal del archivo no coincide con el canal asociado al cliente"),
+            (~tipo_venta.isin(["sell_in", "sell_out"]), "tipo_venta debe ser sell_in o sell_out"),
+        ], df.index)
 
         if errores:
             return Response(
@@ -9081,54 +8281,56 @@ class VentasBluettiBulkImportView(APIView):
                 status=status.HTTP_400_BAD_REQUEST
             )
 
-        VentasBluetti.objects.bulk_create(objs, batch_size=1000)
-        return Response({"importados": len(objs)}, status=status.HTTP_201_CREATED)
-
-
-class VentasBluettiBulkUpdateExcelView(APIView):
-    @transaction.atomic
-    def post(self, request):
-        file = request.FILES.get("file")
-        if not file:
-            return Response({"error": "No se envio ningun archivo"}, status=status.HTTP_400_BAD_REQUEST)
-        try:
-            if file.name.endswith(".csv"):
-                df = pd.read_csv(file, parse_dates=["fecha_venta"])
-            else:
-                df = pd.read_excel(file, parse_dates=["fecha_venta"])
-        except Exception as e:
-            return Response({"error": f"Archivo invalido: {str(e)}"}, status=status.HTTP_400_BAD_REQUEST)
+        carga = CargaMasiva(VentasBluetti)
+        carga.copiar(carga.filas_de_columnas({
+            "fecha_venta": fecha.dt.date,
+            "ano": fecha.dt.year,
+            "mes": fecha.dt.month,
+            "canal_id": canal_cliente,
+            "cliente_id": clientes["cliente_id"],
+            "sku": sku,
+            "producto": producto,
+            "cantidad": cantidad,
+            "precio_unitario": precio_unitario,
+            "total_venta": total_venta.fillna((cantidad * precio_unitario).round(2)),
+            "tipo_venta": tipo_venta,
+            "costo_unitario": costo_unitario,
+            "costo_total": costo_total.fillna((cantidad * costo_unitario).round(2)),
+            "id_empresa_id": DEFAULT_EMPRESA_ID,
+            "id_producto_id": DEFAULT_PRODUCTO_ID,
+        }, mascara=validas))
+        importados, _ = carga.insertar(empresa_id=DEFAULT_EMPRESA_ID)
+        return Response({"importados": importados}, status=status.HTTP_201_CREATED)
+
+
+
+class VentasBluettiBulkUpdateExcelView(ActualizacionMasivaView):
+    modelo = VentasBluetti
+    filtro = {
+        "id_empresa_id": DEFAULT_EMPRESA_ID,
+        "id_producto_id": DEFAULT_PRODUCTO_ID,
+    }
+    producto_lookup = None
 
-        required = {"id_registro"}
-        if not required.issubset(df.columns):
-            return Response({"error": "Falta columna obligatoria", "faltantes": list(required - set(df.columns))}, status=status.HTTP_400_BAD_REQUEST)
+    def preparar(self, df):
+        if "nombre_producto" in df.columns:
+            producto = columna_texto(df, "producto", "nombre_producto")
+            df["producto"] = producto.where(producto != "", None)
+        return _con_ano_mes(df, "fecha_venta")
 
-        producto_lookup = _build_producto_bluetti_lookup()
-        updated = 0
-        for _, row in df.iterrows():
-            instance = VentasBluetti.objects.filter(id_registro=row["id_registro"], id_empresa_id=DEFAULT_EMPRESA_ID, id_producto_id=DEFAULT_PRODUCTO_ID).first()
-            if not instance:
-                continue
-            data = row.dropna().to_dict()
-            data.pop("id_registro", None)
-            # convertir fechas si vienen como Timestamp
-            if "fecha_venta" in data and not pd.isnull(data["fecha_venta"]):
-                data["fecha_venta"] = pd.to_datetime(data["fecha_venta"]).date()
-                data["ano"] = pd.to_datetime(data["fecha_venta"]).year
-                data["mes"] = pd.to_datetime(data["fecha_venta"]).month
-
-            if "producto" in data or "nombre_producto" in data or "sku" in data:
-                producto, sku, error_producto = _resolve_venta_bluetti_producto(data, producto_lookup, existing=instance)
-                if error_producto:
-                    continue
-                data["producto"] = producto
-                data["sku"] = sku
-
-            serializer = VentasBluettiSerializer(instance, data=data, partial=True)
-            if serializer.is_valid():
-                serializer.save()
-                updated += 1
-        return Response({"updated": updated}, status=status.HTTP_200_OK)
+    def ajustar(self, instancia, valores):
+        if "producto" not in valores and "sku" not in valores:
+            return None
+        if self.producto_lookup is None:
+            self.producto_lookup = _build_producto_bluetti_lookup()
+        producto, sku, error_producto = _resolve_venta_bluetti_producto(
+            valores, self.producto_lookup, existing=instancia
+        )
+        if error_producto:
+            return error_producto
+        valores["producto"] = producto
+        valores["sku"] = sku
+        return None
 
 
 class VentasBluettiBulkDeleteView(APIView):
@@ -9137,62 +8339,41 @@ class VentasBluettiBulkDeleteView(APIView):
         ids = request.data.get('ids')
         if not isinstance(ids, list):
             return Response({'error': 'ids debe ser una lista'}, status=status.HTTP_400_BAD_REQUEST)
-        deleted, _ = VentasBluetti.objects.filter(id_registro__in=ids, id_empresa_id=DEFAULT_EMPRESA_ID, id_producto_id=DEFAULT_PRODUCTO_ID).delete()
+        deleted, _ = borrar_y_marcar(VentasBluetti.objects.filter(id_registro__in=ids, id_empresa_id=DEFAULT_EMPRESA_ID, id_producto_id=DEFAULT_PRODUCTO_ID))
         return Response({'deleted': deleted}, status=status.HTTP_200_OK)
 
 
+def _dos_decimales(valor):
+    return "{:.2f}".format(valor) if valor is not None else ""
+
+
 class VentasBluettiExportView(APIView):
     def get(self, request):
         # filtrar por empresa/producto si aplica como en otras vistas
         qs = VentasBluetti.objects.filter(
             id_empresa_id=DEFAULT_EMPRESA_ID,
             id_producto_id=DEFAULT_PRODUCTO_ID
-        ).select_related("cliente", "canal")  # evita N+1 (si las FK se llaman 'cliente' y 'canal')
-
-        # pedimos campos including related fields: cliente__nombre_cliente y canal__nombre_canal
-        qs_values = qs.values(
-            "id_registro",
-            "fecha_venta",
-            "ano",
-            "mes",
-            "tipo_venta",
-            "cliente",                 # id numÃ©rico (opcional)
-            "cliente__nombre_cliente", # <-- nombre del cliente (lo que queremos)
-            "canal",                   # id canal (opcional)
-            "canal__nombre_canal",  
-            "sku",
-            "producto",
-            "cantidad",
-            "precio_unitario",
-            "total_venta",
-            "costo_unitario",
-            "costo_total",
-               # <-- nombre del canal (opcional)
         )
 
-        # convertir a DataFrame y renombrar columnas para que queden amigables en el Excel
-        df = pd.DataFrame(list(qs_values)).rename(columns={
-            "cliente__nombre_cliente": "cliente_nombre",
-            "canal__nombre_canal": "canal_nombre"
-        })
-
-        # Opcional: formatear nÃºmeros/decimales como texto con 2 decimales (si quieres)
-        for col in ("precio_unitario", "total_venta", "costo_unitario", "costo_total"):
-            if col in df.columns:
-                # si vienen como Decimal/float -> formatear; si vienen como string, este paso es seguro
-                df[col] = df[col].apply(lambda v: ("{:.2f}".format(v)) if pd.notna(v) else "")
-
-        # preparar respuesta Excel
-        response = HttpResponse(content_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet")
-        response["Content-Disposition"] = 'attachment; filename="ventas_bluetti.xlsx"'
-        with pd.ExcelWriter(response, engine="openpyxl") as writer:
-            df.to_excel(writer, index=False, sheet_name="Ventas")
-        return response
+        # nombres de cliente / canal por JOIN en el mismo values_list; montos como texto con 2 decimales
+        columnas = columnas_de("id_registro", "fecha_venta", "ano", "mes", "tipo_venta", "cliente") + [
+            ("cliente_nombre", "cliente__nombre_cliente"),
+            ("canal", "canal"),
+            ("canal_nombre", "canal__nombre_canal"),
+            ("sku", "sku"),
+            ("producto", "producto"),
+            ("cantidad", "cantidad"),
+        ] + [(col, col, _dos_decimales) for col in ("precio_unitario", "total_venta", "costo_unitario", "costo_total")]
+        return exportar(
+            request, qs, columnas, "ventas_bluetti", hoja="Ventas",
+            modelos=(VentasBluetti, CuentasClientesBluetti, CanalesBluetti), empresa_dataset=DEFAULT_EMPRESA_ID,
+        )
 
 # ---------------------------
 # INVENTARIOS
 # ---------------------------
 class InventariosBluettiListCreateView(APIView):
+    @etag_dataset(InventariosBluetti, CanalesBluetti, CuentasClientesBluetti, empresa=DEFAULT_EMPRESA_ID)
     def get(self, request):
         qs = InventariosBluetti.objects.filter(id_empresa_id=DEFAULT_EMPRESA_ID, id_producto_id=DEFAULT_PRODUCTO_ID)
         serializer = InventariosBluettiSerializer(qs, many=True)
@@ -9234,13 +8415,15 @@ class InventariosBluettiDetailView(APIView):
         instance = self.get_object(pk)
         if not instance:
             return Response({'error': 'Inventario no encontrado'}, status=status.HTTP_404_NOT_FOUND)
-        instance.delete()
+        borrar_y_marcar(instance)
         return Response(status=status.HTTP_204_NO_CONTENT)
 
 
-class InventariosBluettiBulkImportView(APIView):
+class InventariosBluettiBulkImportView(ImportacionEnSegundoPlanMixin, APIView):
+    modelos_importacion = (InventariosBluetti, CanalesBluetti, CuentasClientesBluetti)
+
     @transaction.atomic
-    def post(self, request):
+    def importar(self, request):
         file = request.FILES.get("file")
         if not file:
             return Response({"error": "No se envio ningun archivo"}, status=status.HTTP_400_BAD_REQUEST)
@@ -9260,78 +8443,33 @@ class InventariosBluettiBulkImportView(APIView):
                 status=status.HTTP_400_BAD_REQUEST
             )
 
-        cliente_lookup = _build_cliente_lookup()
-        canal_lookup = _build_canal_lookup()
-
-        objs = []
-        errores = []
-        for idx, row in df.iterrows():
-            fecha = _parse_date_or_none(row.get("fecha_inventario"))
-            cantidad_disponible = _to_int_or_none(row.get("cantidad_disponible"))
-            cantidad_reservada = _to_int_or_none(row.get("cantidad_reservada"), default=0)
-
-            raw_cliente = row.get("cliente") if "cliente" in df.columns else None
-            if _clean_cell(raw_cliente) == "":
-                raw_cliente = row.get("cliente_nombre") if "cliente_nombre" in df.columns else None
-            if _clean_cell(raw_cliente) == "":
-                raw_cliente = row.get("cliente_id") if "cliente_id" in df.columns else None
-
-            cliente_info = cliente_lookup.get(_cell_key(raw_cliente))
-
-            if not fecha:
-                errores.append(f"Fila {idx + 2}: fecha_inventario invalida")
-                continue
-            if cantidad_disponible is None:
-                errores.append(f"Fila {idx + 2}: cantidad_disponible invalida")
-                continue
-            if not cliente_info:
-                errores.append(f"Fila {idx + 2}: cliente no existe")
-                continue
-
-            cliente_id = cliente_info["cliente_id"]
-            canal_id_cliente = cliente_info["canal_id"]
-            pais_cliente = _clean_cell(cliente_info.get("pais"))
-
-            if not canal_id_cliente:
-                errores.append(f"Fila {idx + 2}: el cliente no tiene canal asociado")
-                continue
-            if not pais_cliente:
-                errores.append(f"Fila {idx + 2}: el cliente no tiene pais asociado")
-                continue
-
-            raw_canal = row.get("canal") if "canal" in df.columns else None
-            if _clean_cell(raw_canal) == "":
-                raw_canal = row.get("canal_nombre") if "canal_nombre" in df.columns else None
-            if _clean_cell(raw_canal) == "":
-                raw_canal = row.get("codigo_canal") if "codigo_canal" in df.columns else None
-            if _clean_cell(raw_canal) == "":
-                raw_canal = row.get("canal_id") if "canal_id" in df.columns else None
-            canal_id_archivo = canal_lookup.get(_cell_key(raw_canal)) if _clean_cell(raw_canal) else None
-            if canal_id_archivo and canal_id_archivo != canal_id_cliente:
-                errores.append(
-                    f"Fila {idx + 2}: el canal del archivo no coincide con el canal asociado al cliente"
-                )
-                continue
-
-            pais_archivo = _clean_cell(row.get("pais")) if "pais" in df.columns else ""
-            if pais_archivo and pais_archivo.lower() != pais_cliente.lower():
-                errores.append(
-                    f"Fila {idx + 2}: el pais del archivo no coincide con el pais asociado al cliente"
-                )
-                continue
-
-            objs.append(InventariosBluetti(
-                fecha_inventario=fecha,
-                ano=fecha.year,
-                mes=fecha.month,
-                canal_id=canal_id_cliente,
-                cliente_id=cliente_id,
-                pais=pais_cliente,
-                cantidad_disponible=cantidad_disponible,
-                cantidad_reservada=cantidad_reservada or 0,
-                id_empresa_id=DEFAULT_EMPRESA_ID,
-                id_producto_id=DEFAULT_PRODUCTO_ID,
-            ))
+        clientes = resolver_lookup(
+            columna_texto(df, "cliente", "cliente_nombre", "cliente_id"),
+            tabla_lookup(_build_cliente_lookup(), ["cliente_id", "canal_id", "pais"]),
+        )
+        canal_archivo = resolver_lookup(
+            columna_texto(df, "canal", "canal_nombre", "codigo_canal", "canal_id"),
+            tabla_lookup(_build_canal_lookup(), ["canal_id"]),
+        )["canal_id"]
+
+        fecha = columna_fecha(df, "fecha_inventario")
+        cantidad_disponible = columna_numero(df, "cantidad_disponible", entero=True)
+        cantidad_reservada = columna_numero(df, "cantidad_reservada", entero=True).fillna(0)
+        canal_cliente = clientes["canal_id"]
+        pais_cliente = clientes["pais"].where(clientes["pais"].notna(), "").astype(str).str.strip()
+        pais_archivo = columna_texto(df, "pais")
+
+        errores, validas = errores_por_fila([
+            (fecha.isna(), "fecha_inventario invalida"),
+            (cantidad_disponible.isna(), "cantidad_disponible invalida"),
+            (clientes["cliente_id"].isna(), "cliente no existe"),
+            (canal_cliente.fillna(0) == 0, "el cliente no tiene canal asociado"),
+            (pais_cliente == "", "el cliente no tiene pais asociado"),
+            (canal_archivo.notna() & (canal_archivo != canal_cliente),
+             "el canal del archivo no coincide con el canal asociado al cliente"),
+            ((pais_archivo != "") & (pais_archivo.str.lower() != pais_cliente.str.lower()),
+             "el pais del archivo no coincide con el pais asociado al cliente"),
+        ], df.index)
 
         if errores:
             return Response(
@@ -9339,44 +8477,33 @@ class InventariosBluettiBulkImportView(APIView):
                 status=status.HTTP_400_BAD_REQUEST
             )
 
-        InventariosBluetti.objects.bulk_create(objs, batch_size=1000)
-        return Response({"importados": len(objs)}, status=status.HTTP_201_CREATED)
-
-
-class InventariosBluettiBulkUpdateExcelView(APIView):
-    @transaction.atomic
-    def post(self, request):
-        file = request.FILES.get("file")
-        if not file:
-            return Response({"error": "No se envio ningun archivo"}, status=status.HTTP_400_BAD_REQUEST)
-        try:
-            if file.name.endswith(".csv"):
-                df = pd.read_csv(file, parse_dates=["fecha_inventario"])
-            else:
-                df = pd.read_excel(file, parse_dates=["fecha_inventario"])
-        except Exception as e:
-            return Response({"error": f"Archivo invalido: {str(e)}"}, status=status.HTTP_400_BAD_REQUEST)
-
-        required = {"id_registro"}
-        if not required.issubset(df.columns):
-            return Response({"error": "Falta columna obligatoria", "faltantes": list(required - set(df.columns))}, status=status.HTTP_400_BAD_REQUEST)
+        carga = CargaMasiva(InventariosBluetti)
+        carga.copiar(carga.filas_de_columnas({
+            "fecha_inventario": fecha.dt.date,
+            "ano": fecha.dt.year,
+            "mes": fecha.dt.month,
+            "canal_id": canal_cliente,
+            "cliente_id": clientes["cliente_id"],
+            "pais": pais_cliente,
+            "cantidad_disponible": cantidad_disponible,
+            "cantidad_reservada": cantidad_reservada,
+            "id_empresa_id": DEFAULT_EMPRESA_ID,
+            "id_producto_id": DEFAULT_PRODUCTO_ID,
+        }, mascara=validas))
+        importados, _ = carga.insertar(empresa_id=DEFAULT_EMPRESA_ID)
+        return Response({"importados": importados}, status=status.HTTP_201_CREATED)
+
+
+
+class InventariosBluettiBulkUpdateExcelView(ActualizacionMasivaView):
+    modelo = InventariosBluetti
+    filtro = {
+        "id_empresa_id": DEFAULT_EMPRESA_ID,
+        "id_producto_id": DEFAULT_PRODUCTO_ID,
+    }
 
-        updated = 0
-        for _, row in df.iterrows():
-            instance = InventariosBluetti.objects.filter(id_registro=row["id_registro"], id_empresa_id=DEFAULT_EMPRESA_ID, id_producto_id=DEFAULT_PRODUCTO_ID).first()
-            if not instance:
-                continue
-            data = row.dropna().to_dict()
-            data.pop("id_registro", None)
-            if "fecha_inventario" in data and not pd.isnull(data["fecha_inventario"]):
-                data["fecha_inventario"] = pd.to_datetime(data["fecha_inventario"]).date()
-                data["ano"] = pd.to_datetime(data["fecha_inventario"]).year
-                data["mes"] = pd.to_datetime(data["fecha_inventario"]).month
-            serializer = InventariosBluettiSerializer(instance, data=data, partial=True)
-            if serializer.is_valid():
-                serializer.save()
-                updated += 1
-        return Response({"updated": updated}, status=status.HTTP_200_OK)
+    def preparar(self, df):
+        return _con_ano_mes(df, "fecha_inventario")
 
 
 class InventariosBluettiBulkDeleteView(APIView):
@@ -9385,25 +8512,22 @@ class InventariosBluettiBulkDeleteView(APIView):
         ids = request.data.get('ids')
         if not isinstance(ids, list):
             return Response({'error': 'ids debe ser una lista'}, status=status.HTTP_400_BAD_REQUEST)
-        deleted, _ = InventariosBluetti.objects.filter(id_registro__in=ids, id_empresa_id=DEFAULT_EMPRESA_ID, id_producto_id=DEFAULT_PRODUCTO_ID).delete()
+        deleted, _ = borrar_y_marcar(InventariosBluetti.objects.filter(id_registro__in=ids, id_empresa_id=DEFAULT_EMPRESA_ID, id_producto_id=DEFAULT_PRODUCTO_ID))
         return Response({'deleted': deleted}, status=status.HTTP_200_OK)
 
 
 class InventariosBluettiExportView(APIView):
     def get(self, request):
-        qs = InventariosBluetti.objects.filter(id_empresa_id=DEFAULT_EMPRESA_ID, id_producto_id=DEFAULT_PRODUCTO_ID).values("fecha_inventario", "ano", "mes", "canal_id", "cliente_id", "pais", "cantidad_disponible", "cantidad_reservada")
-        df = pd.DataFrame(list(qs))
-        response = HttpResponse(content_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet")
-        response["Content-Disposition"] = 'attachment; filename="inventarios_bluetti.xlsx"'
-        with pd.ExcelWriter(response, engine="openpyxl") as writer:
-            df.to_excel(writer, index=False, sheet_name="Inventarios")
-        return response
+        qs = InventariosBluetti.objects.filter(id_empresa_id=DEFAULT_EMPRESA_ID, id_producto_id=DEFAULT_PRODUCTO_ID)
+        columnas = columnas_de("fecha_inventario", "ano", "mes", "canal_id", "cliente_id", "pais", "cantidad_disponible", "cantidad_reservada")
+        return exportar(request, qs, columnas, "inventarios_bluetti", hoja="Inventarios", empresa_dataset=DEFAULT_EMPRESA_ID)
 
 
 # ---------------------------
 # VENTAS SELLOUT
 # ---------------------------
 class VentasSelloutBluettiListCreateView(APIView):
+    @etag_dataset(VentasSelloutBluetti, CanalesBluetti, CuentasClientesBluetti, empresa=DEFAULT_EMPRESA_ID)
     def get(self, request):
         qs = VentasSelloutBluetti.objects.filter(id_empresa_id=DEFAULT_EMPRESA_ID, id_producto_id=DEFAULT_PRODUCTO_ID)
         serializer = VentasSelloutBluettiSerializer(qs, many=True)
@@ -9445,13 +8569,15 @@ class VentasSelloutBluettiDetailView(APIView):
         instance = self.get_object(pk)
         if not instance:
             return Response({'error': 'Venta sellout no encontrada'}, status=status.HTTP_404_NOT_FOUND)
-        instance.delete()
+        borrar_y_marcar(instance)
         return Response(status=status.HTTP_204_NO_CONTENT)
 
 
-class VentasSelloutBluettiBulkImportView(APIView):
+class VentasSelloutBluettiBulkImportView(ImportacionEnSegundoPlanMixin, APIView):
+    modelos_importacion = (VentasSelloutBluetti, CanalesBluetti, CuentasClientesBluetti)
+
     @transaction.atomic
-    def post(self, request):
+    def importar(self, request):
         file = request.FILES.get("file")
         if not file:
             return Response({"error": "No se envio ningun archivo"}, status=status.HTTP_400_BAD_REQUEST)
@@ -9465,129 +8591,69 @@ class VentasSelloutBluettiBulkImportView(APIView):
         if faltantes:
             return Response({"error": "Columnas invalidas", "faltantes": faltantes}, status=status.HTTP_400_BAD_REQUEST)
 
-        canal_lookup = _build_canal_lookup()
-        cliente_lookup = _build_cliente_lookup()
-
-        objs = []
-        errores = []
-        for idx, row in df.iterrows():
-            fecha = _parse_date_or_none(row.get("fecha_venta"))
-            punto_venta = _clean_cell(row.get("punto_venta"))
-            sku = _clean_cell(row.get("sku"))
-            ean = _clean_cell(row.get("ean"))
-            producto = _clean_cell(row.get("producto"))
-            cantidad = _to_int_or_none(row.get("cantidad"))
-            precio_ventas = _to_float_or_none(row.get("precio_ventas"))
-            total_ventas = _to_float_or_none(row.get("total_ventas"))
-
-            raw_canal = row.get("canal") if "canal" in df.columns else None
-            if _clean_cell(raw_canal) == "":
-                raw_canal = row.get("canal_nombre") if "canal_nombre" in df.columns else None
-            if _clean_cell(raw_canal) == "":
-                raw_canal = row.get("codigo_canal") if "codigo_canal" in df.columns else None
-            if _clean_cell(raw_canal) == "":
-                raw_canal = row.get("canal_id") if "canal_id" in df.columns else None
-            canal_id = canal_lookup.get(_cell_key(raw_canal)) if _clean_cell(raw_canal) else None
-
-            raw_cliente = row.get("cliente") if "cliente" in df.columns else None
-            if _clean_cell(raw_cliente) == "":
-                raw_cliente = row.get("cliente_nombre") if "cliente_nombre" in df.columns else None
-            if _clean_cell(raw_cliente) == "":
-                raw_cliente = row.get("cliente_id") if "cliente_id" in df.columns else None
-            cliente_info = cliente_lookup.get(_cell_key(raw_cliente))
-
-            if not fecha:
-                errores.append(f"Fila {idx + 2}: fecha_venta invalida")
-                continue
-            if not punto_venta:
-                errores.append(f"Fila {idx + 2}: punto_venta es obligatorio")
-                continue
-            if not sku:
-                errores.append(f"Fila {idx + 2}: sku es obligatorio")
-                continue
-            if not producto:
-                errores.append(f"Fila {idx + 2}: producto es obligatorio")
-                continue
-            if cantidad is None:
-                errores.append(f"Fila {idx + 2}: cantidad invalida")
-                continue
-            if precio_ventas is None:
-                errores.append(f"Fila {idx + 2}: precio_ventas invalido")
-                continue
-            if total_ventas is None:
-                errores.append(f"Fila {idx + 2}: total_ventas invalido")
-                continue
-            if not cliente_info:
-                errores.append(f"Fila {idx + 2}: cliente no existe")
-                continue
-
-            cliente_id = cliente_info.get("cliente_id")
-            canal_cliente = cliente_info.get("canal_id")
-            if canal_id and canal_cliente and canal_id != canal_cliente:
-                errores.append(f"Fila {idx + 2}: canal no coincide con el cliente")
-                continue
-            if not canal_id:
-                canal_id = canal_cliente
-            if not canal_id:
-                errores.append(f"Fila {idx + 2}: canal no existe")
-                continue
+        canal_archivo = resolver_lookup(
+            columna_texto(df, "canal", "canal_nombre", "codigo_canal", "canal_id"),
+            tabla_lookup(_build_canal_lookup(), ["canal_id"]),
+        )["canal_id"]
+        clientes = resolver_lookup(
+            columna_texto(df, "cliente", "cliente_nombre", "cliente_id"),
+            tabla_lookup(_build_cliente_lookup(), ["cliente_id", "canal_id"]),
+        )
 
-            objs.append(VentasSelloutBluetti(
-                fecha_venta=fecha,
-                canal_id=canal_id,
-                cliente_id=cliente_id,
-                punto_venta=punto_venta,
-                sku=sku,
-                ean=ean or None,
-                producto=producto,
-                cantidad=cantidad,
-                precio_ventas=precio_ventas,
-                total_ventas=total_ventas,
-                id_empresa_id=DEFAULT_EMPRESA_ID,
-                id_producto_id=DEFAULT_PRODUCTO_ID,
-            ))
+        fecha = columna_fecha(df, "fecha_venta")
+        punto_venta = columna_texto(df, "punto_venta")
+        sku = columna_texto(df, "sku")
+        ean = columna_texto(df, "ean")
+        producto = columna_texto(df, "producto")
+        cantidad = columna_numero(df, "cantidad", entero=True)
+        precio_ventas = columna_numero(df, "precio_ventas")
+        total_ventas = columna_numero(df, "total_ventas")
+        canal_cliente = clientes["canal_id"]
+        canal_id = canal_archivo.fillna(canal_cliente)
+
+        errores, validas = errores_por_fila([
+            (fecha.isna(), "fecha_venta invalida"),
+            (punto_venta == "", "punto_venta es obligatorio"),
+            (sku == "", "sku es obligatorio"),
+            (producto == "", "producto es obligatorio"),
+            (cantidad.isna(), "cantidad invalida"),
+            (precio_ventas.isna(), "precio_ventas invalido"),
+            (total_ventas.isna(), "total_ventas invalido"),
+            (clientes["cliente_id"].isna(), "cliente no existe"),
+            (canal_archivo.notna() & canal_cliente.notna() & (canal_archivo != canal_cliente),
+             "canal no coincide con el cliente"),
+            (canal_id.fillna(0) == 0, "canal no existe"),
+        ], df.index)
 
         if errores:
             return Response({"error": "Errores de validacion en plantilla", "detalles": errores[:50]}, status=status.HTTP_400_BAD_REQUEST)
 
-        VentasSelloutBluetti.objects.bulk_create(objs, batch_size=1000)
-        return Response({"importados": len(objs)}, status=status.HTTP_201_CREATED)
-
-
-class VentasSelloutBluettiBulkUpdateExcelView(APIView):
-    @transaction.atomic
-    def post(self, request):
-        file = request.FILES.get("file")
-        if not file:
-            return Response({"error": "No se envio ningun archivo"}, status=status.HTTP_400_BAD_REQUEST)
-        try:
-            if file.name.endswith(".csv"):
-                df = pd.read_csv(file)
-            else:
-                df = pd.read_excel(file)
-        except Exception as e:
-            return Response({"error": f"Archivo invalido: {str(e)}"}, status=status.HTTP_400_BAD_REQUEST)
-
-        required = {"id_registro"}
-        if not required.issubset(df.columns):
-            return Response({"error": "Falta columna obligatoria", "faltantes": list(required - set(df.columns))}, status=status.HTTP_400_BAD_REQUEST)
-
-        updated = 0
-        for _, row in df.iterrows():
-            instance = VentasSelloutBluetti.objects.filter(id_registro=row["id_registro"], id_empresa_id=DEFAULT_EMPRESA_ID, id_producto_id=DEFAULT_PRODUCTO_ID).first()
-            if not instance:
-                continue
-            data = row.dropna().to_dict()
-            data.pop("id_registro", None)
-            if "fecha_venta" in data:
-                parsed = _parse_date_or_none(data.get("fecha_venta"))
-                if parsed:
-                    data["fecha_venta"] = parsed
-            serializer = VentasSelloutBluettiSerializer(instance, data=data, partial=True)
-            if serializer.is_valid():
-                serializer.save()
-                updated += 1
-        return Response({"updated": updated}, status=status.HTTP_200_OK)
+        carga = CargaMasiva(VentasSelloutBluetti)
+        carga.copiar(carga.filas_de_columnas({
+            "fecha_venta": fecha.dt.date,
+            "canal_id": canal_id,
+            "cliente_id": clientes["cliente_id"],
+            "punto_venta": punto_venta,
+            "sku": sku,
+            "ean": ean.where(ean != "", None),
+            "producto": producto,
+            "cantidad": cantidad,
+            "precio_ventas": precio_ventas,
+            "total_ventas": total_ventas,
+            "id_empresa_id": DEFAULT_EMPRESA_ID,
+            "id_producto_id": DEFAULT_PRODUCTO_ID,
+        }, mascara=validas))
+        importados, _ = carga.insertar(empresa_id=DEFAULT_EMPRESA_ID)
+        return Response({"importados": importados}, status=status.HTTP_201_CREATED)
+
+
+
+class VentasSelloutBluettiBulkUpdateExcelView(ActualizacionMasivaView):
+    modelo = VentasSelloutBluetti
+    filtro = {
+        "id_empresa_id": DEFAULT_EMPRESA_ID,
+        "id_producto_id": DEFAULT_PRODUCTO_ID,
+    }
 
 
 class VentasSelloutBluettiBulkDeleteView(APIView):
@@ -9596,11 +8662,11 @@ class VentasSelloutBluettiBulkDeleteView(APIView):
         ids = request.data.get('ids')
         if not isinstance(ids, list):
             return Response({'error': 'ids debe ser una lista'}, status=status.HTTP_400_BAD_REQUEST)
-        deleted, _ = VentasSelloutBluetti.objects.filter(
+        deleted, _ = borrar_y_marcar(VentasSelloutBluetti.objects.filter(
             id_registro__in=ids,
             id_empresa_id=DEFAULT_EMPRESA_ID,
             id_producto_id=DEFAULT_PRODUCTO_ID
-        ).delete()
+        ))
         return Response({'deleted': deleted}, status=status.HTTP_200_OK)
 
 
@@ -9609,13 +8675,9 @@ class VentasSelloutBluettiExportView(APIView):
         qs = VentasSelloutBluetti.objects.filter(
             id_empresa_id=DEFAULT_EMPRESA_ID,
             id_producto_id=DEFAULT_PRODUCTO_ID
-        ).values("fecha_venta", "canal_id", "cliente_id", "punto_venta", "sku", "ean", "producto", "cantidad", "precio_ventas", "total_ventas")
-        df = pd.DataFrame(list(qs))
-        response = HttpResponse(content_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet")
-        response["Content-Disposition"] = 'attachment; filename="ventas_sellout_bluetti.xlsx"'
-        with pd.ExcelWriter(response, engine="openpyxl") as writer:
-            df.to_excel(writer, index=False, sheet_name="VentasSellout")
-        return response
+        )
+        columnas = columnas_de("fecha_venta", "canal_id", "cliente_id", "punto_venta", "sku", "ean", "producto", "cantidad", "precio_ventas", "total_ventas")
+        return exportar(request, qs, columnas, "ventas_sellout_bluetti", hoja="VentasSellout", empresa_dataset=DEFAULT_EMPRESA_ID)
 
 
 class VentasSelloutBluettiTemplateView(APIView):
@@ -9647,6 +8709,7 @@ class VentasSelloutBluettiTemplateView(APIView):
 # INVENTARIOS SELLOUT
 # ---------------------------
 class InventariosSelloutBluettiListCreateView(APIView):
+    @etag_dataset(InventariosSelloutBluetti, CanalesBluetti, CuentasClientesBluetti, empresa=DEFAULT_EMPRESA_ID)
     def get(self, request):
         qs = InventariosSelloutBluetti.objects.filter(id_empresa_id=DEFAULT_EMPRESA_ID, id_producto_id=DEFAULT_PRODUCTO_ID)
         serializer = InventariosSelloutBluettiSerializer(qs, many=True)
@@ -9688,13 +8751,15 @@ class InventariosSelloutBluettiDetailView(APIView):
         instance = self.get_object(pk)
         if not instance:
             return Response({'error': 'Inventario sellout no encontrado'}, status=status.HTTP_404_NOT_FOUND)
-        instance.delete()
+        borrar_y_marcar(instance)
         return Response(status=status.HTTP_204_NO_CONTENT)
 
 
-class InventariosSelloutBluettiBulkImportView(APIView):
+class InventariosSelloutBluettiBulkImportView(ImportacionEnSegundoPlanMixin, APIView):
+    modelos_importacion = (InventariosSelloutBluetti, CanalesBluetti, CuentasClientesBluetti)
+
     @transaction.atomic
-    def post(self, request):
+    def importar(self, request):
         file = request.FILES.get("file")
         if not file:
             return Response({"error": "No se envio ningun archivo"}, status=status.HTTP_400_BAD_REQUEST)
@@ -9784,43 +8849,16 @@ class InventariosSelloutBluettiBulkImportView(APIView):
             return Response({"error": "Errores de validacion en plantilla", "detalles": errores[:50]}, status=status.HTTP_400_BAD_REQUEST)
 
         InventariosSelloutBluetti.objects.bulk_create(objs, batch_size=1000)
+        marcar_objetos_modificados(InventariosSelloutBluetti, objs)
         return Response({"importados": len(objs)}, status=status.HTTP_201_CREATED)
 
 
-class InventariosSelloutBluettiBulkUpdateExcelView(APIView):
-    @transaction.atomic
-    def post(self, request):
-        file = request.FILES.get("file")
-        if not file:
-            return Response({"error": "No se envio ningun archivo"}, status=status.HTTP_400_BAD_REQUEST)
-        try:
-            if file.name.endswith(".csv"):
-                df = pd.read_csv(file)
-            else:
-                df = pd.read_excel(file)
-        except Exception as e:
-            return Response({"error": f"Archivo invalido: {str(e)}"}, status=status.HTTP_400_BAD_REQUEST)
-
-        required = {"id_registro"}
-        if not required.issubset(df.columns):
-            return Response({"error": "Falta columna obligatoria", "faltantes": list(required - set(df.columns))}, status=status.HTTP_400_BAD_REQUEST)
-
-        updated = 0
-        for _, row in df.iterrows():
-            instance = InventariosSelloutBluetti.objects.filter(id_registro=row["id_registro"], id_empresa_id=DEFAULT_EMPRESA_ID, id_producto_id=DEFAULT_PRODUCTO_ID).first()
-            if not instance:
-                continue
-            data = row.dropna().to_dict()
-            data.pop("id_registro", None)
-            if "fecha_inventario" in data:
-                parsed = _parse_date_or_none(data.get("fecha_inventario"))
-                if parsed:
-                    data["fecha_inventario"] = parsed
-            serializer = InventariosSelloutBluettiSerializer(instance, data=data, partial=True)
-            if serializer.is_valid():
-                serializer.save()
-                updated += 1
-        return Response({"updated": updated}, status=status.HTTP_200_OK)
+class InventariosSelloutBluettiBulkUpdateExcelView(ActualizacionMasivaView):
+    modelo = InventariosSelloutBluetti
+    filtro = {
+        "id_empresa_id": DEFAULT_EMPRESA_ID,
+        "id_producto_id": DEFAULT_PRODUCTO_ID,
+    }
 
 
 class InventariosSelloutBluettiBulkDeleteView(APIView):
@@ -9829,11 +8867,11 @@ class InventariosSelloutBluettiBulkDeleteView(APIView):
         ids = request.data.get('ids')
         if not isinstance(ids, list):
             return Response({'error': 'ids debe ser una lista'}, status=status.HTTP_400_BAD_REQUEST)
-        deleted, _ = InventariosSelloutBluetti.objects.filter(
+        deleted, _ = borrar_y_marcar(InventariosSelloutBluetti.objects.filter(
             id_registro__in=ids,
             id_empresa_id=DEFAULT_EMPRESA_ID,
             id_producto_id=DEFAULT_PRODUCTO_ID
-        ).delete()
+        ))
         return Response({'deleted': deleted}, status=status.HTTP_200_OK)
 
 
@@ -9842,13 +8880,9 @@ class InventariosSelloutBluettiExportView(APIView):
         qs = InventariosSelloutBluetti.objects.filter(
             id_empresa_id=DEFAULT_EMPRESA_ID,
             id_producto_id=DEFAULT_PRODUCTO_ID
-        ).values("fecha_inventario", "canal_id", "cliente_id", "punto_venta", "sku", "ean", "producto", "unidades_inventario")
-        df = pd.DataFrame(list(qs))
-        response = HttpResponse(content_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet")
-        response["Content-Disposition"] = 'attachment; filename="inventarios_sellout_bluetti.xlsx"'
-        with pd.ExcelWriter(response, engine="openpyxl") as writer:
-            df.to_excel(writer, index=False, sheet_name="InventariosSellout")
-        return response
+        )
+        columnas = columnas_de("fecha_inventario", "canal_id", "cliente_id", "punto_venta", "sku", "ean", "producto", "unidades_inventario")
+        return exportar(request, qs, columnas, "inventarios_sellout_bluetti", hoja="InventariosSellout", empresa_dataset=DEFAULT_EMPRESA_ID)
 
 
 class InventariosSelloutBluettiTemplateView(APIView):
@@ -9878,6 +8912,7 @@ class InventariosSelloutBluettiTemplateView(APIView):
 # METAS COMERCIALES
 # ---------------------------
 class MetasComercialesBluettiListCreateView(APIView):
+    @etag_dataset(MetasComercialesBluetti, CanalesBluetti, CuentasClientesBluetti, empresa=DEFAULT_EMPRESA_ID)
     def get(self, request):
         qs = MetasComercialesBluetti.objects.filter(id_empresa_id=DEFAULT_EMPRESA_ID, id_producto_id=DEFAULT_PRODUCTO_ID)
         serializer = MetasComercialesBluettiSerializer(qs, many=True)
@@ -9919,13 +8954,15 @@ class MetasComercialesBluettiDetailView(APIView):
         instance = self.get_object(pk)
         if not instance:
             return Response({'error': 'Meta no encontrada'}, status=status.HTTP_404_NOT_FOUND)
-        instance.delete()
+        borrar_y_marcar(instance)
         return Response(status=status.HTTP_204_NO_CONTENT)
 
 
-class MetasComercialesBluettiBulkImportView(APIView):
+class MetasComercialesBluettiBulkImportView(ImportacionEnSegundoPlanMixin, APIView):
+    modelos_importacion = (MetasComercialesBluetti, CanalesBluetti)
+
     @transaction.atomic
-    def post(self, request):
+    def importar(self, request):
         file = request.FILES.get("file")
         if not file:
             return Response({"error": "No se envio ningun archivo"}, status=status.HTTP_400_BAD_REQUEST)
@@ -9949,49 +8986,20 @@ class MetasComercialesBluettiBulkImportView(APIView):
                 status=status.HTTP_400_BAD_REQUEST
             )
 
-        canal_lookup = _build_canal_lookup()
-
-        objs = []
-        errores = []
-        for idx, row in df.iterrows():
-            ano = _to_int_or_none(row.get("ano"))
-            mes = _to_int_or_none(row.get("mes"))
-            pais = _clean_cell(row.get("pais"))
-            meta_monetaria = _to_float_or_none(row.get("meta_monetaria"))
-            meta_unidades = _to_int_or_none(row.get("meta_unidades"))
-
-            raw_canal = row.get("canal") if "canal" in df.columns else None
-            if _clean_cell(raw_canal) == "":
-                raw_canal = row.get("nombre_canal") if "nombre_canal" in df.columns else None
-            if _clean_cell(raw_canal) == "":
-                raw_canal = row.get("codigo_canal") if "codigo_canal" in df.columns else None
-            if _clean_cell(raw_canal) == "":
-                raw_canal = row.get("canal_id") if "canal_id" in df.columns else None
-            canal_id = canal_lookup.get(_cell_key(raw_canal))
-
-            if ano is None:
-                errores.append(f"Fila {idx + 2}: ano invalido")
-                continue
-            if meta_monetaria is None:
-                errores.append(f"Fila {idx + 2}: meta_monetaria invalida")
-                continue
-            if not pais:
-                errores.append(f"Fila {idx + 2}: pais es obligatorio")
-                continue
-            if not canal_id:
-                errores.append(f"Fila {idx + 2}: canal no existe o viene vacio")
-                continue
-
-            objs.append(MetasComercialesBluetti(
-                ano=ano,
-                mes=mes,
-                canal_id=canal_id,
-                pais=pais,
-                meta_monetaria=meta_monetaria,
-                meta_unidades=meta_unidades,
-                id_empresa_id=DEFAULT_EMPRESA_ID,
-                id_producto_id=DEFAULT_PRODUCTO_ID
-            ))
+        canal_id = resolver_lookup(
+            columna_texto(df, "canal", "nombre_canal", "codigo_canal", "canal_id"),
+            tabla_lookup(_build_canal_lookup(), ["canal_id"]),
+        )["canal_id"]
+        ano = columna_numero(df, "ano", entero=True)
+        pais = columna_texto(df, "pais")
+        meta_monetaria = columna_numero(df, "meta_monetaria")
+
+        errores, validas = errores_por_fila([
+            (ano.isna(), "ano invalido"),
+            (meta_monetaria.isna(), "meta_monetaria invalida"),
+            (pais == "", "pais es obligatorio"),
+            (canal_id.fillna(0) == 0, "canal no existe o viene vacio"),
+        ], df.index)
 
         if errores:
             return Response(
@@ -9999,40 +9007,28 @@ class MetasComercialesBluettiBulkImportView(APIView):
                 status=status.HTTP_400_BAD_REQUEST
             )
 
-        MetasComercialesBluetti.objects.bulk_create(objs, batch_size=1000)
-        return Response({"importados": len(objs)}, status=status.HTTP_201_CREATED)
-
-
-class MetasComercialesBluettiBulkUpdateExcelView(APIView):
-    @transaction.atomic
-    def post(self, request):
-        file = request.FILES.get("file")
-        if not file:
-            return Response({"error": "No se envio ningun archivo"}, status=status.HTTP_400_BAD_REQUEST)
-        try:
-            if file.name.endswith(".csv"):
-                df = pd.read_csv(file)
-            else:
-                df = pd.read_excel(file)
-        except Exception as e:
-            return Response({"error": f"Archivo invalido: {str(e)}"}, status=status.HTTP_400_BAD_REQUEST)
-
-        required = {"id_registro"}
-        if not required.issubset(df.columns):
-            return Response({"error": "Falta columna obligatoria", "faltantes": list(required - set(df.columns))}, status=status.HTTP_400_BAD_REQUEST)
-
-        updated = 0
-        for _, row in df.iterrows():
-            instance = MetasComercialesBluetti.objects.filter(id_registro=row["id_registro"], id_empresa_id=DEFAULT_EMPRESA_ID, id_producto_id=DEFAULT_PRODUCTO_ID).first()
-            if not instance:
-                continue
-            data = row.dropna().to_dict()
-            data.pop("id_registro", None)
-            serializer = MetasComercialesBluettiSerializer(instance, data=data, partial=True)
-            if serializer.is_valid():
-                serializer.save()
-                updated += 1
-        return Response({"updated": updated}, status=status.HTTP_200_OK)
+        carga = CargaMasiva(MetasComercialesBluetti)
+        carga.copiar(carga.filas_de_columnas({
+            "ano": ano,
+            "mes": columna_numero(df, "mes", entero=True),
+            "canal_id": canal_id,
+            "pais": pais,
+            "meta_monetaria": meta_monetaria,
+            "meta_unidades": columna_numero(df, "meta_unidades", entero=True),
+            "id_empresa_id": DEFAULT_EMPRESA_ID,
+            "id_producto_id": DEFAULT_PRODUCTO_ID,
+        }, mascara=validas))
+        importados, _ = carga.insertar(empresa_id=DEFAULT_EMPRESA_ID)
+        return Response({"importados": importados}, status=status.HTTP_201_CREATED)
+
+
+
+class MetasComercialesBluettiBulkUpdateExcelView(ActualizacionMasivaView):
+    modelo = MetasComercialesBluetti
+    filtro = {
+        "id_empresa_id": DEFAULT_EMPRESA_ID,
+        "id_producto_id": DEFAULT_PRODUCTO_ID,
+    }
 
 
 class MetasComercialesBluettiBulkDeleteView(APIView):
@@ -10041,19 +9037,15 @@ class MetasComercialesBluettiBulkDeleteView(APIView):
         ids = request.data.get('ids')
         if not isinstance(ids, list):
             return Response({'error': 'ids debe ser una lista'}, status=status.HTTP_400_BAD_REQUEST)
-        deleted, _ = MetasComercialesBluetti.objects.filter(id_registro__in=ids, id_empresa_id=DEFAULT_EMPRESA_ID, id_producto_id=DEFAULT_PRODUCTO_ID).delete()
+        deleted, _ = borrar_y_marcar(MetasComercialesBluetti.objects.filter(id_registro__in=ids, id_empresa_id=DEFAULT_EMPRESA_ID, id_producto_id=DEFAULT_PRODUCTO_ID))
         return Response({'deleted': deleted}, status=status.HTTP_200_OK)
 
 
 class MetasComercialesBluettiExportView(APIView):
     def get(self, request):
-        qs = MetasComercialesBluetti.objects.filter(id_empresa_id=DEFAULT_EMPRESA_ID, id_producto_id=DEFAULT_PRODUCTO_ID).values("ano", "mes", "canal_id", "pais", "meta_monetaria", "meta_unidades")
-        df = pd.DataFrame(list(qs))
-        response = HttpResponse(content_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet")
-        response["Content-Disposition"] = 'attachment; filename="metas_comerciales_bluetti.xlsx"'
-        with pd.ExcelWriter(response, engine="openpyxl") as writer:
-            df.to_excel(writer, index=False, sheet_name="Metas")
-        return response
+        qs = MetasComercialesBluetti.objects.filter(id_empresa_id=DEFAULT_EMPRESA_ID, id_producto_id=DEFAULT_PRODUCTO_ID)
+        columnas = columnas_de("ano", "mes", "canal_id", "pais", "meta_monetaria", "meta_unidades")
+        return exportar(request, qs, columnas, "metas_comerciales_bluetti", hoja="Metas", empresa_dataset=DEFAULT_EMPRESA_ID)
 
 
 # ---------------------------
@@ -10271,18 +9263,8 @@ def _to_int_or_none(value, default=None):
 
 
 def _read_bulk_file(file, date_columns=None):
-    if file.name.endswith(".csv"):
-        df = pd.read_csv(file)
-    else:
-        df = pd.read_excel(file)
-
-    df.columns = [str(c).strip() for c in df.columns]
-
-    if date_columns:
-        for col in date_columns:
-            if col in df.columns:
-                df[col] = pd.to_datetime(df[col], errors="coerce")
-    return df
+    # openpyxl read_only por trozos: sin el pico de memoria de pd.read_excel
+    return leer_archivo(file, date_columns=date_columns)
 
 
 def _build_template_response(filename, sheet_name, columns, sample_rows=None, notes=None):
@@ -10301,6 +9283,7 @@ def _build_template_response(filename, sheet_name, columns, sample_rows=None, no
 # ==============================================================
 
 
+from .exportacion import columnas_de, exportar
 from .serializers import (
     ServiciosLoopTotekSerializer,
     ServiciosLoopTotekBulkItemSerializer,
@@ -10316,6 +9299,8 @@ LOOPSERVICIOSTOTEK_DEFAULT_PRODUCTO_ID = 24
 class LoopserviciosTotekKpisView(APIView):
     permission_classes = (IsAuthenticated,)
 
+    @etag_dataset(ServiciosLoopTotek, empresa=LOOPSERVICIOSTOTEK_DEFAULT_EMPRESA_ID)
+    @cache_respuesta(ServiciosLoopTotek, empresa=LOOPSERVICIOSTOTEK_DEFAULT_EMPRESA_ID)
     def get(self, request):
         from django.db.models import Sum, Count, Q
         qs = ServiciosLoopTotek.objects.filter(
@@ -10448,6 +9433,7 @@ class LoopserviciosTotekKpisView(APIView):
 class LoopserviciosTotekListCreateView(APIView):
     permission_classes = (IsAuthenticated,)
 
+    @etag_dataset(ServiciosLoopTotek, empresa=LOOPSERVICIOSTOTEK_DEFAULT_EMPRESA_ID)
     def get(self, request):
         qs = ServiciosLoopTotek.objects.filter(
             id_empresa_id=LOOPSERVICIOSTOTEK_DEFAULT_EMPRESA_ID,
@@ -10498,144 +9484,61 @@ class LoopserviciosTotekDetailView(APIView):
         instance = self.get_object(pk)
         if not instance:
             return Response({'error': 'Servicio no encontrado'}, status=status.HTTP_404_NOT_FOUND)
-        instance.delete()
+        borrar_y_marcar(instance)
         return Response(status=status.HTTP_204_NO_CONTENT)
 
 
 # ---------------------------
 # BULK IMPORT
 # ---------------------------
-class LoopserviciosTotekBulkImportView(APIView):
+class LoopserviciosTotekBulkImportView(ImportacionEsquemaView):
     permission_classes = (IsAuthenticated,)
-
-    @transaction.atomic
-    def post(self, request):
-        file = request.FILES.get('file')
-        if not file:
-            return Response({'error': 'No se envio ningun archivo'}, status=status.HTTP_400_BAD_REQUEST)
-        try:
-            df = _read_bulk_file(file)
-        except Exception as e:
-            return Response({'error': f'Archivo invalido: {str(e)}'}, status=status.HTTP_400_BAD_REQUEST)
-
-        columnas_requeridas = {'estado_servicio'}
-        if not columnas_requeridas.issubset(df.columns):
-            return Response(
-                {'error': 'Columnas invalidas', 'faltantes': list(columnas_requeridas - set(df.columns))},
-                status=status.HTTP_400_BAD_REQUEST,
-            )
-
-        registros = []
-        errores = []
-        for idx, row in df.iterrows():
-            estado = _clean_cell(row.get('estado_servicio', 'FINALIZADO'))
-            if not estado:
-                estado = 'FINALIZADO'
-
-            fecha_raw = _clean_cell(row.get('fecha_servicio'))
-            fecha = None
-            if fecha_raw:
-                try:
-                    import datetime
-                    fecha = datetime.datetime.strptime(str(fecha_raw)[:10], '%Y-%m-%d').date()
-                except Exception:
-                    errores.append(f'Fila {idx + 2}: fecha_servicio invalida ({fecha_raw})')
-                    continue
-
-            cantidad_raw = row.get('cantidad_instalada', 0)
-            try:
-                cantidad = int(cantidad_raw) if cantidad_raw not in [None, ''] else 0
-            except (ValueError, TypeError):
-                cantidad = 0
-
-            ano_raw = row.get('ano')
-            try:
-                ano = int(ano_raw) if ano_raw not in [None, ''] else None
-            except (ValueError, TypeError):
-                ano = None
-
-            sat_raw = _to_int_or_none(row.get('satisfaccion_cliente'))
-            if sat_raw is not None and sat_raw not in (1, 2, 3, 4, 5):
-                errores.append(
-                    f'Fila {idx + 2}: satisfaccion_cliente invalida ({sat_raw}). '
-                    f'Valores validos: 1=Muy insatisfecho, 2=Insatisfecho, 3=Neutral, 4=Satisfecho, 5=Muy satisfecho'
-                )
-                continue
-            satisfaccion = sat_raw
-
-            registros.append(
-                ServiciosLoopTotek(
-                    id_empresa_id=LOOPSERVICIOSTOTEK_DEFAULT_EMPRESA_ID,
-                    id_producto_id=LOOPSERVICIOSTOTEK_DEFAULT_PRODUCTO_ID,
-                    fecha_servicio=fecha,
-                    mes=_clean_cell(row.get('mes', '')),
-                    ano=ano,
-                    tipo_empresa=_clean_cell(row.get('tipo_empresa', '')),
-                    categoria_servicio=_clean_cell(row.get('categoria_servicio', '')),
-                    descripcion_servicio=_clean_cell(row.get('descripcion_servicio', '')),
-                    cantidad_instalada=cantidad,
-                    estado_servicio=estado,
-                    motivo_cancelacion=_clean_cell(row.get('motivo_cancelacion', '')),
-                    motivo_reprogramacion=_clean_cell(row.get('motivo_reprogramacion', '')),
-                    satisfaccion_cliente=satisfaccion,
-                    ciudad_principal=_clean_cell(row.get('ciudad_principal', '')),
-                    ciudad=_clean_cell(row.get('ciudad', '')),
-                    municipio_sector=_clean_cell(row.get('municipio_sector', '')),
-                    codigo_ot=_clean_cell(row.get('codigo_ot', '')),
-                    nombre_instalador=_clean_cell(row.get('nombre_instalador', '')),
-                    notas=_clean_cell(row.get('notas', '')),
-                )
-            )
-
-        if errores:
-            return Response(
-                {'error': 'Errores de validacion en plantilla', 'detalles': errores[:50]},
-                status=status.HTTP_400_BAD_REQUEST,
-            )
-
-        ServiciosLoopTotek.objects.bulk_create(registros, batch_size=1000)
-        return Response({'importados': len(registros)}, status=status.HTTP_201_CREATED)
+    esquema = EsquemaImportacion(
+        modelo=ServiciosLoopTotek,
+        requeridas=('estado_servicio',),
+        columnas=(
+            Columna('fecha_servicio', 'fecha', mensaje='fecha_servicio invalida ({valor})'),
+            Columna(
+                'satisfaccion_cliente', 'entero', estricta=False, opciones=(1, 2, 3, 4, 5),
+                mensaje=(
+                    'satisfaccion_cliente invalida ({valor}). Valores validos: 1=Muy insatisfecho, '
+                    '2=Insatisfecho, 3=Neutral, 4=Satisfecho, 5=Muy satisfecho'
+                ),
+            ),
+            Columna('estado_servicio', default='FINALIZADO'),
+            Columna('cantidad_instalada', 'entero', estricta=False, default=0),
+            Columna('ano', 'entero', estricta=False),
+            Columna('mes'),
+            Columna('tipo_empresa'),
+            Columna('categoria_servicio'),
+            Columna('descripcion_servicio'),
+            Columna('motivo_cancelacion'),
+            Columna('motivo_reprogramacion'),
+            Columna('ciudad_principal'),
+            Columna('ciudad'),
+            Columna('municipio_sector'),
+            Columna('codigo_ot'),
+            Columna('nombre_instalador'),
+            Columna('notas'),
+        ),
+        fijos={
+            'id_empresa_id': LOOPSERVICIOSTOTEK_DEFAULT_EMPRESA_ID,
+            'id_producto_id': LOOPSERVICIOSTOTEK_DEFAULT_PRODUCTO_ID,
+        },
+    )
 
 
 # ---------------------------
 # BULK UPDATE EXCEL
 # ---------------------------
-class LoopserviciosTotekBulkUpdateExcelView(APIView):
+class LoopserviciosTotekBulkUpdateExcelView(ActualizacionMasivaView):
     permission_classes = (IsAuthenticated,)
-
-    @transaction.atomic
-    def post(self, request):
-        file = request.FILES.get('file')
-        if not file:
-            return Response({'error': 'No se envio ningun archivo'}, status=status.HTTP_400_BAD_REQUEST)
-        try:
-            if file.name.endswith('.csv'):
-                df = pd.read_csv(file)
-            else:
-                df = pd.read_excel(file)
-        except Exception as e:
-            return Response({'error': f'Archivo invalido: {str(e)}'}, status=status.HTTP_400_BAD_REQUEST)
-
-        if 'id_registro' not in df.columns:
-            return Response({'error': 'Falta columna id_registro'}, status=status.HTTP_400_BAD_REQUEST)
-
-        updated = 0
-        for _, row in df.iterrows():
-            instance = ServiciosLoopTotek.objects.filter(
-                id_registro=row['id_registro'],
-                id_empresa_id=LOOPSERVICIOSTOTEK_DEFAULT_EMPRESA_ID,
-                id_producto_id=LOOPSERVICIOSTOTEK_DEFAULT_PRODUCTO_ID,
-            ).first()
-            if not instance:
-                continue
-            data = row.dropna().to_dict()
-            data.pop('id_registro', None)
-            serializer = ServiciosLoopTotekSerializer(instance, data=data, partial=True)
-            if serializer.is_valid():
-                serializer.save()
-                updated += 1
-
-        return Response({'updated': updated}, status=status.HTTP_200_OK)
+    modelo = ServiciosLoopTotek
+    filtro = {
+        "id_empresa_id": LOOPSERVICIOSTOTEK_DEFAULT_EMPRESA_ID,
+        "id_producto_id": LOOPSERVICIOSTOTEK_DEFAULT_PRODUCTO_ID,
+    }
+    error_sin_clave = {'error': 'Falta columna id_registro'}
 
 
 # ---------------------------
@@ -10649,11 +9552,11 @@ class LoopserviciosTotekBulkDeleteView(APIView):
         ids = request.data.get('ids')
         if not isinstance(ids, list):
             return Response({'error': 'ids debe ser una lista'}, status=status.HTTP_400_BAD_REQUEST)
-        deleted, _ = ServiciosLoopTotek.objects.filter(
+        deleted, _ = borrar_y_marcar(ServiciosLoopTotek.objects.filter(
             id_registro__in=ids,
             id_empresa_id=LOOPSERVICIOSTOTEK_DEFAULT_EMPRESA_ID,
             id_producto_id=LOOPSERVICIOSTOTEK_DEFAULT_PRODUCTO_ID,
-        ).delete()
+        ))
         return Response({'deleted': deleted}, status=status.HTTP_200_OK)
 
 
@@ -10667,21 +9570,16 @@ class LoopserviciosTotekExportView(APIView):
         qs = ServiciosLoopTotek.objects.filter(
             id_empresa_id=LOOPSERVICIOSTOTEK_DEFAULT_EMPRESA_ID,
             id_producto_id=LOOPSERVICIOSTOTEK_DEFAULT_PRODUCTO_ID,
-        ).values(
+        )
+        columnas = columnas_de(
             'id_registro', 'fecha_servicio', 'mes', 'ano',
             'tipo_empresa', 'categoria_servicio', 'descripcion_servicio', 'cantidad_instalada',
             'estado_servicio', 'motivo_cancelacion', 'motivo_reprogramacion',
             'satisfaccion_cliente', 'ciudad_principal', 'ciudad', 'municipio_sector',
             'codigo_ot', 'nombre_instalador', 'notas',
         )
-        df = pd.DataFrame(list(qs))
-        response = HttpResponse(
-            content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
-        )
-        response['Content-Disposition'] = 'attachment; filename="servicios_loop_totek.xlsx"'
-        with pd.ExcelWriter(response, engine='openpyxl') as writer:
-            df.to_excel(writer, index=False, sheet_name='Servicios')
-        return response
+        return exportar(request, qs, columnas, 'servicios_loop_totek', hoja='Servicios',
+                        empresa_dataset=LOOPSERVICIOSTOTEK_DEFAULT_EMPRESA_ID)
 
 
 # ---------------------------
@@ -2,6 +2,7 @@ from pathlib import Path
 from decouple import config, Csv
 import dj_database_url
 import os
+import tempfile
 
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -112,6 +113,74 @@ REST_FRAMEWORK = {
     ),
 }
 
+# Cache en proceso de tokens JWT ya verificados (appdataflowai/authentication.py)
+JWT_AUTH_CACHE_MAX_ENTRIES = config("JWT_AUTH_CACHE_MAX_ENTRIES", cast=int, default=2048)
+JWT_AUTH_CACHE_TTL_SECONDS = config("JWT_AUTH_CACHE_TTL_SECONDS", cast=int, default=60)
+# hits / misses de esa cache en el log de cada worker cada N búsquedas (0 = desactivado)
+JWT_AUTH_CACHE_LOG_EVERY = config("JWT_AUTH_CACHE_LOG_EVERY", cast=int, default=10000)
+# la versión de token (revocación) vive en usuarios.version_token; esto es lo que se cachea
+TOKEN_VERSION_CACHE_SECONDS = config("TOKEN_VERSION_CACHE_SECONDS", cast=int, default=300)
+
+# Cache de Django (versiones de dataset para ETag / exportaciones, versión de token, recuperación
+# de contraseña). Con varios workers o con los comandos procesar_* tiene que ser compartido:
+# por defecto DatabaseCache (la tabla la crea la migración 0079 / `manage.py createcachetable`);
+# Redis o Memcached con CACHE_BACKEND/CACHE_LOCATION. Con LocMem `check` da el aviso W001.
+CACHES = {
+    'default': {
+        'BACKEND': config("CACHE_BACKEND", default="django.core.cache.backends.db.DatabaseCache"),
+        'LOCATION': config("CACHE_LOCATION", default="dataflow_cache"),
+    },
+    # Cuerpos de respuesta de dashboards (appdataflowai/cache_respuestas.py): LRU con tope en bytes
+    # en proceso; en producción apuntar RESPONSE_CACHE_BACKEND/LOCATION a Redis o Memcached.
+    'respuestas': {
+        'BACKEND': config("RESPONSE_CACHE_BACKEND", default="appdataflowai.cache_backends.LRUBytesCache"),
+        'LOCATION': config("RESPONSE_CACHE_LOCATION", default="dataflow-respuestas"),
+        'TIMEOUT': config("RESPONSE_CACHE_TIMEOUT", cast=int, default=300),
+        'OPTIONS': {
+            'MAX_BYTES': config("RESPONSE_CACHE_MAX_BYTES", cast=int, default=64 * 1024 * 1024),
+        },
+    },
+}
+RESPONSE_CACHE_ALIAS = 'respuestas'
+RESPONSE_CACHE_TIMEOUT = config("RESPONSE_CACHE_TIMEOUT", cast=int, default=300)
+
+# Buffer write-behind de RegistrosSesion (appdataflowai/registro_sesiones.py); tamaño <= 1 = síncrono
+REGISTROS_SESION_BUFFER_SIZE = config("REGISTROS_SESION_BUFFER_SIZE", cast=int, default=200)
+REGISTROS_SESION_FLUSH_SECONDS = config("REGISTROS_SESION_FLUSH_SECONDS", cast=int, default=5)
+
+# Paginación keyset opt-in de listados de dashboards (appdataflowai/paginacion.py)
+KEYSET_PAGE_SIZE = config("KEYSET_PAGE_SIZE", cast=int, default=500)
+
+# Importaciones masivas (appdataflowai/importacion.py, appdataflowai/trabajos_importacion.py)
+IMPORTACION_BATCH_SIZE = config("IMPORTACION_BATCH_SIZE", cast=int, default=1000)
+# false = en segundo plano sólo con ?async=1; true = todas las importaciones (salvo ?sync=1)
+IMPORTACION_ASINCRONA = config("IMPORTACION_ASINCRONA", default="false").lower() in ("1", "true", "yes")
+# hilos por proceso web; 0 = sólo `python manage.py procesar_importaciones`
+IMPORTACION_WORKERS = config("IMPORTACION_WORKERS", cast=int, default=2)
+IMPORTACION_TRABAJO_TIMEOUT_SECONDS = config("IMPORTACION_TRABAJO_TIMEOUT_SECONDS", cast=int, default=600)
+# COPY FROM STDIN + INSERT ... SELECT para importaciones grandes en PostgreSQL (appdataflowai/carga_masiva.py)
+CARGA_COPY_HABILITADA = config("CARGA_COPY_HABILITADA", default="true").lower() in ("1", "true", "yes")
+# filas por trozo al validar con los esquemas de importación (appdataflowai/esquemas_importacion.py)
+IMPORTACION_CHUNK_FILAS = config("IMPORTACION_CHUNK_FILAS", cast=int, default=50000)
+# subida por partes de archivos grandes (appdataflowai/cargas_archivo.py); disco local del proceso web
+CARGAS_DIR = config("CARGAS_DIR", default=os.path.join(tempfile.gettempdir(), "dataflowai_cargas"))
+CARGA_MAX_BYTES = config("CARGA_MAX_BYTES", cast=int, default=1024 * 1024 * 1024)
+CARGA_TAMANO_PARTE = config("CARGA_TAMANO_PARTE", cast=int, default=8 * 1024 * 1024)
+CARGA_EXPIRACION_HORAS = config("CARGA_EXPIRACION_HORAS", cast=int, default=24)
+KEYSET_MAX_PAGE_SIZE = config("KEYSET_MAX_PAGE_SIZE", cast=int, default=5000)
+
+# Exportaciones en segundo plano con archivo en caché (appdataflowai/trabajos_exportacion.py)
+# false = sólo con ?async=1; true = todas las exportaciones (salvo ?sync=1)
+EXPORTACION_ASINCRONA = config("EXPORTACION_ASINCRONA", default="false").lower() in ("1", "true", "yes")
+# hilos por proceso web; 0 = sólo `python manage.py procesar_exportaciones`
+EXPORTACION_WORKERS = config("EXPORTACION_WORKERS", cast=int, default=1)
+EXPORTACION_TRABAJO_TIMEOUT_SECONDS = config("EXPORTACION_TRABAJO_TIMEOUT_SECONDS", cast=int, default=600)
+EXPORTACION_ARTEFACTOS_DIR = config(
+    "EXPORTACION_ARTEFACTOS_DIR", default=os.path.join(tempfile.gettempdir(), "dataflowai_exportaciones")
+)
+# tope del directorio; al superarlo se borran los archivos menos usados
+EXPORTACION_ARTEFACTOS_MAX_BYTES = config("EXPORTACION_ARTEFACTOS_MAX_BYTES", cast=int, default=5 * 1024 * 1024 * 1024)
+
 
 SHOPIFY_SHOP_DOMAIN = config("SHOPIFY_SHOP_DOMAIN", default="e7i1zh-xs.myshopify.com")
 SHOPIFY_ACCESS_TOKEN = config("SHOPIFY_ACCESS_TOKEN", default=None)